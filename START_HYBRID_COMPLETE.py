@@ -50,6 +50,7 @@ from core.enhanced_production_system import EnhancedProductionSystem
 from src.agents.hmarl_agents_realtime import HMARLAgentsRealtime
 from src.trading.order_manager import WDOOrderManager, OrderSide, OrderStatus
 from src.trading.adaptive_risk_manager import AdaptiveRiskManager
+from src.market_data.bar_aggregator import BarAggregator
 from src.monitoring.hmarl_monitor_bridge import get_bridge
 
 class QuantumTraderHybridComplete:
@@ -94,6 +95,11 @@ class QuantumTraderHybridComplete:
         self.tick_buffer = deque(maxlen=1000)
         self.book_buffer = deque(maxlen=1000)
         
+        # Candles formados uma única vez a partir dos trades; o risk manager
+        # recebe só as barras de 1min fechadas
+        self.bar_aggregator = BarAggregator()
+        self.bar_aggregator.subscribe('1min', self.risk_manager.on_bar)
+        
         # Preço atual para gestão de ordens
         self.current_price = 0
         self.last_mid_price = 0
@@ -903,13 +909,6 @@ class QuantumTraderHybridComplete:
     def _process_book(self, book_data):
         """Processa dados do book"""
         try:
-            # Atualizar risk manager com novos dados
-            if hasattr(self, 'risk_manager') and book_data.get('mid_price'):
-                self.risk_manager.update_buffers(
-                    price=book_data['mid_price'],
-                    volume=book_data.get('total_volume', 0)
-                )
-            
             # Calcular métricas do book
             book_metrics = {}
             
@@ -980,6 +979,7 @@ class QuantumTraderHybridComplete:
             # Adicionar ao buffer
             self.tick_buffer.append(trade_data)
             self.price_history.append(trade_data.get('price', 0))
+            self.bar_aggregator.on_trade_data(trade_data)
             
             # Alimentar HMARL em tempo real (incremental)
             if trade_data.get('price') and trade_data.get('volume'):
@@ -1062,24 +1062,8 @@ class QuantumTraderHybridComplete:
             
             # Usar gestão de risco adaptativa se ativada
             if self.use_adaptive_risk:
-                # Atualizar buffers do risk manager com dados recentes
-                if hasattr(self, 'last_book') and self.last_book:
-                    # Usar spread como proxy para volatilidade instantânea
-                    if 'bids' in self.last_book and 'asks' in self.last_book:
-                        if self.last_book['bids'] and self.last_book['asks']:
-                            bid = self.last_book['bids'][0]['price']
-                            ask = self.last_book['asks'][0]['price']
-                            spread = ask - bid
-                            # Estimar high/low baseado no spread
-                            self.risk_manager.update_buffers(
-                                price=self.current_price,
-                                high=self.current_price + spread * 2,
-                                low=self.current_price - spread * 2,
-                                volume=self.last_book.get('total_volume', 1000)
-                            )
-                else:
-                    # Atualizar apenas com preço
-                    self.risk_manager.update_buffers(price=self.current_price)
+                # Buffers do risk manager são alimentados pelas barras de 1min
+                # fechadas (self.bar_aggregator)
                 
                 # Calcular níveis adaptativos
                 risk_levels = self.risk_manager.calculate_adaptive_levels(
@@ -32,6 +32,8 @@ load_dotenv('.env.production')
 # Importar novo sistema baseado em regime
 from src.trading.regime_based_strategy import RegimeBasedTradingSystem, RegimeSignal
 from src.trading.smart_targets_calculator import SmartTargetsCalculator
+from src.market_data.tick_recorder import TickDataRecorder
+from src.market_data.bar_aggregator import BarAggregator
 
 # ============= SISTEMA DE EVENTOS INTEGRADO =============
 from src.events import (
@@ -70,7 +72,13 @@ sys.path.insert(0, str(Path(__file__).parent / 'src'))
 sys.path.insert(0, str(Path(__file__).parent / 'core'))
 
 # Importar componentes
-from src.connection_manager_working import ConnectionManagerWorking
+try:
+    from src.connection_manager_working import ConnectionManagerWorking
+except Exception as e:
+    # Sem ProfitDLL (ex: Linux) - apenas replay com conexão simulada
+    ConnectionManagerWorking = None
+    logger.warning(f"ConnectionManagerWorking não disponível: {e}")
+
 try:
     from src.agents.hmarl_agents_realtime import HMARLAgentsRealtime
 except:
@@ -101,6 +109,27 @@ except:
     get_bridge = None
     logger.warning("Monitor bridge não disponível")
 
+from src.monitoring.status_channel import publish_status, get_status_publisher
+from src.monitoring.snapshot_writer import get_snapshot_writer
+from src.metrics.latency_tracer import get_tracer, format_latency_report
+
+# Spans do caminho quente (callback -> features -> ML -> consenso -> ordem)
+LATENCY_TRACER = get_tracer()
+
+from src.features.feature_schema import FeatureSchema
+
+# Layout fixo do vetor de features do caminho ao vivo (_calculate_feature_vector)
+LIVE_FEATURES = FeatureSchema([
+    'returns_1', 'returns_2', 'returns_5', 'returns_10', 'returns_20',
+    'volatility_10', 'volatility_20', 'volatility_50', 'rsi_14', 'ma_5_20_ratio',
+    'volume', 'cumulative_volume', 'buy_volume', 'sell_volume', 'delta_volume',
+    'buy_sell_ratio', 'volume_pressure',
+    'bid_price_1', 'ask_price_1', 'spread', 'mid_price', 'bid_volume_1', 'ask_volume_1',
+    'imbalance',
+], name='live', dtype=np.float64)
+LIVE_INDEX = LIVE_FEATURES.index
+LIVE_NAMES = tuple(LIVE_FEATURES.names)
+
 try:
     from src.training.smart_retraining_system import SmartRetrainingSystem
 except:
@@ -178,6 +207,9 @@ class QuantumTraderCompleteOCOEvents:
         # Order Manager
         self.order_manager = WDOOrderManager() if WDOOrderManager else None
         
+        # Vetor de features do caminho ao vivo (reutilizado a cada ciclo)
+        self._live_features = LIVE_FEATURES.new_vector()
+        
         # Modelos híbridos
         self.models = {}
         self.scalers = {}
@@ -188,6 +220,7 @@ class QuantumTraderCompleteOCOEvents:
         if HMARLAgentsRealtime:
             try:
                 self.hmarl_agents = HMARLAgentsRealtime()
+                self._hmarl_binding = self.hmarl_agents.bind_features(LIVE_NAMES)
                 logger.info("[INIT] HMARL Agents inicializados com sucesso")
             except Exception as e:
                 logger.error(f"[INIT] Erro ao inicializar HMARL: {e}")
@@ -235,6 +268,11 @@ class QuantumTraderCompleteOCOEvents:
         self.tick_buffer = deque(maxlen=1000)
         self.book_buffer = deque(maxlen=1000)
         
+        # Candles 1s/5s/1min/5min formados uma única vez a partir dos trades
+        self.bar_aggregator = BarAggregator()
+        if self.risk_manager:
+            self.bar_aggregator.subscribe('1min', self.risk_manager.on_bar)
+        
         # Preços e dados
         self.current_price = 0
         self.last_mid_price = 0
@@ -287,6 +325,7 @@ class QuantumTraderCompleteOCOEvents:
         
         # Arquivos de dados
         self.data_files = {}
+        self.recorder = None
         
         logger.info("Sistema Completo OCO com Eventos inicializado")
     
@@ -470,6 +509,7 @@ class QuantumTraderCompleteOCOEvents:
                         'max_daily_trades': self.max_daily_trades,
                         'position_size': 1
                     })
+                    self.optimization_system.attach_bar_aggregator(self.bar_aggregator)
                     print("  [OK] Sistema de Otimização ativo")
                     print("     • Detector de Regime de Mercado")
                     print("     • Targets Adaptativos")
@@ -490,31 +530,13 @@ class QuantumTraderCompleteOCOEvents:
             if not dll_path.exists():
                 dll_path = Path('ProfitDLL64.dll')
             
-            self.connection = ConnectionManagerWorking(str(dll_path))
-            
-            # Integrar eventos com connection manager e order manager
-            self.event_integration = integrate_with_existing_system(
-                connection_manager=self.connection,
-                order_manager=self.order_manager
-            )
+            self.attach_connection(ConnectionManagerWorking(str(dll_path)))
             print("  [OK] Sistema de eventos integrado")
             
-            # Configurar callback via eventos
-            if hasattr(self.connection, 'oco_monitor') and self.connection.oco_monitor:
-                # Callback original ainda funciona, mas agora também emite eventos
-                self.connection.oco_monitor.position_closed_callback = self.handle_position_closed
-            
             USERNAME = os.getenv('PROFIT_USERNAME', '')
             PASSWORD = os.getenv('PROFIT_PASSWORD', '')
             KEY = os.getenv('PROFIT_KEY', '')
             
-            # Configurar callbacks para receber atualizações
-            self.connection.set_offer_book_callback(self.process_book_update)
-            
-            # IMPORTANTE: Configurar callback de trades para receber volume!
-            self.connection.set_trade_callback(self.process_trade_update)
-            logger.info("[OK] Callbacks de book e trades configurados")
-            
             if self.connection.connect():
                 print("  [OK] CONECTADO À B3!")
                 
@@ -634,6 +656,33 @@ class QuantumTraderCompleteOCOEvents:
             traceback.print_exc()
             return False
     
+    def attach_connection(self, connection):
+        """
+        Liga um connection manager ao sistema (eventos, OCO e callbacks)
+        
+        Args:
+            connection: ConnectionManagerWorking/OCO ou conexão simulada (replay)
+        """
+        self.connection = connection
+        
+        # Integrar eventos com connection manager e order manager
+        self.event_integration = integrate_with_existing_system(
+            connection_manager=self.connection,
+            order_manager=self.order_manager
+        )
+        
+        # Configurar callback via eventos
+        if hasattr(self.connection, 'oco_monitor') and self.connection.oco_monitor:
+            # Callback original ainda funciona, mas agora também emite eventos
+            self.connection.oco_monitor.position_closed_callback = self.handle_position_closed
+        
+        # Configurar callbacks para receber atualizações
+        self.connection.set_offer_book_callback(self.process_book_update)
+        
+        # IMPORTANTE: Configurar callback de trades para receber volume!
+        self.connection.set_trade_callback(self.process_trade_update)
+        logger.info("[OK] Callbacks de book e trades configurados")
+    
     def execute_trade_with_oco(self, signal, confidence, ml_prediction=None, hmarl_consensus=None, regime_signal=None):
         """Executa trade com OCO e emite eventos, com Sistema de Otimização"""
         
@@ -1407,104 +1456,6 @@ class QuantumTraderCompleteOCOEvents:
                 logger.error(f"[CONSISTENCY] Erro na verificação: {e}")
                 time.sleep(30)  # Esperar mais em caso de erro
     
-    def monitor_oco_executions(self):
-        """Thread dedicada para monitorar execuções de ordens OCO"""
-        global GLOBAL_POSITION_LOCK, GLOBAL_POSITION_LOCK_TIME, GLOBAL_POSITION_LOCK_MUTEX
-        
-        logger.info("[OCO EXEC MONITOR] Thread iniciada - verificando execuções a cada 5s")
-        check_count = 0
-        
-        while self.running:
-            try:
-                time.sleep(5)  # Verificar a cada 5 segundos
-                
-                # NOVO: Verificação agressiva de consistência
-                with GLOBAL_POSITION_LOCK_MUTEX:
-                    # Se não tem posição mas tem lock, é inconsistência
-                    if not self.has_open_position and GLOBAL_POSITION_LOCK:
-                        time_locked = datetime.now() - GLOBAL_POSITION_LOCK_TIME if GLOBAL_POSITION_LOCK_TIME else timedelta(seconds=0)
-                        
-                        if time_locked > timedelta(seconds=10):
-                            logger.warning(f"[CLEANUP] Inconsistência detectada: Lock há {time_locked.seconds}s sem posição")
-                            GLOBAL_POSITION_LOCK = False
-                            GLOBAL_POSITION_LOCK_TIME = None
-                            
-                            # Cancelar todas ordens
-                            if self.connection:
-                                self.connection.cancel_all_pending_orders(self.symbol)
-                            logger.info("[CLEANUP] Lock resetado e ordens canceladas")
-                    
-                    # Se não tem lock e não tem posição, garantir que não há ordens
-                    if not GLOBAL_POSITION_LOCK and not self.has_open_position:
-                        # Verificar se há ordens pendentes
-                        if self.active_orders:
-                            logger.warning(f"[CLEANUP] {len(self.active_orders)} ordens órfãs detectadas")
-                            if self.connection:
-                                for order_id in list(self.active_orders.keys()):
-                                    self.connection.cancel_order(order_id)
-                                self.active_orders.clear()
-                                logger.info("[CLEANUP] Ordens órfãs canceladas")
-            
-            except Exception as e:
-                logger.error(f"[CLEANUP] Erro na verificação: {e}")
-                time.sleep(5)
-    
-    def monitor_oco_executions_fixed(self):
-        """Thread dedicada para monitorar execuções de ordens OCO"""
-        logger.info("[OCO EXEC MONITOR] Thread iniciada - verificando execuções a cada 5s")
-        check_count = 0
-        
-        while self.running:
-            try:
-                time.sleep(5)  # Verificar a cada 5 segundos
-                check_count += 1
-                
-                if hasattr(self.connection, 'oco_monitor') and self.connection.oco_monitor.oco_groups:
-                    # Log periódico para confirmar que está rodando
-                    if check_count % 12 == 0:  # A cada minuto
-                        active_groups = sum(1 for g in self.connection.oco_monitor.oco_groups.values() if g.get('active'))
-                        logger.info(f"[OCO EXEC MONITOR] Monitorando {active_groups} grupos OCO ativos")
-                    
-                    for group_id, group in list(self.connection.oco_monitor.oco_groups.items()):
-                        if not group.get('active', False):
-                            continue
-                        
-                        stop_id = group.get('stop_order_id') or group.get('stop')
-                        take_id = group.get('take_order_id') or group.get('take')
-                        
-                        # Log detalhado a cada 30s
-                        if check_count % 6 == 0:
-                            logger.debug(f"[OCO EXEC MONITOR] Verificando grupo {group_id}: Stop={stop_id}, Take={take_id}")
-                        
-                        # Verificar status das ordens
-                        if stop_id and self.connection:
-                            stop_status = self.connection.get_order_status(stop_id)
-                            
-                            # Log do status para debug
-                            if check_count % 6 == 0:
-                                logger.debug(f"[OCO EXEC MONITOR] Stop {stop_id} status: {stop_status}")
-                            
-                            if stop_status in ["FILLED", "PARTIALLY_FILLED"]:
-                                logger.warning(f"[OCO EXEC MONITOR] STOP {stop_id} EXECUTADO! Status: {stop_status}")
-                                self.handle_order_execution(stop_id, "stop_filled")
-                                continue
-                        
-                        if take_id and self.connection:
-                            take_status = self.connection.get_order_status(take_id)
-                            
-                            # Log do status para debug
-                            if check_count % 6 == 0:
-                                logger.debug(f"[OCO EXEC MONITOR] Take {take_id} status: {take_status}")
-                            
-                            if take_status in ["FILLED", "PARTIALLY_FILLED"]:
-                                logger.warning(f"[OCO EXEC MONITOR] TAKE {take_id} EXECUTADO! Status: {take_status}")
-                                self.handle_order_execution(take_id, "take_filled")
-                                continue
-                        
-            except Exception as e:
-                logger.error(f"[OCO EXEC MONITOR] Erro: {e}")
-                time.sleep(10)
-    
     def cleanup_orphan_orders_loop(self):
         """Thread que verifica e cancela ordens órfãs periodicamente"""
         global GLOBAL_POSITION_LOCK, GLOBAL_POSITION_LOCK_TIME, GLOBAL_POSITION_LOCK_MUTEX
@@ -1609,37 +1560,16 @@ class QuantumTraderCompleteOCOEvents:
     
     def _setup_data_recording(self):
         """Configura gravação de dados para treinamento"""
-        data_dir = Path('data/book_tick_data')
-        data_dir.mkdir(parents=True, exist_ok=True)
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        # Arquivo de book
-        self.data_files['book'] = data_dir / f'book_data_{timestamp}.csv'
-        with open(self.data_files['book'], 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                'timestamp', 'symbol',
-                'bid_price_1', 'bid_vol_1', 'ask_price_1', 'ask_vol_1',
-                'spread', 'mid_price', 'imbalance'
-            ])
-        
-        # Arquivo de trades
-        self.data_files['tick'] = data_dir / f'tick_data_{timestamp}.csv'
-        with open(self.data_files['tick'], 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                'timestamp', 'symbol', 'price', 'volume', 'aggressor'
-            ])
+        self.recorder = TickDataRecorder(
+            data_dir='data/book_tick_data',
+            flush_interval=float(os.getenv('RECORDING_FLUSH_INTERVAL', '1.0'))
+        )
+        self.data_files = self.recorder.start()
     
     def _save_regime_status_for_monitor(self, regime_signal):
-        """Salva status do regime para o monitor ler"""
+        """Publica status do regime no canal de status dos monitores"""
         try:
-            # Criar diretório se não existir
-            monitor_dir = Path('data/monitor')
-            monitor_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Salvar status do regime
+            # Status do regime
             regime_status = {
                 'timestamp': datetime.now().isoformat(),
                 'regime': regime_signal.regime.value if regime_signal else 'undefined',
@@ -1647,10 +1577,9 @@ class QuantumTraderCompleteOCOEvents:
                 'strategy': regime_signal.strategy if regime_signal else 'none'
             }
             
-            with open(monitor_dir / 'regime_status.json', 'w') as f:
-                json.dump(regime_status, f, indent=2)
+            publish_status('regime', regime_status)
             
-            # Salvar último sinal se houver
+            # Publicar último sinal se houver
             if regime_signal and regime_signal.signal != 0:
                 signal_data = {
                     'timestamp': datetime.now().isoformat(),
@@ -1662,8 +1591,7 @@ class QuantumTraderCompleteOCOEvents:
                     'risk_reward': regime_signal.risk_reward
                 }
                 
-                with open(monitor_dir / 'latest_signal.json', 'w') as f:
-                    json.dump(signal_data, f, indent=2)
+                publish_status('signal', signal_data)
             
             # Atualizar estatísticas
             self._update_regime_statistics(regime_signal)
@@ -1674,14 +1602,15 @@ class QuantumTraderCompleteOCOEvents:
     def _update_regime_statistics(self, regime_signal):
         """Atualiza estatísticas do sistema de regime"""
         try:
-            monitor_dir = Path('data/monitor')
-            stats_file = monitor_dir / 'regime_stats.json'
-            
-            # Carregar estatísticas existentes
-            if stats_file.exists():
-                with open(stats_file, 'r') as f:
-                    stats = json.load(f)
-            else:
+            stats = getattr(self, '_regime_stats', None)
+            
+            # Carregar estatísticas existentes (apenas na primeira vez)
+            if stats is None:
+                stats_file = Path('data/monitor') / 'regime_stats.json'
+                if stats_file.exists():
+                    with open(stats_file, 'r') as f:
+                        stats = json.load(f)
+            if stats is None:
                 stats = {
                     'total_trades': 0,
                     'wins': 0,
@@ -1703,9 +1632,9 @@ class QuantumTraderCompleteOCOEvents:
                     elif 'lateral' in regime_name.lower():
                         stats['lateral_trades'] += 1
             
-            # Salvar estatísticas atualizadas
-            with open(stats_file, 'w') as f:
-                json.dump(stats, f, indent=2)
+            # Publicar estatísticas atualizadas
+            self._regime_stats = stats
+            publish_status('regime_stats', dict(stats, regime_distribution=dict(stats['regime_distribution'])))
                 
         except Exception as e:
             logger.debug(f"Erro ao atualizar estatísticas: {e}")
@@ -1877,26 +1806,14 @@ class QuantumTraderCompleteOCOEvents:
                 if predictions:
                     logger.info(f"  Predictions keys: {list(predictions.keys())}")
             
-            # Salvar em arquivo para o monitor
-            monitor_dir = Path('data/monitor')
-            monitor_dir.mkdir(parents=True, exist_ok=True)
-            
-            ml_status_file = monitor_dir / 'ml_status.json'
-            
-            # Log antes de salvar
-            if self._ml_saved_count % 10 == 0:
-                logger.info(f"[ML SAVE] Salvando status #{self._ml_saved_count} em {ml_status_file}")
+            # Publicar para o monitor
+            published = publish_status('ml', ml_status)
             
-            with open(ml_status_file, 'w') as f:
-                json.dump(ml_status, f, indent=2)
-                f.flush()  # Forçar escrita no disco
-                
-            # Verificar se salvou
             if self._ml_saved_count % 10 == 0:
-                if ml_status_file.exists():
-                    logger.info(f"[ML SAVE] Arquivo salvo com sucesso!")
+                if published:
+                    logger.info(f"[ML SAVE] Status #{self._ml_saved_count} publicado")
                 else:
-                    logger.error(f"[ML SAVE] Erro - arquivo não existe!")
+                    logger.error(f"[ML SAVE] Erro - canal de status indisponível!")
                     
         except Exception as e:
             logger.error(f"[ML SAVE ERROR] Erro ao salvar status ML: {e}")
@@ -2032,9 +1949,19 @@ class QuantumTraderCompleteOCOEvents:
         except:
             return 50.0
     
-    def _calculate_features_from_buffer(self) -> Dict[str, float]:
-        """Calcula features básicas dos buffers para ML"""
-        features = {}
+    def _calculate_feature_vector(self) -> Optional[np.ndarray]:
+        """
+        Calcula as features básicas dos buffers no vetor LIVE_FEATURES
+        
+        O vetor é preallocado e reutilizado; ML e HMARL recebem-no por
+        bindings compilados uma vez, sem montar dicts por tick. Features
+        não calculadas neste ciclo ficam em 0.0 (o padrão dos modelos).
+        
+        Returns:
+            Vetor no layout de LIVE_FEATURES, ou None se o cálculo falhar
+        """
+        f = self._live_features
+        f[:] = 0.0
         
         try:
             # GARANTIR que temos dados para calcular features
@@ -2056,7 +1983,6 @@ class QuantumTraderCompleteOCOEvents:
             # Features de preço
             if len(self.price_history) > 0:
                 prices = list(self.price_history)[-100:]
-                prices_array = np.array(prices)
                 
                 # Log a cada 20 cálculos
                 if self._feature_calc_count % 20 == 0:
@@ -2065,27 +1991,27 @@ class QuantumTraderCompleteOCOEvents:
                 
                 # Retornos
                 if len(prices) > 1:
-                    features['returns_1'] = (prices[-1] - prices[-2]) / prices[-2] if prices[-2] != 0 else 0
+                    f[LIVE_INDEX['returns_1']] = (prices[-1] - prices[-2]) / prices[-2] if prices[-2] != 0 else 0
                 if len(prices) > 5:
-                    features['returns_5'] = (prices[-1] - prices[-5]) / prices[-5] if prices[-5] != 0 else 0
+                    f[LIVE_INDEX['returns_5']] = (prices[-1] - prices[-5]) / prices[-5] if prices[-5] != 0 else 0
                 if len(prices) > 20:
-                    features['returns_20'] = (prices[-1] - prices[-20]) / prices[-20] if prices[-20] != 0 else 0
+                    f[LIVE_INDEX['returns_20']] = (prices[-1] - prices[-20]) / prices[-20] if prices[-20] != 0 else 0
                 
                 # Volatilidade
                 if len(prices) > 20:
-                    features['volatility_20'] = np.std(prices[-20:]) / np.mean(prices[-20:]) if np.mean(prices[-20:]) != 0 else 0
+                    f[LIVE_INDEX['volatility_20']] = np.std(prices[-20:]) / np.mean(prices[-20:]) if np.mean(prices[-20:]) != 0 else 0
                 
                 # RSI simplificado - calcular de verdade
                 if len(prices) > 14:
-                    features['rsi_14'] = self._calculate_rsi(prices, 14)
+                    f[LIVE_INDEX['rsi_14']] = self._calculate_rsi(prices, 14)
                 else:
-                    features['rsi_14'] = 50  # Placeholder
+                    f[LIVE_INDEX['rsi_14']] = 50  # Placeholder
                 
                 # Médias móveis
                 if len(prices) > 20:
                     ma5 = np.mean(prices[-5:])
                     ma20 = np.mean(prices[-20:])
-                    features['ma_5_20_ratio'] = ma5 / ma20 if ma20 != 0 else 1
+                    f[LIVE_INDEX['ma_5_20_ratio']] = ma5 / ma20 if ma20 != 0 else 1
             
             # Features de VOLUME REAL do VolumeTracker
             if self.connection and hasattr(self.connection, 'get_volume_stats'):
@@ -2098,32 +2024,24 @@ class QuantumTraderCompleteOCOEvents:
                     logger.info(f"  Delta: {volume_stats['delta_volume']} (Buy - Sell)")
                 
                 # Features de volume
-                features['volume'] = float(volume_stats['current_volume'])
-                features['cumulative_volume'] = float(volume_stats['cumulative_volume'])
-                features['buy_volume'] = float(volume_stats['buy_volume'])
-                features['sell_volume'] = float(volume_stats['sell_volume'])
-                features['delta_volume'] = float(volume_stats['delta_volume'])
+                f[LIVE_INDEX['volume']] = volume_stats['current_volume']
+                f[LIVE_INDEX['cumulative_volume']] = volume_stats['cumulative_volume']
+                f[LIVE_INDEX['buy_volume']] = volume_stats['buy_volume']
+                f[LIVE_INDEX['sell_volume']] = volume_stats['sell_volume']
+                f[LIVE_INDEX['delta_volume']] = volume_stats['delta_volume']
                 
                 # Volume ratios
                 if volume_stats['sell_volume'] > 0:
-                    features['buy_sell_ratio'] = volume_stats['buy_volume'] / volume_stats['sell_volume']
+                    f[LIVE_INDEX['buy_sell_ratio']] = volume_stats['buy_volume'] / volume_stats['sell_volume']
                 else:
-                    features['buy_sell_ratio'] = 1.0 if volume_stats['buy_volume'] > 0 else 0.0
+                    f[LIVE_INDEX['buy_sell_ratio']] = 1.0 if volume_stats['buy_volume'] > 0 else 0.0
                     
                 # Volume pressure indicator
                 if volume_stats['cumulative_volume'] > 0:
-                    features['volume_pressure'] = volume_stats['delta_volume'] / volume_stats['cumulative_volume']
-                else:
-                    features['volume_pressure'] = 0.0
+                    f[LIVE_INDEX['volume_pressure']] = volume_stats['delta_volume'] / volume_stats['cumulative_volume']
             else:
                 # Default volume features quando não há dados
-                features['volume'] = 0.0
-                features['cumulative_volume'] = 0.0
-                features['buy_volume'] = 0.0
-                features['sell_volume'] = 0.0
-                features['delta_volume'] = 0.0
-                features['buy_sell_ratio'] = 1.0
-                features['volume_pressure'] = 0.0
+                f[LIVE_INDEX['buy_sell_ratio']] = 1.0
             
             # Features de book
             if self.last_book_update:
@@ -2135,35 +2053,30 @@ class QuantumTraderCompleteOCOEvents:
                     logger.info(f"  Bid: {book.get('bid_price_1', 0):.2f} x {book.get('bid_volume_1', 0)}")
                     logger.info(f"  Ask: {book.get('ask_price_1', 0):.2f} x {book.get('ask_volume_1', 0)}")
                 
-                features['bid_price_1'] = book.get('bid_price_1', 0)
-                features['ask_price_1'] = book.get('ask_price_1', 0)
-                features['spread'] = features['ask_price_1'] - features['bid_price_1']
-                features['mid_price'] = (features['bid_price_1'] + features['ask_price_1']) / 2
-                features['bid_volume_1'] = book.get('bid_volume_1', 0)
-                features['ask_volume_1'] = book.get('ask_volume_1', 0)
+                bid, ask = book.get('bid_price_1', 0), book.get('ask_price_1', 0)
+                bid_volume, ask_volume = book.get('bid_volume_1', 0), book.get('ask_volume_1', 0)
+                f[LIVE_INDEX['bid_price_1']] = bid
+                f[LIVE_INDEX['ask_price_1']] = ask
+                f[LIVE_INDEX['spread']] = ask - bid
+                f[LIVE_INDEX['mid_price']] = (bid + ask) / 2
+                f[LIVE_INDEX['bid_volume_1']] = bid_volume
+                f[LIVE_INDEX['ask_volume_1']] = ask_volume
                 
                 # Imbalance
-                total_vol = features['bid_volume_1'] + features['ask_volume_1']
+                total_vol = bid_volume + ask_volume
                 if total_vol > 0:
-                    features['imbalance'] = (features['bid_volume_1'] - features['ask_volume_1']) / total_vol
-                else:
-                    features['imbalance'] = 0
-            
-            # Preencher features faltantes com valores padrão
-            all_features = [
-                'returns_1', 'returns_2', 'returns_5', 'returns_10', 'returns_20',
-                'volatility_10', 'volatility_20', 'volatility_50',
-                'rsi_14', 'spread', 'imbalance', 'bid_price_1', 'ask_price_1'
-            ]
-            
-            for feat in all_features:
-                if feat not in features:
-                    features[feat] = 0.0
+                    f[LIVE_INDEX['imbalance']] = (bid_volume - ask_volume) / total_vol
             
         except Exception as e:
             logger.error(f"Erro ao calcular features: {e}")
+            return None
         
-        return features
+        return f
+    
+    def _calculate_features_from_buffer(self) -> Dict[str, float]:
+        """Mesmas features de _calculate_feature_vector como dict (monitor/debug)"""
+        vector = self._calculate_feature_vector()
+        return LIVE_FEATURES.to_dict(vector) if vector is not None else {}
     
     def check_position_status(self):
         """Verifica posição e emite eventos se necessário"""
@@ -2266,15 +2179,8 @@ class QuantumTraderCompleteOCOEvents:
             logger.error(f"Erro ao verificar posição: {e}")
     
     def _save_ml_status(self, prediction=None):
-        """Salva status do ML para o monitor"""
+        """Publica status do ML para o monitor"""
         try:
-            from pathlib import Path
-            import json
-            from datetime import datetime
-            
-            # Criar diretório se não existir
-            Path("data/monitor").mkdir(parents=True, exist_ok=True)
-            
             # Preparar dados
             ml_data = {
                 'timestamp': datetime.now().isoformat(),
@@ -2308,23 +2214,14 @@ class QuantumTraderCompleteOCOEvents:
                 ml_data['context_conf'] = prediction.get('confidence', 0) * 0.9
                 ml_data['micro_conf'] = prediction.get('confidence', 0) * 0.95
             
-            # Salvar arquivo
-            with open("data/monitor/ml_status.json", 'w') as f:
-                json.dump(ml_data, f, indent=2)
+            publish_status('ml', ml_data)
                 
         except Exception as e:
             pass  # Silencioso para não atrapalhar o sistema
 
     def _save_hmarl_status(self, consensus=None):
-        """Salva status do HMARL para o monitor"""
+        """Publica status do HMARL para o monitor"""
         try:
-            from pathlib import Path
-            import json
-            from datetime import datetime
-            
-            # Criar diretório se não existir
-            Path("data/monitor").mkdir(parents=True, exist_ok=True)
-            
             # Preparar dados
             hmarl_data = {
                 'timestamp': datetime.now().isoformat(),
@@ -2343,10 +2240,8 @@ class QuantumTraderCompleteOCOEvents:
                 volume_stats = self.connection.get_volume_stats()
                 hmarl_data['market_data']['volume'] = volume_stats.get('current_volume', 0)
                 
-                # Salvar estatísticas completas de volume
-                volume_file = Path("data/monitor/volume_stats.json")
-                with open(volume_file, 'w') as f:
-                    json.dump(volume_stats, f, indent=2)
+                # Publicar estatísticas completas de volume
+                publish_status('volume', volume_stats)
             
             # Adicionar dados do consensus se disponível
             if consensus:
@@ -2394,9 +2289,7 @@ class QuantumTraderCompleteOCOEvents:
                     'FootprintPatternAgent': {'signal': 0, 'confidence': 0.5, 'weight': 0.25}
                 }
             
-            # Salvar arquivo
-            with open("data/monitor/hmarl_status.json", 'w') as f:
-                json.dump(hmarl_data, f, indent=2)
+            publish_status('hmarl', hmarl_data)
                 
         except Exception as e:
             pass  # Silencioso
@@ -2416,17 +2309,20 @@ class QuantumTraderCompleteOCOEvents:
                 'timestamp': datetime.now()
             }
             
+            # Features uma vez por ciclo, no vetor compartilhado por ML e HMARL
+            features = None
+            if self.ml_predictor or self.hmarl_agents:
+                with LATENCY_TRACER.span('features'):
+                    features = self._calculate_feature_vector()
+            
             # 1. Tentar ML primeiro
             ml_prediction = None
             if self.ml_predictor:
                 try:
-                    # Calcular features
-                    features = self._calculate_features_from_buffer()
-                    
-                    # Garantir que temos features suficientes
-                    if len(features) >= 10:  # Mínimo de features
-                        # Fazer predição ML
-                        ml_result = self.ml_predictor.predict(features)
+                    if features is not None:
+                        # Fazer predição ML (binding compilado por versão dos modelos)
+                        with LATENCY_TRACER.span('ml_predict'):
+                            ml_result = self.ml_predictor.predict_vector(features, LIVE_NAMES)
                         
                         if ml_result:
                             ml_prediction = ml_result
@@ -2460,14 +2356,13 @@ class QuantumTraderCompleteOCOEvents:
                             price=self.current_price,
                             volume=100,  # Volume fictício por enquanto
                             book_data=book_data,
-                            features=features
+                            feature_vector=features,
+                            binding=self._hmarl_binding
                         )
                     
-                    # HMARL precisa apenas das features
-                    features = self._calculate_features_from_buffer() if not features else features
-                    
                     # Fazer predição HMARL
-                    hmarl_result = self.hmarl_agents.get_consensus(features)
+                    with LATENCY_TRACER.span('consensus'):
+                        hmarl_result = self.hmarl_agents.get_consensus()
                     
                     if hmarl_result:
                         hmarl_prediction = hmarl_result
@@ -2590,6 +2485,7 @@ class QuantumTraderCompleteOCOEvents:
 
     def process_trade_update(self, symbol, trade_data):
         """Processa atualização de trades para capturar volume"""
+        LATENCY_TRACER.mark_tick()
         try:
             # Verificar se é o símbolo correto
             if symbol != self.symbol:
@@ -2637,25 +2533,15 @@ class QuantumTraderCompleteOCOEvents:
                 )
                 
             # Salvar dados para treinamento se habilitado
-            if hasattr(self, 'enable_data_recording') and self.enable_data_recording and self.data_files.get('tick'):
-                try:
-                    with open(self.data_files['tick'], 'a', newline='') as f:
-                        writer = csv.writer(f)
-                        writer.writerow([
-                            datetime.now().isoformat(),
-                            symbol,
-                            price,
-                            volume,
-                            aggressor
-                        ])
-                except Exception as e:
-                    logger.debug(f"Erro ao salvar trade data: {e}")
+            if self.recorder:
+                self.recorder.record_trade(symbol, price, volume, aggressor)
                     
         except Exception as e:
             logger.error(f"Erro ao processar trade: {e}")
     
     def process_book_update(self, symbol, book_data):
         """Processa atualização do book"""
+        LATENCY_TRACER.mark_tick()
         try:
             # Log para debug
             if not hasattr(self, '_book_update_count'):
@@ -2678,6 +2564,10 @@ class QuantumTraderCompleteOCOEvents:
             bid_vol_1 = book_data.get('bid_vol_1', 0)
             ask_vol_1 = book_data.get('ask_vol_1', 0)
             
+            # Salvar dados para treinamento se habilitado
+            if self.recorder and bid_price > 0 and ask_price > 0:
+                self.recorder.record_book(symbol, bid_price, bid_vol_1, ask_price, ask_vol_1)
+            
             if bid_price > 0 and ask_price > 0:
                 self.last_mid_price = (bid_price + ask_price) / 2
                 self.current_price = self.last_mid_price
@@ -2743,6 +2633,8 @@ class QuantumTraderCompleteOCOEvents:
             if 'volume' in trade_data:
                 self.total_volume += trade_data.get('volume', 0)
             
+            self.bar_aggregator.on_trade_data(trade_data)
+            
             # Emitir evento de trade executado
             self.event_bus.publish(Event(
                 type=EventType.TRADE_EXECUTED,
@@ -2804,6 +2696,82 @@ class QuantumTraderCompleteOCOEvents:
                 logger.error(f"Erro no scheduler: {e}")
                 time.sleep(300)
     
+    def trading_step(self):
+        """Um ciclo de decisão: predição, consistência de posição e execução OCO"""
+        # Trace do ciclo: origem no último tick recebido
+        LATENCY_TRACER.start_trace()
+        try:
+            with LATENCY_TRACER.span('decision'):
+                return self._run_decision_cycle()
+        finally:
+            LATENCY_TRACER.finish_trace('tick_to_decision')
+    
+    def _run_decision_cycle(self):
+        global GLOBAL_POSITION_LOCK, GLOBAL_POSITION_LOCK_TIME, GLOBAL_POSITION_LOCK_MUTEX
+        # FAZER PREDIÇÃO - CRÍTICO!
+        prediction = self.make_hybrid_prediction()
+        
+        # NOVO: Verificação agressiva de consistência
+        with GLOBAL_POSITION_LOCK_MUTEX:
+            # Se não tem posição mas tem lock, é inconsistência
+            if not self.has_open_position and GLOBAL_POSITION_LOCK:
+                time_locked = datetime.now() - GLOBAL_POSITION_LOCK_TIME if GLOBAL_POSITION_LOCK_TIME else timedelta(seconds=0)
+                
+                if time_locked > timedelta(seconds=10):
+                    logger.warning(f"[CLEANUP] Inconsistência detectada: Lock há {time_locked.seconds}s sem posição")
+                    GLOBAL_POSITION_LOCK = False
+                    GLOBAL_POSITION_LOCK_TIME = None
+                    
+                    # Cancelar todas ordens
+                    if self.connection:
+                        self.connection.cancel_all_pending_orders(self.symbol)
+                    logger.info("[CLEANUP] Lock resetado e ordens canceladas")
+            
+            # Se não tem lock e não tem posição, garantir que não há ordens
+            if not GLOBAL_POSITION_LOCK and not self.has_open_position:
+                # Verificar se há ordens pendentes
+                if self.active_orders:
+                    logger.warning(f"[CLEANUP] {len(self.active_orders)} ordens órfãs detectadas")
+                    if self.connection:
+                        for order_id in list(self.active_orders.keys()):
+                            self.connection.cancel_order(order_id)
+                        self.active_orders.clear()
+                        logger.info("[CLEANUP] Ordens órfãs canceladas")
+        
+        # Executar trade se sinal válido
+        if prediction and prediction['signal'] != 0 and prediction['confidence'] >= self.min_confidence:
+            logger.info(f"[TRADING LOOP] Sinal válido detectado! Signal={prediction['signal']}, Conf={prediction['confidence']:.1%}")
+            
+            # Preparar dados para sistema de otimização
+            ml_pred = prediction.get('ml_data', {'signal': prediction['signal'], 'confidence': prediction['confidence']})
+            hmarl_cons = prediction.get('hmarl_data', {'signal': prediction['signal'], 'confidence': prediction['confidence'], 'action': 'BUY' if prediction['signal'] > 0 else 'SELL'})
+            
+            # NOVO: Passar regime_signal se disponível
+            regime_signal = prediction.get('regime_signal', None)
+            
+            # NOVO: Log de validação de tendência aprovada
+            if regime_signal:
+                trend_stats = self.regime_system.get_stats()
+                logger.info(f"[TREND APPROVED] Trade alinhado com tendência")
+                logger.info(f"  Regime: {trend_stats.get('current_regime', 'unknown')}")
+                logger.info(f"  Consistência: {trend_stats.get('trend_consistency', 'N/A')}")
+                logger.info(f"  Bloqueios: {trend_stats.get('trades_blocked_by_trend', 0)}/{trend_stats.get('total_validations', 0)}")
+                
+                # Atualizar métrica
+                self.metrics['trend_aligned_trades'] += 1
+            
+            with LATENCY_TRACER.span('order'):
+                self.execute_trade_with_oco(
+                    signal=prediction['signal'],
+                    confidence=prediction['confidence'],
+                    ml_prediction=ml_pred,
+                    hmarl_consensus=hmarl_cons,
+                    regime_signal=regime_signal  # Passar info do regime
+                )
+            LATENCY_TRACER.finish_trace('tick_to_order')
+        
+        return prediction
+    
     def trading_loop(self):
         global GLOBAL_POSITION_LOCK, GLOBAL_POSITION_LOCK_TIME, GLOBAL_POSITION_LOCK_MUTEX
         """Loop principal de trading"""
@@ -2818,77 +2786,11 @@ class QuantumTraderCompleteOCOEvents:
             try:
                 time.sleep(5)  # Verificar a cada 5 segundos
                 
-                # FAZER PREDIÇÃO - CRÍTICO!
-                prediction = self.make_hybrid_prediction()
-                
-                # NOVO: Verificação agressiva de consistência
-                with GLOBAL_POSITION_LOCK_MUTEX:
-                    # Se não tem posição mas tem lock, é inconsistência
-                    if not self.has_open_position and GLOBAL_POSITION_LOCK:
-                        time_locked = datetime.now() - GLOBAL_POSITION_LOCK_TIME if GLOBAL_POSITION_LOCK_TIME else timedelta(seconds=0)
-                        
-                        if time_locked > timedelta(seconds=10):
-                            logger.warning(f"[CLEANUP] Inconsistência detectada: Lock há {time_locked.seconds}s sem posição")
-                            GLOBAL_POSITION_LOCK = False
-                            GLOBAL_POSITION_LOCK_TIME = None
-                            
-                            # Cancelar todas ordens
-                            if self.connection:
-                                self.connection.cancel_all_pending_orders(self.symbol)
-                            logger.info("[CLEANUP] Lock resetado e ordens canceladas")
-                    
-                    # Se não tem lock e não tem posição, garantir que não há ordens
-                    if not GLOBAL_POSITION_LOCK and not self.has_open_position:
-                        # Verificar se há ordens pendentes
-                        if self.active_orders:
-                            logger.warning(f"[CLEANUP] {len(self.active_orders)} ordens órfãs detectadas")
-                            if self.connection:
-                                for order_id in list(self.active_orders.keys()):
-                                    self.connection.cancel_order(order_id)
-                                self.active_orders.clear()
-                                logger.info("[CLEANUP] Ordens órfãs canceladas")
-                
-                # Continuar verificação normal
-            
+                self.trading_step()
                 
                 # Reset error count on success
                 error_count = 0
                 
-                # Log da predição
-                if loop_count <= 5:
-                    pass  # Linha comentada, apenas passar
-                    # logger.info(f"[TRADING LOOP] Predição: signal={prediction['signal']}, confidence={prediction['confidence']:.2%}")
-                
-                # Executar trade se sinal válido
-                if prediction and prediction['signal'] != 0 and prediction['confidence'] >= self.min_confidence:
-                    logger.info(f"[TRADING LOOP] Sinal válido detectado! Signal={prediction['signal']}, Conf={prediction['confidence']:.1%}")
-                    
-                    # Preparar dados para sistema de otimização
-                    ml_pred = prediction.get('ml_data', {'signal': prediction['signal'], 'confidence': prediction['confidence']})
-                    hmarl_cons = prediction.get('hmarl_data', {'signal': prediction['signal'], 'confidence': prediction['confidence'], 'action': 'BUY' if prediction['signal'] > 0 else 'SELL'})
-                    
-                    # NOVO: Passar regime_signal se disponível
-                    regime_signal = prediction.get('regime_signal', None)
-                    
-                    # NOVO: Log de validação de tendência aprovada
-                    if regime_signal:
-                        trend_stats = self.regime_system.get_stats()
-                        logger.info(f"[TREND APPROVED] Trade alinhado com tendência")
-                        logger.info(f"  Regime: {trend_stats.get('current_regime', 'unknown')}")
-                        logger.info(f"  Consistência: {trend_stats.get('trend_consistency', 'N/A')}")
-                        logger.info(f"  Bloqueios: {trend_stats.get('trades_blocked_by_trend', 0)}/{trend_stats.get('total_validations', 0)}")
-                        
-                        # Atualizar métrica
-                        self.metrics['trend_aligned_trades'] += 1
-                    
-                    self.execute_trade_with_oco(
-                        signal=prediction['signal'],
-                        confidence=prediction['confidence'],
-                        ml_prediction=ml_pred,
-                        hmarl_consensus=hmarl_cons,
-                        regime_signal=regime_signal  # Passar info do regime
-                    )
-                
                 time.sleep(1)
                 
             except Exception as e:
@@ -3055,9 +2957,9 @@ class QuantumTraderCompleteOCOEvents:
             threading.Thread(target=self.metrics_loop, daemon=True, name="Metrics"),
             threading.Thread(target=self.data_collection_loop, daemon=True, name="DataCollection"),
             threading.Thread(target=self.cleanup_orphan_orders_loop, daemon=True, name="Cleanup"),
-            threading.Thread(target=self.position_consistency_check, daemon=True, name="Consistency"),
-            threading.Thread(target=self.monitor_oco_executions, daemon=True, name="OCOExecMonitor")
+            threading.Thread(target=self.position_consistency_check, daemon=True, name="Consistency")
         ]
+        # Execuções OCO chegam pelo callback de ordens (OCOMonitor), sem thread de polling
         
         for thread in threads:
             thread.start()
@@ -3107,10 +3009,36 @@ class QuantumTraderCompleteOCOEvents:
         if self.event_bus:
             self.event_bus.stop()
         
+        # Finalizar gravação de dados (grava o que estiver pendente)
+        if self.recorder:
+            try:
+                self.recorder.stop()
+            except Exception as e:
+                logger.error(f"[STOP] Erro ao finalizar gravação: {e}")
+        
         # Parar monitor
         if self.monitor_process:
             self.monitor_process.terminate()
         
+        # Relatório de latência do caminho quente
+        latency_report = LATENCY_TRACER.report()
+        if latency_report:
+            logger.info("[LATÊNCIA] Por estágio (us):\n" + format_latency_report(latency_report))
+        
+        # Gravar snapshots pendentes. regime_stats.json é recarregado na
+        # próxima execução, então vai para o disco mesmo com STATUS_SNAPSHOT_FILES=0
+        snapshot_writer = get_snapshot_writer()
+        regime_stats = getattr(self, '_regime_stats', None)
+        if regime_stats is not None:
+            snapshot_writer.submit('regime_stats', dict(
+                regime_stats, regime_distribution=dict(regime_stats['regime_distribution'])))
+        snapshot_writer.stop()
+        
+        # Liberar canal de status dos monitores
+        publisher = get_status_publisher()
+        if publisher:
+            publisher.close()
+        
         # Desconectar
         if self.connection:
             self.connection.disconnect()
@@ -17,6 +17,9 @@ import numpy as np
 sys.path.insert(0, str(Path(__file__).parent.parent))
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
+# Canal de status publicado pelo sistema (fallback para os JSON legados)
+from src.monitoring.status_channel import read_status
+
 # Importar bridge dos agentes HMARL
 try:
     from src.monitoring.hmarl_monitor_bridge import get_bridge
@@ -202,28 +205,25 @@ class EnhancedConsoleMonitor:
         if metrics:
             ml_data['ml_predictions'] = metrics.get('ml.predictions', 0)
             
-        # Ler status ML do arquivo de bridge se disponível
-        ml_status_file = Path('data/monitor/ml_status.json')
-        if ml_status_file.exists():
+        # Ler status ML do canal de status (ou arquivo legado)
+        ml_status = read_status('ml')
+        if ml_status:
             try:
-                with open(ml_status_file, 'r') as f:
-                    ml_status = json.load(f)
-                    
-                    # Converter valores numéricos para texto se necessário
-                    for key in ['context_pred', 'micro_pred', 'meta_pred']:
-                        if key in ml_status:
-                            val = ml_status[key]
-                            if isinstance(val, (int, float)):
-                                if val > 0.3 or val == 1:
-                                    ml_status[key] = 'BUY'
-                                elif val < -0.3 or val == -1:
-                                    ml_status[key] = 'SELL'
-                                else:
-                                    ml_status[key] = 'HOLD'
-                    
-                    ml_data.update(ml_status)
+                # Converter valores numéricos para texto se necessário
+                for key in ['context_pred', 'micro_pred', 'meta_pred']:
+                    if key in ml_status:
+                        val = ml_status[key]
+                        if isinstance(val, (int, float)):
+                            if val > 0.3 or val == 1:
+                                ml_status[key] = 'BUY'
+                            elif val < -0.3 or val == -1:
+                                ml_status[key] = 'SELL'
+                            else:
+                                ml_status[key] = 'HOLD'
+                
+                ml_data.update(ml_status)
             except Exception as e:
-                logger.debug(f"Erro ao ler ml_status.json: {e}")
+                logger.debug(f"Erro ao processar status ML: {e}")
         
         # Layer predictions
         layers = [
@@ -16,6 +16,9 @@ import numpy as np
 sys.path.insert(0, str(Path(__file__).parent.parent))
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
+# Canal de status publicado pelo sistema (fallback para os JSON legados)
+from src.monitoring.status_channel import read_status
+
 # Importar bridge dos agentes HMARL
 try:
     from src.monitoring.hmarl_monitor_bridge import get_bridge
@@ -271,12 +274,11 @@ class RegimeMonitor:
             return f"{Fore.RED}{value:.0f}{Fore.RESET}"
     
     def read_regime_status(self):
-        """Lê status do regime do arquivo"""
+        """Lê status do regime publicado pelo sistema"""
         try:
-            status_file = Path('data/monitor/regime_status.json')
-            if status_file.exists():
-                with open(status_file, 'r') as f:
-                    return json.load(f)
+            data = read_status('regime')
+            if data:
+                return data
         except Exception:
             pass
         
@@ -288,10 +290,7 @@ class RegimeMonitor:
     def read_latest_signal(self):
         """Lê último sinal de trading"""
         try:
-            signal_file = Path('data/monitor/latest_signal.json')
-            if signal_file.exists():
-                with open(signal_file, 'r') as f:
-                    return json.load(f)
+            return read_status('signal')
         except Exception:
             pass
         return None
@@ -299,10 +298,9 @@ class RegimeMonitor:
     def read_statistics(self):
         """Lê estatísticas do sistema"""
         try:
-            stats_file = Path('data/monitor/regime_stats.json')
-            if stats_file.exists():
-                with open(stats_file, 'r') as f:
-                    return json.load(f)
+            data = read_status('regime_stats')
+            if data:
+                return data
         except Exception:
             pass
         
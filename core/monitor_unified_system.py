@@ -17,6 +17,9 @@ import numpy as np
 sys.path.insert(0, str(Path(__file__).parent.parent))
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
+# Canal de status publicado pelo sistema (fallback para os JSON legados)
+from src.monitoring.status_channel import read_status, status_age
+
 # Importar bridge dos agentes HMARL
 try:
     from src.monitoring.hmarl_monitor_bridge import get_bridge
@@ -362,15 +365,13 @@ class UnifiedSystemMonitor:
     def read_regime_status(self):
         """Lê status do regime"""
         try:
-            status_file = Path('data/monitor/regime_status.json')
-            if status_file.exists():
-                with open(status_file, 'r') as f:
-                    data = json.load(f)
-                    # Atualizar contador se mudou
-                    if data.get('regime') != self.last_regime:
-                        self.counters['regime_changes'] += 1
-                        self.last_regime = data.get('regime')
-                    return data
+            data = read_status('regime')
+            if data:
+                # Atualizar contador se mudou
+                if data.get('regime') != self.last_regime:
+                    self.counters['regime_changes'] += 1
+                    self.last_regime = data.get('regime')
+                return data
         except Exception:
             pass
         return {'regime': 'undefined', 'confidence': 0.0}
@@ -384,10 +385,9 @@ class UnifiedSystemMonitor:
                 return regime_data
             
             # Fallback para ML status antigo
-            ml_file = Path('data/monitor/ml_status.json')
-            if ml_file.exists():
-                with open(ml_file, 'r') as f:
-                    return json.load(f)
+            ml_status = read_status('ml')
+            if ml_status:
+                return ml_status
         except Exception:
             pass
         return {}
@@ -395,15 +395,13 @@ class UnifiedSystemMonitor:
     def read_latest_signal(self):
         """Lê último sinal"""
         try:
-            signal_file = Path('data/monitor/latest_signal.json')
-            if signal_file.exists():
-                with open(signal_file, 'r') as f:
-                    data = json.load(f)
-                    # Atualizar contador se é novo sinal
-                    if data != self.last_signal:
-                        self.counters['signals_generated'] += 1
-                        self.last_signal = data
-                    return data
+            data = read_status('signal')
+            if data:
+                # Atualizar contador se é novo sinal
+                if data != self.last_signal:
+                    self.counters['signals_generated'] += 1
+                    self.last_signal = data
+                return data
         except Exception:
             pass
         return None
@@ -411,13 +409,11 @@ class UnifiedSystemMonitor:
     def read_statistics(self):
         """Lê estatísticas"""
         try:
-            stats_file = Path('data/monitor/regime_stats.json')
-            if stats_file.exists():
-                with open(stats_file, 'r') as f:
-                    data = json.load(f)
-                    # Atualizar stats locais
-                    self.stats.update(data)
-                    return data
+            data = read_status('regime_stats')
+            if data:
+                # Atualizar stats locais
+                self.stats.update(data)
+                return data
         except Exception:
             pass
         return self.stats
@@ -444,11 +440,10 @@ class UnifiedSystemMonitor:
     def check_system_status(self):
         """Verifica se sistema está rodando"""
         try:
-            # Verificar se arquivo de status existe e é recente
-            status_file = Path('data/monitor/regime_status.json')
-            if status_file.exists():
+            # Verificar se o status do regime existe e é recente
+            age = status_age('regime')
+            if age is not None:
                 # Se foi atualizado nos últimos 10 segundos
-                age = time.time() - status_file.stat().st_mtime
                 return age < 10
         except Exception:
             pass
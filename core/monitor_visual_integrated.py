@@ -17,6 +17,9 @@ import numpy as np
 sys.path.insert(0, str(Path(__file__).parent.parent))
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
+# Canal de status publicado pelo sistema (fallback para os JSON legados)
+from src.monitoring.status_channel import read_status
+
 # Importar componentes
 try:
     from src.monitoring.hmarl_monitor_bridge import get_bridge
@@ -113,13 +116,11 @@ class IntegratedVisualMonitor:
     
     def _update_position_cache(self):
         """Atualiza cache de posição"""
-        position_file = Path('data/monitor/position_status.json')
-        if position_file.exists():
+        data = read_status('position')
+        if data:
             try:
-                with open(position_file, 'r') as f:
-                    data = json.load(f)
-                    self.cache['position']['data'] = data
-                    self.cache['position']['timestamp'] = datetime.now()
+                self.cache['position']['data'] = data
+                self.cache['position']['timestamp'] = datetime.now()
             except:
                 pass
     
@@ -322,29 +323,18 @@ class IntegratedVisualMonitor:
     
     def _fetch_position_data(self):
         """Busca dados de posição"""
-        position_file = Path('data/monitor/position_status.json')
-        if position_file.exists():
-            with open(position_file, 'r') as f:
-                return json.load(f)
-        return None
+        return read_status('position')
     
     def _fetch_ml_status(self):
         """Busca status ML"""
-        ml_file = Path('data/monitor/ml_status.json')
-        if ml_file.exists():
-            with open(ml_file, 'r') as f:
-                return json.load(f)
-        return None
+        return read_status('ml')
     
     def _fetch_agents_data(self):
-        """Busca dados dos agentes do arquivo hmarl_status.json"""
-        # Primeiro tentar ler do arquivo JSON
-        hmarl_file = Path('data/monitor/hmarl_status.json')
-        if hmarl_file.exists():
+        """Busca dados dos agentes do status HMARL publicado pelo sistema"""
+        # Primeiro tentar o canal de status (ou hmarl_status.json legado)
+        data = read_status('hmarl')
+        if data:
             try:
-                with open(hmarl_file, 'r') as f:
-                    data = json.load(f)
-                
                 # Verificar idade dos dados
                 from datetime import datetime
                 timestamp = datetime.fromisoformat(data['timestamp'])
@@ -379,7 +369,7 @@ class IntegratedVisualMonitor:
                 return agents_data if agents_data else None
                 
             except Exception as e:
-                print(f"Erro ao ler hmarl_status.json: {e}")
+                print(f"Erro ao ler status HMARL: {e}")
         
         # Fallback para bridge se disponível
         if BRIDGE_AVAILABLE:
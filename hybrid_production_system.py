@@ -8,8 +8,8 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta, time
-import joblib
 import json
+import shutil
 import threading
 import queue
 import logging
@@ -27,6 +27,8 @@ warnings.filterwarnings('ignore')
 
 # Para re-treinamento
 from train_hybrid_pipeline import HybridTradingPipeline
+from src.features.feature_library import build_feature_matrix
+from src.ml.model_registry import ModelRegistry, ModelStack, load_model_dir
 
 class HybridProductionSystem:
     """
@@ -49,9 +51,13 @@ class HybridProductionSystem:
         self.data_dir = Path("data/daily_training")
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
+        # Versões de modelos (manifest + checksums) e conjunto ativo:
+        # models/scalers/versão trocados juntos por um único ponteiro
+        self.registry = ModelRegistry(self.config.get('model_registry_dir', 'models/registry'))
+        self._model_set = {'models': {}, 'scalers': {}, 'version': "v1.0"}
+        self._swap_lock = threading.Lock()
+        
         # Componentes do sistema
-        self.models = {}
-        self.scalers = {}
         self.hmarl_agents = None
         self.consensus_system = None
         self.buffers = None
@@ -60,7 +66,6 @@ class HybridProductionSystem:
         # Estado do sistema
         self.is_running = False
         self.last_training_date = None
-        self.model_version = "v1.0"
         self.performance_metrics = {
             'trades_today': 0,
             'win_rate': 0.0,
@@ -110,38 +115,28 @@ class HybridProductionSystem:
         )
         self.logger = logging.getLogger(__name__)
         
+    @property
+    def models(self) -> Dict:
+        return self._model_set['models']
+    
+    @property
+    def scalers(self) -> Dict:
+        return self._model_set['scalers']
+    
+    @property
+    def model_version(self) -> str:
+        return self._model_set['version']
+    
     def load_models(self):
-        """Carrega todos os modelos treinados"""
+        """Carrega a versão ativa do registro (ou models/hybrid sem registro)"""
         self.logger.info("Carregando modelos híbridos...")
         
         try:
-            # Carregar modelos de contexto
-            context_dir = self.models_dir / "context"
-            self.models['context'] = {
-                'regime_detector': joblib.load(context_dir / "regime_detector.pkl"),
-                'volatility_forecaster': joblib.load(context_dir / "volatility_forecaster.pkl"),
-                'session_classifier': joblib.load(context_dir / "session_classifier.pkl")
-            }
-            
-            # Carregar modelos de microestrutura
-            micro_dir = self.models_dir / "microstructure"
-            self.models['microstructure'] = {
-                'order_flow_analyzer': joblib.load(micro_dir / "order_flow_analyzer.pkl"),
-                'book_dynamics': joblib.load(micro_dir / "book_dynamics.pkl")
-            }
-            
-            # Carregar meta-learner
-            meta_dir = self.models_dir / "meta_learner"
-            self.models['meta_learner'] = joblib.load(meta_dir / "meta_learner.pkl")
-            
-            # Carregar scalers
-            self.scalers['context'] = joblib.load(self.models_dir / "scaler_context.pkl")
-            self.scalers['microstructure'] = joblib.load(self.models_dir / "scaler_microstructure.pkl")
-            
-            # Carregar configuração dos modelos
-            with open(self.models_dir / "config.json", 'r') as f:
-                model_config = json.load(f)
-                self.model_version = model_config.get('timestamp', 'unknown')
+            if self.registry.current():
+                stack = self.registry.load()
+            else:
+                stack = load_model_dir(self.models_dir)
+            self._activate_stack(stack)
             
             self.logger.info(f"Modelos carregados com sucesso. Versão: {self.model_version}")
             return True
@@ -150,6 +145,54 @@ class HybridProductionSystem:
             self.logger.error(f"Erro ao carregar modelos: {e}")
             return False
     
+    def _build_model_set(self, stack: ModelStack) -> Dict:
+        """Converte um ModelStack no formato por camada usado em make_prediction"""
+        context = stack.layer('context')
+        micro = stack.layer('micro')
+        meta = stack.layer('meta')
+        
+        required = {
+            'context': (context, ('regime_detector', 'volatility_forecaster', 'session_classifier')),
+            'microstructure': (micro, ('order_flow_analyzer', 'book_dynamics')),
+            'meta_learner': (meta, ('meta_learner',)),
+            'scaler': (stack.scalers, ('context', 'microstructure')),
+        }
+        missing = [f"{layer}/{name}" for layer, (found, names) in required.items()
+                   for name in names if name not in found]
+        if missing:
+            raise ValueError(f"Versão {stack.version} incompleta: {missing}")
+        
+        return {
+            'models': {
+                'context': {name: context[name] for name in required['context'][1]},
+                'microstructure': {name: micro[name] for name in required['microstructure'][1]},
+                'meta_learner': meta['meta_learner'],
+            },
+            'scalers': dict(stack.scalers),
+            'version': stack.version,
+        }
+    
+    def _warm_up(self, model_set: Dict):
+        """Roda as camadas uma vez com entradas zeradas (fora do caminho de inferência)"""
+        try:
+            n_context = model_set['scalers']['context'].n_features_in_
+            n_micro = model_set['scalers']['microstructure'].n_features_in_
+        except AttributeError:
+            return
+        try:
+            self._predict_models(model_set, np.zeros((1, n_context)), np.zeros((1, n_micro)))
+        except Exception as e:
+            self.logger.warning(f"Aquecimento da versão {model_set['version']} falhou: {e}")
+    
+    def _activate_stack(self, stack: ModelStack):
+        """Valida, aquece e troca o conjunto ativo de uma só vez"""
+        model_set = self._build_model_set(stack)
+        self._warm_up(model_set)
+        with self._swap_lock:
+            previous = self._model_set['version']
+            self._model_set = model_set
+        self.logger.info(f"Versão ativa: {model_set['version']} (anterior: {previous})")
+    
     def initialize_components(self):
         """Inicializa componentes do sistema"""
         self.logger.info("Inicializando componentes...")
@@ -178,130 +221,23 @@ class HybridProductionSystem:
         self.logger.info("Componentes inicializados (modo simulado)")
         
     def create_context_features(self, tick_data: pd.DataFrame) -> pd.DataFrame:
-        """Cria features de contexto a partir de tick data"""
-        features = pd.DataFrame()
-        
-        # Médias móveis
-        features['sma_5'] = tick_data['price'].rolling(5).mean()
-        features['sma_20'] = tick_data['price'].rolling(20).mean()
-        features['sma_50'] = tick_data['price'].rolling(50).mean()
-        features['sma_trend'] = (features['sma_5'] - features['sma_20']) / features['sma_20']
-        
-        # Momentum
-        features['momentum_10'] = tick_data['price'].pct_change(10)
-        features['momentum_30'] = tick_data['price'].pct_change(30)
-        features['momentum_60'] = tick_data['price'].pct_change(60)
-        
-        # Volatilidade
-        returns = tick_data['price'].pct_change()
-        features['volatility_10'] = returns.rolling(10).std()
-        features['volatility_30'] = returns.rolling(30).std()
-        features['volatility_60'] = returns.rolling(60).std()
-        features['volatility_ratio'] = features['volatility_10'] / features['volatility_30']
-        
-        # ATR
-        high = tick_data['price'].rolling(20).max()
-        low = tick_data['price'].rolling(20).min()
-        features['atr'] = (high - low) / tick_data['price']
-        
-        # Volume
-        features['volume_ma_10'] = tick_data['volume'].rolling(10).mean()
-        features['volume_ma_30'] = tick_data['volume'].rolling(30).mean()
-        features['volume_ratio'] = tick_data['volume'] / features['volume_ma_30']
-        features['volume_trend'] = features['volume_ma_10'] / features['volume_ma_30']
-        
-        # Temporal
-        features['hour'] = tick_data['timestamp'].dt.hour
-        features['minute'] = tick_data['timestamp'].dt.minute
-        features['day_of_week'] = tick_data['timestamp'].dt.dayofweek
-        features['session'] = pd.cut(
-            features['hour'],
-            bins=[0, 11, 14, 24],
-            labels=[0, 1, 2]
-        ).astype(int)
-        
-        # Microestrutura básica
-        features['aggressor_ratio'] = tick_data.get('aggressor', 0)
-        features['trade_intensity'] = tick_data['volume'].rolling(100).sum()
-        
-        return features
+        """Cria features de contexto a partir de tick data (mesma definição do treino)"""
+        return build_feature_matrix(tick_data, 'context')
     
     def create_book_features(self, book_data: pd.DataFrame) -> pd.DataFrame:
-        """Cria features de book"""
-        features = pd.DataFrame()
-        
-        # Spread
-        features['spread'] = book_data.get('spread', 0)
-        features['spread_ma'] = features['spread'].rolling(20).mean()
-        features['spread_std'] = features['spread'].rolling(20).std()
-        features['spread_normalized'] = (features['spread'] - features['spread_ma']) / (features['spread_std'] + 1e-8)
-        
-        # Imbalance
-        features['imbalance'] = book_data.get('imbalance', 0)
-        features['imbalance_ma'] = features['imbalance'].rolling(20).mean()
-        features['imbalance_momentum'] = features['imbalance'].diff(5)
-        
-        # Volume
-        features['book_pressure'] = book_data.get('book_pressure', 0.5)
-        features['volume_at_best'] = book_data.get('volume_at_best', 0)
-        features['volume_ratio'] = book_data.get('volume_ratio', 1)
-        
-        # Price dynamics
-        features['mid_price'] = book_data.get('mid_price', 0)
-        features['mid_return_1'] = features['mid_price'].pct_change(1)
-        features['mid_return_5'] = features['mid_price'].pct_change(5)
-        features['mid_return_10'] = features['mid_price'].pct_change(10)
-        
-        # Order flow
-        features['bid_change'] = book_data.get('bid_vol_1', 0).diff()
-        features['ask_change'] = book_data.get('ask_vol_1', 0).diff()
-        features['net_order_flow'] = features['bid_change'] - features['ask_change']
-        
-        # Microstructure
-        features['bid_ask_ratio'] = book_data.get('bid_price_1', 1) / (book_data.get('ask_price_1', 1) + 1e-8)
-        features['microprice'] = book_data.get('microprice', features['mid_price'])
-        
-        return features.fillna(0)
+        """Cria features de book (mesma definição do treino)"""
+        return build_feature_matrix(book_data, 'book').fillna(0)
     
     def make_prediction(self, tick_features: pd.DataFrame, book_features: pd.DataFrame) -> Dict[str, Any]:
         """
         Faz predição usando o sistema híbrido completo
         """
+        # Uma leitura do ponteiro: a predição inteira usa a mesma versão
+        model_set = self._model_set
+        
         try:
-            # 1. Predição da Camada 1 (Contexto)
-            context_features_scaled = self.scalers['context'].transform(tick_features)
-            
-            context_predictions = {
-                'regime': self.models['context']['regime_detector'].predict(context_features_scaled)[0],
-                'volatility': self.models['context']['volatility_forecaster'].predict(context_features_scaled)[0],
-                'session': self._decode_xgboost_prediction(
-                    self.models['context']['session_classifier'], 
-                    context_features_scaled
-                )[0]
-            }
-            
-            # 2. Predição da Camada 2 (Microestrutura)
-            book_features_scaled = self.scalers['microstructure'].transform(book_features)
-            
-            micro_predictions = {
-                'order_flow': self.models['microstructure']['order_flow_analyzer'].predict(book_features_scaled)[0],
-                'book_dynamics': self.models['microstructure']['book_dynamics'].predict(book_features_scaled)[0]
-            }
-            
-            # 3. Combinar para Meta-Learner
-            meta_features = pd.DataFrame({
-                'context_pred': [context_predictions['regime']],
-                'micro_pred': [micro_predictions['order_flow']],
-                'agreement': [1 if context_predictions['regime'] == micro_predictions['order_flow'] else 0],
-                'confidence_gap': [abs(context_predictions['regime'] - micro_predictions['order_flow'])]
-            })
-            
-            # 4. Predição final do Meta-Learner
-            final_prediction = self.models['meta_learner'].predict(meta_features)[0]
-            
-            # 5. Calcular confidence
-            probabilities = self.models['meta_learner'].predict_proba(meta_features)[0]
-            confidence = max(probabilities)
+            final_prediction, confidence, context_predictions, micro_predictions = \
+                self._predict_models(model_set, tick_features, book_features)
             
             # 6. Integrar com HMARL se disponível
             if self.hmarl_agents:
@@ -316,6 +252,7 @@ class HybridProductionSystem:
                 'confidence': float(confidence),
                 'context': context_predictions,
                 'micro': micro_predictions,
+                'model_version': model_set['version'],
                 'timestamp': datetime.now()
             }
             
@@ -328,6 +265,48 @@ class HybridProductionSystem:
                 'timestamp': datetime.now()
             }
     
+    def _predict_models(self, model_set: Dict, tick_features, book_features) -> Tuple:
+        """Camadas 1-3 com um conjunto de modelos fixo"""
+        models = model_set['models']
+        scalers = model_set['scalers']
+        
+        # 1. Predição da Camada 1 (Contexto)
+        context_features_scaled = scalers['context'].transform(tick_features)
+        
+        context_predictions = {
+            'regime': models['context']['regime_detector'].predict(context_features_scaled)[0],
+            'volatility': models['context']['volatility_forecaster'].predict(context_features_scaled)[0],
+            'session': self._decode_xgboost_prediction(
+                models['context']['session_classifier'], 
+                context_features_scaled
+            )[0]
+        }
+        
+        # 2. Predição da Camada 2 (Microestrutura)
+        book_features_scaled = scalers['microstructure'].transform(book_features)
+        
+        micro_predictions = {
+            'order_flow': models['microstructure']['order_flow_analyzer'].predict(book_features_scaled)[0],
+            'book_dynamics': models['microstructure']['book_dynamics'].predict(book_features_scaled)[0]
+        }
+        
+        # 3. Combinar para Meta-Learner
+        meta_features = pd.DataFrame({
+            'context_pred': [context_predictions['regime']],
+            'micro_pred': [micro_predictions['order_flow']],
+            'agreement': [1 if context_predictions['regime'] == micro_predictions['order_flow'] else 0],
+            'confidence_gap': [abs(context_predictions['regime'] - micro_predictions['order_flow'])]
+        })
+        
+        # 4. Predição final do Meta-Learner
+        final_prediction = models['meta_learner'].predict(meta_features)[0]
+        
+        # 5. Calcular confidence
+        probabilities = models['meta_learner'].predict_proba(meta_features)[0]
+        confidence = max(probabilities)
+        
+        return final_prediction, confidence, context_predictions, micro_predictions
+    
     def _decode_xgboost_prediction(self, model_wrapper: Any, features: np.ndarray) -> np.ndarray:
         """Decodifica predição do XGBoost"""
         if isinstance(model_wrapper, dict) and 'model' in model_wrapper:
@@ -467,8 +446,14 @@ class HybridProductionSystem:
                 self.logger.warning(f"Dados insuficientes: {len(df_tick)} < {min_samples}")
                 return False
             
-            # 4. Executar pipeline de treinamento
+            # 4. Executar pipeline de treinamento (grava num diretório candidato,
+            #    nunca sobre os modelos em uso)
             pipeline = HybridTradingPipeline()
+            candidate_dir = self.data_dir / "candidate_models"
+            if candidate_dir.exists():
+                shutil.rmtree(candidate_dir)
+            candidate_dir.mkdir(parents=True)
+            pipeline.models_dir = candidate_dir
             
             # Salvar dados temporários para o pipeline
             temp_tick = self.data_dir / "temp_tick.csv"
@@ -491,13 +476,19 @@ class HybridProductionSystem:
                 self.logger.warning(f"Novos modelos rejeitados. Acurácia: {new_accuracy:.2%}")
                 return False
             
-            # 6. Backup dos modelos antigos
+            # 6. Registrar versão base (rollback) e a nova versão com checksums
             self._backup_current_models()
+            version = self.registry.publish(
+                candidate_dir,
+                metrics={'accuracy': new_accuracy},
+                metadata={'tick_samples': len(df_tick), 'book_samples': len(df_book)}
+            )
             
-            # 7. Substituir modelos em produção
-            self.models = pipeline.models
-            self.scalers = pipeline.scalers
-            self.model_version = f"v{datetime.now():%Y%m%d_%H%M}"
+            # 7. Carregar, aquecer e trocar o ponteiro (inferência segue na
+            #    versão anterior até a nova estar pronta)
+            self._activate_stack(self.registry.load(version))
+            self.registry.activate(version)
+            self.registry.prune(keep=self.config.get('model_versions_to_keep', 7))
             
             self.logger.info(f"Re-treinamento concluído. Nova versão: {self.model_version}")
             
@@ -520,22 +511,20 @@ class HybridProductionSystem:
             return 0.0
     
     def _backup_current_models(self):
-        """Faz backup dos modelos atuais"""
+        """
+        Registra os modelos de models/hybrid como versão base
+        
+        Só na primeira vez (registro sem versão ativa); depois disso as
+        versões anteriores já ficam no registro para rollback.
+        """
         try:
-            backup_dir = Path("models/backup") / datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Copiar todos os arquivos de modelo
-            import shutil
-            for model_file in self.models_dir.glob("**/*.pkl"):
-                dest = backup_dir / model_file.relative_to(self.models_dir)
-                dest.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(model_file, dest)
-                
-            self.logger.info(f"Backup criado em: {backup_dir}")
+            if self.registry.current() is None and any(self.models_dir.glob("**/*.pkl")):
+                version = self.registry.publish(self.models_dir, metadata={'source': 'baseline'})
+                self.registry.activate(version)
+                self.logger.info(f"Versão base registrada: {version}")
             
         except Exception as e:
-            self.logger.error(f"Erro ao criar backup: {e}")
+            self.logger.error(f"Erro ao registrar versão base: {e}")
     
     def _cleanup_old_training_data(self, days_to_keep: int = 7):
         """Remove dados de treinamento antigos"""
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Replay de Sessão - Pipeline completo sem ProfitDLL
+Reproduz book/trades gravados por QuantumTraderCompleteOCOEvents
+(features, HybridMLPredictor, HMARL, regime e OCO) com conexão simulada
+e imprime throughput/latência por estágio
+
+Uso:
+    python replay_session.py [data/book_tick_data] [--speed 0] [--start 2025-08-28]
+                             [--end 2025-08-29] [--report data/replay/report.json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Replay não grava dados nem agenda re-treinamento
+os.environ.setdefault('ENABLE_DATA_RECORDING', 'false')
+os.environ.setdefault('ENABLE_DAILY_TRAINING', 'false')
+
+import START_SYSTEM_COMPLETE_OCO_EVENTS as production
+from src.events import init_event_system
+from src.replay import (
+    SimulatedConnectionManager,
+    ReplayEngine,
+    ReplayClock,
+    load_market_events,
+    format_report
+)
+
+
+def build_system():
+    """Monta o sistema de produção ligado a uma conexão simulada"""
+    system = production.QuantumTraderCompleteOCOEvents()
+    system.event_bus = init_event_system()
+    system.setup_event_handlers()
+    system.load_hybrid_models()
+
+    connection = SimulatedConnectionManager(symbol=system.symbol)
+    system.attach_connection(connection)
+    connection.connect()
+
+    system.enable_trading = True      # ordens vão para a conexão simulada
+    system.position_checker = None    # depende da DLL
+    return system, connection
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay de sessão gravada")
+    parser.add_argument("data_dir", nargs="?", default="data/book_tick_data")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="0 = o mais rápido possível, 1 = tempo real, N = N x")
+    parser.add_argument("--start", default=None, help="Início (inclusivo)")
+    parser.add_argument("--end", default=None, help="Fim (exclusivo)")
+    parser.add_argument("--decision-interval", type=float, default=5.0,
+                        help="Segundos (horário gravado) entre ciclos de decisão")
+    parser.add_argument("--max-events", type=int, default=None)
+    parser.add_argument("--report", default=None, help="Salvar relatório JSON")
+    parser.add_argument("--quiet", action="store_true", help="Logs apenas de aviso")
+    args = parser.parse_args()
+
+    system, connection = build_system()
+    if args.quiet:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    events = load_market_events(args.data_dir, args.start, args.end, symbol=system.symbol)
+
+    clock = ReplayClock(connection)
+    clock.install(production)
+    engine = ReplayEngine(system, connection, speed=args.speed,
+                          decision_interval=args.decision_interval)
+    try:
+        report = engine.run(events, max_events=args.max_events)
+    finally:
+        clock.restore()
+        if system.event_bus:
+            system.event_bus.stop()
+        connection.disconnect()
+
+    print(format_report(report))
+
+    if args.report:
+        report_path = Path(args.report)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Relatório salvo em {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,281 @@
 """
 Agentes HMARL Real-time - Versão que realmente processa dados do mercado
+
+As regras dos quatro agentes são avaliadas de uma vez, com operações
+vetorizadas sobre um vetor de features de layout fixo (AGENT_SCHEMA). O
+mesmo caminho pontua uma linha (tempo real) ou uma matriz de ticks
+históricos (backtest dos agentes).
 """
 
 import numpy as np
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 from collections import deque
-import random
 import time
-import json
-from pathlib import Path
+
+try:
+    from src.features.feature_schema import FeatureSchema, FeatureBinding
+    from src.monitoring.status_channel import publish_status
+except ImportError:
+    from features.feature_schema import FeatureSchema, FeatureBinding
+    from monitoring.status_channel import publish_status
 
 logger = logging.getLogger(__name__)
 
+
+AGENT_NAMES = ('OrderFlowSpecialist', 'LiquidityAgent', 'TapeReadingAgent', 'FootprintPatternAgent')
+AGENT_WEIGHTS = (0.30, 0.20, 0.25, 0.25)
+
+# Features vindas do dict do sistema (nome, valor quando ausente)
+MARKET_FEATURES = (
+    ('delta_volume', 0.0),
+    ('buy_sell_ratio', 1.0),
+    ('volume_pressure', 0.0),
+    ('order_flow_imbalance_5', 0.0),
+    ('signed_volume_5', 0.0),
+    ('trade_flow_5', 0.0),
+    ('volume_ratio', 1.0),
+    ('spread', 0.5),
+    ('book_depth_imbalance', 0.0),
+    ('bid_levels_active', 5.0),
+    ('ask_levels_active', 5.0),
+    ('volume', 0.0),
+    ('cumulative_volume', 0.0),
+)
+
+# Estado derivado dos buffers de preço/volume/book
+BUFFER_FEATURES = (
+    ('has_features', 0.0),
+    ('n_prices', 0.0),
+    ('n_volumes', 0.0),
+    ('n_books', 0.0),
+    ('book_samples', 0.0),
+    ('flow_vol_trend', 0.0),
+    ('flow_volume_weighted', 0.0),
+    ('book_spread_mean', 0.5),
+    ('book_imbalance_mean', 0.0),
+    ('tape_momentum', 0.0),
+    ('tape_volatility', 0.0),
+    ('poc_samples', 0.0),
+    ('poc_distance', 0.0),
+    ('poc_strength', 0.0),
+)
+
+AGENT_SCHEMA = FeatureSchema(
+    [name for name, _ in MARKET_FEATURES + BUFFER_FEATURES],
+    name='hmarl_agents', dtype=np.float64
+)
+AGENT_DEFAULTS = np.array([value for _, value in MARKET_FEATURES + BUFFER_FEATURES])
+# Features de mercado ocupam o início de AGENT_SCHEMA (destino de bind_features)
+MARKET_SCHEMA = FeatureSchema([name for name, _ in MARKET_FEATURES],
+                              name='hmarl_market', dtype=np.float64)
+_N_MARKET = len(MARKET_FEATURES)
+_MARKET_INDEX = tuple((AGENT_SCHEMA.index[name], name) for name, _ in MARKET_FEATURES)
+_I = AGENT_SCHEMA.index
+
+# Janelas das regras dos agentes
+FLOW_WINDOW = 10
+BOOK_WINDOW = 5
+TAPE_WINDOW = 20
+TAPE_SHORT_WINDOW = 5
+FOOTPRINT_WINDOW = 30
+POC_TICK = 0.5
+
+
+def score_agents(X: np.ndarray, now: Optional[float] = None, rng=None,
+                 state: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Avalia os quatro agentes sobre vetores no layout AGENT_SCHEMA
+
+    Args:
+        X: Vetor (n_features,) ou matriz (n_amostras, n_features)
+        now: Relógio para a variação temporal das confianças; None desliga
+             a variação (backtest determinístico)
+        rng: Fonte de np.random para a variação aleatória do aquecimento;
+             None desliga
+        state: Estado dos agentes (tempo real): 'signals' (último sinal por
+               agente) e 'flow_confidence'; ativa o decay de confiança
+
+    Returns:
+        (sinais, confianças, ativos): arrays (n_amostras, 4) na ordem de
+        AGENT_NAMES; `ativos` marca as avaliações que passam pelo estado
+        do agente (as demais são respostas de aquecimento)
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    n = len(X)
+
+    def col(name):
+        return X[:, _I[name]]
+
+    if now is None:
+        flow_var, liq_tf, tape_tf, fp_tf = 0.0, 1.0, 1.0, 1.0
+    else:
+        flow_var = np.sin(now / 5) * 0.05
+        liq_tf = 1.0 + np.sin(now / 10) * 0.05
+        tape_tf = 0.95 + 0.1 * np.sin(now / 10)
+        fp_tf = 0.95 + 0.1 * np.cos(now / 15)
+    jitter = rng.uniform(0.95, 1.05, (2, n)) if rng is not None else np.ones((2, n))
+
+    has_f = col('has_features') > 0
+    n_prices, n_volumes, n_books = col('n_prices'), col('n_volumes'), col('n_books')
+    delta = col('delta_volume')
+
+    signals = np.zeros((n, 4))
+    confidences = np.empty((n, 4))
+    active = np.empty((n, 4), dtype=bool)
+
+    # OrderFlowSpecialist - fluxo de ordens
+    combined = np.where(
+        delta != 0,
+        np.sign(delta) * 0.5 + (col('buy_sell_ratio') - 1.0) * 0.3 + col('volume_pressure') * 0.2,
+        col('order_flow_imbalance_5') * 0.4 + np.sign(col('signed_volume_5')) * 0.3
+        + np.sign(col('trade_flow_5')) * 0.3
+    )
+    flow_signal = np.where(combined > 0.3, 1.0, np.where(combined < -0.3, -1.0, combined))
+    flow_base = np.minimum(np.abs(combined) + 0.3, 0.95)
+    if state is not None:
+        # Valor travado: reduzir 5%
+        stuck = np.abs(state['flow_confidence'] - flow_base) < 0.01
+        flow_base = np.where(stuck, flow_base * 0.95, flow_base)
+    flow_conf = np.clip(flow_base + flow_var, 0.3, 0.95)
+
+    weighted = col('flow_volume_weighted')
+    trend = col('flow_vol_trend')
+    buffer_signal = np.select(
+        [weighted > 0, weighted < 0],
+        [np.where(trend > 0, 1.0, 0.5), np.where(trend < 0, -1.0, -0.5)], 0.0
+    )
+    buffer_conf = np.minimum(np.abs(weighted) / 1000 + 0.5, 0.95)
+    flow_ready = (n_volumes >= FLOW_WINDOW) & (n_prices >= FLOW_WINDOW)
+    signals[:, 0] = np.where(has_f, flow_signal, np.where(flow_ready, buffer_signal, 0.0))
+    confidences[:, 0] = np.where(has_f, flow_conf, np.where(flow_ready, buffer_conf, 0.5))
+    active[:, 0] = has_f | (n_volumes >= FLOW_WINDOW)
+
+    # LiquidityAgent - liquidez do book
+    volume_ratio, spread = col('volume_ratio'), col('spread')
+    level_ratio = col('bid_levels_active') / (col('ask_levels_active') + 1)
+    liquidity = np.where(volume_ratio > 1.2, 0.3, np.where(volume_ratio < 0.8, -0.3, 0.0))
+    liquidity = liquidity + np.where(spread < 0.5, 0.2, np.where(spread > 1.0, -0.2, 0.0))
+    liquidity = liquidity + col('book_depth_imbalance') * 0.3
+    liquidity = liquidity + np.where(level_ratio > 1.3, 0.2, np.where(level_ratio < 0.7, -0.2, 0.0))
+
+    avg_spread, avg_imbalance = col('book_spread_mean'), col('book_imbalance_mean')
+    tight = avg_spread < 0.5
+    book_signal = np.select(
+        [tight & (avg_imbalance > 0.1), tight & (avg_imbalance < -0.1), avg_spread > 1.0],
+        [1.0, -1.0, 0.0], avg_imbalance
+    )
+    # Janela sem books em dict: neutro
+    has_books = col('book_samples') > 0
+    book_signal = np.where(has_books, book_signal, 0.0)
+    book_conf = np.where(has_books, np.maximum(0.3, np.minimum(0.9, 1.0 - avg_spread / 2.0)), 0.5)
+    books_ready = n_books >= BOOK_WINDOW
+    liq_active = has_f | books_ready
+    signals[:, 1] = np.where(has_f, np.clip(liquidity, -1, 1), np.where(books_ready, book_signal, 0.0))
+    liq_conf = np.where(has_f, np.minimum(np.abs(liquidity) + 0.4, 0.9), book_conf)
+    confidences[:, 1] = np.where(liq_active, np.minimum(liq_conf * liq_tf, 0.95), 0.5)
+    active[:, 1] = liq_active
+
+    # TapeReadingAgent - fita de operações
+    volume = col('volume')
+    tape_direct = has_f & (col('cumulative_volume') > 0)
+    direct_signal = np.select([volume > 50, volume > 10],
+                              [np.sign(delta) * 0.8, np.sign(delta) * 0.4], 0.0)
+    direct_conf = np.select([volume > 50, volume > 10], [np.minimum(volume / 100, 0.9), 0.6], 0.5)
+
+    momentum, volatility = col('tape_momentum'), col('tape_volatility')
+    calm = volatility < 0.01
+    # Threshold ajustado para WDO: 0.0001 = ~0.55 pontos
+    tape_signal = np.select(
+        [momentum > 0.0001, momentum < -0.0001],
+        [np.where(calm, 1.0, 0.5), np.where(calm, -1.0, -0.5)], 0.0
+    )
+    strength = np.abs(momentum) / 0.0001
+    tape_conf = np.maximum(0.3, np.minimum(
+        0.95, (1.0 - volatility * 10) * (0.5 + strength * 0.1) * tape_tf))
+    tape_ready = ~tape_direct & (n_prices >= TAPE_WINDOW)
+    if state is not None:
+        unchanged = np.abs(tape_signal - state['signals'][2]) < 0.01
+        tape_conf = np.where(unchanged, np.maximum(tape_conf * 0.98, 0.3), tape_conf)
+    warmup_conf = np.where(n_prices >= 5, np.minimum(0.3 + n_prices * 0.02, 0.6) * jitter[0], 0.3)
+    signals[:, 2] = np.where(tape_direct, direct_signal, np.where(tape_ready, tape_signal, 0.0))
+    confidences[:, 2] = np.where(tape_direct, direct_conf, np.where(tape_ready, tape_conf, warmup_conf))
+    active[:, 2] = tape_ready
+
+    # FootprintPatternAgent - padrões de pegada (POC dos buffers, inclusive
+    # com features: a pontuação das features nunca chegava ao resultado)
+    distance = col('poc_distance')
+    # Threshold ajustado para WDO: 0.0002 = ~1.1 pontos
+    poc_signal = np.select([distance > 0.0002, distance < -0.0002], [-0.5, 0.5], 0.0)
+    distance_factor = np.minimum(np.abs(distance) / 0.0002, 2.0)
+    poc_conf = np.maximum(0.3, np.minimum(
+        0.95, (0.4 + col('poc_strength') * 0.4 + distance_factor * 0.1) * fp_tf))
+
+    # Com features o POC usa o que houver nos buffers; sem pares, neutro
+    has_poc = col('poc_samples') > 0
+    poc_signal = np.where(has_poc, poc_signal, 0.0)
+    poc_conf = np.where(has_poc, poc_conf, 0.5)
+    poc_ready = (n_prices >= FOOTPRINT_WINDOW) & (n_volumes >= FOOTPRINT_WINDOW)
+    fp_active = has_f | poc_ready
+    fp_signal = np.where(fp_active, poc_signal, 0.0)
+    fp_conf = poc_conf
+    if state is not None:
+        unchanged = np.abs(fp_signal - state['signals'][3]) < 0.01
+        fp_conf = np.where(unchanged, np.maximum(fp_conf * 0.98, 0.25), fp_conf)
+    warmup_conf = np.where((n_prices >= 10) & (n_volumes >= 10),
+                           (0.3 + np.minimum(n_prices * 0.01, 0.3)) * jitter[1], 0.25)
+    signals[:, 3] = fp_signal
+    confidences[:, 3] = np.where(fp_active, fp_conf, warmup_conf)
+    active[:, 3] = fp_active
+
+    return signals, confidences, active
+
+
+def consensus_scores(signals: np.ndarray, confidences: np.ndarray,
+                     weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Consenso ponderado (peso × confiança) dos agentes, por amostra
+
+    Args:
+        signals: Sinais (n_amostras, 4)
+        confidences: Confianças (n_amostras, 4)
+        weights: Peso de cada agente (4,)
+
+    Returns:
+        (sinal final, confiança do consenso, ação: 1 BUY, -1 SELL, 0 HOLD)
+    """
+    signals = np.atleast_2d(signals)
+    confidences = np.atleast_2d(confidences)
+    total = (confidences * weights).sum(axis=1)
+    final = np.divide((signals * weights * confidences).sum(axis=1), total,
+                      out=np.zeros_like(total), where=total > 0)
+    action = np.where(final > 0.3, 1, np.where(final < -0.3, -1, 0))
+    return final, np.minimum(total, 1.0), action
+
+
 class HMARLAgentsRealtime:
     """Agentes HMARL que processam dados reais do mercado"""
-    
+
     def __init__(self):
         self.name = "HMARL_Realtime"
         self.agents = {
-            'OrderFlowSpecialist': {'weight': 0.30, 'bias': 0},
-            'LiquidityAgent': {'weight': 0.20, 'bias': 0},
-            'TapeReadingAgent': {'weight': 0.25, 'bias': 0},
-            'FootprintPatternAgent': {'weight': 0.25, 'bias': 0}
+            name: {'weight': weight, 'bias': 0}
+            for name, weight in zip(AGENT_NAMES, AGENT_WEIGHTS)
         }
-        
+
         # Buffers para análise
         self.price_buffer = deque(maxlen=100)
         self.volume_buffer = deque(maxlen=100)
         self.book_buffer = deque(maxlen=50)
-        
+
+        self.last_features = None
+        self.last_consensus = None
+        self._vector = AGENT_SCHEMA.new_vector()
+        # Features de mercado recebidas como vetor (update_market_data com binding)
+        self._market = AGENT_DEFAULTS[:_N_MARKET].copy()
+        self._market_bound = False
+
         # Estados dos agentes com decay
         self.agent_states = {}
         for agent in self.agents:
@@ -41,498 +286,223 @@ class HMARLAgentsRealtime:
                 'last_change_time': time.time(),
                 'confidence_decay_rate': 0.98  # Decai 2% por atualização sem mudança
             }
-        
+        self._state = {'signals': np.zeros(len(AGENT_NAMES)), 'flow_confidence': 0.0}
+
         logger.info("HMARLAgentsRealtime inicializado")
-    
-    def update_market_data(self, price: float = None, volume: float = None, 
-                          book_data: Dict = None, features: Dict = None):
-        """Atualiza dados de mercado"""
+
+    def bind_features(self, producer_names: List[str]) -> FeatureBinding:
+        """
+        Compila (uma vez) o mapeamento do vetor de um produtor para as
+        features de mercado dos agentes
+
+        Args:
+            producer_names: Ordem das features no vetor do produtor
+        """
+        return MARKET_SCHEMA.bind(producer_names)
+
+    def update_market_data(self, price: float = None, volume: float = None,
+                          book_data: Dict = None, features: Dict = None,
+                          feature_vector: Optional[np.ndarray] = None,
+                          binding: Optional[FeatureBinding] = None):
+        """
+        Atualiza dados de mercado
+
+        As features chegam como dict (`features`) ou como o vetor de um
+        produtor mais o binding de bind_features(); features de mercado sem
+        produtor mantêm o valor padrão dos agentes.
+        """
         if price is not None and price > 0:
             self.price_buffer.append(price)
-            
+
         if volume is not None and volume > 0:
             self.volume_buffer.append(volume)
-            
+
         if book_data is not None:
             self.book_buffer.append(book_data)
-        
+
         # Se features foram passadas, usar para análise mais precisa
         if features:
             self.last_features = features
-    
+        elif feature_vector is not None and binding is not None:
+            binding.gather(feature_vector, out=self._market)
+            self.last_features = None
+            self._market_bound = True
+
+    def feature_vector(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Monta o vetor AGENT_SCHEMA com as features e o estado dos buffers
+
+        Args:
+            out: Destino (padrão: vetor interno, reutilizado a cada chamada)
+
+        Returns:
+            Vetor de features dos agentes
+        """
+        vec = self._vector if out is None else out
+        vec[:] = AGENT_DEFAULTS
+
+        features = self.last_features
+        if features:
+            vec[_I['has_features']] = 1.0
+            get = features.get
+            for i, name in _MARKET_INDEX:
+                value = get(name)
+                if value is not None:
+                    vec[i] = value
+        elif self._market_bound:
+            vec[_I['has_features']] = 1.0
+            vec[:_N_MARKET] = self._market
+        features = bool(features) or self._market_bound
+
+        prices, volumes, books = self.price_buffer, self.volume_buffer, self.book_buffer
+        n_prices, n_volumes, n_books = len(prices), len(volumes), len(books)
+        vec[_I['n_prices']] = n_prices
+        vec[_I['n_volumes']] = n_volumes
+        vec[_I['n_books']] = n_books
+
+        # Estatísticas das janelas com as mesmas expressões das regras
+        # originais: os limiares veem exatamente os mesmos valores
+        if n_books >= BOOK_WINDOW:
+            recent_books = [b for b in list(books)[-BOOK_WINDOW:] if isinstance(b, dict)]
+            vec[_I['book_samples']] = len(recent_books)
+            if recent_books:
+                vec[_I['book_spread_mean']] = np.mean([b.get('spread', 0.5) for b in recent_books])
+                vec[_I['book_imbalance_mean']] = np.mean([b.get('imbalance', 0) for b in recent_books])
+
+        if n_prices >= TAPE_WINDOW:
+            window = list(prices)[-TAPE_WINDOW:]
+            long_ma = np.mean(window)
+            vec[_I['tape_momentum']] = (np.mean(window[-TAPE_SHORT_WINDOW:]) - long_ma) / long_ma
+            vec[_I['tape_volatility']] = np.std(window) / np.mean(window)
+
+        if not features and n_volumes >= FLOW_WINDOW:
+            recent_vol = list(volumes)[-FLOW_WINDOW:]
+            avg_vol = np.mean(recent_vol)
+            vec[_I['flow_vol_trend']] = (recent_vol[-1] - avg_vol) / (avg_vol + 1e-8)
+            if n_prices >= FLOW_WINDOW:
+                price_changes = np.diff(list(prices)[-FLOW_WINDOW:])
+                vec[_I['flow_volume_weighted']] = sum(
+                    p * v for p, v in zip(price_changes, recent_vol[1:])
+                )
+
+        # POC: sempre com features; sem elas, só com as janelas cheias
+        if features or (n_prices >= FOOTPRINT_WINDOW and n_volumes >= FOOTPRINT_WINDOW):
+            window_prices = list(prices)[-FOOTPRINT_WINDOW:]
+            # Volume por nível de preço (arredondado a 0.5): Point of Control
+            price_levels = {}
+            for p, v in zip(window_prices, list(volumes)[-FOOTPRINT_WINDOW:]):
+                level = round(p / POC_TICK) * POC_TICK
+                price_levels[level] = price_levels.get(level, 0) + v
+            if price_levels:
+                poc_level = max(price_levels, key=price_levels.get)
+                current_price = window_prices[-1]
+                vec[_I['poc_samples']] = len(price_levels)
+                vec[_I['poc_distance']] = (current_price - poc_level) / current_price
+                vec[_I['poc_strength']] = price_levels[poc_level] / sum(price_levels.values())
+
+        return vec
+
+    def _weights(self) -> np.ndarray:
+        return np.array([self.agents[name]['weight'] for name in AGENT_NAMES])
+
+    def evaluate(self, agent: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Avalia todos os agentes de uma vez sobre o vetor atual
+
+        Atualiza o estado (decay e último sinal) dos agentes avaliados.
+
+        Args:
+            agent: Índice em AGENT_NAMES cujo estado deve ser atualizado
+                   (padrão: todos)
+
+        Returns:
+            (sinais, confianças) na ordem de AGENT_NAMES
+        """
+        now = time.time()
+        signals, confidences, active = score_agents(
+            self.feature_vector(), now=now, rng=np.random, state=self._state
+        )
+        signals, confidences, active = signals[0], confidences[0], active[0]
+
+        update = range(len(AGENT_NAMES)) if agent is None else (agent,)
+        if 0 in update and active[0] and (self.last_features or self._market_bound):
+            self._state['flow_confidence'] = confidences[0]
+        last = self._state['signals']
+        for i in update:
+            if not active[i]:
+                continue
+            name = AGENT_NAMES[i]
+            state = self.agent_states[name]
+            if abs(signals[i] - last[i]) >= 0.01:
+                state['last_change_time'] = now
+            state['last_signal'] = float(signals[i])
+            state['confidence'] = float(confidences[i])
+            last[i] = signals[i]
+
+        return signals, confidences
+
     def analyze_order_flow(self) -> tuple[float, float]:
         """OrderFlowSpecialist - Analisa fluxo de ordens"""
-        
-        # Usar features se disponíveis
-        if hasattr(self, 'last_features') and self.last_features:
-            # USAR VOLUME REAL DO VOLUMETRACKER!
-            delta_volume = self.last_features.get('delta_volume', 0)
-            buy_sell_ratio = self.last_features.get('buy_sell_ratio', 1.0)
-            volume_pressure = self.last_features.get('volume_pressure', 0)
-            
-            # Manter features antigas como fallback
-            ofi = self.last_features.get('order_flow_imbalance_5', 0)
-            signed_vol = self.last_features.get('signed_volume_5', 0)
-            trade_flow = self.last_features.get('trade_flow_5', 0)
-            
-            # Calcular sinal baseado nas features com PRIORIDADE para volume real
-            if delta_volume != 0:  # Temos volume real!
-                # Usar volume real com peso maior
-                combined = (
-                    np.sign(delta_volume) * 0.5 +  # Delta volume tem peso maior
-                    (buy_sell_ratio - 1.0) * 0.3 + # Ratio de compra/venda
-                    volume_pressure * 0.2           # Pressão de volume
-                )
-            else:
-                # Fallback para features antigas
-                combined = ofi * 0.4 + np.sign(signed_vol) * 0.3 + np.sign(trade_flow) * 0.3
-            
-            if combined > 0.3:
-                signal = 1
-            elif combined < -0.3:
-                signal = -1
-            else:
-                signal = combined
-            
-            # Confiança baseada na força do sinal
-            # Confiança com variação temporal para evitar travamento
-            base_confidence = min(abs(combined) + 0.3, 0.95)
-            
-            # Adicionar variação temporal
-            time_var = np.sin(time.time() / 5) * 0.05  # ±5% de variação
-            
-            # Aplicar decay se valor está travado
-            state = self.agent_states['OrderFlowSpecialist']
-            if abs(state.get('last_confidence', 0) - base_confidence) < 0.01:
-                # Valor travado, aplicar decay
-                base_confidence = base_confidence * 0.95  # Reduz 5%
-            
-            # Garantir variação
-            confidence = np.clip(base_confidence + time_var, 0.3, 0.95)
-            state['last_confidence'] = confidence
-            
-        elif len(self.volume_buffer) < 10:
-            return 0, 0.5
-        else:
-            # Análise de volume (fallback)
-            recent_vol = list(self.volume_buffer)[-10:]
-            avg_vol = np.mean(recent_vol)
-            vol_trend = (recent_vol[-1] - avg_vol) / (avg_vol + 1e-8)
-            
-            # Análise de preço com volume
-            if len(self.price_buffer) >= 10:
-                price_changes = np.diff(list(self.price_buffer)[-10:])
-                volume_weighted = sum(p * v for p, v in zip(price_changes, recent_vol[1:]))
-                
-                # Sinal baseado em volume ponderado
-                if volume_weighted > 0:
-                    signal = 1 if vol_trend > 0 else 0.5
-                elif volume_weighted < 0:
-                    signal = -1 if vol_trend < 0 else -0.5
-                else:
-                    signal = 0
-                    
-                # Confiança baseada na força do movimento
-                confidence = min(abs(volume_weighted) / 1000 + 0.5, 0.95)
-            else:
-                signal = 0
-                confidence = 0.5
-        
-        self.agent_states['OrderFlowSpecialist']['last_signal'] = signal
-        self.agent_states['OrderFlowSpecialist']['confidence'] = confidence
-        
-        return signal, confidence
-    
+        signals, confidences = self.evaluate(0)
+        return float(signals[0]), float(confidences[0])
+
     def analyze_liquidity(self) -> tuple[float, float]:
         """LiquidityAgent - Analisa liquidez do book"""
-        
-        # Usar features se disponíveis
-        if hasattr(self, 'last_features') and self.last_features:
-            volume_ratio = self.last_features.get('volume_ratio', 1.0)
-            spread = self.last_features.get('spread', 0.5)
-            depth_imb = self.last_features.get('book_depth_imbalance', 0)
-            bid_levels = self.last_features.get('bid_levels_active', 5)
-            ask_levels = self.last_features.get('ask_levels_active', 5)
-            
-            # Score de liquidez
-            liquidity_score = 0
-            
-            # Volume ratio favorece compra/venda
-            if volume_ratio > 1.2:
-                liquidity_score += 0.3
-            elif volume_ratio < 0.8:
-                liquidity_score -= 0.3
-            
-            # Spread estreito indica boa liquidez
-            if spread < 0.5:
-                liquidity_score += 0.2
-            elif spread > 1.0:
-                liquidity_score -= 0.2
-            
-            # Profundidade do book
-            liquidity_score += depth_imb * 0.3
-            
-            # Níveis ativos
-            level_ratio = bid_levels / (ask_levels + 1)
-            if level_ratio > 1.3:
-                liquidity_score += 0.2
-            elif level_ratio < 0.7:
-                liquidity_score -= 0.2
-            
-            # Determinar sinal
-            signal = np.clip(liquidity_score, -1, 1)
-            
-            # Confiança baseada na clareza do sinal
-            confidence = min(abs(liquidity_score) + 0.4, 0.9)
-            
-        elif len(self.book_buffer) < 5:
-            return 0, 0.5
-        else:
-            # Análise fallback
-            recent_books = list(self.book_buffer)[-5:]
-            
-            # Análise de spread e profundidade
-            spreads = []
-            imbalances = []
-            
-            for book in recent_books:
-                if isinstance(book, dict):
-                    spread = book.get('spread', 0.5)
-                    imbalance = book.get('imbalance', 0)
-                    spreads.append(spread)
-                    imbalances.append(imbalance)
-            
-            if spreads and imbalances:
-                avg_spread = np.mean(spreads)
-                avg_imbalance = np.mean(imbalances)
-                
-                # Sinal baseado em liquidez
-                if avg_spread < 0.5 and avg_imbalance > 0.1:
-                    signal = 1  # Boa liquidez, pressão compradora
-                elif avg_spread < 0.5 and avg_imbalance < -0.1:
-                    signal = -1  # Boa liquidez, pressão vendedora
-                elif avg_spread > 1.0:
-                    signal = 0  # Baixa liquidez, neutro
-                else:
-                    signal = avg_imbalance  # Usar imbalance como sinal
-                
-                # Confiança baseada no spread
-                confidence = max(0.3, min(0.9, 1.0 - avg_spread / 2.0))
-            else:
-                signal = 0
-                confidence = 0.5
-        
-        # Adicionar variação temporal
-        time_factor = 1.0 + (np.sin(time.time() / 10) * 0.05)  # ±5% variação
-        confidence = min(confidence * time_factor, 0.95)
-        
-        self.agent_states['LiquidityAgent']['last_signal'] = signal
-        self.agent_states['LiquidityAgent']['confidence'] = confidence
-        
-        return signal, confidence
-    
+        signals, confidences = self.evaluate(1)
+        return float(signals[1]), float(confidences[1])
+
     def analyze_tape(self) -> tuple[float, float]:
         """TapeReadingAgent - Analisa fita de operações"""
-        
-        # Usar features se disponíveis
-        if hasattr(self, 'last_features') and self.last_features:
-            # USAR VOLUME REAL!
-            current_volume = self.last_features.get('volume', 0)
-            cumulative_volume = self.last_features.get('cumulative_volume', 0)
-            delta_volume = self.last_features.get('delta_volume', 0)
-            
-            # Análise de velocidade de negociação
-            if cumulative_volume > 0:
-                # Volume acelerado indica momentum
-                if current_volume > 50:  # Alto volume no último trade
-                    signal = np.sign(delta_volume) * 0.8
-                    confidence = min(current_volume / 100, 0.9)  # Confiança baseada no volume
-                elif current_volume > 10:
-                    signal = np.sign(delta_volume) * 0.4
-                    confidence = 0.6
-                else:
-                    signal = 0
-                    confidence = 0.5
-                    
-                return signal, confidence
-        
-        buffer_size = len(self.price_buffer)
-        
-        # Log para debug
-        if buffer_size % 10 == 0:  # Log a cada 10 updates
-            logger.debug(f"TapeReading buffer size: {buffer_size}")
-        
-        if buffer_size < 20:
-            # Retornar valores variáveis mesmo com poucos dados
-            if buffer_size >= 5:
-                prices = list(self.price_buffer)
-                vol = np.std(prices) / (np.mean(prices) + 1e-8)
-                # Adicionar aleatoriedade pequena para evitar valores fixos
-                random_factor = np.random.uniform(0.95, 1.05)
-                return 0, min(0.3 + buffer_size * 0.02, 0.6) * random_factor
-            return 0, 0.3
-        
-        prices = list(self.price_buffer)[-20:]
-        
-        # Análise de momentum
-        short_ma = np.mean(prices[-5:])
-        long_ma = np.mean(prices)
-        
-        momentum = (short_ma - long_ma) / long_ma
-        
-        # Análise de volatilidade
-        volatility = np.std(prices) / np.mean(prices)
-        
-        # Log detalhado
-        logger.debug(
-            f"TapeReading - Momentum: {momentum:.6f} | "
-            f"Volatility: {volatility:.6f} | "
-            f"Short MA: {short_ma:.2f} | Long MA: {long_ma:.2f}"
-        )
-        
-        # Sinal baseado em momentum e volatilidade
-        # Threshold ajustado para WDO: 0.0001 = ~0.55 pontos
-        if momentum > 0.0001:
-            signal = 1 if volatility < 0.01 else 0.5
-        elif momentum < -0.0001:
-            signal = -1 if volatility < 0.01 else -0.5
-        else:
-            signal = 0
-        
-        # Confiança baseada em clareza do movimento e força do sinal
-        base_confidence = 1.0 - volatility * 10
-        signal_strength = abs(momentum) / 0.0001  # Normalizar pelo threshold
-        
-        # Adicionar variação temporal para evitar valores fixos
-        time_factor = 0.95 + 0.1 * np.sin(time.time() / 10)  # Oscila entre 0.95 e 1.05
-        confidence = max(0.3, min(0.95, base_confidence * (0.5 + signal_strength * 0.1) * time_factor))
-        
-        # Aplicar decay se sinal não mudou
-        state = self.agent_states['TapeReadingAgent']
-        if abs(signal - state['last_signal']) < 0.01:  # Sem mudança significativa
-            # Aplicar decay
-            confidence = confidence * state['confidence_decay_rate']
-            confidence = max(confidence, 0.3)  # Mínimo de 30%
-        else:
-            # Sinal mudou, resetar tempo
-            state['last_change_time'] = time.time()
-        
-        state['last_signal'] = signal
-        state['confidence'] = confidence
-        
-        return signal, confidence
-    
+        signals, confidences = self.evaluate(2)
+        return float(signals[2]), float(confidences[2])
+
     def analyze_footprint(self) -> tuple[float, float]:
         """FootprintPatternAgent - Analisa padrões de pegada"""
-        
-        # Usar features se disponíveis
-        if hasattr(self, 'last_features') and self.last_features:
-            # USAR VOLUME REAL DO TRACKER!
-            delta_volume = self.last_features.get('delta_volume', 0)
-            buy_volume = self.last_features.get('buy_volume', 0)
-            sell_volume = self.last_features.get('sell_volume', 0)
-            cumulative_volume = self.last_features.get('cumulative_volume', 0)
-            
-            # Manter features antigas como fallback
-            delta_profile = self.last_features.get('delta_profile', 0)
-            cumulative_delta = self.last_features.get('cumulative_delta', delta_volume)  # Usar delta_volume como fallback
-            absorption_ratio = self.last_features.get('absorption_ratio', 0.5)
-            volume_clusters = self.last_features.get('volume_clusters', 1)
-            
-            # Análise de pegada baseada em VOLUME REAL
-            footprint_score = 0
-            
-            # Usar delta volume real se disponível
-            if delta_volume != 0:
-                # Delta positivo/negativo indica pressão
-                if delta_volume > 100:
-                    footprint_score += 0.5
-                elif delta_volume > 50:
-                    footprint_score += 0.3
-                elif delta_volume < -100:
-                    footprint_score -= 0.5
-                elif delta_volume < -50:
-                    footprint_score -= 0.3
-                    
-                # Ratio de volume para detectar absorção
-                if buy_volume > sell_volume * 1.5:
-                    footprint_score += 0.2
-                elif sell_volume > buy_volume * 1.5:
-                    footprint_score -= 0.2
-            elif cumulative_delta > 100:
-                footprint_score += 0.4
-            elif cumulative_delta < -100:
-                footprint_score -= 0.4
-            else:
-                footprint_score += cumulative_delta / 250.0
-            
-            # Absorption ratio
-            if absorption_ratio > 0.7:
-                footprint_score += 0.3  # Alta absorção compradora
-            elif absorption_ratio < 0.3:
-                footprint_score -= 0.3  # Alta absorção vendedora
-            
-            # Volume clusters indicam níveis importantes
-            if volume_clusters > 3:
-                footprint_score *= 0.8  # Reduzir sinal em áreas congestionadas
-            
-            # Determinar sinal
-            signal = np.clip(footprint_score, -1, 1)
-            
-            # Confiança baseada na clareza
-            confidence = min(abs(footprint_score) + 0.25, 0.85)
-            
-            # Adicionar variação temporal
-            time_variation = 1.0 + 0.1 * np.sin(time.time() / 15)
-            confidence = min(confidence * time_variation, 0.9)
-            
-        else:
-            # Fallback para análise por buffers
-            price_buffer_size = len(self.price_buffer)
-            volume_buffer_size = len(self.volume_buffer)
-            
-            # Log para debug
-            if price_buffer_size % 10 == 0:
-                logger.debug(
-                    f"Footprint buffers - Prices: {price_buffer_size}, "
-                    f"Volumes: {volume_buffer_size}"
-                )
-            
-            if price_buffer_size < 30 or volume_buffer_size < 30:
-                # Retornar valores variáveis mesmo com poucos dados
-                if price_buffer_size >= 10 and volume_buffer_size >= 10:
-                    # Adicionar variação para evitar valores fixos
-                    random_factor = np.random.uniform(0.95, 1.05)
-                    return 0, (0.3 + min(price_buffer_size * 0.01, 0.3)) * random_factor
-                return 0, 0.25
-        
-        prices = list(self.price_buffer)[-30:]
-        volumes = list(self.volume_buffer)[-30:]
-        
-        # Identificar níveis de suporte/resistência por volume
-        price_levels = {}
-        for p, v in zip(prices, volumes):
-            level = round(p / 0.5) * 0.5  # Arredondar para 0.5
-            if level not in price_levels:
-                price_levels[level] = 0
-            price_levels[level] += v
-        
-        if price_levels:
-            # Encontrar nível com maior volume
-            poc_level = max(price_levels, key=price_levels.get)  # Point of Control
-            current_price = prices[-1]
-            
-            # Sinal baseado em posição relativa ao POC
-            distance_from_poc = (current_price - poc_level) / current_price
-            
-            # Threshold ajustado para WDO: 0.0002 = ~1.1 pontos
-            if distance_from_poc > 0.0002:
-                signal = -0.5  # Acima do POC, possível resistência
-            elif distance_from_poc < -0.0002:
-                signal = 0.5  # Abaixo do POC, possível suporte
-            else:
-                signal = 0  # No POC, neutro
-            
-            # Log detalhado
-            logger.debug(
-                f"Footprint - POC: {poc_level:.1f} | "
-                f"Current: {current_price:.1f} | "
-                f"Distance: {distance_from_poc:.6f}"
-            )
-            
-            # Confiança baseada no volume no POC e distância
-            total_volume = sum(price_levels.values())
-            poc_strength = price_levels[poc_level] / total_volume
-            distance_factor = min(abs(distance_from_poc) / 0.0002, 2.0)  # Normalizar
-            
-            # Adicionar variação temporal
-            time_factor = 0.95 + 0.1 * np.cos(time.time() / 15)  # Oscila diferente do TapeReading
-            confidence = max(0.3, min(0.95, (0.4 + poc_strength * 0.4 + distance_factor * 0.1) * time_factor))
-        else:
-            signal = 0
-            confidence = 0.5
-        
-        # Aplicar decay se sinal não mudou
-        state = self.agent_states['FootprintPatternAgent']
-        if abs(signal - state['last_signal']) < 0.01:  # Sem mudança significativa
-            # Aplicar decay
-            confidence = confidence * state['confidence_decay_rate']
-            confidence = max(confidence, 0.25)  # Mínimo de 25%
-        else:
-            # Sinal mudou, resetar tempo
-            state['last_change_time'] = time.time()
-        
-        state['last_signal'] = signal
-        state['confidence'] = confidence
-        
-        return signal, confidence
-    
+        signals, confidences = self.evaluate(3)
+        return float(signals[3]), float(confidences[3])
+
     def get_consensus(self, features: Dict = None) -> Dict:
-        """Retorna consenso de todos os agentes"""
-        
-        # Analisar com cada agente
-        signals = {
-            'OrderFlowSpecialist': self.analyze_order_flow(),
-            'LiquidityAgent': self.analyze_liquidity(),
-            'TapeReadingAgent': self.analyze_tape(),
-            'FootprintPatternAgent': self.analyze_footprint()
-        }
-        
-        # Calcular consenso ponderado
-        weighted_signal = 0
-        total_confidence = 0
-        
-        for agent_name, (signal, confidence) in signals.items():
-            weight = self.agents[agent_name]['weight']
-            weighted_signal += signal * weight * confidence
-            total_confidence += confidence * weight
-        
-        # Normalizar
-        if total_confidence > 0:
-            final_signal = weighted_signal / total_confidence
-        else:
-            final_signal = 0
-        
-        # Determinar ação
-        if final_signal > 0.3:
-            action = 'BUY'
-        elif final_signal < -0.3:
-            action = 'SELL'
-        else:
-            action = 'HOLD'
-        
-        # Calcular confiança do consenso
-        consensus_confidence = min(total_confidence, 1.0)
-        
+        """
+        Retorna consenso de todos os agentes
+
+        Args:
+            features: Ignorado (compatibilidade) - as features chegam por
+                      update_market_data()
+
+        O status não é publicado aqui; quem chama publica (bridge do
+        monitor ou save_status()) fora do caminho de decisão.
+        """
+        signals, confidences = self.evaluate()
+        weights = self._weights()
+        final, confidence, action = consensus_scores(signals, confidences, weights)
+        final_signal = float(final[0])
+
         result = {
-            'action': action,
+            'action': {1: 'BUY', -1: 'SELL'}.get(int(action[0]), 'HOLD'),
             'signal': final_signal,
-            'confidence': consensus_confidence,
+            'confidence': float(confidence[0]),
             'agents': {
                 name: {
-                    'signal': sig,
-                    'confidence': conf,
-                    'weight': self.agents[name]['weight']
+                    'signal': float(signals[i]),
+                    'confidence': float(confidences[i]),
+                    'weight': float(weights[i])
                 }
-                for name, (sig, conf) in signals.items()
+                for i, name in enumerate(AGENT_NAMES)
             },
             'timestamp': datetime.now()
         }
-        
-        # Salvar status em arquivo JSON
-        self._save_status(result)
-        
+        self.last_consensus = result
         return result
-    
+
     def get_agent_signals(self) -> Dict:
         """Retorna sinais individuais dos agentes para visualização"""
         result = {}
-        
+
         for agent_name in self.agents:
             state = self.agent_states[agent_name]
             signal = state['last_signal']
             confidence = state['confidence']
-            
+
             # Converter sinal para texto
             if signal > 0.5:
                 signal_text = 'BUY'
@@ -540,18 +510,26 @@ class HMARLAgentsRealtime:
                 signal_text = 'SELL'
             else:
                 signal_text = 'HOLD'
-            
+
             result[agent_name] = {
                 'signal': signal_text,
                 'strength': abs(signal),
                 'confidence': confidence,
                 'weight': self.agents[agent_name]['weight']
             }
-        
+
         return result
-    
-    def _save_status(self, consensus_data: Dict):
-        """Salva o status atual em arquivo JSON"""
+
+    def save_status(self, consensus_data: Dict = None):
+        """
+        Publica o status atual no canal de status dos monitores
+
+        Args:
+            consensus_data: Consenso a publicar (padrão: o último calculado)
+        """
+        consensus_data = consensus_data or self.last_consensus
+        if not consensus_data:
+            return
         try:
             # Preparar dados de mercado
             market_data = {
@@ -562,7 +540,7 @@ class HMARLAgentsRealtime:
                     'imbalance': self.book_buffer[-1].get('imbalance', 0) if self.book_buffer else 0
                 }
             }
-            
+
             # Preparar dados completos
             status_data = {
                 'timestamp': datetime.now().isoformat(),
@@ -572,41 +550,69 @@ class HMARLAgentsRealtime:
                     'confidence': consensus_data['confidence'],
                     'signal': consensus_data['signal'],
                     'weights': {
-                        name: data['weight'] 
+                        name: data['weight']
                         for name, data in consensus_data['agents'].items()
                     }
                 },
                 'agents': consensus_data['agents']
             }
-            
-            # Salvar em arquivo (em dois locais para compatibilidade)
-            # Usar escrita atômica para evitar leitura de arquivo parcial
-            import tempfile
-            import shutil
-            
-            # Local 1: Raiz (para debug)
-            status_file = Path('hmarl_status.json')
-            temp_file = Path(tempfile.mktemp(suffix='.json', dir='.'))
-            try:
-                with open(temp_file, 'w') as f:
-                    json.dump(status_data, f, indent=2, default=str)
-                shutil.move(str(temp_file), str(status_file))
-            except:
-                if temp_file.exists():
-                    temp_file.unlink()
-            
-            # Local 2: data/monitor (para o monitor)
-            monitor_dir = Path('data/monitor')
-            monitor_dir.mkdir(parents=True, exist_ok=True)
-            monitor_file = monitor_dir / 'hmarl_status.json'
-            temp_file2 = Path(tempfile.mktemp(suffix='.json', dir=str(monitor_dir)))
-            try:
-                with open(temp_file2, 'w') as f:
-                    json.dump(status_data, f, indent=2, default=str)
-                shutil.move(str(temp_file2), str(monitor_file))
-            except:
-                if temp_file2.exists():
-                    temp_file2.unlink()
-            
+
+            publish_status('hmarl', status_data)
+
         except Exception as e:
-            logger.error(f"Erro ao salvar status HMARL: {e}")
\ No newline at end of file
+            logger.error(f"Erro ao salvar status HMARL: {e}")
+
+
+def build_feature_matrix(ticks: Iterable[Dict]) -> np.ndarray:
+    """
+    Monta a matriz AGENT_SCHEMA de uma sequência de ticks históricos
+
+    Cada tick passa pelo mesmo update_market_data do tempo real; a linha i
+    é o vetor que os agentes veriam depois do tick i.
+
+    Args:
+        ticks: Dicts com 'price', 'volume', 'book_data' e/ou 'features'
+
+    Returns:
+        Matriz (n_ticks, AGENT_SCHEMA.size)
+    """
+    ticks = list(ticks)
+    agents = HMARLAgentsRealtime()
+    X = AGENT_SCHEMA.new_vector(len(ticks))
+    for i, tick in enumerate(ticks):
+        agents.update_market_data(
+            price=tick.get('price'),
+            volume=tick.get('volume'),
+            book_data=tick.get('book_data'),
+            features=tick.get('features')
+        )
+        agents.feature_vector(out=X[i])
+    return X
+
+
+def score_matrix(X: np.ndarray, weights: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Pontua uma matriz de ticks históricos (backtest dos agentes)
+
+    Sem variação temporal, aleatoriedade ou decay: cada linha é avaliada
+    de forma independente e determinística.
+
+    Args:
+        X: Matriz (n_amostras, AGENT_SCHEMA.size), ex.: build_feature_matrix()
+        weights: Pesos dos agentes (padrão: os do HMARLAgentsRealtime)
+
+    Returns:
+        Dict com 'signals' e 'confidences' (n, 4) e 'signal', 'confidence'
+        e 'action' (n,) do consenso
+    """
+    if weights is None:
+        weights = np.array(AGENT_WEIGHTS)
+    signals, confidences, _ = score_agents(X)
+    final, confidence, action = consensus_scores(signals, confidences, weights)
+    return {
+        'signals': signals,
+        'confidences': confidences,
+        'signal': final,
+        'confidence': confidence,
+        'action': action
+    }
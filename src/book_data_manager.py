@@ -17,6 +17,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from buffers.circular_buffer import BookBuffer, TradeBuffer
+from market_data.order_book import OrderBookLadder
 
 
 class BookDataManager:
@@ -25,7 +26,8 @@ class BookDataManager:
     Mantém estado atual e histórico do order book
     """
     
-    def __init__(self, max_book_snapshots: int = 100, max_trades: int = 1000, levels: int = 5):
+    def __init__(self, max_book_snapshots: int = 100, max_trades: int = 1000, levels: int = 5,
+                 tick_size: float = 0.5):
         """
         Inicializa o gerenciador de book
         
@@ -33,6 +35,7 @@ class BookDataManager:
             max_book_snapshots: Máximo de snapshots do book a manter
             max_trades: Máximo de trades a manter
             levels: Número de níveis do book a processar
+            tick_size: Tick do ativo para o book por nível (WDO = 0.5)
         """
         self.levels = levels
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -41,6 +44,9 @@ class BookDataManager:
         self.book_buffer = BookBuffer(max_size=max_book_snapshots, levels=levels)
         self.trade_buffer = TradeBuffer(max_size=max_trades)
         
+        # Book completo mantido por deltas do OfferBook/PriceBook V2
+        self.ladder = OrderBookLadder(tick_size=tick_size)
+        
         # Estado atual do book
         self.current_book = {
             "timestamp": None,
@@ -64,6 +70,7 @@ class BookDataManager:
             "price_book_callbacks": 0,
             "offer_book_callbacks": 0,
             "trades_callbacks": 0,
+            "book_deltas": 0,
             "errors": 0
         }
         
@@ -178,6 +185,76 @@ class BookDataManager:
             self.stats["errors"] += 1
             return False
     
+    def on_book_delta(self, data: Dict) -> bool:
+        """
+        Aplica um delta do OfferBook V2 (ou PriceBook V2) no book por nível
+        
+        Args:
+            data: Dict no formato de ConnectionManagerV4:
+                {
+                    'timestamp': datetime,
+                    'action': int (0=add, 1=edit, 2=delete, 3=delete from),
+                    'side': int (0=buy, 1=sell),
+                    'price': float,
+                    'quantity': int,
+                    'offer_id': int (offer book),
+                    'order_count': int (price book),
+                    'has_price': bool,
+                    'has_quantity': bool
+                }
+        
+        Returns:
+            True se o book foi alterado
+        """
+        try:
+            with self.lock:
+                self.stats["book_deltas"] += 1
+                
+                if 'order_count' in data:
+                    # PriceBook: nível agregado, a quantidade substitui a anterior
+                    quantity = data.get('quantity', 0) if data.get('action') != 2 else 0
+                    self.ladder.set_level(data['side'], data['price'], quantity,
+                                          data.get('order_count', 0))
+                    changed = True
+                else:
+                    changed = self.ladder.apply_offer(
+                        data.get('action', 0), data.get('side', 0),
+                        data.get('price', 0.0), data.get('quantity', 0),
+                        offer_id=data.get('offer_id'),
+                        has_price=data.get('has_price', True),
+                        has_quantity=data.get('has_quantity', True)
+                    )
+                
+                if not changed:
+                    return False
+                
+                timestamp = data.get('timestamp', datetime.now())
+                bid_prices, bid_volumes = self.ladder.depth(0, self.levels)
+                ask_prices, ask_volumes = self.ladder.depth(1, self.levels)
+                
+                self.current_book["timestamp"] = timestamp
+                self.current_book["bid_prices"] = bid_prices.tolist()
+                self.current_book["bid_volumes"] = bid_volumes.tolist()
+                self.current_book["ask_prices"] = ask_prices.tolist()
+                self.current_book["ask_volumes"] = ask_volumes.tolist()
+                self.current_book["bid_traders"] = []
+                self.current_book["ask_traders"] = []
+                self.current_book["total_bid_volume"] = float(bid_volumes.sum())
+                self.current_book["total_ask_volume"] = float(ask_volumes.sum())
+                
+                self._update_derived_metrics()
+                if self.ladder.is_valid():
+                    self._add_snapshot_to_buffer()
+                
+                self._invalidate_cache()
+                self.stats["last_update"] = timestamp
+                return True
+                
+        except Exception as e:
+            self.logger.error(f"Erro em book_delta: {e}")
+            self.stats["errors"] += 1
+            return False
+    
     def on_trade_callback(self, data: Dict) -> bool:
         """
         Processa callback de trade executado
@@ -361,6 +438,7 @@ class BookDataManager:
             stats = self.stats.copy()
             stats["book_buffer_stats"] = self.book_buffer.get_stats()
             stats["trade_buffer_stats"] = self.trade_buffer.get_stats()
+            stats["order_book"] = self.ladder.get_stats()
             stats["current_spread"] = self.current_book["spread"]
             stats["current_mid_price"] = self.current_book["mid_price"]
             return stats
@@ -370,6 +448,7 @@ class BookDataManager:
         with self.lock:
             self.book_buffer.clear()
             self.trade_buffer.clear()
+            self.ladder.clear()
             
             # Resetar estado atual
             for key in self.current_book:
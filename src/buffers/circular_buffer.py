@@ -6,10 +6,16 @@ Mantém histórico limitado com acesso eficiente para cálculo de features
 import numpy as np
 import pandas as pd
 from collections import deque
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from datetime import datetime
 import threading
 import logging
+from abc import ABCMeta, abstractmethod
+
+from .ring_buffer import (
+    StructuredRingBuffer, CANDLE_DTYPE, TRADE_DTYPE, SIDE_NAMES, AGGRESSOR_NAMES,
+    book_dtype, to_epoch, side_code
+)
 
 class CircularBuffer:
     """
@@ -167,13 +173,144 @@ class CircularBuffer:
         return f"CircularBuffer(name='{self.name}', size={self.size()}/{self.max_size})"
 
 
-class CandleBuffer(CircularBuffer):
+class StructuredCircularBuffer(CircularBuffer, metaclass=ABCMeta):
+    """
+    Buffer circular com armazenamento tipado (array estruturado NumPy)
+
+    Mantém a interface do CircularBuffer, mas guarda os registros em um
+    StructuredRingBuffer preallocado. get_window()/get_column() devolvem
+    cópias; cálculos internos leem o ring direto sob o lock.
+    Subclasses implementam _encode()/_decode().
+    """
+    
+    def __init__(self, max_size: int, dtype: np.dtype, name: str = "buffer"):
+        super().__init__(max_size, name=name)
+        self.data = None  # Armazenamento substituído pelo ring tipado
+        self.ring = StructuredRingBuffer(max_size, dtype)
+    
+    @abstractmethod
+    def _encode(self, item: Dict) -> Tuple:
+        """Converte dict no formato legado para tupla do dtype"""
+    
+    @abstractmethod
+    def _decode(self, record: np.void) -> Dict:
+        """Converte registro tipado para dict no formato legado"""
+    
+    def _append(self, record: Tuple) -> bool:
+        """Escreve registro já codificado no ring"""
+        try:
+            with self.lock:
+                if self.ring.append(record):
+                    self.stats["total_dropped"] += 1
+                self.stats["total_added"] += 1
+                self.stats["last_update"] = datetime.now()
+                return True
+                
+        except Exception as e:
+            self.logger.error(f"Erro ao adicionar item: {e}")
+            return False
+    
+    def add(self, item: Dict) -> bool:
+        """
+        Adiciona item no formato dict (compatibilidade)
+        
+        Args:
+            item: Dict com os campos do buffer
+            
+        Returns:
+            True se adicionado com sucesso
+        """
+        try:
+            record = self._encode(item)
+        except Exception as e:
+            self.logger.error(f"Erro ao adicionar item: {e}")
+            return False
+        return self._append(record)
+    
+    def get_window(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Retorna cópia dos últimos N registros
+        
+        A cópia é feita sob o lock: uma view do ring seria sobrescrita
+        pela próxima escrita de outro thread.
+        
+        Args:
+            n: Número de registros (None = todos)
+        """
+        with self.lock:
+            return self.ring.last(n).copy()
+    
+    def get_column(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        """Retorna cópia de um campo para os últimos N registros"""
+        with self.lock:
+            return self.ring.column(field, n).copy()
+    
+    def get_last_n(self, n: int) -> List[Dict]:
+        """
+        Retorna os últimos N itens como dicts (compatibilidade)
+        
+        Prefira get_window() em caminhos quentes.
+        """
+        with self.lock:
+            return [self._decode(record) for record in self.ring.last(n)]
+    
+    def get_dataframe(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Converte buffer para DataFrame (aloca; evite em caminhos quentes)
+        
+        Args:
+            columns: Nomes das colunas (opcional)
+        """
+        with self.lock:
+            if len(self.ring) == 0:
+                return pd.DataFrame()
+            
+            df = pd.DataFrame(self.get_last_n(len(self.ring)))
+            if columns:
+                available_cols = [col for col in columns if col in df.columns]
+                df = df[available_cols]
+            return df
+    
+    def clear(self):
+        """Limpa o buffer"""
+        with self.lock:
+            self.ring.clear()
+            self.logger.info(f"Buffer '{self.name}' limpo")
+    
+    def size(self) -> int:
+        """Retorna tamanho atual do buffer"""
+        with self.lock:
+            return len(self.ring)
+    
+    def is_full(self) -> bool:
+        """Verifica se buffer está cheio"""
+        with self.lock:
+            return len(self.ring) == self.max_size
+    
+    def is_empty(self) -> bool:
+        """Verifica se buffer está vazio"""
+        with self.lock:
+            return len(self.ring) == 0
+    
+    def get_stats(self) -> Dict:
+        """Retorna estatísticas do buffer"""
+        with self.lock:
+            return {
+                "name": self.name,
+                "current_size": len(self.ring),
+                "max_size": self.max_size,
+                "utilization": len(self.ring) / self.max_size * 100,
+                **self.stats
+            }
+
+
+class CandleBuffer(StructuredCircularBuffer):
     """
     Buffer especializado para candles OHLCV
     """
     
     def __init__(self, max_size: int = 200):
-        super().__init__(max_size, name="candles")
+        super().__init__(max_size, CANDLE_DTYPE, name="candles")
         
     def add_candle(self, timestamp: datetime, open: float, high: float, 
                    low: float, close: float, volume: float) -> bool:
@@ -188,34 +325,45 @@ class CandleBuffer(CircularBuffer):
             close: Preço de fechamento
             volume: Volume negociado
         """
-        candle = {
-            "timestamp": timestamp,
-            "open": open,
-            "high": high,
-            "low": low,
-            "close": close,
-            "volume": volume
+        return self._append((to_epoch(timestamp), open, high, low, close, volume))
+    
+    def _encode(self, item: Dict) -> Tuple:
+        return (to_epoch(item.get("timestamp")), item["open"], item["high"],
+                item["low"], item["close"], item["volume"])
+    
+    def _decode(self, record: np.void) -> Dict:
+        return {
+            "timestamp": datetime.fromtimestamp(record["timestamp"]),
+            "open": float(record["open"]),
+            "high": float(record["high"]),
+            "low": float(record["low"]),
+            "close": float(record["close"]),
+            "volume": float(record["volume"])
         }
-        return self.add(candle)
     
-    def calculate_returns(self, periods: int = 1) -> np.ndarray:
+    def get_last_close(self) -> float:
+        """Retorna último fechamento (0.0 se vazio)"""
+        with self.lock:
+            last = self.ring.latest()
+            return float(last["close"]) if last is not None else 0.0
+    
+    def calculate_returns(self, periods: int = 1, window: Optional[int] = None) -> np.ndarray:
         """
         Calcula retornos para N períodos
         
         Args:
             periods: Número de períodos
+            window: Limitar aos últimos N fechamentos (None = todos)
             
         Returns:
             Array com retornos
         """
         with self.lock:
-            df = self.get_dataframe()
-            if df.empty or len(df) < periods + 1:
+            closes = self.ring.column("close", window)
+            if len(closes) < periods + 1:
                 return np.array([])
             
-            closes = df['close'].values
-            returns = (closes[periods:] - closes[:-periods]) / closes[:-periods]
-            return returns
+            return (closes[periods:] - closes[:-periods]) / closes[:-periods]
     
     def calculate_volatility(self, periods: int = 20) -> float:
         """
@@ -227,11 +375,11 @@ class CandleBuffer(CircularBuffer):
         Returns:
             Volatilidade
         """
-        returns = self.calculate_returns(1)
+        returns = self.calculate_returns(1, window=periods + 1)
         if len(returns) < periods:
             return 0.0
         
-        return np.std(returns[-periods:])
+        return float(np.std(returns))
     
     def get_ohlc_stats(self) -> Dict:
         """
@@ -241,27 +389,37 @@ class CandleBuffer(CircularBuffer):
             Dict com estatísticas
         """
         with self.lock:
-            df = self.get_dataframe()
-            if df.empty:
+            candles = self.ring.last()
+            if len(candles) == 0:
                 return {}
             
+            volumes = candles["volume"]
             return {
-                "last_close": df['close'].iloc[-1],
-                "avg_volume": df['volume'].mean(),
-                "high_period": df['high'].max(),
-                "low_period": df['low'].min(),
-                "total_volume": df['volume'].sum()
+                "last_close": float(candles["close"][-1]),
+                "avg_volume": float(volumes.mean()),
+                "high_period": float(candles["high"].max()),
+                "low_period": float(candles["low"].min()),
+                "total_volume": float(volumes.sum())
             }
 
 
-class BookBuffer(CircularBuffer):
+class BookBuffer(StructuredCircularBuffer):
     """
     Buffer especializado para dados de book (bid/ask)
     """
     
     def __init__(self, max_size: int = 100, levels: int = 5):
-        super().__init__(max_size, name="book")
+        super().__init__(max_size, book_dtype(levels), name="book")
         self.levels = levels
+        self._zeros = [0.0] * levels
+        self._blanks = [""] * levels
+        
+    def _pad(self, values: Optional[List], fill: List) -> List:
+        """Completa/corta lista para o número de níveis"""
+        if not values:
+            return fill
+        values = list(values[:self.levels])
+        return values + fill[len(values):]
         
     def add_snapshot(self, timestamp: datetime, 
                     bid_prices: List[float], bid_volumes: List[float],
@@ -280,20 +438,54 @@ class BookBuffer(CircularBuffer):
             bid_traders: IDs dos traders bid (opcional)
             ask_traders: IDs dos traders ask (opcional)
         """
+        try:
+            record = self._record(timestamp, bid_prices, bid_volumes, ask_prices, ask_volumes,
+                                  bid_traders, ask_traders)
+        except Exception as e:
+            self.logger.error(f"Erro ao adicionar item: {e}")
+            return False
+        return self._append(record)
+    
+    def _record(self, timestamp, bid_prices, bid_volumes, ask_prices, ask_volumes,
+                bid_traders=None, ask_traders=None) -> Tuple:
+        """Monta a tupla do dtype a partir das listas do snapshot"""
+        return (
+            to_epoch(timestamp),
+            min(len(bid_prices), self.levels),
+            min(len(ask_prices), self.levels),
+            self._pad(bid_prices, self._zeros),
+            self._pad(bid_volumes, self._zeros),
+            self._pad(ask_prices, self._zeros),
+            self._pad(ask_volumes, self._zeros),
+            self._pad([str(t) for t in bid_traders] if bid_traders else None, self._blanks),
+            self._pad([str(t) for t in ask_traders] if ask_traders else None, self._blanks)
+        )
+    
+    def _encode(self, item: Dict) -> Tuple:
+        return self._record(
+            item.get("timestamp"),
+            item.get("bid_prices", []),
+            item.get("bid_volumes", []),
+            item.get("ask_prices", []),
+            item.get("ask_volumes", []),
+            item.get("bid_traders"),
+            item.get("ask_traders")
+        )
+    
+    def _decode(self, record: np.void) -> Dict:
+        n_bid, n_ask = int(record["n_bid"]), int(record["n_ask"])
         snapshot = {
-            "timestamp": timestamp,
-            "bid_prices": bid_prices[:self.levels],
-            "bid_volumes": bid_volumes[:self.levels],
-            "ask_prices": ask_prices[:self.levels],
-            "ask_volumes": ask_volumes[:self.levels]
+            "timestamp": datetime.fromtimestamp(record["timestamp"]),
+            "bid_prices": record["bid_prices"][:n_bid].tolist(),
+            "bid_volumes": record["bid_volumes"][:n_bid].tolist(),
+            "ask_prices": record["ask_prices"][:n_ask].tolist(),
+            "ask_volumes": record["ask_volumes"][:n_ask].tolist()
         }
-        
-        if bid_traders:
-            snapshot["bid_traders"] = bid_traders[:self.levels]
-        if ask_traders:
-            snapshot["ask_traders"] = ask_traders[:self.levels]
-            
-        return self.add(snapshot)
+        if record["bid_traders"][0]:
+            snapshot["bid_traders"] = record["bid_traders"][:n_bid].tolist()
+        if record["ask_traders"][0]:
+            snapshot["ask_traders"] = record["ask_traders"][:n_ask].tolist()
+        return snapshot
     
     def calculate_spread(self) -> float:
         """
@@ -303,12 +495,12 @@ class BookBuffer(CircularBuffer):
             Spread
         """
         with self.lock:
-            if not self.data:
+            last = self.ring.latest()
+            if last is None:
                 return 0.0
             
-            last = self.data[-1]
-            if last["bid_prices"] and last["ask_prices"]:
-                return last["ask_prices"][0] - last["bid_prices"][0]
+            if last["n_bid"] > 0 and last["n_ask"] > 0:
+                return float(last["ask_prices"][0] - last["bid_prices"][0])
             return 0.0
     
     def calculate_imbalance(self, periods: int = 10) -> float:
@@ -322,16 +514,13 @@ class BookBuffer(CircularBuffer):
             Imbalance ratio (-1 a 1)
         """
         with self.lock:
-            snapshots = self.get_last_n(periods)
-            if not snapshots:
+            snapshots = self.ring.last(periods)
+            if len(snapshots) == 0:
                 return 0.0
             
-            total_bid_volume = 0
-            total_ask_volume = 0
-            
-            for snapshot in snapshots:
-                total_bid_volume += sum(snapshot.get("bid_volumes", []))
-                total_ask_volume += sum(snapshot.get("ask_volumes", []))
+            # Níveis não preenchidos têm volume 0
+            total_bid_volume = float(snapshots["bid_volumes"].sum())
+            total_ask_volume = float(snapshots["ask_volumes"].sum())
             
             total_volume = total_bid_volume + total_ask_volume
             if total_volume == 0:
@@ -347,26 +536,29 @@ class BookBuffer(CircularBuffer):
             Dict com informações de profundidade
         """
         with self.lock:
-            if not self.data:
+            last = self.ring.latest()
+            if last is None:
                 return {}
             
-            last = self.data[-1]
+            bid_depth = float(last["bid_volumes"].sum())
+            ask_depth = float(last["ask_volumes"].sum())
+            has_both = last["n_bid"] > 0 and last["n_ask"] > 0
             return {
-                "bid_depth": sum(last.get("bid_volumes", [])),
-                "ask_depth": sum(last.get("ask_volumes", [])),
-                "total_depth": sum(last.get("bid_volumes", [])) + sum(last.get("ask_volumes", [])),
+                "bid_depth": bid_depth,
+                "ask_depth": ask_depth,
+                "total_depth": bid_depth + ask_depth,
                 "spread": self.calculate_spread(),
-                "mid_price": (last["bid_prices"][0] + last["ask_prices"][0]) / 2 if last["bid_prices"] and last["ask_prices"] else 0
+                "mid_price": float(last["bid_prices"][0] + last["ask_prices"][0]) / 2 if has_both else 0
             }
 
 
-class TradeBuffer(CircularBuffer):
+class TradeBuffer(StructuredCircularBuffer):
     """
     Buffer especializado para trades executados
     """
     
     def __init__(self, max_size: int = 1000):
-        super().__init__(max_size, name="trades")
+        super().__init__(max_size, TRADE_DTYPE, name="trades")
         
     def add_trade(self, timestamp: datetime, price: float, volume: float,
                   side: str, aggressor: str, trader_id: Optional[str] = None) -> bool:
@@ -381,18 +573,29 @@ class TradeBuffer(CircularBuffer):
             aggressor: Quem foi o agressor ('buyer' ou 'seller')
             trader_id: ID do trader (opcional)
         """
+        return self._append((
+            to_epoch(timestamp), price, volume,
+            side_code(side), side_code(aggressor),
+            str(trader_id) if trader_id else ""
+        ))
+    
+    def _encode(self, item: Dict) -> Tuple:
+        trader_id = item.get("trader_id")
+        return (to_epoch(item.get("timestamp")), item["price"], item["volume"],
+                side_code(item.get("side")), side_code(item.get("aggressor")),
+                str(trader_id) if trader_id else "")
+    
+    def _decode(self, record: np.void) -> Dict:
         trade = {
-            "timestamp": timestamp,
-            "price": price,
-            "volume": volume,
-            "side": side,
-            "aggressor": aggressor
+            "timestamp": datetime.fromtimestamp(record["timestamp"]),
+            "price": float(record["price"]),
+            "volume": float(record["volume"]),
+            "side": SIDE_NAMES[int(record["side"])],
+            "aggressor": AGGRESSOR_NAMES[int(record["aggressor"])]
         }
-        
-        if trader_id:
-            trade["trader_id"] = trader_id
-            
-        return self.add(trade)
+        if record["trader_id"]:
+            trade["trader_id"] = str(record["trader_id"])
+        return trade
     
     def calculate_vwap(self, periods: int = 100) -> float:
         """
@@ -405,17 +608,17 @@ class TradeBuffer(CircularBuffer):
             VWAP
         """
         with self.lock:
-            trades = self.get_last_n(periods)
-            if not trades:
+            trades = self.ring.last(periods)
+            if len(trades) == 0:
                 return 0.0
             
-            total_value = sum(t["price"] * t["volume"] for t in trades)
-            total_volume = sum(t["volume"] for t in trades)
+            volumes = trades["volume"]
+            total_volume = float(volumes.sum())
             
             if total_volume == 0:
                 return 0.0
             
-            return total_value / total_volume
+            return float(np.dot(trades["price"], volumes)) / total_volume
     
     def calculate_trade_intensity(self, time_window_seconds: int = 60) -> float:
         """
@@ -428,24 +631,22 @@ class TradeBuffer(CircularBuffer):
             Trades por segundo
         """
         with self.lock:
-            if len(self.data) < 2:
+            if len(self.ring) < 2:
                 return 0.0
             
             # Pegar trades na janela de tempo
-            current_time = self.data[-1]["timestamp"]
-            trades_in_window = [
-                t for t in self.data 
-                if (current_time - t["timestamp"]).total_seconds() <= time_window_seconds
-            ]
+            timestamps = self.ring.column("timestamp")
+            current_time = timestamps[-1]
+            in_window = np.flatnonzero(current_time - timestamps <= time_window_seconds)
             
-            if not trades_in_window:
+            if len(in_window) == 0:
                 return 0.0
             
-            time_span = (trades_in_window[-1]["timestamp"] - trades_in_window[0]["timestamp"]).total_seconds()
+            time_span = timestamps[in_window[-1]] - timestamps[in_window[0]]
             if time_span == 0:
-                return len(trades_in_window)
+                return len(in_window)
             
-            return len(trades_in_window) / time_span
+            return len(in_window) / time_span
     
     def get_aggressor_ratio(self) -> Dict:
         """
@@ -455,16 +656,17 @@ class TradeBuffer(CircularBuffer):
             Dict com estatísticas de agressores
         """
         with self.lock:
-            if not self.data:
+            if len(self.ring) == 0:
                 return {}
             
-            buyer_aggressor = sum(1 for t in self.data if t["aggressor"] == "buyer")
-            seller_aggressor = sum(1 for t in self.data if t["aggressor"] == "seller")
-            total = len(self.data)
+            aggressors = self.ring.column("aggressor")
+            buyer_aggressor = int(np.count_nonzero(aggressors == 1))
+            seller_aggressor = int(np.count_nonzero(aggressors == -1))
+            total = len(aggressors)
             
             return {
                 "buyer_aggressor_count": buyer_aggressor,
                 "seller_aggressor_count": seller_aggressor,
                 "buyer_aggressor_ratio": buyer_aggressor / total if total > 0 else 0,
                 "seller_aggressor_ratio": seller_aggressor / total if total > 0 else 0
-            }
\ No newline at end of file
+            }
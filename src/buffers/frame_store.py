@@ -0,0 +1,258 @@
+"""
+FrameStore - tabela colunar preallocada com upsert por índice ordenado
+Substitui o padrão concat + drop_duplicates + sort_index por atualização:
+a barra aberta é corrigida no lugar, barras novas são anexadas ao final,
+e o DataFrame só é montado quando algum consumidor pede
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def _missing_value(dtype: np.dtype):
+    """Valor de ausência para o dtype (None se o dtype não comporta ausência)"""
+    if dtype.kind in 'fc':
+        return np.nan
+    if dtype.kind in 'mM':
+        return np.array('NaT', dtype=dtype)
+    return None
+
+
+class FrameStore:
+    """
+    Tabela indexada (ex.: candles por timestamp) em arrays NumPy por coluna
+
+    Custo por atualização:
+        - barra aberta (mesmo índice da última linha): O(colunas)
+        - barra nova (índice maior que o último): O(colunas), amortizado
+        - correção de linhas antigas: O(k log n) via busca binária
+        - índice novo no meio da série (raro): reconstrução O(n)
+
+    Semântica igual à anterior: linha com índice repetido substitui a
+    existente (keep='last') e a tabela fica sempre ordenada pelo índice.
+    """
+
+    def __init__(self, columns: Optional[Iterable[str]] = None, capacity: int = 1024):
+        """
+        Args:
+            columns: Colunas iniciais (a tabela aceita colunas novas depois)
+            capacity: Linhas preallocadas (dobra quando enche)
+        """
+        self._initial_capacity = max(int(capacity), 16)
+        self._lock = threading.RLock()
+        self.reset(columns=columns)
+
+    # ------------------------------------------------------------------ estado
+
+    def reset(self, frame: Optional[pd.DataFrame] = None,
+              columns: Optional[Iterable[str]] = None):
+        """Esvazia a tabela (mantendo as colunas) e opcionalmente carrega `frame`"""
+        with self._lock:
+            if columns is not None:
+                self._columns: List[str] = list(columns)
+            elif frame is not None:
+                self._columns = list(frame.columns)
+            elif not hasattr(self, '_columns'):
+                self._columns = []
+            self._capacity = self._initial_capacity
+            self._size = 0
+            self._index: Optional[np.ndarray] = None
+            self._index_name = None
+            self._index_tz = None
+            self._data: Dict[str, np.ndarray] = {}
+            self._version = 0
+            self._frame: Optional[pd.DataFrame] = None
+            self._frame_version = -1
+            if frame is not None and not frame.empty:
+                self.upsert(frame)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def empty(self) -> bool:
+        return self._size == 0
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def version(self) -> int:
+        """Incrementado a cada alteração (útil para caches de consumidores)"""
+        return self._version
+
+    # ---------------------------------------------------------------- escrita
+
+    def upsert(self, frame: pd.DataFrame) -> int:
+        """
+        Insere ou substitui linhas pelo índice
+
+        Args:
+            frame: Linhas novas/alteradas (índice comparável com o existente)
+
+        Returns:
+            Número de linhas anexadas ao final
+        """
+        if frame is None or frame.empty:
+            return 0
+        if not (frame.index.is_monotonic_increasing and frame.index.is_unique):
+            frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+
+        with self._lock:
+            if self._index is None:
+                self._init_arrays(frame)
+            for col in frame.columns:
+                if col not in self._columns:
+                    self._columns.append(col)
+
+            keys = self._to_index(frame.index)
+            values = self._column_values(frame)
+            n = self._size
+            if n == 0:
+                split = 0
+            else:
+                split = int(np.searchsorted(keys, self._index[n - 1], side='right'))
+
+            if split:
+                # Linhas que já deveriam existir: corrigir no lugar
+                old_keys = keys[:split]
+                pos = np.searchsorted(self._index[:n], old_keys)
+                found = (pos < n) & (self._index[np.minimum(pos, n - 1)] == old_keys)
+                if not found.all():
+                    self._rebuild(frame)
+                    return 0
+                self._write(pos, values, slice(0, split))
+
+            appended = len(keys) - split
+            if appended:
+                self._reserve(n + appended)
+                self._index[n:n + appended] = keys[split:]
+                self._write(slice(n, n + appended), values, slice(split, None))
+                self._size = n + appended
+
+            self._version += 1
+            return appended
+
+    @staticmethod
+    def _column_values(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+        dtypes = frame.dtypes.to_numpy()
+        if len(dtypes) and (dtypes == dtypes[0]).all() and dtypes[0] != object:
+            # Um único bloco (caso comum: OHLCV float): uma conversão só
+            block = frame.to_numpy()
+            return {col: block[:, i] for i, col in enumerate(frame.columns)}
+        return {col: frame[col].to_numpy() for col in frame.columns}
+
+    def _init_arrays(self, frame: pd.DataFrame):
+        keys = self._to_index(frame.index)
+        self._index = np.empty(self._capacity, dtype=keys.dtype)
+        self._index_name = frame.index.name
+        self._index_tz = getattr(frame.index, 'tz', None)
+
+    @staticmethod
+    def _to_index(index: pd.Index) -> np.ndarray:
+        if isinstance(index, pd.DatetimeIndex) and index.tz is not None:
+            index = index.tz_convert(None)
+        return np.asarray(index)
+
+    def _reserve(self, rows: int):
+        if rows <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < rows:
+            capacity *= 2
+        index = np.empty(capacity, dtype=self._index.dtype)
+        index[:self._size] = self._index[:self._size]
+        self._index = index
+        for col, arr in self._data.items():
+            grown = np.empty(capacity, dtype=arr.dtype)
+            grown[:self._size] = arr[:self._size]
+            self._data[col] = grown
+        self._capacity = capacity
+
+    def _column(self, col: str, dtype: np.dtype) -> np.ndarray:
+        """Array da coluna, criado (ausente no passado) ou promovido para `dtype`"""
+        arr = self._data.get(col)
+        if arr is None:
+            if self._size and dtype.kind in 'iub':
+                dtype = np.result_type(dtype, np.float64)
+            arr = np.empty(self._capacity, dtype=dtype)
+            if self._size:
+                arr[:self._size] = _missing_value(dtype)
+            self._data[col] = arr
+        elif np.result_type(arr.dtype, dtype) != arr.dtype:
+            arr = arr.astype(np.result_type(arr.dtype, dtype))
+            self._data[col] = arr
+        return arr
+
+    def _write(self, positions, values: Dict[str, np.ndarray], rows: slice):
+        for col, column_values in values.items():
+            column_values = column_values[rows]
+            if column_values.dtype.kind not in 'biufcmM':
+                column_values = column_values.astype(object)
+            arr = self._column(col, column_values.dtype)
+            arr[positions] = column_values
+        # A linha inteira é substituída: colunas ausentes ficam NaN (como no concat)
+        for col in list(self._data):
+            if col not in values:
+                arr = self._data[col]
+                if arr.dtype.kind in 'iub':
+                    arr = self._data[col] = arr.astype(np.float64)
+                arr[positions] = _missing_value(arr.dtype)
+
+    def _rebuild(self, frame: pd.DataFrame):
+        """Índice novo no meio da série: merge completo (caminho raro)"""
+        merged = pd.concat([self._build_frame(), frame])
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        columns = self._columns
+        self.reset(columns=columns)
+        self.upsert(merged)
+
+    # ---------------------------------------------------------------- leitura
+
+    def _build_frame(self, start: int = 0) -> pd.DataFrame:
+        n = self._size
+        if self._index is None or n == 0:
+            return pd.DataFrame(columns=self._columns)
+        index = pd.Index(self._index[start:n], name=self._index_name)
+        if self._index_tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self._index_tz)
+        data = {col: self._data[col][start:n].copy() for col in self._columns if col in self._data}
+        return pd.DataFrame(data, index=index, columns=self._columns)
+
+    def frame(self) -> pd.DataFrame:
+        """DataFrame completo, montado só quando a tabela mudou"""
+        with self._lock:
+            if self._frame_version != self._version:
+                self._frame = self._build_frame()
+                self._frame_version = self._version
+            return self._frame
+
+    def tail(self, rows: int) -> pd.DataFrame:
+        """Últimas `rows` linhas sem montar a tabela inteira"""
+        with self._lock:
+            return self._build_frame(max(self._size - int(rows), 0))
+
+    def last(self, column: str):
+        """Valor da última linha em uma coluna (None se vazio)"""
+        with self._lock:
+            if self._size == 0 or column not in self._data:
+                return None
+            return self._data[column][self._size - 1].item()
+
+    def index_bounds(self):
+        """(primeiro, último) índice, ou None se vazio"""
+        with self._lock:
+            if self._size == 0:
+                return None
+            bounds = self._index[0], self._index[self._size - 1]
+            if self._index.dtype.kind != 'M':
+                return tuple(value.item() for value in bounds)
+            bounds = tuple(pd.Timestamp(value) for value in bounds)
+            if self._index_tz is not None:
+                bounds = tuple(value.tz_localize('UTC').tz_convert(self._index_tz)
+                               for value in bounds)
+            return bounds
@@ -0,0 +1,157 @@
+"""
+StructuredRingBuffer - Ring buffer preallocado sobre arrays estruturados NumPy
+Base de armazenamento para CandleBuffer, BookBuffer e TradeBuffer
+"""
+
+import numpy as np
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+
+# Códigos de lado/agressor armazenados como int8
+SIDE_CODES = {"buy": 1, "buyer": 1, "sell": -1, "seller": -1}
+SIDE_NAMES = {1: "buy", -1: "sell", 0: "unknown"}
+AGGRESSOR_NAMES = {1: "buyer", -1: "seller", 0: "unknown"}
+
+# Tamanho máximo armazenado para IDs de traders
+TRADER_ID_DTYPE = "U16"
+
+CANDLE_DTYPE = np.dtype([
+    ("timestamp", "f8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+TRADE_DTYPE = np.dtype([
+    ("timestamp", "f8"),
+    ("price", "f8"),
+    ("volume", "f8"),
+    ("side", "i1"),
+    ("aggressor", "i1"),
+    ("trader_id", TRADER_ID_DTYPE),
+])
+
+
+def book_dtype(levels: int) -> np.dtype:
+    """
+    Cria dtype de snapshot de book com N níveis
+
+    Args:
+        levels: Número de níveis por lado
+
+    Returns:
+        dtype estruturado com subarrays de preço/volume/trader por lado
+    """
+    return np.dtype([
+        ("timestamp", "f8"),
+        ("n_bid", "i2"),
+        ("n_ask", "i2"),
+        ("bid_prices", "f8", (levels,)),
+        ("bid_volumes", "f8", (levels,)),
+        ("ask_prices", "f8", (levels,)),
+        ("ask_volumes", "f8", (levels,)),
+        ("bid_traders", TRADER_ID_DTYPE, (levels,)),
+        ("ask_traders", TRADER_ID_DTYPE, (levels,)),
+    ])
+
+
+def to_epoch(timestamp: Any) -> float:
+    """Converte datetime/Timestamp/número para segundos desde epoch"""
+    if timestamp is None:
+        return datetime.now().timestamp()
+    if isinstance(timestamp, (int, float, np.floating, np.integer)):
+        return float(timestamp)
+    return timestamp.timestamp()
+
+
+def side_code(value: Optional[str]) -> int:
+    """Converte 'buy'/'sell'/'buyer'/'seller' em código int8"""
+    return SIDE_CODES.get(value, 0) if value else 0
+
+
+class StructuredRingBuffer:
+    """
+    Ring buffer de capacidade fixa sobre um array estruturado NumPy
+
+    O armazenamento é espelhado (2 x capacidade): cada registro é escrito
+    nas duas metades, de modo que qualquer janela dos últimos N registros
+    é sempre contígua e pode ser devolvida como view, sem cópia.
+
+    Não é thread-safe; o buffer dono deve serializar o acesso.
+    Views retornadas só são válidas até a próxima escrita.
+    """
+
+    def __init__(self, capacity: int, dtype: np.dtype):
+        """
+        Inicializa o ring buffer
+
+        Args:
+            capacity: Número máximo de registros
+            dtype: dtype estruturado dos registros
+        """
+        if capacity <= 0:
+            raise ValueError("capacity deve ser positiva")
+
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self._storage = np.zeros(2 * capacity, dtype=self.dtype)
+        self._pos = 0      # Próxima posição de escrita em [0, capacity)
+        self._count = 0
+        self.total_written = 0
+
+    def append(self, record: Tuple) -> bool:
+        """
+        Escreve um registro (tupla na ordem dos campos do dtype)
+
+        Returns:
+            True se um registro antigo foi sobrescrito
+        """
+        pos = self._pos
+        self._storage[pos] = record
+        self._storage[pos + self.capacity] = self._storage[pos]
+
+        self._pos = pos + 1 if pos + 1 < self.capacity else 0
+        self.total_written += 1
+
+        if self._count < self.capacity:
+            self._count += 1
+            return False
+        return True
+
+    def last(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Retorna view (sem cópia) dos últimos N registros em ordem cronológica
+
+        Args:
+            n: Número de registros (None = todos)
+        """
+        if n is None or n > self._count:
+            n = self._count
+        if n <= 0:
+            return self._storage[:0]
+        end = self._pos + self.capacity
+        return self._storage[end - n:end]
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        """Retorna view de um campo para os últimos N registros"""
+        return self.last(n)[name]
+
+    def latest(self) -> Optional[np.void]:
+        """Retorna o registro mais recente (ou None se vazio)"""
+        if self._count == 0:
+            return None
+        return self._storage[self._pos + self.capacity - 1]
+
+    def clear(self):
+        """Descarta todos os registros (sem realocar)"""
+        self._pos = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __repr__(self) -> str:
+        return f"StructuredRingBuffer(size={self._count}/{self.capacity}, fields={self.dtype.names})"
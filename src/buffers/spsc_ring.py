@@ -0,0 +1,271 @@
+"""
+SPSCRing / CallbackIngress - Ingresso sem lock para callbacks da ProfitDLL
+O thread da DLL (único produtor) apenas copia campos brutos para colunas
+preallocadas e retorna; um thread consumidor faz parsing e fan-out em lotes
+"""
+
+import logging
+import threading
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+
+def _next_power_of_two(value: int) -> int:
+    """Menor potência de 2 >= value"""
+    return 1 << max(0, int(value) - 1).bit_length()
+
+
+class SPSCRing:
+    """
+    Fila circular single-producer/single-consumer em struct-of-arrays
+
+    Cada campo do dtype vira uma coluna NumPy independente. O produtor é o
+    único a escrever `_head` e o consumidor o único a escrever `_tail`; como
+    cada atribuição de int é atômica sob o GIL e o produtor publica `_head`
+    só depois de escrever todas as colunas, nenhum lock é necessário.
+
+    Quando cheia, push() descarta o registro (a DLL nunca é bloqueada).
+    """
+
+    def __init__(self, capacity: int, dtype: np.dtype, name: str = "ring"):
+        """
+        Inicializa a fila
+
+        Args:
+            capacity: Capacidade mínima (arredondada para potência de 2)
+            dtype: dtype estruturado que define as colunas
+            name: Nome do canal (para logs/estatísticas)
+        """
+        if capacity <= 0:
+            raise ValueError("capacity deve ser positiva")
+
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.capacity = _next_power_of_two(capacity)
+        self._mask = self.capacity - 1
+        self.columns = {field: np.zeros(self.capacity, dtype=self.dtype.fields[field][0])
+                        for field in self.dtype.names}
+        self._cols = tuple(self.columns[field] for field in self.dtype.names)
+
+        self._head = 0      # Próxima escrita (apenas produtor)
+        self._tail = 0      # Próxima leitura (apenas consumidor)
+        self.dropped = 0
+        self.high_water = 0
+        self.waiter: Optional["CallbackIngress"] = None
+
+    def push(self, *values) -> bool:
+        """
+        Copia um registro (valores na ordem dos campos do dtype)
+
+        Returns:
+            False se a fila estava cheia e o registro foi descartado
+        """
+        head = self._head
+        if head - self._tail >= self.capacity:
+            self.dropped += 1
+            return False
+
+        index = head & self._mask
+        for column, value in zip(self._cols, values):
+            column[index] = value
+        self._head = head + 1
+
+        waiter = self.waiter
+        if waiter is not None and waiter.sleeping:
+            waiter.wakeup.set()
+        return True
+
+    def consume(self, handler: Callable[[Dict[str, np.ndarray], int], None],
+                max_items: Optional[int] = None) -> int:
+        """
+        Entrega registros pendentes ao handler como views por coluna
+
+        O espaço só é liberado ao produtor depois que o handler retorna,
+        portanto as views são válidas durante a chamada. Um lote que cruza
+        o fim do buffer é entregue em dois segmentos contíguos.
+
+        Args:
+            handler: Função (colunas, n) chamada por segmento
+            max_items: Limite de registros nesta chamada
+
+        Returns:
+            Número de registros consumidos
+        """
+        tail = self._tail
+        available = self._head - tail
+        if available <= 0:
+            return 0
+        if available > self.high_water:
+            self.high_water = available
+        if max_items is not None and available > max_items:
+            available = max_items
+
+        consumed = 0
+        while consumed < available:
+            start = (tail + consumed) & self._mask
+            n = min(available - consumed, self.capacity - start)
+            segment = {field: column[start:start + n] for field, column in self.columns.items()}
+            try:
+                handler(segment, n)
+            finally:
+                consumed += n
+                self._tail = tail + consumed
+        return consumed
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    def get_stats(self) -> Dict:
+        """Retorna estatísticas do canal"""
+        return {
+            'capacity': self.capacity,
+            'pending': len(self),
+            'pushed': self._head,
+            'dropped': self.dropped,
+            'high_water': self.high_water
+        }
+
+
+class CallbackIngress:
+    """
+    Consumidor de um conjunto de SPSCRing
+
+    Um thread drena os canais em rodízio, em lotes de até `batch_size`
+    registros, e chama o handler de cada canal. Exceções do handler são
+    logadas sem derrubar o thread. Quando ocioso, o consumidor dorme num
+    Event que o produtor só sinaliza se `sleeping` estiver ativo.
+    """
+
+    def __init__(self, name: str = "CallbackIngress", batch_size: int = 512,
+                 idle_timeout: float = 0.05):
+        """
+        Inicializa o ingresso
+
+        Args:
+            name: Nome do thread consumidor
+            batch_size: Máximo de registros por canal a cada rodada
+            idle_timeout: Espera máxima (s) quando não há dados
+        """
+        self.name = name
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self.logger = logging.getLogger(name)
+
+        self.channels: Dict[str, SPSCRing] = {}
+        self._handlers: List = []
+        self.sleeping = False
+        self.wakeup = threading.Event()
+        self.running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.batches = 0
+        self.dispatched = 0
+        self.errors = 0
+
+    def add_channel(self, name: str, dtype: np.dtype, handler: Callable,
+                    capacity: int = 65536) -> SPSCRing:
+        """
+        Cria um canal
+
+        Args:
+            name: Nome do canal
+            dtype: Colunas do registro bruto
+            handler: Função (colunas, n) executada no thread consumidor
+            capacity: Capacidade da fila
+
+        Returns:
+            SPSCRing onde o produtor faz push()
+        """
+        ring = SPSCRing(capacity, dtype, name=name)
+        ring.waiter = self
+        self.channels[name] = ring
+        self._handlers.append((ring, handler))
+        return ring
+
+    def start(self):
+        """Inicia o thread consumidor"""
+        if self.running:
+            return
+        if self._thread is not None:
+            # Consumidor anterior ainda terminando a drenagem final
+            self._thread.join()
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self.logger.info(f"Ingresso de callbacks iniciado ({', '.join(self.channels)})")
+
+    def stop(self, timeout: float = 2.0):
+        """
+        Para o consumidor após drenar o que já foi recebido
+
+        A drenagem final é feita pelo próprio thread consumidor antes de
+        sair: drenar aqui com o thread ainda vivo (join expirado) colocaria
+        dois consumidores no mesmo ring.
+        """
+        if not self.running:
+            return
+        self.running = False
+        self.wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                self.logger.warning(
+                    f"Consumidor não terminou em {timeout}s - drenagem final fica com ele "
+                    f"({self.pending()} registros pendentes)"
+                )
+                return
+            self._thread = None
+        self.logger.info(f"Ingresso de callbacks parado - {self.dispatched} registros entregues")
+
+    def pending(self) -> int:
+        """Total de registros aguardando consumo"""
+        return sum(len(ring) for ring in self.channels.values())
+
+    def drain(self, max_items: Optional[int] = None) -> int:
+        """
+        Executa uma rodada de consumo em todos os canais
+
+        Args:
+            max_items: Limite por canal (None = tudo o que estiver pendente)
+
+        Returns:
+            Registros consumidos
+        """
+        total = 0
+        for ring, handler in self._handlers:
+            try:
+                count = ring.consume(handler, max_items)
+            except Exception as e:
+                self.errors += 1
+                self.logger.error(f"Erro processando canal {ring.name}: {e}")
+                continue
+            if count:
+                total += count
+                self.batches += 1
+        self.dispatched += total
+        return total
+
+    def _run(self):
+        """Loop do consumidor"""
+        while self.running:
+            if self.drain(self.batch_size):
+                continue
+
+            self.sleeping = True
+            if not self.pending():
+                self.wakeup.wait(self.idle_timeout)
+            self.sleeping = False
+            self.wakeup.clear()
+
+        # Drenagem final no thread consumidor (único consumidor dos rings)
+        self.drain()
+
+    def get_stats(self) -> Dict:
+        """Retorna estatísticas agregadas e por canal"""
+        return {
+            'running': self.running,
+            'batches': self.batches,
+            'dispatched': self.dispatched,
+            'errors': self.errors,
+            'channels': {name: ring.get_stats() for name, ring in self.channels.items()}
+        }
@@ -11,6 +11,7 @@ from .profit_dll_structures import (
     TConnectorCancelOrder,
     TConnectorAccountIdentifier, 
     TConnectorOrderIdentifier,
+    TConnectorOrderCallback,
     POINTER
 )
 from datetime import datetime
@@ -36,6 +37,46 @@ class ConnectionManagerOCO(ConnectionManagerWorking):
         self.oco_monitor = OCOMonitor(self)
         self.oco_monitor.start()
         
+    def _setup_additional_callbacks(self):
+        """Configura callbacks adicionais e o callback de ordens para o monitor OCO"""
+        super()._setup_additional_callbacks()
+        
+        if not hasattr(self.dll, 'SetOrderCallback'):
+            self.logger.warning("[OCO] SetOrderCallback indisponível - monitor OCO em polling")
+            return
+        
+        @TConnectorOrderCallback
+        def orderCallback(order_ptr):
+            # Apenas copia os campos e enfileira: cancelar a irmã chama a DLL,
+            # o que não pode acontecer dentro do callback
+            try:
+                if order_ptr:
+                    order = order_ptr.contents
+                    self.oco_monitor.on_order_update({
+                        'profit_id': order.ProfitID,
+                        'ticker': str(order.AssetID.pwcTicker),
+                        'side': order.Side,
+                        'order_type': order.OrderType,
+                        'status': order.Status,
+                        'quantity': order.Quantity,
+                        'executed_quantity': order.ExecutedQuantity,
+                        'remaining_quantity': order.RemainingQuantity,
+                        'price': order.Price,
+                        'stop_price': order.StopPrice,
+                        'average_price': order.AveragePrice
+                    })
+                return 0
+            except Exception as e:
+                self.logger.error(f"Erro no order callback: {e}")
+                return 0
+        
+        self.callback_refs['order'] = orderCallback
+        result = self.dll.SetOrderCallback(orderCallback)
+        if result == 0:
+            self.logger.info("[OK] SetOrderCallback registrado - monitor OCO orientado a eventos")
+        else:
+            self.logger.warning(f"[AVISO] SetOrderCallback retornou: {result}")
+        
     def send_order_with_bracket(self, symbol, side, quantity, entry_price,
                                stop_price, take_price, 
                                account_id=None, broker_id=None, password=None):
@@ -519,6 +560,11 @@ class ConnectionManagerOCO(ConnectionManagerWorking):
             if order_id in self.executed_orders:
                 return "FILLED"
             
+            # Índice alimentado pelo callback de ordens evita consultar a DLL
+            known_status = self.oco_monitor.get_order_state(order_id)
+            if known_status is not None:
+                return known_status
+            
             # Tentar obter status via DLL
             if hasattr(self.dll, 'GetOrderStatus'):
                 # Configurar GetOrderStatus
@@ -7,6 +7,7 @@ import logging
 import time
 import os
 import traceback
+import numpy as np
 from typing import Dict, Optional, Callable, Any, List
 from ctypes import WINFUNCTYPE, WinDLL, c_int, c_int32, c_wchar_p, c_double, c_uint, c_char, c_longlong, c_void_p, POINTER, byref
 from datetime import datetime, timedelta
@@ -24,6 +25,47 @@ from src.profit_dll_structures import (
     TOfferBookCallbackV2, TPriceBookCallbackV2, TTradeCallbackV2,
     NResult, ConnectionState
 )
+from src.buffers.spsc_ring import CallbackIngress
+from src.metrics.latency_tracer import get_tracer
+
+# Registros brutos copiados pelos callbacks de mercado (thread da DLL)
+TRADE_INGRESS_DTYPE = np.dtype([
+    ('ticker', object),
+    ('date', object),
+    ('trade_number', 'i8'),
+    ('price', 'f8'),
+    ('volume', 'f8'),
+    ('quantity', 'i8'),
+    ('trade_type', 'i4'),
+    ('received_ns', 'i8'),      # perf_counter_ns na chegada (latência de ingresso)
+])
+
+OFFER_BOOK_INGRESS_DTYPE = np.dtype([
+    ('received', 'f8'),
+    ('ticker', object),
+    ('action', 'i4'),
+    ('position', 'i4'),
+    ('side', 'i4'),
+    ('quantity', 'i8'),
+    ('agent', 'i4'),
+    ('offer_id', 'i8'),
+    ('price', 'f8'),
+    ('has_price', '?'),
+    ('has_quantity', '?'),
+    ('received_ns', 'i8'),
+])
+
+PRICE_BOOK_INGRESS_DTYPE = np.dtype([
+    ('received', 'f8'),
+    ('ticker', object),
+    ('action', 'i4'),
+    ('position', 'i4'),
+    ('side', 'i4'),
+    ('order_count', 'i4'),
+    ('quantity', 'i8'),
+    ('display_quantity', 'i8'),
+    ('price', 'f8'),
+])
 
 class ConnectionManagerV4:
     """Gerencia conexão com Profit e callbacks essenciais - v4.0.0.30"""
@@ -79,6 +121,21 @@ class ConnectionManagerV4:
         # Contadores para debug
         self._historical_data_count = 0
         self._last_historical_timestamp = None
+        self._book_count = 0
+        self.book_update_callback = None
+        
+        # Ingresso dos callbacks de mercado: a DLL só copia campos brutos,
+        # parsing e notificação rodam no thread consumidor
+        ring_size = int(os.getenv('CALLBACK_RING_SIZE', '65536'))
+        self.ingress = CallbackIngress(name='ProfitIngress')
+        self._trade_ring = self.ingress.add_channel(
+            'trade', TRADE_INGRESS_DTYPE, self._dispatch_trades, ring_size)
+        self._offer_book_ring = self.ingress.add_channel(
+            'offer_book', OFFER_BOOK_INGRESS_DTYPE, self._dispatch_offer_book, ring_size)
+        self._price_book_ring = self.ingress.add_channel(
+            'price_book', PRICE_BOOK_INGRESS_DTYPE, self._dispatch_price_book, ring_size)
+        self._time_cache = (None, None)
+        self.tracer = get_tracer()
         
         self.logger.info("ConnectionManagerV4 criado - Compatível com ProfitDLL v4.0.0.30")
     
@@ -159,6 +216,9 @@ class ConnectionManagerV4:
             )
             self.logger.info(f"Resultado da configuração do servidor: {server_result}")
             
+            # Consumidor precisa estar ativo antes dos primeiros callbacks
+            self.ingress.start()
+            
             # Configurar callbacks v4.0.0.30
             self._setup_callbacks_v4()
             
@@ -273,22 +333,9 @@ class ConnectionManagerV4:
         def trade_callback(asset_id, date, trade_number, price, vol, qtd, 
                           buy_agent, sell_agent, trade_type, b_edit):
             try:
-                timestamp = datetime.strptime(str(date), '%d/%m/%Y %H:%M:%S.%f')
-                
-                trade_data = {
-                    'timestamp': timestamp,
-                    'ticker': asset_id.pwcTicker,
-                    'price': float(price),
-                    'volume': float(vol),
-                    'quantity': int(qtd),
-                    'trade_type': int(trade_type),
-                    'trade_number': int(trade_number)
-                }
-                
-                # Notificar callbacks registrados
-                for callback in self.trade_callbacks:
-                    callback(trade_data)
-                    
+                # Apenas copia para o ring - parsing/notificação em _dispatch_trades
+                self._trade_ring.push(asset_id.pwcTicker, date, trade_number,
+                                      price, vol, qtd, trade_type, time.perf_counter_ns())
                 return 0
             except Exception as e:
                 self.logger.error(f"Erro no trade callback: {e}")
@@ -582,39 +629,10 @@ class ConnectionManagerV4:
                     try:
                         ticker_name = asset_id.pwcTicker if asset_id and hasattr(asset_id, 'pwcTicker') else 'N/A'
                         
-                        # Processar dados do book
-                        book_data = {
-                            'timestamp': datetime.now(),
-                            'ticker': ticker_name,
-                            'action': action,  # 0=Adicionar, 1=Atualizar, 2=Remover
-                            'position': position,
-                            'side': side,  # 0=Buy, 1=Sell
-                            'quantity': qtd,
-                            'agent': agent,
-                            'offer_id': offer_id,
-                            'price': price,
-                            'has_price': bool(has_price),
-                            'has_quantity': bool(has_qtd)
-                        }
-                        
-                        # Notificar callback registrado
-                        if self._offer_book_callback:
-                            self._offer_book_callback(book_data)
-                        
-                        # Notificar book_update_callback se existir
-                        if hasattr(self, 'book_update_callback') and self.book_update_callback:
-                            self.book_update_callback(book_data)
-                        
-                        # Log apenas primeiras mensagens para debug
-                        if not hasattr(self, '_book_count'):
-                            self._book_count = 0
-                        self._book_count += 1
-                        
-                        if self._book_count <= 5:
-                            self.logger.info(f"[BOOK V2] {ticker_name} - Side: {side}, Price: {price}, Qty: {qtd}")
-                        elif self._book_count == 100:
-                            self.logger.info(f"[BOOK V2] Recebendo dados de book... ({self._book_count} mensagens)")
-                        
+                        # Apenas copia para o ring - notificação em _dispatch_offer_book
+                        self._offer_book_ring.push(time.time(), ticker_name, action, position,
+                                                   side, qtd, agent, offer_id, price,
+                                                   has_price, has_qtd, time.perf_counter_ns())
                         return 0
                     except Exception as e:
                         self.logger.error(f"Erro no offer book callback v2: {e}")
@@ -635,21 +653,9 @@ class ConnectionManagerV4:
                     try:
                         ticker_name = asset_id.pwcTicker if asset_id and hasattr(asset_id, 'pwcTicker') else 'N/A'
                         
-                        book_data = {
-                            'timestamp': datetime.now(),
-                            'ticker': ticker_name,
-                            'action': action,
-                            'position': position,
-                            'side': side,
-                            'order_count': order_count,
-                            'quantity': qtd,
-                            'display_quantity': display_qtd,
-                            'price': price
-                        }
-                        
-                        if self._price_book_callback:
-                            self._price_book_callback(book_data)
-                        
+                        # Apenas copia para o ring - notificação em _dispatch_price_book
+                        self._price_book_ring.push(time.time(), ticker_name, action, position,
+                                                   side, order_count, qtd, display_qtd, price)
                         return 0
                     except Exception as e:
                         self.logger.error(f"Erro no price book callback v2: {e}")
@@ -673,6 +679,155 @@ class ConnectionManagerV4:
         except Exception as e:
             self.logger.error(f"Erro configurando callbacks V2: {e}")
     
+    def _parse_trade_timestamp(self, date) -> datetime:
+        """
+        Converte 'dd/mm/aaaa HH:MM:SS.fff' da DLL em datetime
+        
+        Trades do mesmo segundo compartilham o prefixo, então só o primeiro
+        paga o strptime; os demais somam apenas a fração.
+        """
+        text = str(date)
+        prefix, _, fraction = text.partition('.')
+        cached_prefix, base = self._time_cache
+        if prefix != cached_prefix:
+            try:
+                base = datetime.strptime(prefix, '%d/%m/%Y %H:%M:%S')
+            except ValueError:
+                return datetime.strptime(text, '%d/%m/%Y %H:%M:%S.%f')
+            self._time_cache = (prefix, base)
+        if not fraction:
+            return base
+        return base.replace(microsecond=int(fraction[:6].ljust(6, '0')))
+    
+    def _dispatch_trades(self, batch: Dict[str, np.ndarray], count: int):
+        """
+        Notifica trade_callbacks com um lote de trades do ring (thread consumidor)
+        
+        Args:
+            batch: Colunas TRADE_INGRESS_DTYPE (views)
+            count: Registros no lote
+        """
+        tickers = batch['ticker']
+        dates = batch['date']
+        numbers = batch['trade_number'].tolist()
+        prices = batch['price'].tolist()
+        volumes = batch['volume'].tolist()
+        quantities = batch['quantity'].tolist()
+        trade_types = batch['trade_type'].tolist()
+        callbacks = list(self.trade_callbacks)
+        
+        for i in range(count):
+            try:
+                trade_data = {
+                    'timestamp': self._parse_trade_timestamp(dates[i]),
+                    'ticker': tickers[i],
+                    'price': prices[i],
+                    'volume': volumes[i],
+                    'quantity': quantities[i],
+                    'trade_type': trade_types[i],
+                    'trade_number': numbers[i]
+                }
+                for callback in callbacks:
+                    callback(trade_data)
+            except Exception as e:
+                self.logger.error(f"Erro no trade callback: {e}")
+        
+        # Callback da DLL -> fim do dispatch, pelo registro mais antigo do lote
+        self.tracer.record('ingress', int(batch['received_ns'][0]))
+    
+    def _dispatch_offer_book(self, batch: Dict[str, np.ndarray], count: int):
+        """
+        Notifica callbacks de offer book com um lote do ring (thread consumidor)
+        
+        Args:
+            batch: Colunas OFFER_BOOK_INGRESS_DTYPE (views)
+            count: Registros no lote
+        """
+        received = batch['received'].tolist()
+        tickers = batch['ticker']
+        actions = batch['action'].tolist()
+        positions = batch['position'].tolist()
+        sides = batch['side'].tolist()
+        quantities = batch['quantity'].tolist()
+        agents = batch['agent'].tolist()
+        offer_ids = batch['offer_id'].tolist()
+        prices = batch['price'].tolist()
+        has_prices = batch['has_price'].tolist()
+        has_quantities = batch['has_quantity'].tolist()
+        
+        for i in range(count):
+            try:
+                book_data = {
+                    'timestamp': datetime.fromtimestamp(received[i]),
+                    'ticker': tickers[i],
+                    'action': actions[i],  # 0=Adicionar, 1=Atualizar, 2=Remover
+                    'position': positions[i],
+                    'side': sides[i],  # 0=Buy, 1=Sell
+                    'quantity': quantities[i],
+                    'agent': agents[i],
+                    'offer_id': offer_ids[i],
+                    'price': prices[i],
+                    'has_price': has_prices[i],
+                    'has_quantity': has_quantities[i]
+                }
+                
+                if self._offer_book_callback:
+                    self._offer_book_callback(book_data)
+                if self.book_update_callback:
+                    self.book_update_callback(book_data)
+                
+                # Log apenas primeiras mensagens para debug
+                self._book_count += 1
+                if self._book_count <= 5:
+                    self.logger.info(f"[BOOK V2] {tickers[i]} - Side: {sides[i]}, Price: {prices[i]}, Qty: {quantities[i]}")
+                elif self._book_count == 100:
+                    self.logger.info(f"[BOOK V2] Recebendo dados de book... ({self._book_count} mensagens)")
+            except Exception as e:
+                self.logger.error(f"Erro no offer book callback v2: {e}")
+        
+        self.tracer.record('ingress', int(batch['received_ns'][0]))
+    
+    def _dispatch_price_book(self, batch: Dict[str, np.ndarray], count: int):
+        """
+        Notifica o callback de price book com um lote do ring (thread consumidor)
+        
+        Args:
+            batch: Colunas PRICE_BOOK_INGRESS_DTYPE (views)
+            count: Registros no lote
+        """
+        if not self._price_book_callback:
+            return
+        
+        received = batch['received'].tolist()
+        tickers = batch['ticker']
+        actions = batch['action'].tolist()
+        positions = batch['position'].tolist()
+        sides = batch['side'].tolist()
+        order_counts = batch['order_count'].tolist()
+        quantities = batch['quantity'].tolist()
+        display_quantities = batch['display_quantity'].tolist()
+        prices = batch['price'].tolist()
+        
+        for i in range(count):
+            try:
+                self._price_book_callback({
+                    'timestamp': datetime.fromtimestamp(received[i]),
+                    'ticker': tickers[i],
+                    'action': actions[i],
+                    'position': positions[i],
+                    'side': sides[i],
+                    'order_count': order_counts[i],
+                    'quantity': quantities[i],
+                    'display_quantity': display_quantities[i],
+                    'price': prices[i]
+                })
+            except Exception as e:
+                self.logger.error(f"Erro no price book callback v2: {e}")
+    
+    def get_ingress_stats(self) -> Dict:
+        """Retorna estatísticas do ingresso de callbacks (pendentes, descartes, lotes)"""
+        return self.ingress.get_stats()
+    
     def _wait_for_connections(self, timeout: int = 30) -> bool:
         """Aguarda conexões serem estabelecidas"""
         start_time = time.time()
@@ -1157,6 +1312,12 @@ class ConnectionManagerV4:
     def disconnect(self):
         """Desconecta e limpa recursos"""
         try:
+            self.ingress.stop()
+            stats = self.ingress.get_stats()
+            dropped = sum(ch['dropped'] for ch in stats['channels'].values())
+            if dropped:
+                self.logger.warning(f"Ingresso descartou {dropped} callbacks (ring cheio)")
+            
             if self.dll:
                 result = self.dll.DLLFinalize()
                 if result == NResult.NL_OK:
@@ -17,6 +17,7 @@ from typing import Optional, Callable, Dict, Any
 from dotenv import load_dotenv
 import threading
 from src.market_data.volume_capture_system import VolumeTracker
+from src.market_data.order_book import OrderBookLadder
 
 # Carregar variáveis de ambiente
 load_dotenv('.env.production')
@@ -90,6 +91,10 @@ class ConnectionManagerWorking:
         self.last_trade_price = 0
         self.last_book_update = {}
         
+        # Book completo reconstruído a partir dos deltas do OfferBook V2
+        self.book_levels = int(os.getenv('BOOK_LEVELS', '5'))
+        self.order_book = OrderBookLadder(tick_size=float(os.getenv('TICK_SIZE', '0.5')))
+        
         # Callbacks externos
         self._offer_book_callback = None
         self._trade_callback = None
@@ -273,8 +278,32 @@ class ConnectionManagerWorking:
             with self._lock:
                 self.callbacks['offer_book'] += 1
                 
-                # Validar e processar dados
-                if bHasPrice and bHasQtd and sPrice > 1000 and sPrice < 10000 and nQtd > 0:
+                # Aplicar delta no book por nível de preço
+                changed = self.order_book.apply_offer(
+                    nAction, Side, sPrice, nQtd,
+                    offer_id=nOfferID if bHasOfferID else None,
+                    has_price=bool(bHasPrice), has_quantity=bool(bHasQtd)
+                )
+                
+                if changed and self.order_book.is_valid():
+                    book_data = self.order_book.snapshot(self.book_levels)
+                    self.last_bid = book_data['bid_price_1']
+                    self.last_ask = book_data['ask_price_1']
+                    self.last_book_update.update(book_data)
+                    book_data['timestamp'] = datetime.now().isoformat()
+                    
+                    if self._offer_book_callback:
+                        try:
+                            self._offer_book_callback(self.target_ticker, book_data)
+                        except Exception as e:
+                            self.logger.error(f"Erro no callback externo: {e}")
+                    
+                    if self.callbacks['offer_book'] <= 5 or self.callbacks['offer_book'] % 1000 == 0:
+                        self.logger.info(f"[OFFER_BOOK] {self.last_bid:.2f} x {self.last_ask:.2f} "
+                                         f"(imbalance {book_data['imbalance']:+.2f})")
+                
+                # Book ainda incompleto: manter heurística de topo por posição
+                elif bHasPrice and bHasQtd and sPrice > 1000 and sPrice < 10000 and nQtd > 0:
                     # Atualizar preços se for melhor bid/ask
                     if Side == 0 and nPosition == 0:  # Melhor bid
                         self.last_bid = sPrice
@@ -608,6 +637,16 @@ class ConnectionManagerWorking:
                 'mid': (self.last_bid + self.last_ask) / 2 if self.last_bid > 0 and self.last_ask > 0 else 0
             }
     
+    def get_book_depth(self, levels: Optional[int] = None) -> Dict[str, float]:
+        """
+        Retorna snapshot do book por nível (bid_price_N, bid_volume_N, ...)
+        
+        Args:
+            levels: Número de níveis por lado (padrão BOOK_LEVELS)
+        """
+        with self._lock:
+            return self.order_book.snapshot(levels or self.book_levels)
+    
     def is_receiving_data(self) -> bool:
         """Verifica se está recebendo dados"""
         with self._lock:
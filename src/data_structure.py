@@ -9,19 +9,48 @@ from datetime import datetime
 from typing import Dict, Optional, List, Any
 import logging
 
+try:
+    from src.buffers.frame_store import FrameStore
+except ImportError:
+    from buffers.frame_store import FrameStore
+
+TABLES = ('candles', 'microstructure', 'orderbook', 'indicators', 'features')
+
+
+def _table_property(name: str) -> property:
+    """
+    Expõe uma FrameStore como DataFrame
+    
+    Leitura monta o DataFrame (em cache até a próxima atualização);
+    atribuição substitui o conteúdo da tabela.
+    """
+    def getter(self) -> pd.DataFrame:
+        return self.stores[name].frame()
+    
+    def setter(self, frame: pd.DataFrame):
+        self.stores[name].reset(frame, columns=list(frame.columns))
+    
+    return property(getter, setter, doc=f"DataFrame de {name} (montado sob demanda)")
+
+
 class TradingDataStructure:
     """
     Estrutura centralizada de dados do sistema
     Mantém dataframes separados para melhor organização e performance
+    
+    Cada tabela é uma FrameStore colunar: atualizações corrigem a barra
+    aberta no lugar ou anexam barras novas, sem recriar a tabela inteira
     """
     
+    candles = _table_property('candles')
+    microstructure = _table_property('microstructure')
+    orderbook = _table_property('orderbook')
+    indicators = _table_property('indicators')
+    features = _table_property('features')
+    
     def __init__(self):
-        # DataFrames principais (baseado em enhanced_historical.py)
-        self.candles = pd.DataFrame()
-        self.microstructure = pd.DataFrame()
-        self.orderbook = pd.DataFrame()
-        self.indicators = pd.DataFrame()
-        self.features = pd.DataFrame()
+        # Tabelas principais (baseado em enhanced_historical.py)
+        self.stores: Dict[str, FrameStore] = {name: FrameStore() for name in TABLES}
         
         # Metadados
         self.last_update = None
@@ -106,20 +135,19 @@ class TradingDataStructure:
         
         self.logger.info("Estrutura de dados inicializada")
     
+    def _upsert(self, name: str, new_data: pd.DataFrame) -> bool:
+        """Atualiza a tabela pelo índice (última versão de cada linha vale)"""
+        if new_data.empty:
+            return False
+        self.stores[name].upsert(new_data)
+        return True
+    
     def update_candles(self, new_candles: pd.DataFrame) -> bool:
-        """Atualiza DataFrame de candles"""
+        """Atualiza candles (barra aberta no lugar, barras novas no final)"""
         try:
-            if new_candles.empty:
+            if not self._upsert('candles', new_candles):
                 return False
                 
-            if self.candles.empty:
-                self.candles = new_candles.copy()
-            else:
-                # Concatenar e remover duplicatas
-                self.candles = pd.concat([self.candles, new_candles])
-                self.candles = self.candles[~self.candles.index.duplicated(keep='last')]
-                self.candles = self.candles.sort_index()
-                
             # Atualizar metadados
             self._update_metadata()
             
@@ -130,97 +158,51 @@ class TradingDataStructure:
             return False
     
     def update_microstructure(self, new_micro: pd.DataFrame) -> bool:
-        """Atualiza DataFrame de microestrutura"""
+        """Atualiza tabela de microestrutura"""
         try:
-            if new_micro.empty:
-                return False
-                
-            if self.microstructure.empty:
-                self.microstructure = new_micro.copy()
-            else:
-                # Concatenar e remover duplicatas
-                self.microstructure = pd.concat([self.microstructure, new_micro])
-                self.microstructure = self.microstructure[~self.microstructure.index.duplicated(keep='last')]
-                self.microstructure = self.microstructure.sort_index()
-                
-            return True
-            
+            return self._upsert('microstructure', new_micro)
         except Exception as e:
             self.logger.error(f"Erro atualizando microestrutura: {e}")
             return False
     
     def update_orderbook(self, new_orderbook: pd.DataFrame) -> bool:
-        """Atualiza DataFrame de orderbook"""
+        """Atualiza tabela de orderbook"""
         try:
-            if new_orderbook.empty:
-                return False
-                
-            if self.orderbook.empty:
-                self.orderbook = new_orderbook.copy()
-            else:
-                # Concatenar e remover duplicatas
-                self.orderbook = pd.concat([self.orderbook, new_orderbook])
-                self.orderbook = self.orderbook[~self.orderbook.index.duplicated(keep='last')]
-                self.orderbook = self.orderbook.sort_index()
-                
-            return True
-            
+            return self._upsert('orderbook', new_orderbook)
         except Exception as e:
             self.logger.error(f"Erro atualizando orderbook: {e}")
             return False
     
     def update_indicators(self, new_indicators: pd.DataFrame) -> bool:
-        """Atualiza DataFrame de indicadores"""
+        """Atualiza tabela de indicadores"""
         try:
-            if new_indicators.empty:
-                return False
-                
-            if self.indicators.empty:
-                self.indicators = new_indicators.copy()
-            else:
-                # Concatenar e remover duplicatas
-                self.indicators = pd.concat([self.indicators, new_indicators])
-                self.indicators = self.indicators[~self.indicators.index.duplicated(keep='last')]
-                self.indicators = self.indicators.sort_index()
-                
-            return True
-            
+            return self._upsert('indicators', new_indicators)
         except Exception as e:
             self.logger.error(f"Erro atualizando indicadores: {e}")
             return False
     
     def update_features(self, new_features: pd.DataFrame) -> bool:
-        """Atualiza DataFrame de features"""
+        """Atualiza tabela de features"""
         try:
-            if new_features.empty:
-                return False
-                
-            if self.features.empty:
-                self.features = new_features.copy()
-            else:
-                # Concatenar e remover duplicatas
-                self.features = pd.concat([self.features, new_features])
-                self.features = self.features[~self.features.index.duplicated(keep='last')]
-                self.features = self.features.sort_index()
-                
-            return True
-            
+            return self._upsert('features', new_features)
         except Exception as e:
             self.logger.error(f"Erro atualizando features: {e}")
             return False
     
     def _update_metadata(self):
-        """Atualiza metadados e cache"""
-        if not self.candles.empty:
+        """Atualiza metadados e cache (sem montar o DataFrame)"""
+        store = self.stores['candles']
+        if not store.empty:
             self.last_update = datetime.now()
-            self.last_price = self.candles['close'].iloc[-1]
-            self.last_volume = self.candles['volume'].iloc[-1]
+            self.last_price = store.last('close')
+            self.last_volume = store.last('volume')
             
             # Atualizar qualidade de dados
-            self.data_quality['total_candles'] = len(self.candles)
+            start, end = store.index_bounds()
+            self.data_quality['total_candles'] = len(store)
             self.data_quality['data_range'] = {
-                'start': self.candles.index[0],
-                'end': self.candles.index[-1]
+                'start': start,
+                'end': end
             }
     
     def get_candles(self) -> pd.DataFrame:
@@ -237,14 +219,16 @@ class TradingDataStructure:
     
     def get_latest_candle(self) -> Optional[pd.Series]:
         """Retorna o candle mais recente"""
-        if not self.candles.empty:
-            return self.candles.iloc[-1]
+        store = self.stores['candles']
+        if not store.empty:
+            return store.tail(1).iloc[-1]
         return None
     
     def get_candles_window(self, periods: int) -> pd.DataFrame:
         """Retorna janela de N candles mais recentes"""
-        if not self.candles.empty:
-            return self.candles.tail(periods)
+        store = self.stores['candles']
+        if not store.empty:
+            return store.tail(periods)
         return pd.DataFrame()
     
     def check_data_quality(self) -> Dict[str, Any]:
@@ -337,11 +321,8 @@ class TradingDataStructure:
     
     def clear(self):
         """Limpa todos os dados"""
-        self.candles = pd.DataFrame()
-        self.microstructure = pd.DataFrame()
-        self.orderbook = pd.DataFrame()
-        self.indicators = pd.DataFrame()
-        self.features = pd.DataFrame()
+        for store in self.stores.values():
+            store.reset(columns=[])
         
         self.last_update = None
         self.last_price = None
@@ -11,6 +11,7 @@ from .event_system import (
     MarketEvent,
     EventBus,
     EventType,
+    LaneConfig,
     
     # Funções helpers
     get_event_bus,
@@ -45,6 +46,7 @@ __all__ = [
     'MarketEvent',
     'EventBus',
     'EventType',
+    'LaneConfig',
     'get_event_bus',
     'emit_order_event',
     'emit_position_event',
@@ -5,12 +5,13 @@ Baseado em arquitetura event-driven para gerenciar ordens, posições e trades
 
 import logging
 import threading
+import time
+import heapq
 from datetime import datetime
 from typing import Dict, List, Callable, Any, Optional
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from collections import defaultdict
-import queue
+from collections import defaultdict, deque
 import json
 
 logger = logging.getLogger(__name__)
@@ -150,32 +151,202 @@ class MarketEvent(Event):
 
 # ==================== EVENT BUS CENTRAL ====================
 
+MARKET_EVENTS = frozenset({
+    EventType.PRICE_UPDATE,
+    EventType.BOOK_UPDATE,
+    EventType.TRADE_EXECUTED
+})
+
+ORDER_EVENTS = frozenset({
+    EventType.ORDER_SUBMITTED,
+    EventType.ORDER_FILLED,
+    EventType.ORDER_PARTIAL_FILLED,
+    EventType.ORDER_CANCELLED,
+    EventType.ORDER_REJECTED,
+    EventType.ORDER_EXPIRED,
+    EventType.POSITION_OPENED,
+    EventType.POSITION_CLOSED,
+    EventType.POSITION_UPDATED,
+    EventType.STOP_TRIGGERED,
+    EventType.TAKE_TRIGGERED,
+    EventType.OCO_CANCELLED
+})
+
+RISK_EVENTS = frozenset({
+    EventType.RISK_LIMIT_REACHED,
+    EventType.DAILY_LOSS_LIMIT,
+    EventType.MARGIN_CALL
+})
+
+
+@dataclass
+class LaneConfig:
+    """
+    Configuração de uma lane (fila + workers) do EventBus
+    
+    Args:
+        name: Nome da lane
+        event_types: Tipos roteados para a lane (vazio = lane padrão)
+        workers: Threads consumidoras (1 preserva a ordem dos eventos)
+        max_size: Eventos pendentes antes de descartar
+        batch_size: Máximo de eventos retirados por vez
+        coalesce: Tipos em que só o último evento pendente por símbolo importa
+        drop_when_full: Descartar silenciosamente quando cheia (dados de mercado)
+    """
+    name: str
+    event_types: frozenset = frozenset()
+    workers: int = 1
+    max_size: int = 10000
+    batch_size: int = 64
+    coalesce: frozenset = frozenset()
+    drop_when_full: bool = False
+
+
+def default_lanes(max_queue_size: int = 10000) -> List[LaneConfig]:
+    """Lanes padrão: mercado isolado de ordens/posições e de risco"""
+    return [
+        LaneConfig("market", MARKET_EVENTS, max_size=max_queue_size, batch_size=256,
+                   coalesce=frozenset({EventType.BOOK_UPDATE, EventType.PRICE_UPDATE}),
+                   drop_when_full=True),
+        LaneConfig("orders", ORDER_EVENTS, max_size=max_queue_size, batch_size=16),
+        LaneConfig("risk", RISK_EVENTS, max_size=max_queue_size, batch_size=16),
+        LaneConfig("default", max_size=max_queue_size)
+    ]
+
+
+class _EventLane:
+    """
+    Fila de prioridade de uma lane
+    
+    Entradas são listas [-prioridade, seq, evento]; eventos coalescidos
+    substituem o payload da entrada pendente, mantendo a posição na fila.
+    """
+    
+    def __init__(self, config: LaneConfig):
+        self.config = config
+        self.name = config.name
+        self.cond = threading.Condition(threading.Lock())
+        self.heap: List[list] = []
+        self.pending_by_key: Dict[tuple, list] = {}
+        self.pending_by_type: Dict[EventType, int] = defaultdict(int)
+        self.threads: List[threading.Thread] = []
+        self._seq = 0
+        
+        self.published = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.high_water = 0
+        self.published_by_type: Dict[EventType, int] = defaultdict(int)
+        # Latência de handlers por tipo: [chamadas, total_ns, max_ns]
+        self.handler_latency: Dict[EventType, list] = defaultdict(lambda: [0, 0, 0])
+    
+    def put(self, event: Event) -> bool:
+        """Enfileira (ou coalesce) o evento; False se descartado por falta de espaço"""
+        with self.cond:
+            self.published += 1
+            self.published_by_type[event.type] += 1
+            key = None
+            if event.type in self.config.coalesce:
+                key = (event.type, event.data.get('symbol', event.source))
+                entry = self.pending_by_key.get(key)
+                if entry is not None:
+                    entry[2] = event
+                    self.coalesced += 1
+                    return True
+            
+            if len(self.heap) >= self.config.max_size:
+                self.dropped += 1
+                return False
+            
+            self._seq += 1
+            entry = [-event.priority, self._seq, event]
+            heapq.heappush(self.heap, entry)
+            if key is not None:
+                self.pending_by_key[key] = entry
+            self.pending_by_type[event.type] += 1
+            if len(self.heap) > self.high_water:
+                self.high_water = len(self.heap)
+            self.cond.notify()
+            return True
+    
+    def take(self, timeout: float) -> List[Event]:
+        """Retira até batch_size eventos (espera até `timeout` se vazia)"""
+        with self.cond:
+            if not self.heap:
+                self.cond.wait(timeout)
+                if not self.heap:
+                    return []
+            
+            batch = []
+            for _ in range(min(self.config.batch_size, len(self.heap))):
+                entry = heapq.heappop(self.heap)
+                event = entry[2]
+                if self.config.coalesce and event.type in self.config.coalesce:
+                    key = (event.type, event.data.get('symbol', event.source))
+                    if self.pending_by_key.get(key) is entry:
+                        del self.pending_by_key[key]
+                self.pending_by_type[event.type] -= 1
+                batch.append(event)
+            return batch
+    
+    def wake_all(self):
+        with self.cond:
+            self.cond.notify_all()
+    
+    def depth(self) -> int:
+        return len(self.heap)
+
+
 class EventBus:
     """
     Barramento de eventos centralizado
     Gerencia publicação e subscrição de eventos
+    
+    Cada tipo de evento é roteado para uma lane com fila e workers próprios,
+    de modo que dados de mercado (BOOK_UPDATE a cada tick) não atrasam
+    eventos de ordem/posição/risco. Book/preço pendentes são coalescidos
+    (só o mais recente por símbolo é entregue) e descartados se a lane
+    encher; as demais lanes nunca coalescem.
     """
     
-    def __init__(self, max_queue_size: int = 10000):
-        self.subscribers: Dict[EventType, List[Callable]] = defaultdict(list)
-        self.event_queue = queue.PriorityQueue(maxsize=max_queue_size)
+    def __init__(self, max_queue_size: int = 10000, lanes: Optional[List[LaneConfig]] = None,
+                 max_history_size: int = 1000):
+        """
+        Args:
+            max_queue_size: Capacidade padrão de cada lane
+            lanes: Configuração das lanes (None = default_lanes)
+            max_history_size: Tamanho do histórico em anel
+        """
+        # handlers por tipo: tupla imutável (copy-on-write), lida sem lock
+        self.subscribers: Dict[EventType, tuple] = {}
         self.is_running = False
-        self.processor_thread = None
         self.lock = threading.RLock()
         
-        # Estatísticas
-        self.stats = {
-            "events_published": 0,
-            "events_processed": 0,
-            "events_failed": 0,
-            "events_by_type": defaultdict(int)
-        }
+        self.lanes: Dict[str, _EventLane] = {}
+        self._routes: Dict[EventType, _EventLane] = {}
+        default_lane = None
+        for config in (lanes or default_lanes(max_queue_size)):
+            lane = _EventLane(config)
+            self.lanes[config.name] = lane
+            if not config.event_types:
+                default_lane = lane
+            for event_type in config.event_types:
+                self._routes[event_type] = lane
+        if default_lane is None:
+            default_lane = _EventLane(LaneConfig("default", max_size=max_queue_size))
+            self.lanes["default"] = default_lane
+        for event_type in EventType:
+            self._routes.setdefault(event_type, default_lane)
+        
+        # Estatísticas: contadores por lane, sob lane.cond; get_stats soma
         
-        # Histórico de eventos (últimos N eventos)
-        self.event_history: List[Event] = []
-        self.max_history_size = 1000
+        # Histórico de eventos (últimos N eventos) em anel
+        self.max_history_size = max_history_size
+        self.event_history = deque(maxlen=max_history_size)
         
-        logger.info("EventBus inicializado")
+        logger.info(f"EventBus inicializado - lanes: {', '.join(self.lanes)}")
     
     def start(self):
         """Inicia o processamento de eventos"""
@@ -183,15 +354,25 @@ class EventBus:
             return
         
         self.is_running = True
-        self.processor_thread = threading.Thread(target=self._process_events, daemon=True)
-        self.processor_thread.start()
+        for lane in self.lanes.values():
+            lane.threads = [
+                threading.Thread(target=self._process_events, args=(lane,), daemon=True,
+                                 name=f"EventBus-{lane.name}-{i}")
+                for i in range(max(1, lane.config.workers))
+            ]
+            for thread in lane.threads:
+                thread.start()
         logger.info("EventBus iniciado")
     
     def stop(self):
         """Para o processamento de eventos"""
         self.is_running = False
-        if self.processor_thread:
-            self.processor_thread.join(timeout=5)
+        for lane in self.lanes.values():
+            lane.wake_all()
+        for lane in self.lanes.values():
+            for thread in lane.threads:
+                thread.join(timeout=5)
+            lane.threads = []
         logger.info("EventBus parado")
     
     def subscribe(self, event_type: EventType, handler: Callable, priority: int = 5):
@@ -204,20 +385,25 @@ class EventBus:
             priority: Prioridade do handler (maior = executado primeiro)
         """
         with self.lock:
-            # Adicionar handler com prioridade
-            self.subscribers[event_type].append((priority, handler))
-            # Ordenar por prioridade (maior primeiro)
-            self.subscribers[event_type].sort(key=lambda x: x[0], reverse=True)
+            handlers = list(self.subscribers.get(event_type, ()))
+            # Inserir após handlers de prioridade >= (estável, sem reordenar tudo)
+            index = len(handlers)
+            for i, (p, _) in enumerate(handlers):
+                if p < priority:
+                    index = i
+                    break
+            handlers.insert(index, (priority, handler))
+            self.subscribers[event_type] = tuple(handlers)
             
             logger.debug(f"Handler inscrito para {event_type.name}")
     
     def unsubscribe(self, event_type: EventType, handler: Callable):
         """Remove inscrição de um handler"""
         with self.lock:
-            self.subscribers[event_type] = [
-                (p, h) for p, h in self.subscribers[event_type] 
+            self.subscribers[event_type] = tuple(
+                (p, h) for p, h in self.subscribers.get(event_type, ())
                 if h != handler
-            ]
+            )
     
     def publish(self, event: Event):
         """
@@ -226,23 +412,16 @@ class EventBus:
         Args:
             event: Evento a ser publicado
         """
-        try:
-            # Adicionar à fila com prioridade invertida (menor valor = maior prioridade)
-            priority_value = -event.priority  # Inverter para PriorityQueue
-            self.event_queue.put((priority_value, event.timestamp, event))
-            
-            # Atualizar estatísticas
-            self.stats["events_published"] += 1
-            self.stats["events_by_type"][event.type] += 1
-            
-            # Adicionar ao histórico
-            self._add_to_history(event)
-            
-            logger.debug(f"Evento publicado: {event}")
-            
-        except queue.Full:
-            logger.error(f"Fila de eventos cheia! Evento perdido: {event}")
-            self.stats["events_failed"] += 1
+        lane = self._routes[event.type]
+        accepted = lane.put(event)
+        
+        if not accepted:
+            if not lane.config.drop_when_full:
+                logger.error(f"Fila de eventos cheia ({lane.name})! Evento perdido: {event}")
+            return
+        
+        # Adicionar ao histórico
+        self.event_history.append(event)
     
     def publish_immediate(self, event: Event):
         """
@@ -252,58 +431,96 @@ class EventBus:
         with self.lock:
             self._process_single_event(event)
     
-    def _process_events(self):
-        """Thread principal de processamento de eventos"""
-        logger.info("Processador de eventos iniciado")
+    def _process_events(self, lane: _EventLane):
+        """Worker de uma lane: retira lotes e despacha"""
+        logger.info(f"Processador de eventos iniciado ({lane.name})")
         
         while self.is_running:
             try:
-                # Pegar evento da fila com timeout
-                priority, timestamp, event = self.event_queue.get(timeout=0.1)
-                self._process_single_event(event)
-                self.stats["events_processed"] += 1
+                batch = lane.take(timeout=0.1)
+                if not batch:
+                    continue
+                for event in batch:
+                    self._process_single_event(event)
+                # Contadores por lane (sob o lock da lane); get_stats soma
+                with lane.cond:
+                    lane.processed += len(batch)
                 
-            except queue.Empty:
-                continue
             except Exception as e:
                 logger.error(f"Erro processando evento: {e}")
-                self.stats["events_failed"] += 1
+                with lane.cond:
+                    lane.failed += 1
     
     def _process_single_event(self, event: Event):
         """Processa um único evento"""
-        try:
-            # Buscar handlers para este tipo de evento
-            handlers = self.subscribers.get(event.type, [])
-            
-            # Executar cada handler
-            for priority, handler in handlers:
-                try:
-                    handler(event)
-                except Exception as e:
-                    logger.error(f"Erro em handler para {event.type.name}: {e}")
-                    
-        except Exception as e:
-            logger.error(f"Erro processando evento {event}: {e}")
-    
-    def _add_to_history(self, event: Event):
-        """Adiciona evento ao histórico"""
-        with self.lock:
-            self.event_history.append(event)
-            
-            # Limitar tamanho do histórico
-            if len(self.event_history) > self.max_history_size:
-                self.event_history = self.event_history[-self.max_history_size:]
+        handlers = self.subscribers.get(event.type, ())
+        if not handlers:
+            return
+        
+        started = time.perf_counter_ns()
+        for priority, handler in handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error(f"Erro em handler para {event.type.name}: {e}")
+        elapsed = time.perf_counter_ns() - started
+        
+        lane = self._routes[event.type]
+        with lane.cond:
+            latency = lane.handler_latency[event.type]
+            latency[0] += 1
+            latency[1] += elapsed
+            if elapsed > latency[2]:
+                latency[2] = elapsed
+    
+    def get_lane_stats(self) -> Dict[str, dict]:
+        """Profundidade, descartes e coalescência por lane/tipo"""
+        lanes = {}
+        for name, lane in self.lanes.items():
+            with lane.cond:
+                lanes[name] = {
+                    "depth": lane.depth(),
+                    "high_water": lane.high_water,
+                    "published": lane.published,
+                    "processed": lane.processed,
+                    "failed": lane.failed,
+                    "dropped": lane.dropped,
+                    "coalesced": lane.coalesced,
+                    "workers": len(lane.threads),
+                    "depth_by_type": {t.name: n for t, n in lane.pending_by_type.items() if n}
+                }
+        return lanes
+    
+    def get_handler_latency(self) -> Dict[str, dict]:
+        """Latência total dos handlers por tipo de evento (ms)"""
+        latency = {}
+        for lane in self.lanes.values():
+            with lane.cond:
+                for event_type, (calls, total, peak) in lane.handler_latency.items():
+                    latency[event_type.name] = {
+                        "calls": calls,
+                        "mean_ms": total / calls / 1e6 if calls else 0.0,
+                        "max_ms": peak / 1e6
+                    }
+        return latency
     
     def get_stats(self) -> dict:
         """Retorna estatísticas do EventBus"""
-        with self.lock:
-            return {
-                "published": self.stats["events_published"],
-                "processed": self.stats["events_processed"],
-                "failed": self.stats["events_failed"],
-                "queue_size": self.event_queue.qsize(),
-                "by_type": dict(self.stats["events_by_type"])
-            }
+        lanes = self.get_lane_stats()
+        by_type = {}
+        for lane in self.lanes.values():
+            with lane.cond:
+                for event_type, count in lane.published_by_type.items():
+                    by_type[event_type] = by_type.get(event_type, 0) + count
+        return {
+            "published": sum(lane["published"] for lane in lanes.values()),
+            "processed": sum(lane["processed"] for lane in lanes.values()),
+            "failed": sum(lane["dropped"] + lane["failed"] for lane in lanes.values()),
+            "queue_size": sum(lane["depth"] for lane in lanes.values()),
+            "by_type": by_type,
+            "lanes": lanes,
+            "handler_latency": self.get_handler_latency()
+        }
     
     def get_recent_events(self, event_type: Optional[EventType] = None, limit: int = 100) -> List[Event]:
         """
@@ -313,13 +530,12 @@ class EventBus:
             event_type: Filtrar por tipo (None = todos)
             limit: Número máximo de eventos
         """
-        with self.lock:
-            events = self.event_history
-            
-            if event_type:
-                events = [e for e in events if e.type == event_type]
-            
-            return events[-limit:]
+        events = list(self.event_history)
+        
+        if event_type:
+            events = [e for e in events if e.type == event_type]
+        
+        return events[-limit:]
 
 # ==================== SINGLETON GLOBAL ====================
 
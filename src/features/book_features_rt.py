@@ -3,6 +3,7 @@ BookFeatureEngineerRT - Engenharia de Features em Tempo Real
 Versão otimizada para cálculo incremental das 65 features necessárias
 """
 
+import math
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Tuple, Any
@@ -19,6 +20,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from book_data_manager import BookDataManager
 from buffers.circular_buffer import CandleBuffer, BookBuffer, TradeBuffer
+from features.streaming_features import StreamingFeatureEngine
 
 
 class BookFeatureEngineerRT:
@@ -27,6 +29,17 @@ class BookFeatureEngineerRT:
     Calcula as 65 features necessárias para os modelos ML de forma incremental
     """
     
+    # Fontes de dados das quais cada grupo de features depende.
+    # Um grupo só é recalculado quando alguma de suas fontes mudou.
+    GROUP_SOURCES = {
+        'volatility': ('candle',),
+        'returns': ('candle',),
+        'order_flow': ('candle', 'trade', 'book'),
+        'volume': ('candle', 'trade'),
+        'technical': ('candle',),
+        'microstructure': ('trade', 'book'),
+    }
+    
     def __init__(self, book_manager: Optional[BookDataManager] = None):
         """
         Inicializa o calculador de features em tempo real
@@ -42,10 +55,18 @@ class BookFeatureEngineerRT:
         # Buffers para cálculos
         self.candle_buffer = CandleBuffer(max_size=200)
         
-        # Cache de features calculadas
+        # Estado incremental (O(1) por candle/trade/snapshot)
+        max_trades = self.book_manager.trade_buffer.max_size if self.book_manager else 1000
+        self.stream = StreamingFeatureEngine(max_trades=max_trades)
+        self._seen_trades = 0
+        self._seen_snapshots = 0
+        self._seen_book_callbacks = 0
+        
+        # Cache de features calculadas (por grupo) e fontes alteradas
         self.feature_cache = {}
         self.cache_timestamp = None
         self.cache_lock = threading.RLock()
+        self._dirty_sources = {'candle', 'trade', 'book'}
         
         # Configurações
         self.lookback_periods = {
@@ -131,36 +152,26 @@ class BookFeatureEngineerRT:
                     # É um candle
                     self._update_candle(new_data)
                 
-                # Calcular todas as features
-                features = {}
-                
-                # 1. Features de Volatilidade
-                volatility_features = self._calculate_volatility_features()
-                features.update(volatility_features)
-                
-                # 2. Features de Retornos
-                return_features = self._calculate_return_features()
-                features.update(return_features)
+                # Consumir trades/snapshots novos do book manager
+                self._sync_book_manager()
                 
-                # 3. Features de Order Flow
-                order_flow_features = self._calculate_order_flow_features()
-                features.update(order_flow_features)
-                
-                # 4. Features de Volume
-                volume_features = self._calculate_volume_features()
-                features.update(volume_features)
-                
-                # 5. Features de Indicadores Técnicos
-                technical_features = self._calculate_technical_features()
-                features.update(technical_features)
+                # Recalcular apenas grupos cujas fontes mudaram
+                dirty = self._dirty_sources
+                for group, sources in self.GROUP_SOURCES.items():
+                    if group not in self.feature_cache or any(src in dirty for src in sources):
+                        self.feature_cache[group] = self._calculate_group(group)
+                        self.stats['cache_misses'] += 1
+                    else:
+                        self.stats['cache_hits'] += 1
+                self._dirty_sources = set()
                 
-                # 6. Features de Microestrutura
-                microstructure_features = self._calculate_microstructure_features()
-                features.update(microstructure_features)
+                features = {}
+                for group_features in self.feature_cache.values():
+                    features.update(group_features)
                 
-                # 7. Features Temporais
-                temporal_features = self._calculate_temporal_features()
-                features.update(temporal_features)
+                # Dependem do relógio: calculadas a cada chamada
+                features['time_normalized'] = self._calculate_time_normalized()
+                features.update(self._calculate_temporal_features())
                 
                 # Garantir que temos todas as 65 features
                 features = self._validate_and_fill_features(features)
@@ -193,97 +204,96 @@ class BookFeatureEngineerRT:
         features = self.calculate_incremental_features({})
         
         # Garantir ordem correta das features
-        feature_vector = []
-        for feature_name in self.required_features:
-            feature_vector.append(features.get(feature_name, 0.0))
-        
-        return np.array(feature_vector)
+        return np.fromiter(
+            (features[name] for name in self.required_features),
+            dtype=float, count=len(self.required_features)
+        )
     
     # Métodos privados de cálculo de features
     
     def _update_candle(self, candle_data: Dict):
-        """Atualiza buffer de candles"""
-        self.candle_buffer.add_candle(
-            timestamp=candle_data.get('timestamp', datetime.now()),
-            open=candle_data['open'],
-            high=candle_data['high'],
-            low=candle_data['low'],
-            close=candle_data['close'],
-            volume=candle_data['volume']
-        )
+        """Atualiza buffer de candles e estado incremental"""
+        with self.cache_lock:
+            self.candle_buffer.add_candle(
+                timestamp=candle_data.get('timestamp', datetime.now()),
+                open=candle_data['open'],
+                high=candle_data['high'],
+                low=candle_data['low'],
+                close=candle_data['close'],
+                volume=candle_data['volume']
+            )
+            self.stream.on_candle(
+                candle_data['open'], candle_data['high'], candle_data['low'],
+                candle_data['close'], candle_data['volume']
+            )
+            self._dirty_sources.add('candle')
+    
+    def _sync_book_manager(self):
+        """
+        Alimenta o estado incremental com trades/snapshots recebidos
+        pelo book manager desde a última chamada (custo proporcional
+        apenas aos registros novos)
+        """
+        manager = self.book_manager
+        if not manager:
+            return
+        
+        with manager.lock:
+            trade_ring = manager.trade_buffer.ring
+            new_trades = trade_ring.total_written - self._seen_trades
+            if new_trades > 0:
+                for trade in trade_ring.last(new_trades):
+                    self.stream.on_trade(
+                        float(trade['timestamp']), float(trade['price']),
+                        float(trade['volume']), int(trade['aggressor'])
+                    )
+                self._seen_trades = trade_ring.total_written
+                self._dirty_sources.add('trade')
+            
+            book_ring = manager.book_buffer.ring
+            new_snapshots = book_ring.total_written - self._seen_snapshots
+            if new_snapshots > 0:
+                for snapshot in book_ring.last(new_snapshots):
+                    self.stream.on_book(
+                        float(snapshot['bid_volumes'].sum()),
+                        float(snapshot['ask_volumes'].sum())
+                    )
+                self._seen_snapshots = book_ring.total_written
+                self._dirty_sources.add('book')
+            
+            # Traders do topo mudam mesmo sem snapshot completo
+            book_callbacks = manager.stats['price_book_callbacks'] + manager.stats['offer_book_callbacks']
+            if book_callbacks != self._seen_book_callbacks:
+                self._seen_book_callbacks = book_callbacks
+                self._dirty_sources.add('book')
+    
+    def _calculate_group(self, group: str) -> Dict:
+        """Calcula um grupo de features"""
+        if group == 'volatility':
+            return self._calculate_volatility_features()
+        if group == 'returns':
+            return self._calculate_return_features()
+        if group == 'order_flow':
+            return self._calculate_order_flow_features()
+        if group == 'volume':
+            return self._calculate_volume_features()
+        if group == 'technical':
+            return self._calculate_technical_features()
+        return self._calculate_microstructure_features()
     
     def _calculate_volatility_features(self) -> Dict:
         """Calcula features de volatilidade"""
-        features = {}
-        
-        df = self.candle_buffer.get_dataframe()
-        if df.empty:
+        if self.stream.candle_count == 0:
             return self._get_default_volatility_features()
         
-        closes = df['close'].values
-        
-        # Volatilidades em diferentes períodos
-        for period in [10, 20, 50, 100]:
-            if len(closes) >= period:
-                returns = np.diff(closes[-period:]) / closes[-period:-1]
-                features[f'volatility_{period}'] = np.std(returns) if len(returns) > 0 else 0
-            else:
-                features[f'volatility_{period}'] = 0
-        
-        # Ratios de volatilidade
-        for p1, p2 in [(10, 20), (20, 50), (50, 100), (100, 200)]:
-            key1, key2 = f'volatility_{p1}', f'volatility_{min(p2, 100)}'
-            if key1 in features and key2 in features and features[key2] > 0:
-                features[f'volatility_ratio_{p1}_{p2}'] = features[key1] / features[key2]
-            else:
-                features[f'volatility_ratio_{p1}_{p2}'] = 1.0
-        
-        # Garman-Klass volatility
-        if len(df) >= 20:
-            high_low = np.log(df['high'].values[-20:] / df['low'].values[-20:])
-            close_open = np.log(df['close'].values[-20:] / df['open'].values[-20:])
-            features['volatility_gk'] = np.sqrt(np.mean(0.5 * high_low**2 - (2*np.log(2) - 1) * close_open**2))
-        else:
-            features['volatility_gk'] = 0
-        
-        # Bollinger Band position
-        if len(closes) >= 20:
-            ma20 = np.mean(closes[-20:])
-            std20 = np.std(closes[-20:])
-            if std20 > 0:
-                features['bb_position'] = (closes[-1] - ma20) / (2 * std20)
-            else:
-                features['bb_position'] = 0
-        else:
-            features['bb_position'] = 0
-        
-        return features
+        return self.stream.volatility_features()
     
     def _calculate_return_features(self) -> Dict:
         """Calcula features de retornos"""
-        features = {}
-        
-        df = self.candle_buffer.get_dataframe()
-        if df.empty:
+        if self.stream.candle_count == 0:
             return self._get_default_return_features()
         
-        closes = df['close'].values
-        
-        # Retornos simples
-        for period in [1, 2, 5, 10, 20, 50, 100]:
-            if len(closes) > period:
-                features[f'returns_{period}'] = (closes[-1] - closes[-period-1]) / closes[-period-1]
-            else:
-                features[f'returns_{period}'] = 0
-        
-        # Log retornos
-        for period in [1, 5, 20]:
-            if len(closes) > period:
-                features[f'log_returns_{period}'] = np.log(closes[-1] / closes[-period-1])
-            else:
-                features[f'log_returns_{period}'] = 0
-        
-        return features
+        return self.stream.return_features()
     
     def _calculate_order_flow_features(self) -> Dict:
         """Calcula features de order flow"""
@@ -291,28 +301,27 @@ class BookFeatureEngineerRT:
         
         # Usar dados do book manager se disponível
         if self.book_manager:
-            book_state = self.book_manager.get_current_state()
+            stream = self.stream
             
-            # Order flow imbalance
+            # Order flow imbalance (volumes bid/ask nos últimos N snapshots)
             for period in [10, 20, 50, 100]:
-                features[f'order_flow_imbalance_{period}'] = book_state.get('imbalance', 0)
+                features[f'order_flow_imbalance_{period}'] = stream.order_flow_imbalance(period)
             
-            # Volume metrics
-            features['cumulative_signed_volume'] = 0  # Seria calculado com histórico de trades
+            # Os modelos atuais foram treinados com estas duas em 0; os valores
+            # do stream (stream.signed_volume / cumulative_signed_volume) só
+            # entram junto com um re-treinamento
+            features['cumulative_signed_volume'] = 0
             features['signed_volume'] = 0
             
             # Volume weighted return
-            if 'vwap' in book_state and self.candle_buffer.size() > 0:
-                last_close = self.candle_buffer.get_last_n(1)[0].get('close', 0)
-                if last_close > 0:
-                    features['volume_weighted_return'] = (book_state['vwap'] - last_close) / last_close
-                else:
-                    features['volume_weighted_return'] = 0
+            last_close = self.candle_buffer.get_last_close()
+            if stream.trade_count > 0 and last_close > 0:
+                features['volume_weighted_return'] = (stream.vwap() - last_close) / last_close
             else:
                 features['volume_weighted_return'] = 0
             
             # Agent turnover (simplicado)
-            features['agent_turnover'] = book_state.get('trade_intensity', 0)
+            features['agent_turnover'] = stream.trade_intensity()
         else:
             # Valores padrão
             for period in [10, 20, 50, 100]:
@@ -326,42 +335,14 @@ class BookFeatureEngineerRT:
     
     def _calculate_volume_features(self) -> Dict:
         """Calcula features de volume"""
-        features = {}
-        
-        df = self.candle_buffer.get_dataframe()
-        if df.empty:
+        if self.stream.candle_count == 0:
             return self._get_default_volume_features()
         
-        volumes = df['volume'].values
-        
-        # Volume ratios
-        for period in [20, 50, 100]:
-            if len(volumes) > period:
-                recent_vol = np.mean(volumes[-10:])
-                period_vol = np.mean(volumes[-period:])
-                if period_vol > 0:
-                    features[f'volume_ratio_{period}'] = recent_vol / period_vol
-                else:
-                    features[f'volume_ratio_{period}'] = 1.0
-            else:
-                features[f'volume_ratio_{period}'] = 1.0
-        
-        # Volume z-score
-        for period in [20, 50, 100]:
-            if len(volumes) >= period:
-                mean_vol = np.mean(volumes[-period:])
-                std_vol = np.std(volumes[-period:])
-                if std_vol > 0:
-                    features[f'volume_zscore_{period}'] = (volumes[-1] - mean_vol) / std_vol
-                else:
-                    features[f'volume_zscore_{period}'] = 0
-            else:
-                features[f'volume_zscore_{period}'] = 0
+        features = self.stream.volume_features()
         
         # Trade intensity
         if self.book_manager:
-            book_state = self.book_manager.get_current_state()
-            features['trade_intensity'] = book_state.get('trade_intensity', 0)
+            features['trade_intensity'] = self.stream.trade_intensity()
             features['trade_intensity_ratio'] = min(features['trade_intensity'] / 10, 1.0)  # Normalizado
         else:
             features['trade_intensity'] = 0
@@ -370,103 +351,32 @@ class BookFeatureEngineerRT:
         return features
     
     def _calculate_technical_features(self) -> Dict:
-        """Calcula indicadores técnicos"""
-        features = {}
-        
-        df = self.candle_buffer.get_dataframe()
-        if df.empty:
+        """Calcula indicadores técnicos (time_normalized é calculado a cada chamada)"""
+        if self.stream.candle_count == 0:
             return self._get_default_technical_features()
         
-        closes = df['close'].values
-        
-        # Moving average ratios
-        if len(closes) >= 20:
-            ma5 = np.mean(closes[-5:])
-            ma20 = np.mean(closes[-20:])
-            if ma20 > 0:
-                features['ma_5_20_ratio'] = ma5 / ma20
-            else:
-                features['ma_5_20_ratio'] = 1.0
-        else:
-            features['ma_5_20_ratio'] = 1.0
-        
-        if len(closes) >= 50:
-            ma20 = np.mean(closes[-20:])
-            ma50 = np.mean(closes[-50:])
-            if ma50 > 0:
-                features['ma_20_50_ratio'] = ma20 / ma50
-            else:
-                features['ma_20_50_ratio'] = 1.0
-        else:
-            features['ma_20_50_ratio'] = 1.0
-        
-        # Momentum
-        if len(closes) >= 20:
-            features['momentum_5_20'] = (closes[-1] - closes[-5]) / (closes[-5] - closes[-20]) if closes[-5] != closes[-20] else 0
-        else:
-            features['momentum_5_20'] = 0
-        
-        if len(closes) >= 50:
-            features['momentum_20_50'] = (closes[-1] - closes[-20]) / (closes[-20] - closes[-50]) if closes[-20] != closes[-50] else 0
-        else:
-            features['momentum_20_50'] = 0
-        
-        # Sharpe ratio simplificado
-        for period in [5, 20]:
-            if len(closes) > period:
-                returns = np.diff(closes[-period:]) / closes[-period:-1]
-                if len(returns) > 0:
-                    mean_ret = np.mean(returns)
-                    std_ret = np.std(returns)
-                    if std_ret > 0:
-                        features[f'sharpe_{period}'] = mean_ret / std_ret * np.sqrt(252)  # Anualizado
-                    else:
-                        features[f'sharpe_{period}'] = 0
-                else:
-                    features[f'sharpe_{period}'] = 0
-            else:
-                features[f'sharpe_{period}'] = 0
+        return self.stream.technical_features()
+    
+    def _calculate_time_normalized(self) -> float:
+        """Time normalized (0-1 para o dia de trading)"""
+        if self.stream.candle_count == 0:
+            return 0.5
         
-        # Time normalized (0-1 para o dia de trading)
         now = datetime.now()
         market_open = now.replace(hour=9, minute=0, second=0)
         market_close = now.replace(hour=17, minute=30, second=0)
         total_seconds = (market_close - market_open).total_seconds()
         elapsed_seconds = (now - market_open).total_seconds()
-        features['time_normalized'] = min(max(elapsed_seconds / total_seconds, 0), 1)
-        
-        # RSI
-        features['rsi_14'] = self._calculate_rsi(closes, 14)
-        
-        return features
-    
-    def _calculate_rsi(self, prices: np.ndarray, period: int = 14) -> float:
-        """Calcula RSI"""
-        if len(prices) < period + 1:
-            return 50.0  # Neutro
-        
-        deltas = np.diff(prices[-period-1:])
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gain = np.mean(gains)
-        avg_loss = np.mean(losses)
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+        return min(max(elapsed_seconds / total_seconds, 0), 1)
     
     def _calculate_microstructure_features(self) -> Dict:
         """Calcula features de microestrutura"""
         features = {}
         
         if self.book_manager:
-            book_state = self.book_manager.get_current_state()
-            micro_features = self.book_manager.get_microstructure_features()
+            with self.book_manager.lock:
+                bid_traders = len(self.book_manager.current_book['bid_traders'])
+                ask_traders = len(self.book_manager.current_book['ask_traders'])
             
             # Top traders activity (simplificado - seria baseado em IDs reais)
             for i in range(5):
@@ -474,15 +384,15 @@ class BookFeatureEngineerRT:
                 features[f'top_seller_{i}_active'] = 1 if i < 2 else 0  # Simulado
             
             # Contagem de traders únicos
-            features['top_buyers_count'] = min(len(book_state.get('bid_traders', [])), 5)
-            features['top_sellers_count'] = min(len(book_state.get('ask_traders', [])), 5)
+            features['top_buyers_count'] = min(bid_traders, 5)
+            features['top_sellers_count'] = min(ask_traders, 5)
             
             # Mudança de traders (simplificado)
             features['buyer_changed'] = 0  # Precisaria histórico
             features['seller_changed'] = 0  # Precisaria histórico
             
             # Aggressor
-            features['is_buyer_aggressor'] = 1 if micro_features.get('buyer_aggressor_ratio', 0.5) > 0.5 else 0
+            features['is_buyer_aggressor'] = 1 if self.stream.buyer_aggressor_ratio() > 0.5 else 0
         else:
             # Valores padrão
             for i in range(5):
@@ -535,12 +445,9 @@ class BookFeatureEngineerRT:
         
         for feature_name in self.required_features:
             if feature_name in features:
-                value = features[feature_name]
+                value = float(features[feature_name])
                 # Tratar NaN e infinitos
-                if pd.isna(value) or np.isinf(value):
-                    validated[feature_name] = 0.0
-                else:
-                    validated[feature_name] = float(value)
+                validated[feature_name] = value if math.isfinite(value) else 0.0
             else:
                 # Feature faltante - usar valor padrão
                 validated[feature_name] = 0.0
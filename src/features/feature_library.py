@@ -0,0 +1,648 @@
+"""
+FeatureLibrary - Matrizes de features vetorizadas e em cache
+Uma definição única dos conjuntos de features usados no treino (WDO,
+pipeline híbrido), no sistema de produção híbrido e no replay; kernels
+rolling em NumPy (numba quando instalado) e cache em disco das matrizes
+indexado pelo conteúdo dos dados + versão do conjunto
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Linhas por bloco nas somas móveis: cada bloco é centrado na sua própria
+# média antes do cumsum, o que mantém a precisão em séries longas de preço
+_BLOCK = 1 << 16
+
+
+# =====================================================================
+# Kernels rolling (mesma semântica de pandas.rolling(w) com min_periods=w)
+# =====================================================================
+
+def _as_float(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def _nan_windows(nan_mask: np.ndarray, window: int) -> np.ndarray:
+    """True para janelas (terminando em i >= window-1) com algum NaN"""
+    counts = np.concatenate(([0], np.cumsum(nan_mask, dtype=np.int64)))
+    return (counts[window:] - counts[:-window]) > 0
+
+
+def _rolling_sums(x: np.ndarray, window: int, squares: bool):
+    """
+    Somas (e somas de quadrados centradas) das janelas completas
+
+    Returns:
+        (soma, soma_quadrados_centrada ou None), ambos de tamanho n-window+1
+    """
+    n = len(x)
+    m = n - window + 1
+    sums = np.empty(m)
+    sq = np.empty(m) if squares else None
+
+    for start in range(0, m, _BLOCK):
+        stop = min(m, start + _BLOCK)
+        seg = x[start:stop + window - 1]
+        center = seg.mean() if len(seg) else 0.0
+        d = seg - center
+        cs = np.concatenate(([0.0], np.cumsum(d)))
+        s = cs[window:] - cs[:-window]
+        sums[start:stop] = s + window * center
+        if squares:
+            cs2 = np.concatenate(([0.0], np.cumsum(d * d)))
+            # Soma dos quadrados dos desvios da média da janela
+            sq[start:stop] = (cs2[window:] - cs2[:-window]) - s * s / window
+    return sums, sq
+
+
+def rolling_sum(x, window: int) -> np.ndarray:
+    """Soma móvel (NaN até completar a janela ou se a janela tiver NaN)"""
+    x = _as_float(x)
+    out = np.full(len(x), np.nan)
+    if window > len(x):
+        return out
+    nan_mask = np.isnan(x)
+    sums, _ = _rolling_sums(np.where(nan_mask, 0.0, x), window, False)
+    if nan_mask.any():
+        sums[_nan_windows(nan_mask, window)] = np.nan
+    out[window - 1:] = sums
+    return out
+
+
+def rolling_mean(x, window: int) -> np.ndarray:
+    """Média móvel"""
+    return rolling_sum(x, window) / window
+
+
+def rolling_std(x, window: int, ddof: int = 1) -> np.ndarray:
+    """Desvio padrão móvel (ddof=1 como no pandas)"""
+    x = _as_float(x)
+    out = np.full(len(x), np.nan)
+    if window > len(x) or window <= ddof:
+        return out
+    nan_mask = np.isnan(x)
+    _, sq = _rolling_sums(np.where(nan_mask, 0.0, x), window, True)
+    std = np.sqrt(np.clip(sq, 0.0, None) / (window - ddof))
+    if nan_mask.any():
+        std[_nan_windows(nan_mask, window)] = np.nan
+    out[window - 1:] = std
+    return out
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _rolling_extreme_numba(x, window, sign):
+        # Deque monotônica: O(n) independente da janela
+        n = len(x)
+        out = np.full(n, np.nan)
+        dq = np.empty(n, dtype=np.int64)
+        head = 0
+        tail = 0
+        last_nan = -1
+        for i in range(n):
+            v = x[i]
+            if np.isnan(v):
+                last_nan = i
+            else:
+                while tail > head and sign * x[dq[tail - 1]] <= sign * v:
+                    tail -= 1
+                dq[tail] = i
+                tail += 1
+            while tail > head and dq[head] <= i - window:
+                head += 1
+            if i >= window - 1 and last_nan <= i - window and tail > head:
+                out[i] = x[dq[head]]
+        return out
+
+
+def _rolling_extreme(x, window: int, sign: float) -> np.ndarray:
+    x = _as_float(x)
+    if NUMBA_AVAILABLE:
+        return _rolling_extreme_numba(x, window, sign)
+    # Sem numba: kernel O(n) do pandas (janela com NaN também vira NaN)
+    rolling = pd.Series(x).rolling(window)
+    return (rolling.max() if sign > 0 else rolling.min()).to_numpy()
+
+
+def rolling_max(x, window: int) -> np.ndarray:
+    """Máximo móvel"""
+    return _rolling_extreme(x, window, 1.0)
+
+
+def rolling_min(x, window: int) -> np.ndarray:
+    """Mínimo móvel"""
+    return _rolling_extreme(x, window, -1.0)
+
+
+def shift(x, periods: int) -> np.ndarray:
+    """Desloca a série (NaN nas posições sem valor)"""
+    x = _as_float(x)
+    out = np.full(len(x), np.nan)
+    if periods >= 0:
+        out[periods:] = x[:len(x) - periods]
+    else:
+        out[:periods] = x[-periods:]
+    return out
+
+
+def diff(x, periods: int = 1) -> np.ndarray:
+    """x[i] - x[i-periods]"""
+    x = _as_float(x)
+    return x - shift(x, periods)
+
+
+def pct_change(x, periods: int = 1) -> np.ndarray:
+    """x[i] / x[i-periods] - 1"""
+    x = _as_float(x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return x / shift(x, periods) - 1.0
+
+
+def safe_divide(a, b) -> np.ndarray:
+    """a / b sem warnings (inf/NaN como no pandas)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.divide(_as_float(a), _as_float(b))
+
+
+# =====================================================================
+# Conjuntos de features
+# =====================================================================
+
+@dataclass(frozen=True)
+class FeatureSet:
+    """
+    Conjunto versionado de features
+
+    Attributes:
+        name: Nome do conjunto
+        version: Incrementar ao mudar qualquer definição (invalida o cache)
+        inputs: Colunas de entrada lidas do DataFrame
+        builder: Função (colunas de entrada) -> {nome: array}
+        dtype: Tipo da matriz resultante
+    """
+    name: str
+    version: int
+    inputs: Tuple[str, ...]
+    builder: Callable[[Dict[str, np.ndarray]], Dict[str, np.ndarray]]
+    dtype: str = 'float64'
+
+
+def _time_features(ts: np.ndarray) -> Dict[str, np.ndarray]:
+    index = pd.DatetimeIndex(ts)
+    return {
+        'hour': index.hour.to_numpy(np.float64),
+        'minute': index.minute.to_numpy(np.float64),
+        'day_of_week': index.dayofweek.to_numpy(np.float64),
+    }
+
+
+def _context_features(c: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Features de contexto (regime, volatilidade, volume, sessão)"""
+    price, volume = c['price'], c['volume']
+    f = {}
+
+    f['sma_5'] = rolling_mean(price, 5)
+    f['sma_20'] = rolling_mean(price, 20)
+    f['sma_50'] = rolling_mean(price, 50)
+    f['sma_trend'] = safe_divide(f['sma_5'] - f['sma_20'], f['sma_20'])
+
+    for period in (10, 30, 60):
+        f[f'momentum_{period}'] = pct_change(price, period)
+
+    returns = pct_change(price, 1)
+    for window in (10, 30, 60):
+        f[f'volatility_{window}'] = rolling_std(returns, window)
+    f['volatility_ratio'] = safe_divide(f['volatility_10'], f['volatility_30'])
+
+    f['atr'] = safe_divide(rolling_max(price, 20) - rolling_min(price, 20), price)
+
+    f['volume_ma_10'] = rolling_mean(volume, 10)
+    f['volume_ma_30'] = rolling_mean(volume, 30)
+    f['volume_ratio'] = safe_divide(volume, f['volume_ma_30'])
+    f['volume_trend'] = safe_divide(f['volume_ma_10'], f['volume_ma_30'])
+
+    f.update(_time_features(c['timestamp']))
+    # Sessões: (0, 11] manhã, (11, 14] almoço, (14, 24] tarde; hora 0 = -1
+    hour = f['hour']
+    f['session'] = np.select([hour <= 0, hour <= 11, hour <= 14], [-1.0, 0.0, 1.0], 2.0)
+
+    f['aggressor_ratio'] = rolling_mean(c['aggressor'], 100)
+    f['trade_intensity'] = rolling_sum(volume, 100)
+    return f
+
+
+def _book_inputs(df: pd.DataFrame) -> pd.DataFrame:
+    """Completa colunas de book deriváveis do primeiro nível"""
+    df = df.copy()
+    aliases = {'bid_vol_1': 'bid_volume_1', 'ask_vol_1': 'ask_volume_1'}
+    for name, alias in aliases.items():
+        if name not in df.columns and alias in df.columns:
+            df[name] = df[alias]
+
+    has_prices = 'bid_price_1' in df.columns and 'ask_price_1' in df.columns
+    has_volumes = 'bid_vol_1' in df.columns and 'ask_vol_1' in df.columns
+    if 'mid_price' not in df.columns and has_prices:
+        df['mid_price'] = (df['bid_price_1'] + df['ask_price_1']) / 2
+    if 'spread' not in df.columns and has_prices:
+        df['spread'] = df['ask_price_1'] - df['bid_price_1']
+    if has_volumes:
+        if 'total_bid_vol' not in df.columns:
+            df['total_bid_vol'] = df['bid_vol_1']
+        if 'total_ask_vol' not in df.columns:
+            df['total_ask_vol'] = df['ask_vol_1']
+        if 'imbalance' not in df.columns:
+            total = df['bid_vol_1'] + df['ask_vol_1']
+            df['imbalance'] = ((df['bid_vol_1'] - df['ask_vol_1']) / total.where(total > 0)).fillna(0)
+    return df
+
+
+def _book_features(c: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Features de microestrutura do book"""
+    spread, imbalance, mid = c['spread'], c['imbalance'], c['mid_price']
+    bid_vol, ask_vol = c['bid_vol_1'], c['ask_vol_1']
+    bid_price, ask_price = c['bid_price_1'], c['ask_price_1']
+    f = {}
+
+    f['spread'] = spread
+    f['spread_ma'] = rolling_mean(spread, 20)
+    f['spread_std'] = rolling_std(spread, 20)
+    f['spread_normalized'] = safe_divide(spread - f['spread_ma'], f['spread_std'])
+
+    f['imbalance'] = imbalance
+    f['imbalance_ma'] = rolling_mean(imbalance, 20)
+    f['imbalance_momentum'] = diff(imbalance, 5)
+
+    f['book_pressure'] = safe_divide(c['total_bid_vol'], c['total_bid_vol'] + c['total_ask_vol'])
+    f['volume_at_best'] = bid_vol + ask_vol
+    f['volume_ratio'] = bid_vol / (ask_vol + 1)
+
+    f['mid_price'] = mid
+    for period in (1, 5, 10):
+        f[f'mid_return_{period}'] = pct_change(mid, period)
+
+    f['bid_change'] = diff(bid_vol, 1)
+    f['ask_change'] = diff(ask_vol, 1)
+    f['net_order_flow'] = f['bid_change'] - f['ask_change']
+
+    f['bid_ask_ratio'] = safe_divide(bid_price, ask_price)
+    f['microprice'] = (bid_price * ask_vol + ask_price * bid_vol) / (bid_vol + ask_vol + 1)
+    return f
+
+
+# Corretoras tratadas como fluxo institucional nas features de tick
+TOP_AGENTS = ('XP', 'BTG', 'Itau', 'Credit', 'Morgan', 'UBS', 'Goldman')
+
+
+def _tick_features(c: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Features do histórico de negócios WDO (WDOModelTrainer)"""
+    price, qty, vol = c['price'], c['qty'], c['vol']
+    f = {}
+
+    # 1. Retornos e momentum
+    for period in (1, 2, 5, 10, 20, 50, 100, 200):
+        f[f'return_{period}'] = pct_change(price, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for period in (1, 5, 20):
+            f[f'log_return_{period}'] = np.log(price / shift(price, period))
+    f['momentum_5_20'] = f['return_5'] - f['return_20']
+    f['momentum_20_50'] = f['return_20'] - f['return_50']
+
+    # 2. Volatilidade
+    for window in (10, 20, 50, 100):
+        f[f'volatility_{window}'] = rolling_std(f['return_1'], window)
+        ratio = safe_divide(f[f'volatility_{window}'],
+                            rolling_mean(f[f'volatility_{window}'], window * 2))
+        f[f'vol_ratio_{window}'] = np.where(np.isnan(ratio), 1.0, ratio)
+    for window in (20, 50):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hl = np.log(rolling_max(price, window) / rolling_min(price, window))
+        f[f'gk_vol_{window}'] = np.sqrt(hl ** 2 / (4 * np.log(2)))
+
+    # 3. Order flow (direção pelo tick do preço)
+    price_diff = diff(price, 1)
+    buy_volume = np.where(price_diff > 0, qty, 0.0)
+    sell_volume = np.where(price_diff < 0, qty, 0.0)
+    for window in (20, 50, 100):
+        buy_sum = rolling_sum(buy_volume, window)
+        sell_sum = rolling_sum(sell_volume, window)
+        f[f'volume_imbalance_{window}'] = (buy_sum - sell_sum) / np.clip(buy_sum + sell_sum, 1, None)
+    f['trade_intensity'] = rolling_sum(qty, 50) / 50
+    ratio = safe_divide(f['trade_intensity'], rolling_mean(f['trade_intensity'], 200))
+    f['trade_intensity_ratio'] = np.where(np.isnan(ratio), 1.0, ratio)
+
+    # 4. Fluxo institucional
+    institutional_buy = c['institutional_buy'] * qty
+    institutional_sell = c['institutional_sell'] * qty
+    for window in (50, 100, 200):
+        f[f'institutional_flow_{window}'] = (rolling_sum(institutional_buy, window) -
+                                             rolling_sum(institutional_sell, window))
+
+    # 5. Indicadores técnicos
+    gain = np.where(price_diff > 0, price_diff, 0.0)
+    loss = np.where(price_diff < 0, -price_diff, 0.0)
+    for period in (14, 21):
+        rs = rolling_mean(gain, period) / np.clip(rolling_mean(loss, period), 0.0001, None)
+        f[f'rsi_{period}'] = 100 - (100 / (1 + rs))
+    for period in (20, 50):
+        sma = rolling_mean(price, period)
+        std = rolling_std(price, period)
+        f[f'bb_position_{period}'] = safe_divide(price - sma, 2 * std)
+        f[f'bb_width_{period}'] = safe_divide(4 * std, sma)
+
+    # 6. Volume e liquidez
+    vwap = rolling_sum(vol, 200) / np.clip(rolling_sum(qty, 200), 1, None)
+    f['price_vwap_ratio'] = safe_divide(price, pd.Series(vwap).ffill().to_numpy())
+    for window in (50, 100):
+        f[f'volume_zscore_{window}'] = ((qty - rolling_mean(qty, window)) /
+                                        np.clip(rolling_std(qty, window), 0.001, None))
+
+    # 7. Temporais
+    f.update(_time_features(c['timestamp']))
+    hour = f['hour']
+    f['is_opening'] = (hour == 9).astype(np.float64)
+    f['is_closing'] = (hour >= 16).astype(np.float64)
+    f['is_lunch'] = ((hour >= 12) & (hour < 14)).astype(np.float64)
+
+    # 8. Compostas
+    f['momentum_volume'] = f['momentum_5_20'] * f['volume_zscore_50']
+    f['vol_flow'] = f['volatility_50'] * f['volume_imbalance_50']
+    f['smart_money'] = f['institutional_flow_100'] * f['momentum_20_50']
+
+    # Limpeza: inf/NaN -> 0 (como no treino original)
+    for name, values in f.items():
+        f[name] = np.where(np.isfinite(values), values, 0.0)
+    return f
+
+
+def _tick_inputs(df: pd.DataFrame) -> pd.DataFrame:
+    """Colunas do histórico WDO (aceita os nomes '<price>' do CSV)"""
+    renamed = df.rename(columns={c: c[1:-1] for c in df.columns
+                                 if isinstance(c, str) and c.startswith('<') and c.endswith('>')})
+    out = pd.DataFrame({
+        'timestamp': renamed['timestamp'],
+        'price': renamed['price'],
+        'qty': renamed['qty'],
+        'vol': renamed['vol'],
+    }, index=df.index)
+    out['institutional_buy'] = renamed['buy_agent'].isin(TOP_AGENTS).astype(np.float64)
+    out['institutional_sell'] = renamed['sell_agent'].isin(TOP_AGENTS).astype(np.float64)
+    return out
+
+
+FEATURE_SETS: Dict[str, FeatureSet] = {
+    'context': FeatureSet('context', 1, ('timestamp', 'price', 'volume', 'aggressor'),
+                          _context_features),
+    'book': FeatureSet('book', 1, ('spread', 'imbalance', 'total_bid_vol', 'total_ask_vol',
+                                   'bid_vol_1', 'ask_vol_1', 'mid_price',
+                                   'bid_price_1', 'ask_price_1'),
+                       _book_features),
+    'tick': FeatureSet('tick', 1, ('timestamp', 'price', 'qty', 'vol',
+                                   'institutional_buy', 'institutional_sell'),
+                       _tick_features, dtype='float32'),
+}
+
+# Preparação das colunas de entrada por conjunto (nomes alternativos, derivadas)
+_INPUT_ADAPTERS: Dict[str, Callable[[pd.DataFrame], pd.DataFrame]] = {
+    'book': _book_inputs,
+    'tick': _tick_inputs,
+}
+
+
+def _input_columns(df: pd.DataFrame, feature_set: FeatureSet) -> Dict[str, np.ndarray]:
+    adapter = _INPUT_ADAPTERS.get(feature_set.name)
+    if adapter is not None:
+        df = adapter(df)
+    columns = {}
+    for name in feature_set.inputs:
+        if name == 'timestamp':
+            columns[name] = pd.to_datetime(df[name]).to_numpy(dtype='datetime64[ns]')
+        elif name in df.columns:
+            columns[name] = df[name].to_numpy(dtype=np.float64)
+        else:
+            columns[name] = np.zeros(len(df))
+    return columns
+
+
+def content_key(columns: Dict[str, np.ndarray]) -> str:
+    """Hash do conteúdo das colunas de entrada (identifica a partição de dados)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(columns):
+        arr = np.ascontiguousarray(columns[name])
+        if arr.dtype.kind == 'M':
+            arr = arr.view(np.int64)
+        digest.update(f"{name}:{arr.dtype.str}:{arr.shape}".encode())
+        digest.update(memoryview(arr).cast('B'))
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """
+    Cache em disco de matrizes de features
+
+    Cada matriz fica em <dir>/<conjunto>/<chave>.npy com um .json de
+    metadados (colunas, versão, linhas). A chave combina conjunto, versão e
+    o hash do conteúdo das colunas de entrada (ou uma partição explícita),
+    então mudar os dados ou a definição das features nunca reaproveita uma
+    matriz antiga. A leitura é via memory-map.
+
+    Como cada sessão/retreino gera chaves novas, prune() remove as matrizes
+    sem uso há mais de `max_age_days` e, depois, as menos usadas até o
+    total caber em `max_bytes`; os scripts de treino chamam ao terminar.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = "data/feature_cache",
+                 max_bytes: Optional[int] = 2 * 1024 ** 3,
+                 max_age_days: Optional[float] = 30):
+        """
+        Args:
+            cache_dir: Diretório do cache
+            max_bytes: Tamanho máximo após prune() (None = sem limite)
+            max_age_days: Dias sem uso até a matriz expirar (None = sem limite)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'pruned': 0}
+
+    @staticmethod
+    def key(feature_set: FeatureSet, partition: str) -> str:
+        raw = f"{feature_set.name}:v{feature_set.version}:{partition}"
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def _paths(self, feature_set: FeatureSet, key: str) -> Tuple[Path, Path]:
+        base = self.cache_dir / feature_set.name
+        return base / f"{key}.npy", base / f"{key}.json"
+
+    def get(self, feature_set: FeatureSet, key: str) -> Optional[Tuple[np.ndarray, list]]:
+        """Matriz (memory-map) e colunas, ou None"""
+        matrix_path, meta_path = self._paths(feature_set, key)
+        if not (matrix_path.exists() and meta_path.exists()):
+            self.stats['misses'] += 1
+            return None
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            matrix = np.load(matrix_path, mmap_mode='r')
+        except Exception as e:
+            logger.warning(f"Cache de features corrompido ({matrix_path.name}): {e}")
+            self.stats['misses'] += 1
+            return None
+        try:
+            # mtime = último uso (ordem de remoção do prune)
+            os.utime(matrix_path)
+        except OSError:
+            pass
+        self.stats['hits'] += 1
+        return matrix, meta['columns']
+
+    def put(self, feature_set: FeatureSet, key: str, matrix: np.ndarray, columns: list,
+            partition: str):
+        """Grava a matriz (arquivo temporário + os.replace)"""
+        matrix_path, meta_path = self._paths(feature_set, key)
+        matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = matrix_path.with_name(f".{matrix_path.stem}.tmp.npy")
+        np.save(tmp_path, matrix)
+        os.replace(tmp_path, matrix_path)
+        with open(meta_path, 'w') as f:
+            json.dump({
+                'feature_set': feature_set.name,
+                'version': feature_set.version,
+                'partition': partition,
+                'rows': int(matrix.shape[0]),
+                'columns': columns,
+                'created': datetime.now().isoformat()
+            }, f, indent=2)
+        self.stats['writes'] += 1
+
+    def prune(self, max_bytes: Optional[int] = None,
+              max_age_days: Optional[float] = None) -> List[str]:
+        """
+        Remove as matrizes expiradas e, se preciso, as menos usadas
+
+        Args:
+            max_bytes: Tamanho máximo do cache (padrão: self.max_bytes)
+            max_age_days: Dias sem uso (padrão: self.max_age_days)
+
+        Returns:
+            Matrizes removidas ('<conjunto>/<chave>')
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+
+        entries = []
+        for matrix_path in self.cache_dir.glob("*/*.npy"):
+            if matrix_path.name.startswith('.'):
+                continue  # gravação em andamento
+            meta_path = matrix_path.with_suffix('.json')
+            try:
+                stat = matrix_path.stat()
+                size = stat.st_size + (meta_path.stat().st_size if meta_path.exists() else 0)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, size, matrix_path, meta_path))
+
+        total = sum(entry[1] for entry in entries)
+        cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+        removed = []
+        for used, size, matrix_path, meta_path in sorted(entries, key=lambda entry: entry[0]):
+            expired = cutoff is not None and used < cutoff
+            if not expired and (max_bytes is None or total <= max_bytes):
+                continue
+            for path in (matrix_path, meta_path):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed.append(f"{matrix_path.parent.name}/{matrix_path.stem}")
+
+        if removed:
+            self.stats['pruned'] += len(removed)
+            logger.info(f"Cache de features: {len(removed)} matrizes removidas "
+                        f"({total / 1024 / 1024:.0f} MB restantes)")
+        return removed
+
+
+def build_feature_matrix(df: pd.DataFrame, feature_set: Union[str, FeatureSet],
+                         cache: Optional[FeatureCache] = None,
+                         partition: Optional[str] = None) -> pd.DataFrame:
+    """
+    Calcula (ou lê do cache) a matriz de features de um DataFrame
+
+    Args:
+        df: Dados de entrada em ordem temporal
+        feature_set: Nome em FEATURE_SETS ou FeatureSet
+        cache: Cache em disco (None = sempre calcular)
+        partition: Identificador da partição (padrão: hash do conteúdo)
+
+    Returns:
+        DataFrame de features com o mesmo índice de `df`
+    """
+    if isinstance(feature_set, str):
+        feature_set = FEATURE_SETS[feature_set]
+
+    columns = _input_columns(df, feature_set)
+
+    key = None
+    if cache is not None:
+        partition = partition or content_key(columns)
+        key = cache.key(feature_set, partition)
+        cached = cache.get(feature_set, key)
+        if cached is not None and cached[0].shape[0] == len(df):
+            matrix, names = cached
+            return pd.DataFrame(matrix, index=df.index, columns=names, copy=False)
+
+    features = feature_set.builder(columns)
+    names = list(features)
+    # Column-major: cada feature é contígua (cópia rápida, DataFrame sem cópia)
+    matrix = np.empty((len(df), len(names)), dtype=feature_set.dtype, order='F')
+    for j, name in enumerate(names):
+        matrix[:, j] = features[name]
+
+    if cache is not None:
+        try:
+            cache.put(feature_set, key, matrix, names, partition)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar cache de features: {e}")
+
+    return pd.DataFrame(matrix, index=df.index, columns=names, copy=False)
+
+
+_cache: Optional[FeatureCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_feature_cache() -> Optional[FeatureCache]:
+    """
+    Cache compartilhado do processo
+
+    FEATURE_CACHE_DIR define o diretório (padrão data/feature_cache);
+    FEATURE_CACHE=0 desliga.
+    """
+    global _cache
+    if os.getenv('FEATURE_CACHE', '1') != '1':
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = FeatureCache(os.getenv('FEATURE_CACHE_DIR', 'data/feature_cache'))
+    return _cache
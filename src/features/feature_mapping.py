@@ -5,6 +5,8 @@ Feature Mapping - Mapeamento entre features calculadas e esperadas pelos agentes
 from typing import Dict, List, Optional
 import numpy as np
 
+from .feature_schema import FeatureSchema, FeatureBinding
+
 
 class FeatureMapper:
     """
@@ -95,6 +97,62 @@ class FeatureMapper:
         
         return mapped_features
     
+    def compile(self, calculated_names: List[str]) -> FeatureBinding:
+        """
+        Compila o mapeamento para vetores (uma vez, na inicialização)
+        
+        O schema resultante contém as features calculadas seguidas das
+        features mapeadas/sintéticas esperadas pelos agentes.
+        
+        Args:
+            calculated_names: Ordem das features no vetor calculado
+            
+        Returns:
+            FeatureBinding para usar com map_vector()
+        """
+        names = list(calculated_names)
+        known = set(names)
+        for expected_name in list(self.feature_mapping) + list(self.synthetic_features):
+            if expected_name not in known:
+                names.append(expected_name)
+                known.add(expected_name)
+        
+        schema = FeatureSchema(names, name="hmarl_agents")
+        # Como em map_features: alvo ausente vira o padrão (0.0), mesmo que
+        # exista uma feature calculada com o nome esperado
+        binding = schema.bind(calculated_names, aliases=self.feature_mapping,
+                              alias_fallback=False)
+        
+        index = schema.index
+        buyer = index.get("is_buyer_aggressor")
+        binding.synthetic_idx = {
+            "sell_intensity": (index["sell_intensity"], buyer),
+            "aggressive_sell_ratio": (index["aggressive_sell_ratio"], buyer),
+            "vwap_distance": (index["vwap_distance"], index.get("volume_weighted_return")),
+        }
+        return binding
+    
+    def map_vector(self, vector: np.ndarray, binding: FeatureBinding,
+                   out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Equivalente vetorial de map_features() usando mapeamento compilado
+        
+        Args:
+            vector: Vetor (ou matriz) na ordem usada em compile()
+            binding: Resultado de compile()
+            out: Destino preallocado (opcional)
+        """
+        out = binding.gather(vector, out)
+        
+        sell_idx, buyer_idx = binding.synthetic_idx["sell_intensity"]
+        buyer = out[..., buyer_idx] if buyer_idx is not None else 0.5
+        out[..., sell_idx] = 1.0 - buyer
+        out[..., binding.synthetic_idx["aggressive_sell_ratio"][0]] = 1.0 - buyer
+        
+        vwap_idx, vwr_idx = binding.synthetic_idx["vwap_distance"]
+        out[..., vwap_idx] = np.abs(out[..., vwr_idx]) if vwr_idx is not None else 0.0
+        return out
+    
     def get_required_agent_features(self) -> Dict[str, List[str]]:
         """
         Retorna as features requeridas por cada agente
@@ -0,0 +1,178 @@
+"""
+FeatureSchema - Layout compilado (nome -> índice) dos vetores de features
+Construído uma vez na carga dos modelos; produtores e consumidores trocam
+vetores float32 preallocados em vez de dicts
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureBinding:
+    """
+    Mapeamento compilado de um vetor produtor para um FeatureSchema
+
+    Guarda os pares de índices (origem -> destino) resolvidos em tempo de
+    compilação; aplicar o mapeamento é uma única operação de indexação.
+
+    `synthetic_idx` guarda, por feature sintética, o índice de destino e o
+    da feature de onde ela é derivada (None se ausente); quem compila o
+    binding (ex: FeatureMapper.compile) o preenche.
+    """
+
+    def __init__(self, schema: 'FeatureSchema', producer_names: List[str],
+                 aliases: Optional[Dict[str, str]] = None, alias_fallback: bool = True):
+        """
+        Args:
+            schema: Schema de destino
+            producer_names: Ordem das features no vetor do produtor
+            aliases: Nome no schema -> nome no produtor (tem prioridade
+                     sobre o nome igual no produtor)
+            alias_fallback: Se o alvo do alias não existir no produtor, usar
+                            o nome igual (senão a feature fica no padrão)
+        """
+        self.schema = schema
+        self.producer_names = list(producer_names)
+        aliases = aliases or {}
+
+        producer_index = {name: i for i, name in enumerate(self.producer_names)}
+        src, dst, missing = [], [], []
+        for j, name in enumerate(schema.names):
+            source_name = aliases.get(name, name)
+            if source_name not in producer_index and alias_fallback:
+                source_name = name
+            if source_name in producer_index:
+                src.append(producer_index[source_name])
+                dst.append(j)
+            else:
+                missing.append(name)
+
+        self.src_idx = np.array(src, dtype=np.intp)
+        self.dst_idx = np.array(dst, dtype=np.intp)
+        self.missing = missing
+        self.synthetic_idx: Dict[str, Tuple[int, Optional[int]]] = {}
+
+        if missing:
+            logger.warning(
+                f"[{schema.name}] {len(missing)} features sem produtor (serão "
+                f"{schema.default}): {missing}"
+            )
+
+    def gather(self, source: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Copia as features do vetor (ou matriz) do produtor para o layout do schema
+
+        Args:
+            source: Vetor 1-D ou matriz (n_amostras, n_features_produtor)
+            out: Destino preallocado (opcional); posições sem produtor
+                 mantêm o valor padrão
+
+        Returns:
+            Vetor/matriz no layout do schema
+        """
+        source = np.asarray(source)
+        if out is None:
+            shape = source.shape[:-1] + (self.schema.size,)
+            out = np.full(shape, self.schema.default, dtype=self.schema.dtype)
+        out[..., self.dst_idx] = source[..., self.src_idx]
+        return out
+
+
+class FeatureSchema:
+    """
+    Layout fixo de um vetor de features (ordem esperada por um modelo)
+    """
+
+    def __init__(self, names: Iterable[str], name: str = "schema",
+                 dtype=np.float32, default: float = 0.0):
+        """
+        Args:
+            names: Nomes das features, na ordem do vetor
+            name: Identificador (para logs)
+            dtype: Tipo do vetor
+            default: Valor usado para features ausentes
+        """
+        self.names = tuple(names)
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.default = default
+        self.index = {feature: i for i, feature in enumerate(self.names)}
+        self.size = len(self.names)
+        self._reported_missing = set()
+
+        if len(self.index) != self.size:
+            raise ValueError(f"[{name}] nomes de features duplicados")
+
+    @classmethod
+    def from_model_config(cls, models_dir, default_names: Optional[List[str]] = None,
+                          name: Optional[str] = None) -> 'FeatureSchema':
+        """
+        Cria schema a partir de models/<dir>/config.json (chave 'features')
+
+        Args:
+            models_dir: Diretório do modelo
+            default_names: Lista usada se o config não declarar as features
+            name: Identificador do schema (padrão: nome do diretório)
+        """
+        models_dir = Path(models_dir)
+        names = None
+        config_file = models_dir / "config.json"
+        if config_file.exists():
+            try:
+                with open(config_file, 'r') as f:
+                    names = json.load(f).get('features')
+            except Exception as e:
+                logger.warning(f"Erro ao ler {config_file}: {e}")
+
+        if not names:
+            if default_names is None:
+                raise ValueError(f"{config_file} não declara 'features'")
+            names = default_names
+
+        return cls(names, name=name or models_dir.name)
+
+    def new_vector(self, rows: Optional[int] = None) -> np.ndarray:
+        """Aloca vetor (ou matriz com `rows` linhas) preenchido com o padrão"""
+        shape = (self.size,) if rows is None else (rows, self.size)
+        return np.full(shape, self.default, dtype=self.dtype)
+
+    def bind(self, producer_names: List[str], aliases: Optional[Dict[str, str]] = None,
+             alias_fallback: bool = True) -> FeatureBinding:
+        """Compila o mapeamento de um produtor para este schema"""
+        return FeatureBinding(self, producer_names, aliases, alias_fallback)
+
+    def fill_from_dict(self, features: Dict[str, float], out: np.ndarray) -> np.ndarray:
+        """
+        Preenche vetor a partir de um dict (caminho legado)
+
+        Features ausentes recebem o padrão; cada nome ausente é reportado
+        apenas na primeira vez.
+        """
+        default = self.default
+        get = features.get
+        for i, feature in enumerate(self.names):
+            value = get(feature)
+            if value is None:
+                value = default
+                if feature not in self._reported_missing:
+                    self._reported_missing.add(feature)
+                    logger.debug(f"[{self.name}] Feature ausente: {feature}")
+            out[i] = value
+        return out
+
+    def to_dict(self, vector: np.ndarray) -> Dict[str, float]:
+        """Converte vetor de volta para dict (debug/monitor)"""
+        return dict(zip(self.names, vector.tolist()))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"FeatureSchema(name='{self.name}', size={self.size})"
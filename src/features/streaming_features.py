@@ -0,0 +1,552 @@
+"""
+StreamingFeatureEngine - Estado incremental O(1) para as features do BookFeatureEngineerRT
+Cada novo candle/trade/snapshot atualiza somas e momentos móveis em tempo constante
+"""
+
+import math
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from typing import Dict, Optional
+
+
+class RollingWindow:
+    """Janela circular de floats com acesso por defasagem (lag)"""
+
+    __slots__ = ("size", "_buf", "_idx", "count")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._buf = [0.0] * size
+        self._idx = 0
+        self.count = 0
+
+    def push(self, value: float) -> Optional[float]:
+        """Adiciona valor; retorna o valor expulso da janela (ou None)"""
+        evicted = self._buf[self._idx] if self.count == self.size else None
+        self._buf[self._idx] = value
+        self._idx = (self._idx + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        return evicted
+
+    def lag(self, k: int) -> float:
+        """Valor k passos atrás (0 = mais recente)"""
+        return self._buf[(self._idx - 1 - k) % self.size]
+
+    def values(self):
+        """Valores em ordem cronológica (O(n), uso em ressincronização)"""
+        if self.count < self.size:
+            return self._buf[:self.count]
+        return self._buf[self._idx:] + self._buf[:self._idx]
+
+
+class RollingSum:
+    """Soma móvel de tamanho fixo"""
+
+    __slots__ = ("window", "total")
+
+    def __init__(self, size: int):
+        self.window = RollingWindow(size)
+        self.total = 0.0
+
+    def push(self, value: float):
+        evicted = self.window.push(value)
+        self.total += value - (evicted or 0.0)
+        # Ressincroniza a cada volta completa para limitar erro de arredondamento
+        if self.window._idx == 0:
+            self.total = math.fsum(self.window.values())
+
+    @property
+    def count(self) -> int:
+        return self.window.count
+
+    @property
+    def full(self) -> bool:
+        return self.window.count == self.window.size
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.window.count if self.window.count else 0.0
+
+
+class RollingMoments:
+    """
+    Média e variância móveis (Welford com janela deslizante)
+
+    A variância é populacional (ddof=0), igual a np.std.
+    """
+
+    __slots__ = ("window", "mean", "_m2")
+
+    def __init__(self, size: int):
+        self.window = RollingWindow(size)
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, value: float):
+        window = self.window
+        evicted = window.push(value)
+
+        if evicted is None:
+            delta = value - self.mean
+            self.mean += delta / window.count
+            self._m2 += delta * (value - self.mean)
+        else:
+            old_mean = self.mean
+            delta = value - evicted
+            self.mean += delta / window.size
+            self._m2 += delta * (value - self.mean + evicted - old_mean)
+
+        if window._idx == 0:
+            self._resync()
+
+    def _resync(self):
+        values = self.window.values()
+        n = len(values)
+        self.mean = math.fsum(values) / n
+        self._m2 = math.fsum((v - self.mean) ** 2 for v in values)
+
+    @property
+    def count(self) -> int:
+        return self.window.count
+
+    @property
+    def full(self) -> bool:
+        return self.window.count == self.window.size
+
+    @property
+    def variance(self) -> float:
+        n = self.window.count
+        return max(self._m2 / n, 0.0) if n else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class RollingRegression:
+    """
+    Regressão linear móvel de y contra a posição na janela (x = 0..n-1)
+
+    Mesmo resultado de np.polyfit(np.arange(n), janela, 1) sobre os últimos
+    n valores (ou menos, enquanto a janela enche). Mantém Σy e Σx·y,
+    deslocando a origem de x a cada valor expulso; a soma dos quadrados
+    dos desvios de y (para o R²) vem de RollingMoments.
+    """
+
+    __slots__ = ("moments", "_sy", "_sxy")
+
+    def __init__(self, size: int):
+        self.moments = RollingMoments(size)
+        self._sy = 0.0
+        self._sxy = 0.0
+
+    def push(self, value: float):
+        window = self.moments.window
+        n = window.count
+        if n == window.size:
+            evicted = window._buf[window._idx]
+            # Todos os x caem uma posição; o novo valor entra em x = n-1
+            self._sxy += (n - 1) * value - (self._sy - evicted)
+            self._sy += value - evicted
+        else:
+            self._sxy += n * value
+            self._sy += value
+        self.moments.push(value)
+        if window._idx == 0:
+            values = window.values()
+            self._sy = math.fsum(values)
+            self._sxy = math.fsum(i * v for i, v in enumerate(values))
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    @property
+    def mean(self) -> float:
+        """Média da janela (Σy/n: exata para preços no grid de ticks)"""
+        n = self.moments.count
+        return self._sy / n if n else 0.0
+
+    def _sxx(self) -> float:
+        n = self.moments.count
+        return n * (n * n - 1) / 12.0
+
+    def _cov(self) -> float:
+        n = self.moments.count
+        return self._sxy - (n - 1) / 2.0 * self._sy
+
+    @property
+    def slope(self) -> float:
+        sxx = self._sxx()
+        return self._cov() / sxx if sxx else 0.0
+
+    @property
+    def r_squared(self) -> float:
+        """Coeficiente de determinação (0 se a janela é constante)"""
+        ss_tot = self.moments._m2
+        sxx = self._sxx()
+        if ss_tot <= 1e-12 * max(self.mean ** 2, 1.0) or not sxx:
+            return 0.0
+        return min(self._cov() ** 2 / (sxx * ss_tot), 1.0)
+
+
+class RollingExtremum:
+    """
+    Máximo (ou mínimo) móvel com deque monotônico: O(1) amortizado por valor
+
+    Empates são mantidos no deque, então `position` é a primeira ocorrência
+    do extremo na janela e `unique` diz se ele não se repete.
+    """
+
+    __slots__ = ("size", "_sign", "_deque", "_count")
+
+    def __init__(self, size: int, mode: str = "max"):
+        self.size = size
+        self._sign = 1.0 if mode == "max" else -1.0
+        self._deque = deque()      # (posição, valor com sinal), não crescente
+        self._count = 0
+
+    def push(self, value: float):
+        signed = self._sign * value
+        dq = self._deque
+        while dq and dq[-1][1] < signed:
+            dq.pop()
+        dq.append((self._count, signed))
+        self._count += 1
+        if dq[0][0] <= self._count - 1 - self.size:
+            dq.popleft()
+
+    @property
+    def count(self) -> int:
+        return min(self._count, self.size)
+
+    @property
+    def value(self) -> float:
+        return self._sign * self._deque[0][1] if self._deque else 0.0
+
+    @property
+    def position(self) -> int:
+        """Índice absoluto (ordem de push, a partir de 0) do extremo atual"""
+        return self._deque[0][0] if self._deque else -1
+
+    @property
+    def unique(self) -> bool:
+        dq = self._deque
+        return len(dq) < 2 or dq[1][1] != dq[0][1]
+
+
+class SortedWindow:
+    """
+    Janela móvel mantida ordenada: extremos em O(1) e contagens por faixa
+    em O(log n) (inserção/remoção por busca binária; memmove em C)
+    """
+
+    __slots__ = ("window", "sorted")
+
+    def __init__(self, size: int):
+        self.window = RollingWindow(size)
+        self.sorted = []
+
+    def push(self, value: float):
+        evicted = self.window.push(value)
+        if evicted is not None:
+            del self.sorted[bisect_left(self.sorted, evicted)]
+        insort(self.sorted, value)
+
+    @property
+    def count(self) -> int:
+        return self.window.count
+
+    @property
+    def max(self) -> float:
+        return self.sorted[-1] if self.sorted else 0.0
+
+    @property
+    def min(self) -> float:
+        return self.sorted[0] if self.sorted else 0.0
+
+    def count_between(self, low: float, high: float,
+                      include_low: bool = True, include_high: bool = True) -> int:
+        """Quantos valores da janela estão entre low e high"""
+        left = bisect_left if include_low else bisect_right
+        right = bisect_right if include_high else bisect_left
+        return max(right(self.sorted, high) - left(self.sorted, low), 0)
+
+
+class StreamingFeatureEngine:
+    """
+    Estado incremental das features de candle, trade e book
+
+    Reproduz as fórmulas do BookFeatureEngineerRT (mesmas janelas e
+    convenções), mas cada atualização custa O(1) em vez de reconstruir
+    arrays a partir do buffer de candles.
+    """
+
+    RETURN_PERIODS = [1, 2, 5, 10, 20, 50, 100]
+    LOG_RETURN_PERIODS = [1, 5, 20]
+    VOLATILITY_PERIODS = [10, 20, 50, 100]
+    VOLATILITY_RATIOS = [(10, 20), (20, 50), (50, 100), (100, 200)]
+    VOLUME_PERIODS = [20, 50, 100]
+    OFI_PERIODS = [10, 20, 50, 100]
+    SHARPE_PERIODS = [5, 20]
+    RSI_PERIOD = 14
+    GK_PERIOD = 20
+    VWAP_TRADES = 100
+    INTENSITY_WINDOW_SECONDS = 60
+
+    def __init__(self, max_trades: int = 1000):
+        """
+        Args:
+            max_trades: Janela de trades para intensidade e razão de agressores
+                        (mesmo tamanho do TradeBuffer)
+        """
+        # Candles
+        self.closes = RollingWindow(max(self.RETURN_PERIODS) + 1)
+        self.candle_count = 0
+        # volatility_N / sharpe_N usam N-1 retornos
+        self.return_moments = {
+            p: RollingMoments(p - 1)
+            for p in set(self.VOLATILITY_PERIODS) | set(self.SHARPE_PERIODS)
+        }
+        self.close_sums = {p: RollingSum(p) for p in (5, 50)}
+        self.close_moments_20 = RollingMoments(20)
+        self.gk_terms = RollingSum(self.GK_PERIOD)
+        self.volume_sum_10 = RollingSum(10)
+        self.volume_moments = {p: RollingMoments(p) for p in self.VOLUME_PERIODS}
+        self.last_volume = 0.0
+        self.rsi_gains = RollingSum(self.RSI_PERIOD)
+        self.rsi_losses = RollingSum(self.RSI_PERIOD)
+
+        # Trades
+        self.trade_count = 0
+        self.signed_volume = 0.0
+        self.cumulative_signed_volume = 0.0
+        self.vwap_value = RollingSum(self.VWAP_TRADES)
+        self.vwap_volume = RollingSum(self.VWAP_TRADES)
+        self.aggressor_codes = RollingWindow(max_trades)
+        self.buyer_aggressors = 0
+        self.seller_aggressors = 0
+        self.trade_times = deque(maxlen=max_trades)
+
+        # Book
+        self.book_count = 0
+        self.bid_volume_sums = {p: RollingSum(p) for p in self.OFI_PERIODS}
+        self.ask_volume_sums = {p: RollingSum(p) for p in self.OFI_PERIODS}
+
+    # ------------------------------------------------------------------
+    # Atualizações
+    # ------------------------------------------------------------------
+
+    def on_candle(self, open: float, high: float, low: float, close: float, volume: float):
+        """Atualiza estado com um novo candle"""
+        if self.candle_count > 0:
+            prev = self.closes.lag(0)
+            ret = (close - prev) / prev if prev else 0.0
+            for moments in self.return_moments.values():
+                moments.push(ret)
+            delta = close - prev
+            self.rsi_gains.push(delta if delta > 0 else 0.0)
+            self.rsi_losses.push(-delta if delta < 0 else 0.0)
+
+        self.closes.push(close)
+        self.candle_count += 1
+        for rolling in self.close_sums.values():
+            rolling.push(close)
+        self.close_moments_20.push(close)
+
+        if high > 0 and low > 0 and open > 0 and close > 0:
+            hl = math.log(high / low)
+            co = math.log(close / open)
+            self.gk_terms.push(0.5 * hl * hl - (2 * math.log(2) - 1) * co * co)
+        else:
+            self.gk_terms.push(float("nan"))
+
+        self.last_volume = volume
+        self.volume_sum_10.push(volume)
+        for moments in self.volume_moments.values():
+            moments.push(volume)
+
+    def on_trade(self, timestamp: float, price: float, volume: float, aggressor: int):
+        """
+        Atualiza estado com um novo trade
+
+        Args:
+            timestamp: Segundos desde epoch
+            price: Preço executado
+            volume: Volume negociado
+            aggressor: +1 comprador, -1 vendedor, 0 desconhecido
+        """
+        self.trade_count += 1
+        self.signed_volume = volume * aggressor
+        self.cumulative_signed_volume += self.signed_volume
+        self.vwap_value.push(price * volume)
+        self.vwap_volume.push(volume)
+
+        evicted = self.aggressor_codes.push(aggressor)
+        if evicted == 1:
+            self.buyer_aggressors -= 1
+        elif evicted == -1:
+            self.seller_aggressors -= 1
+        if aggressor == 1:
+            self.buyer_aggressors += 1
+        elif aggressor == -1:
+            self.seller_aggressors += 1
+
+        # Manter só a janela de intensidade (trades chegam em ordem)
+        times = self.trade_times
+        times.append(timestamp)
+        cutoff = timestamp - self.INTENSITY_WINDOW_SECONDS
+        while times[0] < cutoff:
+            times.popleft()
+
+    def on_book(self, bid_volume: float, ask_volume: float):
+        """Atualiza estado com volumes totais de um snapshot de book"""
+        self.book_count += 1
+        for p in self.OFI_PERIODS:
+            self.bid_volume_sums[p].push(bid_volume)
+            self.ask_volume_sums[p].push(ask_volume)
+
+    # ------------------------------------------------------------------
+    # Leitura de features
+    # ------------------------------------------------------------------
+
+    def volatility_features(self) -> Dict[str, float]:
+        features = {}
+        n = self.candle_count
+
+        for period in self.VOLATILITY_PERIODS:
+            features[f'volatility_{period}'] = self.return_moments[period].std if n >= period else 0
+
+        for p1, p2 in self.VOLATILITY_RATIOS:
+            v1 = features[f'volatility_{p1}']
+            v2 = features[f'volatility_{min(p2, 100)}']
+            features[f'volatility_ratio_{p1}_{p2}'] = v1 / v2 if v2 > 0 else 1.0
+
+        if n >= self.GK_PERIOD:
+            gk_mean = self.gk_terms.mean
+            features['volatility_gk'] = math.sqrt(gk_mean) if gk_mean >= 0 else float("nan")
+        else:
+            features['volatility_gk'] = 0
+
+        bb = self.close_moments_20
+        if n >= 20 and bb.std > 0:
+            features['bb_position'] = (self.closes.lag(0) - bb.mean) / (2 * bb.std)
+        else:
+            features['bb_position'] = 0
+
+        return features
+
+    def return_features(self) -> Dict[str, float]:
+        features = {}
+        n = self.candle_count
+        last = self.closes.lag(0) if n else 0.0
+
+        for period in self.RETURN_PERIODS:
+            if n > period:
+                past = self.closes.lag(period)
+                features[f'returns_{period}'] = (last - past) / past
+            else:
+                features[f'returns_{period}'] = 0
+
+        for period in self.LOG_RETURN_PERIODS:
+            if n > period:
+                features[f'log_returns_{period}'] = math.log(last / self.closes.lag(period))
+            else:
+                features[f'log_returns_{period}'] = 0
+
+        return features
+
+    def volume_features(self) -> Dict[str, float]:
+        features = {}
+        n = self.candle_count
+        recent_vol = self.volume_sum_10.mean
+
+        for period in self.VOLUME_PERIODS:
+            moments = self.volume_moments[period]
+            if n > period and moments.mean > 0:
+                features[f'volume_ratio_{period}'] = recent_vol / moments.mean
+            else:
+                features[f'volume_ratio_{period}'] = 1.0
+
+            if n >= period and moments.std > 0:
+                features[f'volume_zscore_{period}'] = (self.last_volume - moments.mean) / moments.std
+            else:
+                features[f'volume_zscore_{period}'] = 0
+
+        return features
+
+    def technical_features(self) -> Dict[str, float]:
+        """Indicadores técnicos (exceto time_normalized, que depende do relógio)"""
+        features = {}
+        n = self.candle_count
+        closes = self.closes
+
+        ma20 = self.close_moments_20.mean
+        if n >= 20:
+            ma5 = self.close_sums[5].mean
+            features['ma_5_20_ratio'] = ma5 / ma20 if ma20 > 0 else 1.0
+        else:
+            features['ma_5_20_ratio'] = 1.0
+
+        if n >= 50:
+            ma50 = self.close_sums[50].mean
+            features['ma_20_50_ratio'] = ma20 / ma50 if ma50 > 0 else 1.0
+        else:
+            features['ma_20_50_ratio'] = 1.0
+
+        if n >= 20:
+            c5, c20 = closes.lag(4), closes.lag(19)
+            features['momentum_5_20'] = (closes.lag(0) - c5) / (c5 - c20) if c5 != c20 else 0
+        else:
+            features['momentum_5_20'] = 0
+
+        if n >= 50:
+            c20, c50 = closes.lag(19), closes.lag(49)
+            features['momentum_20_50'] = (closes.lag(0) - c20) / (c20 - c50) if c20 != c50 else 0
+        else:
+            features['momentum_20_50'] = 0
+
+        for period in self.SHARPE_PERIODS:
+            moments = self.return_moments[period]
+            if n > period and moments.std > 0:
+                features[f'sharpe_{period}'] = moments.mean / moments.std * math.sqrt(252)
+            else:
+                features[f'sharpe_{period}'] = 0
+
+        features['rsi_14'] = self.rsi()
+        return features
+
+    def rsi(self) -> float:
+        """RSI com médias simples das últimas 14 variações"""
+        if self.candle_count < self.RSI_PERIOD + 1:
+            return 50.0
+        avg_loss = self.rsi_losses.mean
+        if avg_loss == 0:
+            return 100.0
+        rs = self.rsi_gains.mean / avg_loss
+        return 100 - (100 / (1 + rs))
+
+    def vwap(self) -> float:
+        volume = self.vwap_volume.total
+        return self.vwap_value.total / volume if volume > 0 else 0.0
+
+    def order_flow_imbalance(self, period: int) -> float:
+        bid = self.bid_volume_sums[period].total
+        ask = self.ask_volume_sums[period].total
+        total = bid + ask
+        return (bid - ask) / total if total > 0 else 0.0
+
+    def trade_intensity(self) -> float:
+        """Trades por segundo na janela (mesma regra do TradeBuffer)"""
+        # Como no TradeBuffer: o mínimo de 2 vale para o histórico, não para a
+        # janela (um único trade na janela dá 1.0)
+        times = self.trade_times
+        if self.trade_count < 2 or not times:
+            return 0.0
+        span = times[-1] - times[0]
+        return len(times) / span if span > 0 else float(len(times))
+
+    def buyer_aggressor_ratio(self) -> float:
+        total = self.aggressor_codes.count
+        return self.buyer_aggressors / total if total else 0.5
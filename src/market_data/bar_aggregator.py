@@ -0,0 +1,309 @@
+"""
+BarAggregator - Formação de candles em streaming a partir de trades
+Cada trade é consumido uma única vez e atualiza, em O(1), a barra aberta de
+todos os timeframes (1s/5s/1min/5min) e o acumulado da sessão. Assinantes
+só são notificados quando uma barra fecha.
+"""
+
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+try:
+    from src.market_data.tick_recorder import aggressor_code
+except ImportError:
+    from market_data.tick_recorder import aggressor_code
+
+
+logger = logging.getLogger(__name__)
+
+# Nome do timeframe -> duração em segundos
+TIMEFRAMES = {
+    '1s': 1,
+    '5s': 5,
+    '1min': 60,
+    '5min': 300,
+}
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'trades',
+               'buy_volume', 'sell_volume', 'buy_trades', 'sell_trades', 'vwap']
+
+
+def trade_epoch(value) -> float:
+    """Timestamp do trade (datetime/Timestamp/str/epoch/None) em segundos desde epoch"""
+    if value is None:
+        return datetime.now().timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = pd.Timestamp(value)
+    if isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+    return value.timestamp()
+
+
+def trade_side(trade_data: Dict) -> int:
+    """Agressor do trade: 1 compra, -1 venda, 0 desconhecido"""
+    side = trade_data.get('aggressor', trade_data.get('side'))
+    if side is not None:
+        return aggressor_code(side)
+    # Código da DLL: 2 = compra agressora, 3 = venda agressora
+    trade_type = trade_data.get('trade_type')
+    return 1 if trade_type == 2 else -1 if trade_type == 3 else 0
+
+
+class Bar:
+    """Barra OHLCV com VWAP e volume por agressor, atualizada trade a trade"""
+
+    __slots__ = ('timeframe', 'seconds', 'start', 'open', 'high', 'low', 'close',
+                 'volume', 'trades', 'buy_volume', 'sell_volume',
+                 'buy_trades', 'sell_trades', 'notional')
+
+    def __init__(self, timeframe: str, seconds: int, start: float, price: float):
+        self.timeframe = timeframe
+        self.seconds = seconds
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = 0.0
+        self.trades = 0
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+        self.buy_trades = 0
+        self.sell_trades = 0
+        self.notional = 0.0
+
+    def add(self, price: float, volume: float, side: int):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += volume
+        self.trades += 1
+        self.notional += price * volume
+        if side > 0:
+            self.buy_volume += volume
+            self.buy_trades += 1
+        elif side < 0:
+            self.sell_volume += volume
+            self.sell_trades += 1
+
+    @property
+    def vwap(self) -> float:
+        return self.notional / self.volume if self.volume else self.close
+
+    @property
+    def end(self) -> float:
+        return self.start + self.seconds
+
+    @property
+    def timestamp(self) -> datetime:
+        """Abertura da barra (horário local, como os candles da DLL)"""
+        return datetime.fromtimestamp(self.start)
+
+    def to_dict(self) -> Dict:
+        return {
+            'timestamp': self.timestamp,
+            'open': self.open, 'high': self.high, 'low': self.low, 'close': self.close,
+            'volume': self.volume, 'trades': self.trades,
+            'buy_volume': self.buy_volume, 'sell_volume': self.sell_volume,
+            'buy_trades': self.buy_trades, 'sell_trades': self.sell_trades,
+            'vwap': self.vwap,
+        }
+
+    def __repr__(self) -> str:
+        return (f"Bar({self.timeframe} {self.timestamp:%H:%M:%S} O={self.open} H={self.high} "
+                f"L={self.low} C={self.close} V={self.volume})")
+
+
+def bars_to_frame(bars: Iterable[Bar]) -> pd.DataFrame:
+    """Lista de barras -> DataFrame indexado por 'datetime' (abertura da barra)"""
+    bars = list(bars)
+    index = pd.DatetimeIndex([bar.timestamp for bar in bars], name='datetime')
+    data = {
+        'open': [b.open for b in bars], 'high': [b.high for b in bars],
+        'low': [b.low for b in bars], 'close': [b.close for b in bars],
+        'volume': [b.volume for b in bars], 'trades': [b.trades for b in bars],
+        'buy_volume': [b.buy_volume for b in bars], 'sell_volume': [b.sell_volume for b in bars],
+        'buy_trades': [b.buy_trades for b in bars], 'sell_trades': [b.sell_trades for b in bars],
+        'vwap': [b.vwap for b in bars],
+    }
+    return pd.DataFrame(data, index=index, columns=BAR_COLUMNS)
+
+
+class BarAggregator:
+    """
+    Construtor único de barras para todos os consumidores
+
+    - on_trade(): atualiza a barra aberta de cada timeframe (O(1) por trade)
+    - subscribe(): callback(bar) chamado só quando a barra do timeframe fecha
+    - bars()/frame(): histórico de barras fechadas (+ barra aberta opcional)
+
+    Uma barra fecha quando chega um trade de um período posterior ou quando
+    on_clock() é chamado depois do fim do período (mercado parado). Períodos
+    sem nenhum trade não geram barra (mesmo resultado de resample().dropna()).
+    Trades atrasados (período já fechado) entram na barra aberta, para que o
+    volume total não se perca.
+    """
+
+    def __init__(self, timeframes: Iterable[str] = tuple(TIMEFRAMES), history: int = 1000):
+        """
+        Args:
+            timeframes: Timeframes mantidos (chaves de TIMEFRAMES)
+            history: Barras fechadas guardadas por timeframe
+        """
+        unknown = [tf for tf in timeframes if tf not in TIMEFRAMES]
+        if unknown:
+            raise ValueError(f"Timeframes desconhecidos: {unknown} (use {list(TIMEFRAMES)})")
+        self.timeframes: List[str] = sorted(timeframes, key=TIMEFRAMES.get)
+        self.history_size = history
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Callable[[Bar], None]]] = {tf: [] for tf in self.timeframes}
+        self.reset()
+
+    def reset(self):
+        """Descarta barras e acumulado da sessão (ex.: troca de contrato)"""
+        with self._lock:
+            self._open: Dict[str, Optional[Bar]] = {tf: None for tf in self.timeframes}
+            self._closed: Dict[str, deque] = {tf: deque(maxlen=self.history_size)
+                                              for tf in self.timeframes}
+            self.session: Optional[Bar] = None
+            self.last_trade_time: Optional[float] = None
+            self.stats = {'trades': 0, 'late_trades': 0, 'bars_closed': 0, 'callback_errors': 0}
+
+    # ------------------------------------------------------------- assinaturas
+
+    def subscribe(self, timeframe: str, callback: Callable[[Bar], None]):
+        """Registra callback(bar) para o fechamento de barras do timeframe"""
+        if timeframe not in self._subscribers:
+            raise ValueError(f"Timeframe não mantido pelo agregador: {timeframe}")
+        self._subscribers[timeframe].append(callback)
+
+    def unsubscribe(self, timeframe: str, callback: Callable[[Bar], None]):
+        if callback in self._subscribers.get(timeframe, []):
+            self._subscribers[timeframe].remove(callback)
+
+    # ----------------------------------------------------------------- entrada
+
+    def on_trade(self, price: float, volume: float, timestamp=None, side: int = 0) -> List[Bar]:
+        """
+        Consome um trade
+
+        Args:
+            price: Preço negociado
+            volume: Quantidade (contratos)
+            timestamp: Horário do trade (padrão: agora)
+            side: Agressor (1 compra, -1 venda, 0 desconhecido)
+
+        Returns:
+            Barras fechadas por este trade (já notificadas)
+        """
+        if price <= 0:
+            return []
+        ts = trade_epoch(timestamp)
+        closed = []
+        with self._lock:
+            self.stats['trades'] += 1
+            late = False
+            for tf in self.timeframes:
+                bar = self._open[tf]
+                if bar is not None and ts >= bar.end:
+                    self._close(bar, closed)
+                    bar = None
+                if bar is None:
+                    seconds = TIMEFRAMES[tf]
+                    start = ts - ts % seconds
+                    previous = self._closed[tf][-1] if self._closed[tf] else None
+                    if previous is not None and start < previous.end:
+                        start, late = previous.end, True
+                    bar = self._open[tf] = Bar(tf, seconds, start, price)
+                elif ts < bar.start:
+                    late = True
+                bar.add(price, volume, side)
+
+            if self.session is None:
+                self.session = Bar('session', 0, ts, price)
+            self.session.add(price, volume, side)
+            if late:
+                self.stats['late_trades'] += 1
+            if self.last_trade_time is None or ts > self.last_trade_time:
+                self.last_trade_time = ts
+
+        self._notify(closed)
+        return closed
+
+    def on_trade_data(self, trade_data: Dict) -> List[Bar]:
+        """Consome um trade no formato de dicionário da conexão/replay"""
+        volume = trade_data.get('volume', trade_data.get('quantity', 0)) or 0
+        return self.on_trade(
+            float(trade_data.get('price', 0) or 0),
+            float(volume),
+            trade_data.get('timestamp'),
+            trade_side(trade_data),
+        )
+
+    def on_clock(self, timestamp=None) -> List[Bar]:
+        """Fecha as barras cujo período terminou até `timestamp` (sem esperar trade)"""
+        ts = trade_epoch(timestamp)
+        closed = []
+        with self._lock:
+            for tf in self.timeframes:
+                bar = self._open[tf]
+                if bar is not None and ts >= bar.end:
+                    self._close(bar, closed)
+                    self._open[tf] = None
+        self._notify(closed)
+        return closed
+
+    def _close(self, bar: Bar, closed: List[Bar]):
+        self._closed[bar.timeframe].append(bar)
+        self.stats['bars_closed'] += 1
+        closed.append(bar)
+
+    def _notify(self, closed: List[Bar]):
+        for bar in closed:
+            for callback in self._subscribers[bar.timeframe]:
+                try:
+                    callback(bar)
+                except Exception as e:
+                    self.stats['callback_errors'] += 1
+                    logger.error(f"Erro no assinante de barras {bar.timeframe}: {e}")
+
+    # ------------------------------------------------------------------ leitura
+
+    def current(self, timeframe: str) -> Optional[Bar]:
+        """Barra aberta (parcial) do timeframe"""
+        return self._open[timeframe]
+
+    def last_closed(self, timeframe: str) -> Optional[Bar]:
+        closed = self._closed[timeframe]
+        return closed[-1] if closed else None
+
+    def bars(self, timeframe: str, count: Optional[int] = None,
+             include_open: bool = False) -> List[Bar]:
+        """Últimas `count` barras fechadas (e a aberta no final, se pedida)"""
+        with self._lock:
+            bars = list(self._closed[timeframe])
+            if include_open and self._open[timeframe] is not None:
+                bars.append(self._open[timeframe])
+        if count is not None:
+            bars = bars[-count:] if count > 0 else []
+        return bars
+
+    def frame(self, timeframe: str, count: Optional[int] = None,
+              include_open: bool = False) -> pd.DataFrame:
+        """Barras como DataFrame (montado só quando pedido)"""
+        return bars_to_frame(self.bars(timeframe, count, include_open))
+
+    def get_summary(self) -> Dict:
+        session = self.session
+        return {
+            'timeframes': self.timeframes,
+            'bars': {tf: len(self._closed[tf]) for tf in self.timeframes},
+            'session': session.to_dict() if session else None,
+            **self.stats,
+        }
@@ -0,0 +1,423 @@
+"""
+OrderBookLadder - Book completo por nível de preço a partir de deltas do OfferBook V2
+Escada indexada por tick (0.5 no WDO) em arrays NumPy preallocados: add/edit/delete
+são O(1) e melhor bid/ask, profundidade e profundidade acumulada saem sem reconstruir listas
+"""
+
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+# Ações do OfferBook/PriceBook V2 (ProfitDLL)
+BOOK_ADD = 0
+BOOK_EDIT = 1
+BOOK_DELETE = 2
+BOOK_DELETE_FROM = 3
+BOOK_FULL = 4
+
+# Lados
+BID = 0
+ASK = 1
+
+_EMPTY = -1
+
+
+class OrderBookLadder:
+    """
+    Book agregado por preço mantido incrementalmente
+
+    Cada lado é um array de quantidade e outro de número de ordens indexados
+    por tick relativo a `base_tick`. Ofertas individuais são rastreadas por
+    (lado, offer_id) para que edições e remoções descontem a quantidade
+    correta do nível sem depender da posição na fila.
+
+    A janela cobre `span` ticks; se um preço novo cair fora dela a escada é
+    deslocada e os níveis (e ofertas) que saem pelo lado oposto são
+    descartados. Preços fora de `price_band` são rejeitados antes disso, para
+    que um preço espúrio não desloque a janela e apague o book.
+
+    Não é thread-safe: o dono (callback de book) deve serializar o acesso.
+    """
+
+    def __init__(self, tick_size: float = 0.5, span: int = 4096,
+                 price_band: Optional[Tuple[float, float]] = (1000.0, 10000.0)):
+        """
+        Inicializa o book
+
+        Args:
+            tick_size: Tamanho do tick do ativo (WDO = 0.5)
+            span: Número de ticks cobertos pela janela
+            price_band: Faixa (exclusiva) de preços aceitos; None desativa
+        """
+        if tick_size <= 0 or span <= 0:
+            raise ValueError("tick_size e span devem ser positivos")
+        if price_band is not None and price_band[0] >= price_band[1]:
+            raise ValueError("price_band deve ser (mínimo, máximo)")
+
+        self.tick_size = tick_size
+        self._inv_tick = 1.0 / tick_size
+        self.span = span
+        self.price_band = price_band
+        self.base_tick: Optional[int] = None
+
+        self.quantity = np.zeros((2, span), dtype=np.float64)
+        self.orders = np.zeros((2, span), dtype=np.int32)
+        self._best = [_EMPTY, _EMPTY]
+        self._offers: Dict[Tuple[int, int], Tuple[int, float]] = {}
+
+        self.updates = 0
+        self.unmatched = 0
+        self.rejected = 0
+        self.recenters = 0
+        self.full_book_events = 0
+
+    # ------------------------------------------------------------------
+    # Conversões
+    # ------------------------------------------------------------------
+
+    def to_tick(self, price: float) -> int:
+        """Converte preço em tick absoluto"""
+        return int(round(price * self._inv_tick))
+
+    def _in_band(self, price: float) -> bool:
+        """Preço dentro da faixa aceita (conta a rejeição se não estiver)"""
+        band = self.price_band
+        if band is None or band[0] < price < band[1]:
+            return True
+        self.rejected += 1
+        return False
+
+    def _price(self, index: int) -> float:
+        return (self.base_tick + index) * self.tick_size
+
+    def _index(self, tick: int, grow: bool) -> Optional[int]:
+        """
+        Índice do tick na janela
+
+        Args:
+            tick: Tick absoluto
+            grow: Recentralizar se estiver fora da janela (senão retorna None)
+        """
+        if self.base_tick is None:
+            if not grow:
+                return None
+            self.base_tick = tick - self.span // 2
+        index = tick - self.base_tick
+        if 0 <= index < self.span:
+            return index
+        if not grow:
+            return None
+        self._recenter(tick)
+        return tick - self.base_tick
+
+    def _recenter(self, tick: int):
+        """
+        Desloca a janela o mínimo para incluir `tick` (com margem de span/8),
+        preservando os níveis sobrepostos
+        """
+        margin = self.span // 8
+        if tick >= self.base_tick + self.span:
+            new_base = tick - self.span + 1 + margin
+        else:
+            new_base = tick - margin
+        shift = new_base - self.base_tick
+        quantity = np.zeros_like(self.quantity)
+        orders = np.zeros_like(self.orders)
+
+        lo, hi = max(0, shift), min(self.span, self.span + shift)
+        if lo < hi:
+            quantity[:, lo - shift:hi - shift] = self.quantity[:, lo:hi]
+            orders[:, lo - shift:hi - shift] = self.orders[:, lo:hi]
+
+        self.quantity, self.orders = quantity, orders
+        self.base_tick = new_base
+        self.recenters += 1
+        # Ofertas dos níveis descartados não voltam a ser referenciadas por preço
+        self._offers = {k: v for k, v in self._offers.items()
+                        if 0 <= v[0] - new_base < self.span}
+        self._best = [self._scan_best(BID), self._scan_best(ASK)]
+
+    # ------------------------------------------------------------------
+    # Melhor preço
+    # ------------------------------------------------------------------
+
+    def _scan_best(self, side: int, start: Optional[int] = None) -> int:
+        """Procura o melhor nível não vazio a partir de `start` (exclusivo)"""
+        if side == BID:
+            levels = np.flatnonzero(self.quantity[BID, :start])
+            return int(levels[-1]) if levels.size else _EMPTY
+        offset = 0 if start is None else start + 1
+        levels = np.flatnonzero(self.quantity[ASK, offset:])
+        return offset + int(levels[0]) if levels.size else _EMPTY
+
+    def _change(self, side: int, tick: int, delta_qty: float, delta_orders: int):
+        """Aplica variação de quantidade/ordens num nível e atualiza o melhor preço"""
+        index = self._index(tick, grow=delta_qty > 0)
+        if index is None:
+            return
+
+        qty = self.quantity[side, index] + delta_qty
+        count = self.orders[side, index] + delta_orders
+        if qty <= 1e-9:
+            qty, count = 0.0, 0
+        self.quantity[side, index] = qty
+        self.orders[side, index] = max(count, 0)
+        self._refresh_best(side, index, qty > 0)
+
+    def _refresh_best(self, side: int, index: int, filled: bool):
+        best = self._best[side]
+        if filled:
+            if best == _EMPTY or (index > best if side == BID else index < best):
+                self._best[side] = index
+        elif index == best:
+            self._best[side] = self._scan_best(side, index)
+
+    # ------------------------------------------------------------------
+    # Deltas
+    # ------------------------------------------------------------------
+
+    def apply_offer(self, action: int, side: int, price: float, quantity: float,
+                    offer_id: Optional[int] = None, has_price: bool = True,
+                    has_quantity: bool = True) -> bool:
+        """
+        Aplica um delta do OfferBook V2 (uma oferta individual)
+
+        Args:
+            action: BOOK_ADD/BOOK_EDIT/BOOK_DELETE/BOOK_DELETE_FROM/BOOK_FULL
+            side: 0=Buy, 1=Sell
+            price: Preço da oferta
+            quantity: Quantidade da oferta
+            offer_id: ID da oferta (chave para edit/delete)
+            has_price: Se o preço veio preenchido
+            has_quantity: Se a quantidade veio preenchida
+
+        Returns:
+            True se o book foi alterado
+        """
+        if side not in (BID, ASK):
+            return False
+        self.updates += 1
+        key = (side, offer_id) if offer_id is not None else None
+        known = self._offers.get(key) if key is not None else None
+
+        if action == BOOK_ADD or (action == BOOK_EDIT and known is None):
+            if not (has_price and has_quantity) or quantity <= 0:
+                self.unmatched += 1
+                return False
+            if not self._in_band(price):
+                return False
+            if action == BOOK_EDIT:
+                self.unmatched += 1
+            tick = self.to_tick(price)
+            self._change(side, tick, quantity, 1)
+            if key is not None:
+                self._offers[key] = (tick, quantity)
+            return True
+
+        if action == BOOK_EDIT:
+            if has_price and not self._in_band(price):
+                return False
+            old_tick, old_qty = known
+            tick = self.to_tick(price) if has_price else old_tick
+            qty = quantity if has_quantity else old_qty
+            if tick == old_tick:
+                self._change(side, tick, qty - old_qty, 0)
+            else:
+                self._change(side, old_tick, -old_qty, -1)
+                self._change(side, tick, qty, 1)
+            self._offers[key] = (tick, qty)
+            return True
+
+        if action == BOOK_DELETE:
+            if known is not None:
+                del self._offers[key]
+                self._change(side, known[0], -known[1], -1)
+                return True
+            self.unmatched += 1
+            if has_price and has_quantity:
+                self._change(side, self.to_tick(price), -quantity, -1)
+                return True
+            return False
+
+        if action == BOOK_DELETE_FROM:
+            if known is not None:
+                self.clear_from(side, known[0])
+            elif has_price:
+                self.clear_from(side, self.to_tick(price))
+            else:
+                self.clear(side)
+            return True
+
+        if action == BOOK_FULL:
+            # Snapshot vem nos arrays da DLL, que os callbacks não decodificam
+            self.full_book_events += 1
+        return False
+
+    def set_level(self, side: int, price: float, quantity: float, orders: int = 0):
+        """
+        Define a quantidade agregada de um nível (PriceBook V2)
+
+        Args:
+            side: 0=Buy, 1=Sell
+            price: Preço do nível
+            quantity: Quantidade total (0 remove o nível)
+            orders: Número de ordens no nível
+        """
+        if quantity > 0 and not self._in_band(price):
+            return
+        index = self._index(self.to_tick(price), grow=quantity > 0)
+        if index is None:
+            return
+        self.updates += 1
+        self.quantity[side, index] = max(quantity, 0.0)
+        self.orders[side, index] = orders if quantity > 0 else 0
+        self._refresh_best(side, index, quantity > 0)
+
+    def clear_from(self, side: int, tick: int):
+        """
+        Remove o nível `tick` e todos os piores do lado
+
+        Args:
+            side: 0=Buy, 1=Sell
+            tick: Tick absoluto do primeiro nível removido
+        """
+        if self.base_tick is None:
+            return
+        index = min(max(tick - self.base_tick, -1), self.span)
+        if side == BID:
+            self.quantity[BID, :index + 1] = 0.0
+            self.orders[BID, :index + 1] = 0
+            self._offers = {k: v for k, v in self._offers.items() if k[0] != BID or v[0] > tick}
+        else:
+            self.quantity[ASK, max(index, 0):] = 0.0
+            self.orders[ASK, max(index, 0):] = 0
+            self._offers = {k: v for k, v in self._offers.items() if k[0] != ASK or v[0] < tick}
+        self._best[side] = self._scan_best(side)
+
+    def clear(self, side: Optional[int] = None):
+        """Esvazia um lado (ou os dois)"""
+        sides = (BID, ASK) if side is None else (side,)
+        for s in sides:
+            self.quantity[s].fill(0.0)
+            self.orders[s].fill(0)
+            self._best[s] = _EMPTY
+        self._offers = {k: v for k, v in self._offers.items() if k[0] not in sides}
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def best(self, side: int) -> Tuple[float, float]:
+        """Retorna (preço, quantidade) do melhor nível, ou (0.0, 0.0)"""
+        index = self._best[side]
+        if index == _EMPTY:
+            return 0.0, 0.0
+        return self._price(index), float(self.quantity[side, index])
+
+    @property
+    def best_bid(self) -> float:
+        return self.best(BID)[0]
+
+    @property
+    def best_ask(self) -> float:
+        return self.best(ASK)[0]
+
+    @property
+    def spread(self) -> float:
+        bid, ask = self.best_bid, self.best_ask
+        return ask - bid if bid > 0 and ask > 0 else 0.0
+
+    @property
+    def mid_price(self) -> float:
+        bid, ask = self.best_bid, self.best_ask
+        return (bid + ask) / 2 if bid > 0 and ask > 0 else 0.0
+
+    def is_valid(self) -> bool:
+        """Os dois lados têm preço e o book não está cruzado"""
+        bid, ask = self.best_bid, self.best_ask
+        return bid > 0 and ask > 0 and bid < ask
+
+    def depth(self, side: int, levels: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna os N melhores níveis não vazios de um lado
+
+        Args:
+            side: 0=Buy, 1=Sell
+            levels: Número de níveis
+
+        Returns:
+            (preços, quantidades) do melhor para o pior
+        """
+        best = self._best[side]
+        if best == _EMPTY or levels <= 0:
+            empty = np.empty(0, dtype=np.float64)
+            return empty, empty
+
+        # Janela curta primeiro: níveis do WDO raramente têm buracos grandes
+        window = levels * 8
+        if side == BID:
+            start = max(0, best + 1 - window)
+            index = start + np.flatnonzero(self.quantity[BID, start:best + 1])[::-1]
+            if index.size < levels and start > 0:
+                index = np.flatnonzero(self.quantity[BID, :best + 1])[::-1]
+        else:
+            stop = min(self.span, best + window)
+            index = best + np.flatnonzero(self.quantity[ASK, best:stop])
+            if index.size < levels and stop < self.span:
+                index = best + np.flatnonzero(self.quantity[ASK, best:])
+
+        index = index[:levels]
+        prices = (self.base_tick + index) * self.tick_size
+        return prices, self.quantity[side, index]
+
+    def cumulative_depth(self, side: int, levels: int = 5) -> np.ndarray:
+        """Quantidade acumulada do melhor nível até o N-ésimo"""
+        return np.cumsum(self.depth(side, levels)[1])
+
+    def imbalance(self, levels: int = 5) -> float:
+        """(bid - ask) / (bid + ask) sobre os N melhores níveis"""
+        bid = self.depth(BID, levels)[1].sum()
+        ask = self.depth(ASK, levels)[1].sum()
+        total = bid + ask
+        return float((bid - ask) / total) if total > 0 else 0.0
+
+    def snapshot(self, levels: int = 5) -> Dict:
+        """
+        Snapshot no formato plano usado pelo sistema (bid_price_1, bid_volume_1, ...)
+
+        Args:
+            levels: Número de níveis por lado
+
+        Returns:
+            Dict com preços/volumes por nível, spread, mid_price e imbalance
+        """
+        data = {}
+        for side, name in ((BID, 'bid'), (ASK, 'ask')):
+            prices, volumes = self.depth(side, levels)
+            prices, volumes = prices.tolist(), volumes.tolist()
+            for i in range(levels):
+                data[f'{name}_price_{i + 1}'] = prices[i] if i < len(prices) else 0.0
+                data[f'{name}_volume_{i + 1}'] = volumes[i] if i < len(volumes) else 0.0
+            data[f'total_{name}_volume'] = sum(volumes)
+
+        data['spread'] = self.spread
+        data['mid_price'] = self.mid_price
+        data['imbalance'] = self.imbalance(levels)
+        return data
+
+    def get_stats(self) -> Dict:
+        """Retorna estatísticas do book"""
+        return {
+            'updates': self.updates,
+            'unmatched': self.unmatched,
+            'rejected': self.rejected,
+            'recenters': self.recenters,
+            'full_book_events': self.full_book_events,
+            'tracked_offers': len(self._offers),
+            'bid_levels': int(np.count_nonzero(self.quantity[BID])),
+            'ask_levels': int(np.count_nonzero(self.quantity[ASK])),
+            'best_bid': self.best_bid,
+            'best_ask': self.best_ask
+        }
+
+    def __repr__(self) -> str:
+        return f"OrderBookLadder(bid={self.best_bid}, ask={self.best_ask}, offers={len(self._offers)})"
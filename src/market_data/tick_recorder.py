@@ -0,0 +1,420 @@
+"""
+TickDataRecorder - Gravação de ticks e book fora do caminho do callback
+Registros de largura fixa (NumPy) acumulados em fila e gravados em lote
+por uma thread dedicada, em arquivos binários append-only por sessão
+"""
+
+import json
+import logging
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+# Formato do arquivo: MAGIC + uint32 (tamanho do header) + header JSON + registros
+MAGIC = b"QTREC01\n"
+HEADER_LEN = struct.Struct("<I")
+EXTENSION = ".qtr"
+
+SYMBOL_DTYPE = "S12"
+
+TICK_RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),       # epoch (s)
+    ("symbol", SYMBOL_DTYPE),
+    ("price", "<f8"),
+    ("volume", "<f8"),
+    ("aggressor", "i1"),        # 1 comprador, -1 vendedor, 0 desconhecido
+])
+
+BOOK_RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("symbol", SYMBOL_DTYPE),
+    ("bid_price_1", "<f8"),
+    ("bid_vol_1", "<f8"),
+    ("ask_price_1", "<f8"),
+    ("ask_vol_1", "<f8"),
+    ("spread", "<f8"),
+    ("mid_price", "<f8"),
+    ("imbalance", "<f8"),
+])
+
+STREAM_DTYPES = {
+    "tick": TICK_RECORD_DTYPE,
+    "book": BOOK_RECORD_DTYPE,
+}
+
+AGGRESSOR_CODES = {
+    "BUY": 1, "BUYER": 1, "COMPRA": 1, "1": 1,
+    "SELL": -1, "SELLER": -1, "VENDA": -1, "-1": -1, "2": -1,
+}
+AGGRESSOR_LABELS = {1: "BUY", -1: "SELL", 0: "UNKNOWN"}
+
+
+def aggressor_code(value) -> int:
+    """Converte o agressor recebido da DLL (str/int) para código compacto"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, np.integer)):
+        return 1 if value == 1 else -1 if value in (-1, 2) else 0
+    return AGGRESSOR_CODES.get(str(value).strip().upper(), 0)
+
+
+class _StreamWriter:
+    """Arquivo append-only de um tipo de registro (tick ou book)"""
+
+    def __init__(self, path: Path, kind: str, session: str):
+        self.path = path
+        self.kind = kind
+        self.dtype = STREAM_DTYPES[kind]
+        self.records = 0
+        self.bytes_written = 0
+
+        header = json.dumps({
+            "kind": kind,
+            "session": session,
+            "created": datetime.now().isoformat(),
+            "dtype": self.dtype.descr,
+            "itemsize": self.dtype.itemsize,
+        }).encode("utf-8")
+
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.file.write(HEADER_LEN.pack(len(header)))
+        self.file.write(header)
+        self.file.flush()
+
+    def encode(self, rows: List[tuple]) -> bytes:
+        """Converte o lote em um bloco de registros de largura fixa"""
+        return np.array(rows, dtype=self.dtype).tobytes()
+
+    def write(self, data: bytes):
+        """
+        Grava um bloco de uma vez
+
+        Em erro de I/O o arquivo volta ao tamanho anterior, para que um
+        bloco parcial não desalinhe os registros seguintes.
+        """
+        position = self.file.tell()
+        try:
+            self.file.write(data)
+            self.file.flush()
+        except OSError:
+            try:
+                self.file.seek(position)
+                self.file.truncate()
+            except OSError:
+                pass
+            raise
+        self.records += len(data) // self.dtype.itemsize
+        self.bytes_written += len(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.flush()
+            self.file.close()
+
+
+class TickDataRecorder:
+    """
+    Gravador de dados de mercado para treinamento
+
+    record_trade/record_book apenas enfileiram uma tupla (O(1), sem I/O e
+    sem lock), podendo ser chamados direto do callback da DLL. A thread de
+    escrita drena as filas a cada `flush_interval` segundos ou quando
+    `batch_size` registros se acumulam, e grava cada lote como bloco binário
+    contíguo. Os arquivos são rotacionados por sessão (dia de pregão).
+    """
+
+    def __init__(self, data_dir: Union[str, Path] = "data/book_tick_data",
+                 flush_interval: float = 1.0, batch_size: int = 4096,
+                 max_pending: int = 500_000, rotate_daily: bool = True):
+        """
+        Args:
+            data_dir: Diretório de saída
+            flush_interval: Intervalo máximo (s) entre gravações
+            batch_size: Registros pendentes que antecipam a gravação
+            max_pending: Limite por fila; acima disso registros são descartados
+            rotate_daily: Abrir novos arquivos quando o dia mudar
+        """
+        self.data_dir = Path(data_dir)
+        self.flush_interval = flush_interval
+        self.batch_size = max(int(batch_size), 1)
+        self.max_pending = max_pending
+        self.rotate_daily = rotate_daily
+
+        self._queues: Dict[str, deque] = {kind: deque() for kind in STREAM_DTYPES}
+        self._writers: Dict[str, _StreamWriter] = {}
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._io_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        self.session: Optional[str] = None
+        self._session_day = None
+        self.files: Dict[str, Path] = {}
+
+        self.stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "written": 0,
+            "flushes": 0,
+            "errors": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self) -> Dict[str, Path]:
+        """Abre os arquivos da sessão e inicia a thread de escrita"""
+        if self._thread and self._thread.is_alive():
+            return self.files
+
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._open_session()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._writer_loop, name="TickDataRecorder", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"[RECORDER] Gravando sessão {self.session} em {self.data_dir}")
+        return self.files
+
+    def stop(self, timeout: float = 5.0):
+        """Drena as filas, grava o restante e fecha os arquivos"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+        with self._io_lock:
+            try:
+                self._drain()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"[RECORDER] Erro na gravação final: {e}")
+            for writer in self._writers.values():
+                writer.close()
+            self._writers.clear()
+
+        logger.info(
+            f"[RECORDER] Finalizado: {self.stats['written']} registros, "
+            f"{self.stats['dropped']} descartados"
+        )
+
+    def rotate(self, session: Optional[str] = None) -> Dict[str, Path]:
+        """Fecha os arquivos atuais e abre uma nova sessão"""
+        with self._io_lock:
+            self._drain()
+            for writer in self._writers.values():
+                writer.close()
+            self._open_session(session)
+        return self.files
+
+    def _open_session(self, session: Optional[str] = None):
+        now = datetime.now()
+        self.session = session or now.strftime("%Y%m%d_%H%M%S")
+        self._session_day = now.date()
+        self._writers = {}
+        self.files = {}
+        for kind in STREAM_DTYPES:
+            path = self.data_dir / f"{kind}_data_{self.session}{EXTENSION}"
+            self._writers[kind] = _StreamWriter(path, kind, self.session)
+            self.files[kind] = path
+
+    # ------------------------------------------------------------------
+    # Caminho quente (callbacks)
+    # ------------------------------------------------------------------
+
+    def record_trade(self, symbol: str, price: float, volume: float,
+                     aggressor=None, timestamp: Optional[float] = None):
+        """Enfileira um trade (chamável da thread de callback)"""
+        self._enqueue("tick", (
+            time.time() if timestamp is None else timestamp,
+            symbol.encode("ascii", "ignore") if isinstance(symbol, str) else symbol,
+            price,
+            volume,
+            aggressor_code(aggressor),
+        ))
+
+    def record_book(self, symbol: str, bid_price: float, bid_volume: float,
+                    ask_price: float, ask_volume: float,
+                    timestamp: Optional[float] = None):
+        """Enfileira o topo do book; spread, mid e imbalance são derivados aqui"""
+        total = bid_volume + ask_volume
+        self._enqueue("book", (
+            time.time() if timestamp is None else timestamp,
+            symbol.encode("ascii", "ignore") if isinstance(symbol, str) else symbol,
+            bid_price,
+            bid_volume,
+            ask_price,
+            ask_volume,
+            ask_price - bid_price,
+            (bid_price + ask_price) / 2,
+            (bid_volume - ask_volume) / total if total > 0 else 0.0,
+        ))
+
+    def _enqueue(self, kind: str, row: tuple):
+        queue = self._queues[kind]
+        if len(queue) >= self.max_pending:
+            self.stats["dropped"] += 1
+            return
+        queue.append(row)
+        self.stats["enqueued"] += 1
+        if len(queue) >= self.batch_size:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Thread de escrita
+    # ------------------------------------------------------------------
+
+    def _writer_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                with self._io_lock:
+                    if self.rotate_daily and datetime.now().date() != self._session_day:
+                        self._drain()
+                        for writer in self._writers.values():
+                            writer.close()
+                        self._open_session()
+                        logger.info(f"[RECORDER] Nova sessão {self.session}")
+                    self._drain()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"[RECORDER] Erro na gravação: {e}")
+
+    def _drain(self):
+        """
+        Grava tudo que estiver pendente (chamado com _io_lock)
+
+        Se a gravação falha, o lote volta para a frente da fila (na ordem
+        original) e é tentado de novo no próximo ciclo; max_pending continua
+        limitando a memória enquanto o disco não volta.
+        """
+        wrote = False
+        for kind, queue in self._queues.items():
+            pending = len(queue)
+            if not pending or kind not in self._writers:
+                continue
+            rows = [queue.popleft() for _ in range(pending)]
+            writer = self._writers[kind]
+            try:
+                data = writer.encode(rows)
+            except (TypeError, ValueError) as e:
+                # Registro malformado: descartar o lote em vez de travar a fila
+                self.stats["dropped"] += pending
+                self.stats["errors"] += 1
+                logger.error(f"[RECORDER] Lote de {kind} inválido descartado: {e}")
+                continue
+            try:
+                writer.write(data)
+            except OSError:
+                queue.extendleft(reversed(rows))
+                raise
+            self.stats["written"] += pending
+            wrote = True
+
+        if wrote:
+            self.stats["flushes"] += 1
+
+    def flush(self):
+        """Força a gravação imediata das filas"""
+        with self._io_lock:
+            self._drain()
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["pending"] = {kind: len(q) for kind, q in self._queues.items()}
+        stats["session"] = self.session
+        stats["files"] = {kind: str(path) for kind, path in self.files.items()}
+        return stats
+
+
+# ----------------------------------------------------------------------
+# Leitura
+# ----------------------------------------------------------------------
+
+def read_header(path: Union[str, Path]) -> Dict:
+    """Lê o header JSON de um arquivo gravado pelo TickDataRecorder"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} não é um arquivo do TickDataRecorder")
+        (size,) = HEADER_LEN.unpack(f.read(HEADER_LEN.size))
+        header = json.loads(f.read(size).decode("utf-8"))
+    header["data_offset"] = len(MAGIC) + HEADER_LEN.size + size
+    return header
+
+
+def read_records(path: Union[str, Path], mmap: bool = True) -> np.ndarray:
+    """
+    Carrega os registros de um arquivo como array estruturado
+
+    Args:
+        path: Arquivo .qtr
+        mmap: Mapear em memória (sem cópia) em vez de ler para a RAM
+
+    Returns:
+        Array estruturado (TICK_RECORD_DTYPE ou BOOK_RECORD_DTYPE)
+    """
+    header = read_header(path)
+    dtype = np.dtype([tuple(field) for field in header["dtype"]])
+    offset = header["data_offset"]
+    payload = Path(path).stat().st_size - offset
+    count = payload // dtype.itemsize  # ignora registro parcial (gravação interrompida)
+
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    if mmap:
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+    return np.fromfile(path, dtype=dtype, count=count, offset=offset)
+
+
+def records_to_dataframe(records: np.ndarray):
+    """Converte registros em DataFrame no layout dos antigos CSVs"""
+    import pandas as pd
+
+    df = pd.DataFrame({name: np.asarray(records[name]) for name in records.dtype.names})
+    # Epoch -> horário local sem timezone (mesmo formato dos CSVs antigos)
+    local_tz = datetime.now().astimezone().tzinfo
+    df["timestamp"] = (pd.to_datetime(df["timestamp"], unit="s", utc=True)
+                       .dt.tz_convert(local_tz).dt.tz_localize(None))
+    df["symbol"] = df["symbol"].str.decode("ascii")
+    if "aggressor" in df:
+        df["aggressor"] = df["aggressor"].map(AGGRESSOR_LABELS)
+    return df
+
+
+def list_sessions(data_dir: Union[str, Path] = "data/book_tick_data",
+                  kind: str = "tick") -> List[Path]:
+    """Arquivos gravados de um tipo ('tick' ou 'book'), em ordem de sessão"""
+    return sorted(Path(data_dir).glob(f"{kind}_data_*{EXTENSION}"))
+
+
+def load_recorded(data_dir: Union[str, Path] = "data/book_tick_data",
+                  kind: str = "tick"):
+    """Concatena todas as sessões gravadas de um tipo em um DataFrame"""
+    import pandas as pd
+
+    frames = []
+    for path in list_sessions(data_dir, kind):
+        records = read_records(path)
+        if len(records):
+            frames.append(records_to_dataframe(records))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
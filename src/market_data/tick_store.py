@@ -0,0 +1,538 @@
+"""
+TickStore - Armazenamento colunar memory-mapped de dados históricos
+Conversão única dos CSVs (histórico WDO e dados coletados) para partições
+diárias com colunas tipadas; leitura por intervalo de datas sem parsing
+"""
+
+import json
+import logging
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST = "manifest.json"
+INDEX_COLUMN = "timestamp"
+CODE_DTYPE = np.dtype("<i4")
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+# Colunas do export do histórico (WDOFUT_BMF_T.csv), sem os '<>'
+WDO_COLUMNS = ['ticker', 'date', 'time', 'trade_number', 'price', 'qty',
+               'vol', 'buy_agent', 'sell_agent', 'trade_type', 'aft']
+WDO_DTYPES = {
+    'date': 'uint32',
+    'time': 'uint32',
+    'trade_number': 'uint32',
+    'price': 'float32',
+    'qty': 'uint32',
+    'vol': 'float32',
+}
+
+DateLike = Union[str, date, datetime, pd.Timestamp, None]
+
+
+def _to_ns(value: DateLike) -> Optional[int]:
+    if value is None:
+        return None
+    return int(pd.Timestamp(value).value)
+
+
+class TickStore:
+    """
+    Dataset colunar particionado por dia
+
+    Layout em disco:
+        <root>/manifest.json        schema, categorias e partições
+        <root>/<YYYYMMDD>/<col>.bin colunas little-endian de largura fixa
+
+    A coluna `timestamp` (int64, ns) é o índice: cada partição fica ordenada
+    por ela, e a leitura por intervalo usa busca binária nas partições das
+    bordas. Colunas texto são codificadas por dicionário (int32).
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        """
+        Args:
+            root: Diretório do dataset (criado no primeiro append)
+        """
+        self.root = Path(root)
+        self.manifest = {
+            "version": 1,
+            "index": INDEX_COLUMN,
+            "columns": {},
+            "categories": {},
+            "partitions": {},
+            "sources": {},
+        }
+        self._category_index: Dict[str, Dict[str, int]] = {}
+
+        manifest_file = self.root / MANIFEST
+        if manifest_file.exists():
+            with open(manifest_file, 'r') as f:
+                self.manifest = json.load(f)
+            for name, values in self.manifest["categories"].items():
+                self._category_index[name] = {v: i for i, v in enumerate(values)}
+
+    # ------------------------------------------------------------------
+    # Metadados
+    # ------------------------------------------------------------------
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.manifest["columns"])
+
+    @property
+    def partitions(self) -> List[str]:
+        return sorted(self.manifest["partitions"])
+
+    def exists(self) -> bool:
+        return bool(self.manifest["partitions"])
+
+    def __len__(self) -> int:
+        return sum(p["rows"] for p in self.manifest["partitions"].values())
+
+    def dates(self) -> List[date]:
+        return [datetime.strptime(key, "%Y%m%d").date() for key in self.partitions]
+
+    def has_source(self, key: str, signature: str) -> bool:
+        """Indica se um arquivo de origem (com esta assinatura) já foi importado"""
+        info = self.manifest["sources"].get(key)
+        if isinstance(info, dict):
+            info = info["signature"]
+        return info == signature
+
+    def mark_source(self, key: str, signature: str, rows: int = 0,
+                    start: Optional[int] = None, end: Optional[int] = None):
+        """
+        Registra um arquivo de origem importado
+
+        Args:
+            key: Nome do arquivo
+            signature: Tamanho/mtime do arquivo
+            rows: Registros importados dele
+            start, end: Primeiro e último timestamp importados (ns)
+        """
+        self.manifest["sources"][key] = {"signature": signature, "rows": rows,
+                                         "start": start, "end": end}
+        self._save_manifest()
+
+    def sources(self, start: DateLike = None) -> List[str]:
+        """
+        Arquivos de origem importados, opcionalmente só os com dados a partir de `start`
+
+        Entradas de manifests antigos (sem intervalo) sempre são incluídas.
+        """
+        start_ns = _to_ns(start)
+        names = []
+        for key, info in self.manifest["sources"].items():
+            if isinstance(info, dict) and start_ns is not None:
+                if not info["rows"] or info["end"] < start_ns:
+                    continue
+            names.append(key)
+        return names
+
+    def _save_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / (MANIFEST + ".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, self.root / MANIFEST)
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def _define_schema(self, df: pd.DataFrame):
+        columns = {INDEX_COLUMN: "<i8"}
+        for name in df.columns:
+            if name == INDEX_COLUMN:
+                continue
+            series = df[name]
+            if pd.api.types.is_bool_dtype(series):
+                columns[name] = "|i1"
+            elif pd.api.types.is_numeric_dtype(series):
+                columns[name] = series.dtype.newbyteorder("<").str
+            else:
+                columns[name] = "category"
+                self.manifest["categories"][name] = []
+                self._category_index[name] = {}
+        self.manifest["columns"] = columns
+
+    def _encode(self, name: str, series: pd.Series) -> np.ndarray:
+        """Codifica uma coluna texto pelo dicionário (estendido se preciso)"""
+        mapping = self._category_index[name]
+        values = self.manifest["categories"][name]
+        codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+        lookup = np.empty(len(uniques), dtype=CODE_DTYPE)
+        for i, value in enumerate(uniques):
+            value = str(value)
+            code = mapping.get(value)
+            if code is None:
+                code = len(values)
+                mapping[value] = code
+                values.append(value)
+            lookup[i] = code
+        out = np.full(len(codes), -1, dtype=CODE_DTYPE)
+        valid = codes >= 0
+        out[valid] = lookup[codes[valid]]
+        return out
+
+    def append(self, df: pd.DataFrame, timestamp_col: str = INDEX_COLUMN) -> int:
+        """
+        Acrescenta registros ao dataset, distribuindo-os nas partições diárias
+
+        Args:
+            df: Dados com coluna de timestamp (datetime ou parseável)
+            timestamp_col: Nome da coluna de timestamp em `df`
+
+        Returns:
+            Número de registros gravados
+        """
+        if df.empty:
+            return 0
+
+        df = df.rename(columns={timestamp_col: INDEX_COLUMN})
+        ts = pd.to_datetime(df[INDEX_COLUMN], format='mixed', errors='coerce')
+        valid = ts.notna().to_numpy()
+        if not valid.all():
+            logger.warning(f"[TickStore] {int((~valid).sum())} registros com timestamp inválido ignorados")
+            df = df[valid]
+            ts = ts[valid]
+        if df.empty:
+            return 0
+
+        if not self.manifest["columns"]:
+            self._define_schema(df)
+
+        expected = set(self.manifest["columns"]) - {INDEX_COLUMN}
+        missing = expected - set(df.columns)
+        if missing:
+            raise ValueError(f"[TickStore] {self.root}: colunas ausentes {sorted(missing)}")
+
+        arrays = {INDEX_COLUMN: ts.to_numpy(dtype="datetime64[ns]").view("<i8")}
+        for name in expected:
+            dtype = self.manifest["columns"][name]
+            if dtype == "category":
+                arrays[name] = self._encode(name, df[name])
+            else:
+                arrays[name] = df[name].to_numpy().astype(dtype, copy=False)
+
+        index = arrays[INDEX_COLUMN]
+        days = index // NS_PER_DAY
+        order = np.argsort(days, kind="stable")
+        days = days[order]
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(days)]))
+
+        for start, end in zip(starts, ends):
+            rows = order[start:end]
+            key = (np.datetime64(int(days[start]), 'D')).astype(datetime).strftime("%Y%m%d")
+            self._write_partition(key, {name: values[rows] for name, values in arrays.items()})
+
+        self._save_manifest()
+        return len(index)
+
+    def _write_partition(self, key: str, arrays: Dict[str, np.ndarray]):
+        """
+        Acrescenta um bloco a todas as colunas da partição
+
+        O número de linhas no manifest é o commit: cada coluna é cortada no
+        tamanho confirmado antes de escrever (descarta sobras de uma escrita
+        interrompida) e, se alguma falhar, todas voltam a ele.
+        """
+        part_dir = self.root / key
+        part_dir.mkdir(parents=True, exist_ok=True)
+        info = self.manifest["partitions"].get(key)
+        committed = info["rows"] if info else 0
+        sizes = {name: committed * self._column_dtype(name).itemsize for name in arrays}
+        try:
+            for name, values in arrays.items():
+                with open(part_dir / f"{name}.bin", 'ab') as f:
+                    f.truncate(sizes[name])
+                    f.write(np.ascontiguousarray(values).tobytes())
+        except BaseException:
+            for name, size in sizes.items():
+                path = part_dir / f"{name}.bin"
+                if path.exists():
+                    os.truncate(path, size)
+            raise
+
+        index = arrays[INDEX_COLUMN]
+        chunk_sorted = bool(np.all(index[1:] >= index[:-1]))
+        if info is None:
+            info = {"rows": 0, "start": int(index[0]), "end": int(index[-1]), "sorted": chunk_sorted}
+        else:
+            info["sorted"] = info["sorted"] and chunk_sorted and int(index[0]) >= info["end"]
+        info["start"] = min(info["start"], int(index.min()))
+        info["end"] = max(info["end"], int(index.max()))
+        info["rows"] += len(index)
+        self.manifest["partitions"][key] = info
+
+    def finalize(self):
+        """Ordena por timestamp as partições que receberam dados fora de ordem"""
+        for key, info in self.manifest["partitions"].items():
+            if info["sorted"]:
+                continue
+            columns = self._partition_columns(key, self.columns, mmap=False)
+            order = np.argsort(columns[INDEX_COLUMN], kind="stable")
+            for name, values in columns.items():
+                values[order].tofile(self.root / key / f"{name}.bin")
+            info["sorted"] = True
+            logger.info(f"[TickStore] Partição {key} reordenada ({info['rows']:,} registros)")
+        self._save_manifest()
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def _column_dtype(self, name: str) -> np.dtype:
+        dtype = self.manifest["columns"][name]
+        return CODE_DTYPE if dtype == "category" else np.dtype(dtype)
+
+    def _partition_columns(self, key: str, columns: Iterable[str],
+                           mmap: bool = True) -> Dict[str, np.ndarray]:
+        rows = self.manifest["partitions"][key]["rows"]
+        out = {}
+        for name in columns:
+            path = self.root / key / f"{name}.bin"
+            dtype = self._column_dtype(name)
+            if mmap:
+                out[name] = np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+            else:
+                out[name] = np.fromfile(path, dtype=dtype, count=rows)
+        return out
+
+    def read(self, start: DateLike = None, end: DateLike = None,
+             columns: Optional[List[str]] = None, step: int = 1,
+             limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Lê colunas (arrays) de um intervalo [start, end)
+
+        Args:
+            start: Início do intervalo (inclusivo)
+            end: Fim do intervalo (exclusivo)
+            columns: Colunas desejadas (padrão: todas); o índice sempre vem
+            step: Amostragem regular (1 a cada `step` registros)
+            limit: Máximo de registros retornados
+
+        Returns:
+            Dict coluna -> array. Com uma única partição os arrays são views
+            do arquivo mapeado; categorias vêm como códigos int32.
+        """
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+        columns = self.columns if columns is None else columns
+        names = [INDEX_COLUMN] + [c for c in columns if c != INDEX_COLUMN]
+        step = max(int(step), 1)
+
+        pieces: Dict[str, List[np.ndarray]] = {name: [] for name in names}
+        taken = 0
+        offset = 0  # mantém a amostragem regular entre partições
+
+        for key in self.partitions:
+            info = self.manifest["partitions"][key]
+            if start_ns is not None and info["end"] < start_ns:
+                continue
+            if end_ns is not None and info["start"] >= end_ns:
+                break
+            if not info["sorted"]:
+                raise RuntimeError(f"[TickStore] Partição {key} fora de ordem; execute finalize()")
+
+            part = self._partition_columns(key, names)
+            index = part[INDEX_COLUMN]
+            lo = 0 if start_ns is None else int(np.searchsorted(index, start_ns, side='left'))
+            hi = len(index) if end_ns is None else int(np.searchsorted(index, end_ns, side='left'))
+            if hi <= lo:
+                continue
+
+            first = lo + (-offset % step)
+            count = max(0, (hi - first + step - 1) // step)
+            offset += hi - lo
+            if limit is not None:
+                count = min(count, limit - taken)
+            if count <= 0:
+                if limit is not None and taken >= limit:
+                    break
+                continue
+
+            sl = slice(first, first + count * step, step)
+            for name in names:
+                pieces[name].append(part[name][sl])
+            taken += count
+            if limit is not None and taken >= limit:
+                break
+
+        out = {}
+        for name in names:
+            chunks = pieces[name]
+            if not chunks:
+                out[name] = np.empty(0, dtype=self._column_dtype(name) if name != INDEX_COLUMN else "<i8")
+            elif len(chunks) == 1:
+                out[name] = chunks[0]
+            else:
+                out[name] = np.concatenate(chunks)
+        return out
+
+    def to_dataframe(self, start: DateLike = None, end: DateLike = None,
+                     columns: Optional[List[str]] = None, step: int = 1,
+                     limit: Optional[int] = None) -> pd.DataFrame:
+        """Mesmo que read(), decodificando timestamp e categorias para DataFrame"""
+        arrays = self.read(start, end, columns, step, limit)
+        data = {}
+        for name, values in arrays.items():
+            if name == INDEX_COLUMN:
+                data[name] = np.asarray(values).view("datetime64[ns]")
+            elif self.manifest["columns"][name] == "category":
+                data[name] = pd.Categorical.from_codes(
+                    np.asarray(values), categories=self.manifest["categories"][name]
+                )
+            else:
+                data[name] = np.asarray(values)
+        return pd.DataFrame(data)
+
+    def __repr__(self) -> str:
+        return f"TickStore(root='{self.root}', partitions={len(self.manifest['partitions'])}, rows={len(self):,})"
+
+
+# ----------------------------------------------------------------------
+# Conversores
+# ----------------------------------------------------------------------
+
+def _source_signature(path: Path) -> str:
+    stat = path.stat()
+    return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def convert_wdo_history(csv_path: Union[str, Path], root: Union[str, Path],
+                        chunksize: int = 2_000_000,
+                        progress: Optional[Callable[[int], None]] = None) -> TickStore:
+    """
+    Converte o export histórico (<ticker>,<date>,<time>,...) em um TickStore
+
+    Executar uma única vez; chamadas seguintes com o mesmo arquivo (mesmo
+    tamanho/mtime) não fazem nada.
+
+    Args:
+        csv_path: CSV exportado (ex: WDOFUT_BMF_T.csv)
+        root: Diretório do dataset
+        chunksize: Linhas por bloco de leitura
+        progress: Callback opcional com o total de linhas convertidas
+    """
+    csv_path = Path(csv_path)
+    store = TickStore(root)
+    signature = _source_signature(csv_path)
+    if store.has_source(csv_path.name, signature):
+        logger.info(f"[TickStore] {csv_path.name} já convertido em {root}")
+        return store
+    if store.exists():
+        raise ValueError(f"[TickStore] {root} já contém dados; use um diretório novo")
+
+    total = 0
+    reader = pd.read_csv(csv_path, names=WDO_COLUMNS, skiprows=1,
+                         dtype=WDO_DTYPES, chunksize=chunksize)
+    for chunk in reader:
+        seconds = chunk['time'].to_numpy(dtype=np.int64)
+        seconds = (seconds // 10000) * 3600 + (seconds // 100 % 100) * 60 + seconds % 100
+        day = pd.to_datetime(chunk['date'].astype(str), format='%Y%m%d').to_numpy()
+        chunk.insert(0, INDEX_COLUMN, day + (seconds * 1_000_000_000).astype('timedelta64[ns]'))
+
+        total += store.append(chunk)
+        if progress:
+            progress(total)
+        else:
+            logger.info(f"[TickStore] {total:,} linhas convertidas")
+
+    store.finalize()
+    parts = store.manifest["partitions"].values()
+    store.mark_source(csv_path.name, signature, total,
+                      min((p["start"] for p in parts), default=None),
+                      max((p["end"] for p in parts), default=None))
+    return store
+
+
+def _dataset_name(path: Path) -> str:
+    """'book_data_20250828_101500.csv' -> 'book'"""
+    stem = path.stem
+    return stem.split('_data_')[0] if '_data_' in stem else stem.split('_')[0]
+
+
+def ingest_recorded_data(data_dir: Union[str, Path] = "data/book_tick_data",
+                         store_dir: Optional[Union[str, Path]] = None) -> Dict[str, TickStore]:
+    """
+    Importa, incrementalmente, os arquivos coletados (CSV ou .qtr) para
+    um TickStore por tipo (book, tick, ...)
+
+    Arquivos já importados (mesmo tamanho/mtime) são ignorados, então pode
+    ser chamado antes de cada re-treinamento.
+
+    Args:
+        data_dir: Diretório com os arquivos coletados
+        store_dir: Raiz dos datasets (padrão: <data_dir>/store)
+
+    Returns:
+        Dict nome do dataset -> TickStore
+    """
+    from .tick_recorder import EXTENSION, read_records, records_to_dataframe
+
+    data_dir = Path(data_dir)
+    store_dir = Path(store_dir) if store_dir else data_dir / "store"
+    stores: Dict[str, TickStore] = {}
+
+    files = sorted(list(data_dir.glob("*.csv")) + list(data_dir.glob(f"*{EXTENSION}")))
+    for path in files:
+        name = _dataset_name(path)
+        store = stores.get(name) or TickStore(store_dir / name)
+        stores[name] = store
+
+        signature = _source_signature(path)
+        if store.has_source(path.name, signature):
+            continue
+        try:
+            if path.suffix == EXTENSION:
+                df = records_to_dataframe(read_records(path, mmap=False))
+            else:
+                df = pd.read_csv(path)
+            rows, first, last = 0, None, None
+            if INDEX_COLUMN in df.columns and len(df):
+                df[INDEX_COLUMN] = pd.to_datetime(df[INDEX_COLUMN], format='mixed', errors='coerce')
+                rows = store.append(df)
+                if rows:
+                    first, last = _to_ns(df[INDEX_COLUMN].min()), _to_ns(df[INDEX_COLUMN].max())
+            store.mark_source(path.name, signature, rows, first, last)
+        except Exception as e:
+            logger.warning(f"[TickStore] Erro ao importar {path.name}: {e}")
+
+    for store in stores.values():
+        store.finalize()
+    return stores
+
+
+def main():
+    """Conversão única do histórico: python -m src.market_data.tick_store <csv> <destino>"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Converte dados de tick para TickStore")
+    parser.add_argument("source", help="CSV histórico (WDOFUT_BMF_T.csv) ou diretório de coleta")
+    parser.add_argument("dest", nargs="?", default="data/tick_store/wdo", help="Diretório do dataset")
+    parser.add_argument("--chunksize", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    source = Path(args.source)
+    if source.is_dir():
+        for name, store in ingest_recorded_data(source, args.dest).items():
+            print(f"[OK] {name}: {store}")
+    else:
+        store = convert_wdo_history(source, args.dest, chunksize=args.chunksize)
+        print(f"[OK] {store}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Rastreamento de latência do caminho quente
+Mede cada estágio do ciclo de decisão (callback -> features -> ML ->
+consenso -> ordem) com timestamps monotônicos em ns gravados num ring
+preallocado, e a latência total do último tick até a ordem
+"""
+
+import os
+import time
+import threading
+import itertools
+import logging
+import numpy as np
+from typing import Dict, List, Optional
+
+logger = logging.getLogger('LatencyTracer')
+
+# Estágios registrados na criação (outros são criados sob demanda)
+DEFAULT_STAGES = (
+    'ingress',            # Callback da DLL -> fim do dispatch do lote
+    'features',           # _calculate_feature_vector
+    'ml_predict',         # HybridMLPredictor.predict_vector
+    'consensus',          # HMARLAgentsRealtime.get_consensus
+    'order',              # execute_trade_with_oco
+    'decision',           # trading_step completo
+    'tick_to_decision',   # Último tick -> fim do ciclo sem ordem
+    'tick_to_order',      # Último tick -> ordem enviada
+)
+
+
+class _Span:
+    """Context manager de um estágio (sem alocação de closures)"""
+
+    __slots__ = ('tracer', 'stage_id', 'trace_id', 'start')
+
+    def __init__(self, tracer: "LatencyTracer", stage_id: int, trace_id: int):
+        self.tracer = tracer
+        self.stage_id = stage_id
+        self.trace_id = trace_id
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._write(self.trace_id, self.stage_id, self.start, time.perf_counter_ns())
+        return False
+
+
+class _NullSpan:
+    """Span descartado (tracer desligado ou ciclo fora da amostragem)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class LatencyTracer:
+    """
+    Tracer de spans com ring preallocado
+
+    Cada span ocupa uma linha (trace, estágio, início, duração) em arrays
+    NumPy de tamanho fixo; o índice vem de um itertools.count (atômico sob
+    o GIL), então vários threads gravam sem lock e o registro mais antigo é
+    sobrescrito quando o ring enche.
+
+    Um trace agrupa os spans de um ciclo de decisão no thread que chamou
+    start_trace(); a origem do trace é o horário do último tick recebido
+    (mark_tick), o que permite medir tick -> ordem. Só 1 a cada
+    `sample_every` ciclos é rastreado; spans fora de um ciclo (ex.: o
+    dispatch do ingresso) são sempre gravados.
+    """
+
+    def __init__(self, capacity: int = 1 << 16, sample_every: int = 1, enabled: bool = True):
+        """
+        Args:
+            capacity: Spans mantidos no ring (arredondado para potência de 2)
+            sample_every: Rastrear 1 a cada N ciclos de decisão
+            enabled: Desligado, todas as chamadas viram no-op
+        """
+        self.capacity = 1 << max(0, int(capacity) - 1).bit_length()
+        self._mask = self.capacity - 1
+        self.sample_every = max(1, int(sample_every))
+        self.enabled = enabled
+
+        self._trace = np.zeros(self.capacity, dtype=np.int64)
+        self._stage = np.full(self.capacity, -1, dtype=np.int16)
+        self._start = np.zeros(self.capacity, dtype=np.int64)
+        self._duration = np.zeros(self.capacity, dtype=np.int64)
+        self._slots = itertools.count()
+        self._written = 0
+
+        self.stages: Dict[str, int] = {}
+        self.stage_names: List[str] = []
+        for stage in DEFAULT_STAGES:
+            self.stage_id(stage)
+
+        self._cycles = itertools.count(1)
+        self._local = threading.local()
+        self.last_tick_ns = 0
+
+    def stage_id(self, stage: str) -> int:
+        """Id numérico do estágio (registra se novo)"""
+        stage_id = self.stages.get(stage)
+        if stage_id is None:
+            stage_id = self.stages.setdefault(stage, len(self.stage_names))
+            if stage_id == len(self.stage_names):
+                self.stage_names.append(stage)
+        return stage_id
+
+    def mark_tick(self, ns: Optional[int] = None):
+        """Registra o horário (perf_counter_ns) do tick mais recente"""
+        self.last_tick_ns = ns if ns is not None else time.perf_counter_ns()
+
+    def start_trace(self, origin_ns: Optional[int] = None) -> int:
+        """
+        Abre o trace de um ciclo de decisão no thread atual
+
+        Args:
+            origin_ns: Origem do trace (padrão: último tick)
+
+        Returns:
+            Id do trace, ou 0 se o ciclo não foi amostrado
+        """
+        local = self._local
+        cycle = next(self._cycles)
+        if not self.enabled or cycle % self.sample_every:
+            local.trace_id = 0
+            return 0
+        local.trace_id = cycle
+        local.origin_ns = origin_ns if origin_ns is not None else self.last_tick_ns
+        return cycle
+
+    def finish_trace(self, stage: str = 'tick_to_decision'):
+        """
+        Fecha o trace do thread, gravando origem -> agora como `stage`
+        """
+        local = self._local
+        trace_id = getattr(local, 'trace_id', None)
+        local.trace_id = None
+        if trace_id and local.origin_ns:
+            self._write(trace_id, self.stage_id(stage), local.origin_ns, time.perf_counter_ns())
+
+    def span(self, stage: str):
+        """
+        Context manager que mede um estágio
+
+        Dentro de um trace não amostrado, devolve um span nulo.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        trace_id = getattr(self._local, 'trace_id', None)
+        if trace_id == 0:
+            return _NULL_SPAN
+        return _Span(self, self.stage_id(stage), trace_id or 0)
+
+    def record(self, stage: str, start_ns: int, end_ns: Optional[int] = None):
+        """Grava um span já medido (ex.: horário de chegada do callback)"""
+        if self.enabled:
+            self._write(0, self.stage_id(stage), start_ns,
+                        end_ns if end_ns is not None else time.perf_counter_ns())
+
+    def _write(self, trace_id: int, stage_id: int, start_ns: int, end_ns: int):
+        slot = next(self._slots)
+        index = slot & self._mask
+        self._trace[index] = trace_id
+        self._stage[index] = stage_id
+        self._start[index] = start_ns
+        self._duration[index] = end_ns - start_ns
+        if slot >= self._written:
+            self._written = slot + 1  # Aproximado com vários threads gravando
+
+    def reset(self):
+        """Descarta os spans gravados"""
+        self._stage.fill(-1)
+        self._slots = itertools.count()
+        self._written = 0
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        Latência por estágio sobre os spans no ring
+
+        Returns:
+            {estágio: {'calls', 'mean_us', 'p50_us', 'p95_us', 'p99_us', 'max_us'}}
+        """
+        n = min(self._written, self.capacity)
+        stages = self._stage[:n].copy()
+        durations = self._duration[:n].astype(np.float64) / 1000.0  # us
+
+        result = {}
+        for stage_id, name in enumerate(self.stage_names):
+            values = durations[stages == stage_id]
+            if len(values) == 0:
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result[name] = {
+                'calls': int(len(values)),
+                'mean_us': float(values.mean()),
+                'p50_us': float(p50),
+                'p95_us': float(p95),
+                'p99_us': float(p99),
+                'max_us': float(values.max()),
+            }
+        return result
+
+    def get_stats(self) -> Dict:
+        """Estatísticas do ring"""
+        return {
+            'enabled': self.enabled,
+            'capacity': self.capacity,
+            'spans': self._written,
+            'overwritten': max(0, self._written - self.capacity),
+            'sample_every': self.sample_every
+        }
+
+
+def format_latency_report(report: Dict[str, Dict[str, float]]) -> str:
+    """Tabela de latência por estágio (console/log)"""
+    lines = [f"{'Estágio':<18}{'Spans':>9}{'Média(us)':>11}{'p50':>10}{'p99':>10}{'Máx':>11}",
+             "-" * 69]
+    for stage, s in report.items():
+        lines.append(f"{stage:<18}{s['calls']:>9,}{s['mean_us']:>11.1f}"
+                     f"{s['p50_us']:>10.1f}{s['p99_us']:>10.1f}{s['max_us']:>11.1f}")
+    return "\n".join(lines)
+
+
+_tracer: Optional[LatencyTracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> LatencyTracer:
+    """
+    Tracer singleton do processo
+
+    LATENCY_TRACE=0 desliga; LATENCY_TRACE_SAMPLE=N rastreia 1 a cada N
+    ciclos de decisão.
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = LatencyTracer(
+                    sample_every=int(os.getenv('LATENCY_TRACE_SAMPLE', '1')),
+                    enabled=os.getenv('LATENCY_TRACE', '1') == '1')
+    return _tracer
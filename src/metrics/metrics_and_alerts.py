@@ -14,6 +14,11 @@ from collections import deque
 import numpy as np
 import logging
 
+try:
+    from src.metrics.quantile_sketch import WindowedQuantileSketch
+except ImportError:
+    from metrics.quantile_sketch import WindowedQuantileSketch
+
 # Prometheus metrics (será instalado opcionalmente)
 try:
     from prometheus_client import Counter, Gauge, Histogram, Summary, start_http_server
@@ -63,21 +68,41 @@ class Alert:
 
 
 class MetricsCollector:
-    """Coletor de métricas do sistema"""
-    
-    def __init__(self, namespace: str = "trading_system"):
+    """
+    Coletor de métricas do sistema
+
+    Cada métrica é protegida por uma das `stripes` locks (escolhida pelo
+    hash do nome), então registros de métricas diferentes não disputam o
+    mesmo lock. Histogramas alimentam um sketch de quantis em janela
+    deslizante (registro O(1)); média e percentis são calculados apenas
+    na leitura.
+    """
+    
+    HISTOGRAM_STATS = ('mean', 'p50', 'p95', 'p99')
+    
+    def __init__(self, namespace: str = "trading_system", stripes: int = 16,
+                 histogram_window: float = 300.0):
+        """
+        Args:
+            namespace: Prefixo das métricas Prometheus
+            stripes: Número de locks para as métricas
+            histogram_window: Janela (s) dos sketches de histograma
+        """
         self.namespace = namespace
         self.metrics = {}
         self.metric_history = {}
-        self.lock = threading.Lock()
+        self.histograms: Dict[str, WindowedQuantileSketch] = {}
+        self.histogram_window = histogram_window
+        self.lock = threading.Lock()  # Apenas criação de métricas novas
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        
+        # Buffer de métricas
+        self.buffer_size = 1000
         
         # Inicializar Prometheus se disponível
         if PROMETHEUS_AVAILABLE:
             self._init_prometheus_metrics()
         
-        # Buffer de métricas
-        self.buffer_size = 1000
-        
     def _init_prometheus_metrics(self):
         """Inicializa métricas Prometheus"""
         # Contadores
@@ -126,65 +151,94 @@ class MetricsCollector:
             'PnL por trade'
         )
     
+    def _stripe(self, name: str) -> threading.Lock:
+        """Lock responsável pela métrica"""
+        return self._stripes[hash(name) % len(self._stripes)]
+    
+    def _history(self, name: str) -> deque:
+        """Histórico da métrica (criado sob o lock de registro)"""
+        history = self.metric_history.get(name)
+        if history is None:
+            with self.lock:
+                history = self.metric_history.setdefault(name, deque(maxlen=self.buffer_size))
+        return history
+    
     def record_counter(self, name: str, value: float = 1, labels: Dict = None):
         """Registra métrica tipo contador"""
-        with self.lock:
+        history = self._history(name)
+        with self._stripe(name):
             # Atualizar métrica interna
-            if name not in self.metrics:
-                self.metrics[name] = 0
-            self.metrics[name] += value
+            total = self.metrics.get(name, 0) + value
+            self.metrics[name] = total
             
             # Adicionar ao histórico
-            if name not in self.metric_history:
-                self.metric_history[name] = deque(maxlen=self.buffer_size)
-            self.metric_history[name].append({
+            history.append({
                 'timestamp': datetime.now(),
-                'value': self.metrics[name]
+                'value': total
             })
-            
-            # Prometheus se disponível
-            if PROMETHEUS_AVAILABLE:
-                self._update_prometheus_counter(name, value, labels)
+        
+        # Prometheus se disponível
+        if PROMETHEUS_AVAILABLE:
+            self._update_prometheus_counter(name, value, labels)
     
     def record_gauge(self, name: str, value: float):
         """Registra métrica tipo gauge"""
-        with self.lock:
+        history = self._history(name)
+        with self._stripe(name):
             # Atualizar métrica interna
             self.metrics[name] = value
             
             # Adicionar ao histórico
-            if name not in self.metric_history:
-                self.metric_history[name] = deque(maxlen=self.buffer_size)
-            self.metric_history[name].append({
+            history.append({
                 'timestamp': datetime.now(),
                 'value': value
             })
-            
-            # Prometheus se disponível
-            if PROMETHEUS_AVAILABLE:
-                self._update_prometheus_gauge(name, value)
+        
+        # Prometheus se disponível
+        if PROMETHEUS_AVAILABLE:
+            self._update_prometheus_gauge(name, value)
     
     def record_histogram(self, name: str, value: float):
-        """Registra métrica tipo histograma"""
-        with self.lock:
-            # Adicionar ao histórico
-            if name not in self.metric_history:
-                self.metric_history[name] = deque(maxlen=self.buffer_size)
-            self.metric_history[name].append({
+        """Registra métrica tipo histograma (tempo constante)"""
+        sketch = self.histograms.get(name)
+        if sketch is None:
+            with self.lock:
+                sketch = self.histograms.setdefault(
+                    name, WindowedQuantileSketch(self.histogram_window))
+        history = self._history(name)
+        
+        with self._stripe(name):
+            sketch.add(value)
+            history.append({
                 'timestamp': datetime.now(),
                 'value': value
             })
-            
-            # Calcular estatísticas
-            values = [h['value'] for h in self.metric_history[name]]
-            self.metrics[f"{name}_mean"] = np.mean(values)
-            self.metrics[f"{name}_p50"] = np.percentile(values, 50)
-            self.metrics[f"{name}_p95"] = np.percentile(values, 95)
-            self.metrics[f"{name}_p99"] = np.percentile(values, 99)
-            
-            # Prometheus se disponível
-            if PROMETHEUS_AVAILABLE:
-                self._update_prometheus_histogram(name, value)
+        
+        # Prometheus se disponível
+        if PROMETHEUS_AVAILABLE:
+            self._update_prometheus_histogram(name, value)
+    
+    def get_histogram_stats(self, name: str) -> Dict[str, float]:
+        """
+        Estatísticas de um histograma calculadas a partir do sketch
+        
+        Returns:
+            Dict {'<nome>_mean': ..., '<nome>_p50': ..., ...} (vazio se não existe)
+        """
+        sketch = self.histograms.get(name)
+        if sketch is None:
+            return {}
+        with self._stripe(name):
+            merged = sketch.snapshot()
+        if merged.count == 0:
+            return {}
+        
+        return {
+            f"{name}_mean": merged.mean,
+            f"{name}_p50": merged.quantile(0.50),
+            f"{name}_p95": merged.quantile(0.95),
+            f"{name}_p99": merged.quantile(0.99)
+        }
     
     def _update_prometheus_counter(self, name: str, value: float, labels: Dict):
         """Atualiza contador Prometheus"""
@@ -212,46 +266,53 @@ class MetricsCollector:
             self.prom_prediction_latency.observe(value)
     
     def get_metric(self, name: str) -> Optional[float]:
-        """Obtém valor atual de uma métrica"""
-        with self.lock:
-            return self.metrics.get(name)
+        """Obtém valor atual de uma métrica (inclui '<histograma>_p99' etc.)"""
+        value = self.metrics.get(name)
+        if value is None and '_' in name:
+            base_name, stat_type = name.rsplit('_', 1)
+            if stat_type in self.HISTOGRAM_STATS:
+                value = self.get_histogram_stats(base_name).get(name)
+        return value
     
     def get_metric_history(self, name: str, n: int = 100) -> List[Dict]:
         """Obtém histórico de uma métrica"""
-        with self.lock:
-            if name in self.metric_history:
-                return list(self.metric_history[name])[-n:]
+        history = self.metric_history.get(name)
+        if history is None:
             return []
+        with self._stripe(name):
+            return list(history)[-n:]
     
     def get_all_metrics(self) -> Dict:
         """Obtém todas as métricas atuais"""
-        with self.lock:
-            return self.metrics.copy()
+        metrics = self.metrics.copy()
+        for name in list(self.histograms):
+            metrics.update(self.get_histogram_stats(name))
+        return metrics
     
     def get_metrics_summary(self) -> Dict:
         """Obtém resumo das métricas"""
-        with self.lock:
-            summary = {
-                'timestamp': datetime.now().isoformat(),
-                'counters': {},
-                'gauges': {},
-                'histograms': {}
-            }
-            
-            for name, value in self.metrics.items():
-                if '_mean' in name or '_p50' in name or '_p95' in name or '_p99' in name:
-                    base_name = name.rsplit('_', 1)[0]
-                    if base_name not in summary['histograms']:
-                        summary['histograms'][base_name] = {}
-                    stat_type = name.rsplit('_', 1)[1]
-                    summary['histograms'][base_name][stat_type] = value
-                elif isinstance(value, (int, float)):
-                    if name in ['active_position', 'current_pnl', 'win_rate']:
-                        summary['gauges'][name] = value
-                    else:
-                        summary['counters'][name] = value
-            
-            return summary
+        summary = {
+            'timestamp': datetime.now().isoformat(),
+            'counters': {},
+            'gauges': {},
+            'histograms': {}
+        }
+        
+        for name in list(self.histograms):
+            stats = self.get_histogram_stats(name)
+            if stats:
+                summary['histograms'][name] = {
+                    key.rsplit('_', 1)[1]: value for key, value in stats.items()
+                }
+        
+        for name, value in self.metrics.copy().items():
+            if isinstance(value, (int, float)):
+                if name in ['active_position', 'current_pnl', 'win_rate']:
+                    summary['gauges'][name] = value
+                else:
+                    summary['counters'][name] = value
+        
+        return summary
 
 
 class AlertManager:
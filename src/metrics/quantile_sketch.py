@@ -0,0 +1,168 @@
+"""
+Sketches de quantis em streaming para métricas de latência
+Histograma log-linear (estilo DDSketch/HDR): registro O(1) com erro
+relativo limitado, sem guardar as observações
+"""
+
+import math
+import time
+from typing import Dict, Optional
+
+
+class QuantileSketch:
+    """
+    Histograma em buckets logarítmicos com erro relativo garantido
+
+    O bucket i cobre (gamma^(i-1), gamma^i] com gamma = (1+a)/(1-a); qualquer
+    quantil é devolvido com erro relativo <= a. Valores negativos usam
+    buckets espelhados e zeros um contador próprio. Buckets são esparsos
+    (dict), então a memória cresce com a faixa dinâmica, não com o volume.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-9):
+        """
+        Args:
+            relative_accuracy: Erro relativo máximo dos quantis (0 < a < 1)
+            min_value: Valores absolutos abaixo disso contam como zero
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy deve estar entre 0 e 1")
+
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        """Registra uma observação (tempo constante)"""
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        if value > self.min_value:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.positive[key] = self.positive.get(key, 0) + 1
+        elif value < -self.min_value:
+            key = math.ceil(math.log(-value) / self._log_gamma)
+            self.negative[key] = self.negative.get(key, 0) + 1
+        else:
+            self.zero_count += 1
+
+    def merge(self, other: "QuantileSketch"):
+        """Soma as observações de outro sketch (mesma precisão)"""
+        if other.gamma != self.gamma:
+            raise ValueError("Sketches com precisões diferentes")
+        for key, n in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + n
+        for key, n in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> "QuantileSketch":
+        sketch = QuantileSketch(self.relative_accuracy, self.min_value)
+        sketch.merge(self)
+        return sketch
+
+    def _value(self, key: int) -> float:
+        # Ponto do bucket com erro relativo simétrico
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Quantil aproximado
+
+        Args:
+            q: Quantil entre 0 e 1
+
+        Returns:
+            Valor estimado ou None se vazio
+        """
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = 0
+
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._value(key), self.min)
+
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+
+class WindowedQuantileSketch:
+    """
+    Sketch com janela deslizante aproximada
+
+    Mantém o sketch da janela atual e o da anterior; quantis consideram as
+    duas, então refletem entre `window` e 2*`window` segundos recentes.
+    Latências antigas deixam de mascarar degradações novas.
+    """
+
+    def __init__(self, window: float = 300.0, relative_accuracy: float = 0.01):
+        """
+        Args:
+            window: Duração (s) de cada janela
+            relative_accuracy: Erro relativo dos quantis
+        """
+        self.window = window
+        self.relative_accuracy = relative_accuracy
+        self.current = QuantileSketch(relative_accuracy)
+        self.previous: Optional[QuantileSketch] = None
+        self._window_start = time.monotonic()
+        self.total_count = 0
+
+    def _rotate(self, now: float):
+        elapsed = now - self._window_start
+        if elapsed < self.window:
+            return
+        # Mais de duas janelas sem dados: a anterior também expirou
+        self.previous = self.current if elapsed < 2 * self.window else None
+        self.current = QuantileSketch(self.relative_accuracy)
+        self._window_start = now
+
+    def add(self, value: float):
+        """Registra uma observação"""
+        self._rotate(time.monotonic())
+        self.current.add(value)
+        self.total_count += 1
+
+    def snapshot(self) -> QuantileSketch:
+        """Sketch combinado das janelas ativas"""
+        self._rotate(time.monotonic())
+        merged = self.current.copy()
+        if self.previous is not None:
+            merged.merge(self.previous)
+        return merged
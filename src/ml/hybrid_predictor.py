@@ -7,39 +7,96 @@ import numpy as np
 import time
 
 import pandas as pd
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 import logging
-import joblib
+import threading
+from functools import wraps
+from dataclasses import dataclass, field
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
+from src.features.feature_schema import FeatureSchema, FeatureBinding
+from src.ml.model_registry import ModelRegistry, ModelStack, load_model_dir
+
 # Fix numpy compatibility issue
 np.random.BitGenerator = np.random.bit_generator.BitGenerator
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class _ActiveModels:
+    """Versão carregada + layout compilado; trocada inteira, nunca alterada"""
+    stack: ModelStack
+    feature_schema: FeatureSchema
+    micro_schema: FeatureSchema
+    micro_binding: FeatureBinding
+    context_row: np.ndarray
+    micro_row: np.ndarray
+    use_fallback: bool
+    # Bindings de predict_batch por ordem de colunas (compilados sob demanda)
+    batch_bindings: Dict[Tuple[str, ...], FeatureBinding] = field(default_factory=dict)
+
+
+def _pin_models(method):
+    """
+    Fixa a versão ativa durante a chamada
+
+    Todas as leituras de self.models/self.scalers/schemas dentro da chamada
+    (inclusive em métodos auxiliares) veem a mesma versão, mesmo que uma
+    troca aconteça no meio da predição.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        local = self._local
+        if getattr(local, 'active', None) is not None:
+            return method(self, *args, **kwargs)
+        local.active = self._active
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            local.active = None
+    return wrapper
+
+
 class HybridMLPredictor:
     """Sistema de predição ML híbrido de 3 camadas"""
     
-    def __init__(self, models_dir: str = "models/hybrid"):
+    def __init__(self, models_dir: str = "models/hybrid",
+                 registry: Optional[Union[str, ModelRegistry]] = None,
+                 preload: bool = False):
         """
         Inicializa o preditor híbrido
         
         Args:
-            models_dir: Diretório com os modelos
+            models_dir: Diretório com os modelos (usado sem registro ou
+                        enquanto o registro não tem versão ativa)
+            registry: ModelRegistry (ou diretório dele) com versões de modelos
+            preload: Iniciar a carga e o aquecimento dos modelos em
+                     background já na inicialização. Uma predição feita antes
+                     de a carga terminar espera por ela (como a carga
+                     síncrona sob demanda quando False)
         """
         self.models_dir = Path(models_dir)
-        self.models = {}
-        self.scalers = {}
+        if isinstance(registry, (str, Path)):
+            registry = ModelRegistry(registry)
+        self.registry = registry
         self.is_loaded = False
         
+        # Versão ativa: um único ponteiro trocado atomicamente
+        self._local = threading.local()
+        self._swap_lock = threading.Lock()
+        self._loader: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[Future] = None
+        
         # Configurações
         self.confidence_threshold = 0.6
         self.signal_threshold = 0.3
         
         # Features esperadas por camada (baseado no treinamento real)
-        self.context_features = [
+        self.default_context_features = [
             # Features treinadas com dados reais (16 features)
             "returns_1", "returns_5", "returns_10", "returns_20",
             "volatility_10", "volatility_20", "volatility_50",
@@ -60,93 +117,189 @@ class HybridMLPredictor:
             "bid_pressure", "ask_pressure", "book_imbalance"
         ]
         
-        logger.info(f"HybridMLPredictor inicializado - Dir: {self.models_dir}")
+ 
+        # Layout compilado dos vetores de entrada (ver _compile_feature_schemas)
+        self._input_lock = threading.Lock()
+        empty = ModelStack(version='none', models={}, scalers={}, models_dir=self.models_dir)
+        self._active = self._compile_feature_schemas(empty)
         
+        logger.info(f"HybridMLPredictor inicializado - Dir: {self.models_dir}")
+        if preload:
+            self.preload()
+    
+    # ------------------------------------------------------------------
+    # Versão ativa (leituras sempre via ponteiro, fixado por _pin_models)
+    # ------------------------------------------------------------------
+    
+    def _current(self) -> _ActiveModels:
+        return getattr(self._local, 'active', None) or self._active
+    
+    @property
+    def models(self) -> Dict[str, Any]:
+        return self._current().stack.models
+    
+    @property
+    def scalers(self) -> Dict[str, Any]:
+        return self._current().stack.scalers
+    
+    @property
+    def model_version(self) -> str:
+        return self._current().stack.version
+    
+    @property
+    def use_fallback(self) -> bool:
+        return self._current().use_fallback
+    
+    @property
+    def feature_schema(self) -> FeatureSchema:
+        return self._current().feature_schema
+    
+    @property
+    def micro_schema(self) -> FeatureSchema:
+        return self._current().micro_schema
+    
+    @property
+    def _micro_binding(self) -> FeatureBinding:
+        return self._current().micro_binding
+    
+    @property
+    def _context_row(self) -> np.ndarray:
+        return self._current().context_row
+    
+    @property
+    def _micro_row(self) -> np.ndarray:
+        return self._current().micro_row
+    
+    @property
+    def context_features(self) -> List[str]:
+        return list(self._current().feature_schema.names)
+    
     def load_models(self) -> bool:
-        """Carrega todos os modelos e scalers"""
-        try:
-            models_loaded = 0
-            
-            # Try to load models with compatibility workaround
-            import sys
-            import io
-            old_stderr = sys.stderr
-            sys.stderr = io.StringIO()  # Suppress numpy warnings
-            
+        """
+        Carrega, aquece e ativa os modelos (bloqueante)
+        
+        Se já há uma carga em background, apenas espera por ela.
+        """
+        pending = self._pending
+        if pending is not None:
             try:
-                # Camada 1: Contexto
-                context_dir = self.models_dir / "context"
-                if context_dir.exists():
-                    for model_file in context_dir.glob("*.pkl"):
-                        try:
-                            model_name = f"context_{model_file.stem}"
-                            self.models[model_name] = joblib.load(model_file)
-                            models_loaded += 1
-                            logger.debug(f"Modelo carregado: {model_name}")
-                        except Exception as e:
-                            logger.debug(f"Falha ao carregar {model_file.stem}: {e}")
-                
-                # Camada 2: Microestrutura
-                micro_dir = self.models_dir / "microstructure"
-                if micro_dir.exists():
-                    for model_file in micro_dir.glob("*.pkl"):
-                        try:
-                            model_name = f"micro_{model_file.stem}"
-                            self.models[model_name] = joblib.load(model_file)
-                            models_loaded += 1
-                            logger.debug(f"Modelo carregado: {model_name}")
-                        except Exception as e:
-                            logger.debug(f"Falha ao carregar {model_file.stem}: {e}")
-                
-                # Camada 3: Meta-Learner
-                meta_dir = self.models_dir / "meta_learner"
-                if meta_dir.exists():
-                    for model_file in meta_dir.glob("*.pkl"):
-                        try:
-                            model_name = f"meta_{model_file.stem}"
-                            self.models[model_name] = joblib.load(model_file)
-                            models_loaded += 1
-                            logger.debug(f"Modelo carregado: {model_name}")
-                        except Exception as e:
-                            logger.debug(f"Falha ao carregar {model_file.stem}: {e}")
-                
-                # Scalers
-                try:
-                    if (self.models_dir / "scaler_context.pkl").exists():
-                        self.scalers['context'] = joblib.load(self.models_dir / "scaler_context.pkl")
-                        logger.debug("Scaler de contexto carregado")
-                except:
-                    pass
-                
-                try:
-                    if (self.models_dir / "scaler_microstructure.pkl").exists():
-                        self.scalers['microstructure'] = joblib.load(self.models_dir / "scaler_microstructure.pkl")
-                        logger.debug("Scaler de microestrutura carregado")
-                except:
-                    pass
-                    
-            finally:
-                sys.stderr = old_stderr  # Restore stderr
-            
-            self.is_loaded = models_loaded > 0
-            
+                pending.result()
+            except Exception as e:
+                logger.error(f"Erro ao carregar modelos: {e}")
             if self.is_loaded:
-                logger.info(f"[OK] {models_loaded} modelos carregados com sucesso")
-            else:
-                logger.warning("Nenhum modelo encontrado - usando fallback baseado em features")
-                # Usar modo fallback sem modelos treinados
-                self.is_loaded = True  # Permitir uso do sistema mesmo sem modelos
-                self.use_fallback = True
-            
-            return self.is_loaded
-            
+                if getattr(self._local, 'active', None) is not None:
+                    self._local.active = self._active
+                return True
+        
+        try:
+            self._activate(self._prepare_version())
         except Exception as e:
             logger.error(f"Erro ao carregar modelos: {e}")
             # Usar modo fallback
+            empty = ModelStack(version='fallback', models={}, scalers={},
+                               models_dir=self.models_dir)
+            state = self._compile_feature_schemas(empty)
+            state.use_fallback = True
+            self._activate(state)
+        return True
+    
+    def preload(self, version: Optional[str] = None, activate: bool = True) -> Future:
+        """
+        Carrega e aquece uma versão em background
+        
+        As predições continuam na versão atual até a nova estar completa e
+        aquecida; então o ponteiro é trocado de uma vez.
+        
+        Args:
+            version: Versão do registro (padrão: a ativa no registro, ou o
+                     diretório models_dir sem registro)
+            activate: Trocar para a versão ao terminar
+            
+        Returns:
+            Future com o nome da versão carregada
+        """
+        with self._swap_lock:
+            if self._loader is None:
+                self._loader = ThreadPoolExecutor(max_workers=1,
+                                                  thread_name_prefix='model-preload')
+            
+            def job():
+                state = self._prepare_version(version)
+                if activate:
+                    self._activate(state)
+                return state.stack.version
+            
+            future = self._loader.submit(job)
+            self._pending = future
+        future.add_done_callback(self._preload_done)
+        return future
+    
+    def _preload_done(self, future: Future):
+        if future.exception() is not None:
+            logger.error(f"Falha ao pré-carregar modelos: {future.exception()}")
+        with self._swap_lock:
+            if self._pending is future:
+                self._pending = None
+    
+    def swap_to(self, version: str, timeout: Optional[float] = None) -> str:
+        """Carrega, aquece e ativa uma versão do registro (espera terminar)"""
+        return self.preload(version).result(timeout=timeout)
+    
+    def _prepare_version(self, version: Optional[str] = None) -> _ActiveModels:
+        """Carrega (com checksums, se do registro), compila e aquece"""
+        if self.registry is not None and (version or self.registry.current()):
+            stack = self.registry.load(version)
+        elif version is not None:
+            raise ValueError(f"Versão {version} solicitada sem registro de modelos")
+        else:
+            stack = load_model_dir(self.models_dir)
+        
+        state = self._compile_feature_schemas(stack)
+        if not stack.models:
+            logger.warning("Nenhum modelo encontrado - usando fallback baseado em features")
+            state.use_fallback = True
+        else:
+            self._warm_up(state)
+        return state
+    
+    def _warm_up(self, state: _ActiveModels):
+        """
+        Executa as três camadas sobre linhas sintéticas
+        
+        A primeira chamada de predict em xgboost/lightgbm/sklearn inicializa
+        caches e valida o estimador; feito aqui, fora do caminho de predição.
+        """
+        start = time.perf_counter()
+        local = self._local
+        previous = getattr(local, 'active', None)
+        local.active = state
+        try:
+            X_context = np.zeros((2, state.feature_schema.size), dtype=state.feature_schema.dtype)
+            self._predict_layers(X_context, state.micro_binding.gather(X_context))
+        except Exception as e:
+            logger.warning(f"Aquecimento da versão {state.stack.version} falhou: {e}")
+        finally:
+            local.active = previous
+        logger.debug(f"Versão {state.stack.version} aquecida em "
+                     f"{(time.perf_counter() - start) * 1000:.1f}ms")
+    
+    def _activate(self, state: _ActiveModels):
+        """Troca atômica do ponteiro da versão ativa"""
+        with self._swap_lock:
+            old = self._active.stack.version
+            self._active = state
             self.is_loaded = True
-            self.use_fallback = True
-            return True
+            # Chamada fixada que disparou a carga passa a ver a nova versão
+            if getattr(self._local, 'active', None) is not None:
+                self._local.active = state
+        
+        if state.use_fallback:
+            logger.info(f"Modo fallback ativo (versão {state.stack.version})")
+        else:
+            logger.info(f"[OK] {len(state.stack.models)} modelos carregados com sucesso "
+                        f"- versão {state.stack.version} (anterior: {old})")
     
+    @_pin_models
     def predict(self, features: Dict[str, float]) -> Dict:
         """
         Faz predição usando sistema híbrido de 3 camadas
@@ -158,6 +311,7 @@ class HybridMLPredictor:
             Dict com predição, confiança e detalhes
         """
         if not self.is_loaded:
+            # Carga sob demanda (ou espera pela carga em background)
             if not self.load_models():
                 return {'signal': 0, 'confidence': 0, 'error': 'models_not_loaded'}
         
@@ -234,6 +388,180 @@ class HybridMLPredictor:
             logger.error(f"Erro na predição ML: {e}")
             return {'signal': 0, 'confidence': 0, 'error': str(e)}
     
+    @_pin_models
+    def predict_batch(self, X: np.ndarray, feature_names: Optional[List[str]] = None,
+                      chunk_size: int = 100_000) -> Dict[str, np.ndarray]:
+        """
+        Predição vetorizada sobre uma matriz de features
+        
+        Cada linha é um timestamp (ou símbolo). Scalers e as três camadas
+        são aplicados em uma única chamada por bloco de linhas. Não aplica a
+        validação de features estáticas (que depende do histórico de chamadas
+        ao vivo).
+        
+        Args:
+            X: Matriz (n_amostras, n_features)
+            feature_names: Nome de cada coluna de X. Se None, as colunas devem
+                           seguir a ordem de self.context_features
+            chunk_size: Máximo de linhas por chamada aos modelos (limita memória)
+            
+        Returns:
+            Dict de arrays com n_amostras elementos: 'signal', 'confidence',
+            'meta_pred' e as predições individuais de cada camada
+        """
+        if not self.is_loaded:
+            self.load_models()
+        
+        X = np.asarray(X, dtype=self.feature_schema.dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        names = list(feature_names) if feature_names is not None else list(self.context_features)
+        if X.shape[1] != len(names):
+            raise ValueError(f"Matriz com {X.shape[1]} colunas, esperado {len(names)}")
+        
+        if getattr(self, 'use_fallback', False):
+            return self._fallback_predict_batch(X, names)
+        
+        # Reordenar colunas uma única vez para o layout de cada camada
+        if names == self.context_features:
+            X_context = X
+        else:
+            X_context = self._batch_binding(tuple(names)).gather(X)
+        X_micro = self._micro_binding.gather(X_context)
+        
+        chunk_size = max(int(chunk_size), 1)
+        chunks = []
+        for start in range(0, len(X), chunk_size):
+            end = start + chunk_size
+            chunks.append(self._predict_layers(X_context[start:end], X_micro[start:end]))
+        
+        if not chunks:
+            return {'signal': np.zeros(0, dtype=int), 'confidence': np.zeros(0)}
+        
+        keys = set(chunks[0]).intersection(*chunks[1:])
+        return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in keys}
+    
+    @_pin_models
+    def predict_vector(self, x: np.ndarray,
+                       producer_names: Optional[Tuple[str, ...]] = None) -> Dict:
+        """
+        Predição a partir de um vetor de features (caminho sem dicts)
+        
+        Args:
+            x: Vetor no layout de self.feature_schema, ou no layout do
+               produtor se `producer_names` for passado
+            producer_names: Ordem das features no vetor do produtor; o
+                mapeamento para o layout dos modelos é compilado uma vez por
+                versão carregada (features sem produtor recebem o padrão)
+            
+        Returns:
+            Dict no mesmo formato de predict()
+        """
+        if not self.is_loaded:
+            self.load_models()
+        
+        binding = None
+        if producer_names is not None:
+            binding = self._batch_binding(tuple(producer_names))
+            x = binding.gather(x)
+        
+        if getattr(self, 'use_fallback', False):
+            return self._fallback_predict(self.feature_schema.to_dict(x))
+        
+        if not self._validate_features(self._critical_values(x, binding)):
+            logger.warning("[HYBRID] Features estáticas detectadas - usando sinal neutro")
+            return {
+                'signal': 0, 
+                'confidence': 0.3, 
+                'error': 'static_features',
+                'ml_data': {'warning': 'Features não estão variando'},
+                'predictions': {}
+            }
+        
+        try:
+            X_context = np.asarray(x).reshape(1, -1)
+            X_micro = self._micro_binding.gather(X_context)
+            result = self._predict_layers(X_context, X_micro)
+            
+            if 'regime' not in result:
+                return {'signal': 0, 'confidence': 0.3, 'error': 'incomplete_predictions'}
+            
+            row = self._first_row(result)
+            signal = row.pop('signal')
+            confidence = row.pop('confidence')
+            meta_pred = row.pop('meta_pred')
+            context_predictions = {k: v for k, v in row.items()
+                                   if k in ('regime', 'regime_conf', 'volatility', 'session', 'session_conf')}
+            micro_predictions = {k: v for k, v in row.items()
+                                 if k in ('order_flow', 'order_flow_conf', 'book_pressure')}
+            
+            return {
+                'signal': signal,
+                'confidence': confidence,
+                'ml_data': {
+                    'signal': signal,
+                    'confidence': confidence,
+                    'context_pred': context_predictions,
+                    'micro_pred': micro_predictions,
+                    'meta_pred': meta_pred
+                },
+                'predictions': {
+                    'context': context_predictions,
+                    'microstructure': micro_predictions,
+                    'meta': meta_pred
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"Erro na predição ML: {e}")
+            return {'signal': 0, 'confidence': 0, 'error': str(e)}
+    
+    def _critical_values(self, x: np.ndarray,
+                         binding: Optional[FeatureBinding] = None) -> Dict[str, float]:
+        """
+        Extrai do vetor apenas as features usadas em _validate_features
+        
+        Features sem produtor no `binding` ficam de fora, como ficariam
+        ausentes do dict em predict().
+        """
+        index = self.feature_schema.index
+        missing = set(binding.missing) if binding is not None else ()
+        return {
+            name: float(x[index[name]])
+            for name in ('returns_1', 'returns_5', 'volatility_10', 'order_flow_imbalance')
+            if name in index and name not in missing
+        }
+    
+    def _predict_layers(self, X_context: np.ndarray, X_micro: np.ndarray) -> Dict[str, np.ndarray]:
+        """Executa as três camadas sobre um bloco de linhas (features brutas)"""
+        n = len(X_context)
+        neutral = {
+            'signal': np.zeros(n, dtype=int),
+            'confidence': np.full(n, 0.3),
+            'meta_pred': np.zeros(n)
+        }
+        
+        if 'context' in self.scalers:
+            X_context = self.scalers['context'].transform(X_context)
+        if 'microstructure' in self.scalers:
+            X_micro = self.scalers['microstructure'].transform(X_micro)
+        
+        context_pred = self._predict_context_batch(X_context)
+        micro_pred = self._predict_microstructure_batch(X_micro)
+        if 'regime' not in context_pred or 'order_flow' not in micro_pred:
+            logger.warning("[HYBRID] Predições incompletas no lote - retornando sinal neutro")
+            return neutral
+        
+        meta_pred = self._predict_meta_batch(context_pred, micro_pred, n)
+        
+        result = {
+            'signal': self._determine_signal_batch(meta_pred),
+            'confidence': self._calculate_confidence_batch(meta_pred, context_pred, micro_pred),
+            'meta_pred': meta_pred
+        }
+        result.update(context_pred)
+        result.update(micro_pred)
+        return result
     
     def _validate_features(self, features: Dict[str, float]) -> bool:
         """Valida se as features são dinâmicas e não estáticas"""
@@ -278,59 +606,101 @@ class HybridMLPredictor:
                 if key in features:
                     logger.info(f"  {key}: {features[key]:.6f}")
     
-    def _prepare_context_features(self, features: Dict) -> np.ndarray:
-        """Prepara features de contexto"""
-        context_values = []
+    def _compile_feature_schemas(self, stack: ModelStack) -> _ActiveModels:
+        """
+        Compila o layout dos vetores de entrada a partir do config.json
         
-        for feat_name in self.context_features:
-            if feat_name in features:
-                context_values.append(features[feat_name])
-            else:
-                # Usar valor padrão se feature não existir
-                context_values.append(0.0)
-                logger.debug(f"Feature ausente: {feat_name}")
+        Feito uma vez por versão carregada: resolve nomes para índices,
+        prealoca os vetores de entrada e verifica contra os scalers.
+        """
+        feature_schema = FeatureSchema.from_model_config(
+            stack.models_dir or self.models_dir,
+            default_names=self.default_context_features, name="context"
+        )
+        micro_schema = FeatureSchema(self.microstructure_features, name="microstructure")
+        
+        for layer, schema in (('context', feature_schema), ('microstructure', micro_schema)):
+            expected = getattr(stack.scalers.get(layer), 'n_features_in_', None)
+            if expected is not None and expected != schema.size:
+                logger.error(f"Scaler {layer} espera {expected} features, schema tem {schema.size}")
+        
+        return _ActiveModels(
+            stack=stack,
+            feature_schema=feature_schema,
+            micro_schema=micro_schema,
+            micro_binding=micro_schema.bind(list(feature_schema.names)),
+            context_row=feature_schema.new_vector(rows=1),
+            micro_row=micro_schema.new_vector(rows=1),
+            use_fallback=False,
+        )
+    
+    def _batch_binding(self, names: Tuple[str, ...]) -> FeatureBinding:
+        """Binding de um produtor (predict_batch/predict_vector), compilado uma vez por ordem de nomes"""
+        bindings = self._current().batch_bindings
+        binding = bindings.get(names)
+        if binding is None:
+            binding = bindings[names] = self.feature_schema.bind(list(names))
+        return binding
+    
+    def bind_producer(self, producer_names: List[str],
+                      aliases: Optional[Dict[str, str]] = None) -> FeatureBinding:
+        """
+        Compila o mapeamento do vetor de um produtor de features para o
+        layout de entrada dos modelos
         
-        X = np.array(context_values).reshape(1, -1)
+        Sem aliases o binding é o mesmo que predict_vector(x, producer_names)
+        usa (compilado uma vez por versão dos modelos).
         
-        # Aplicar scaler se disponível
-        if 'context' in self.scalers:
-            X = self.scalers['context'].transform(X)
-        
-        return X
+        Args:
+            producer_names: Ordem das features no vetor do produtor
+            aliases: Nome esperado pelo modelo -> nome no produtor
+        """
+        if aliases is None:
+            return self._batch_binding(tuple(producer_names))
+        return self.feature_schema.bind(producer_names, aliases)
+    
+    def _prepare_context_features(self, features: Dict) -> np.ndarray:
+        """Prepara features de contexto"""
+        with self._input_lock:
+            X = self.feature_schema.fill_from_dict(features, self._context_row[0]).reshape(1, -1)
+            
+            # Aplicar scaler se disponível (transform retorna cópia)
+            if 'context' in self.scalers:
+                return self.scalers['context'].transform(X)
+            return X.copy()
     
     def _prepare_microstructure_features(self, features: Dict) -> np.ndarray:
         """Prepara features de microestrutura"""
-        micro_values = []
-        
-        for feat_name in self.microstructure_features:
-            if feat_name in features:
-                micro_values.append(features[feat_name])
-            else:
-                # Usar valor padrão
-                micro_values.append(0.0)
-                logger.debug(f"Feature ausente: {feat_name}")
-        
-        X = np.array(micro_values).reshape(1, -1)
-        
-        # Aplicar scaler se disponível
-        if 'microstructure' in self.scalers:
-            X = self.scalers['microstructure'].transform(X)
-        
-        return X
+        with self._input_lock:
+            X = self.micro_schema.fill_from_dict(features, self._micro_row[0]).reshape(1, -1)
+            
+            # Aplicar scaler se disponível (transform retorna cópia)
+            if 'microstructure' in self.scalers:
+                return self.scalers['microstructure'].transform(X)
+            return X.copy()
     
     def _predict_context(self, X: np.ndarray) -> Dict:
         """Predições da camada de contexto"""
+        return self._first_row(self._predict_context_batch(X))
+    
+    def _predict_microstructure(self, X: np.ndarray) -> Dict:
+        """Predições da camada de microestrutura"""
+        return self._first_row(self._predict_microstructure_batch(X))
+    
+    def _first_row(self, batch: Dict[str, np.ndarray]) -> Dict:
+        """Converte predições em lote (1 linha) para escalares"""
+        return {key: values[0].item() for key, values in batch.items()}
+    
+    def _predict_context_batch(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        """Predições da camada de contexto (uma chamada por modelo)"""
         predictions = {}
         
-        # Sempre garantir que temos valores, mesmo sem modelos
-        time_factor = int(time.time())
-        
         # Regime Detector
         if 'context_regime_detector' in self.models:
             try:
-                pred = self.models['context_regime_detector'].predict_proba(X)[0]
-                predictions['regime'] = int(np.argmax(pred))
-                predictions['regime_conf'] = float(np.max(pred))
+                proba = self.models['context_regime_detector'].predict_proba(X)
+                predictions['regime'] = np.argmax(proba, axis=1).astype(int)
+                predictions['regime_conf'] = np.max(proba, axis=1).astype(float)
             except Exception as e:
                 logger.error(f"Erro ao fazer predição de regime: {e}")
                 # Sem fallback - retornar sem valores se houver erro
@@ -343,37 +713,35 @@ class HybridMLPredictor:
         # Volatility Forecaster
         if 'context_volatility_forecaster' in self.models:
             try:
-                pred = self.models['context_volatility_forecaster'].predict(X)[0]
-                predictions['volatility'] = pred
+                predictions['volatility'] = np.asarray(
+                    self.models['context_volatility_forecaster'].predict(X), dtype=float
+                )
             except:
-                predictions['volatility'] = 0
+                predictions['volatility'] = np.zeros(len(X))
         
         # Session Classifier
         if 'context_session_classifier' in self.models:
             try:
-                pred = self.models['context_session_classifier'].predict_proba(X)[0]
-                predictions['session'] = np.argmax(pred)
-                predictions['session_conf'] = np.max(pred)
+                proba = self.models['context_session_classifier'].predict_proba(X)
+                predictions['session'] = np.argmax(proba, axis=1).astype(int)
+                predictions['session_conf'] = np.max(proba, axis=1).astype(float)
             except:
-                predictions['session'] = 0
-                predictions['session_conf'] = 0.5
+                predictions['session'] = np.zeros(len(X), dtype=int)
+                predictions['session_conf'] = np.full(len(X), 0.5)
         
         return predictions
     
-    def _predict_microstructure(self, X: np.ndarray) -> Dict:
-        """Predições da camada de microestrutura"""
+    def _predict_microstructure_batch(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        """Predições da camada de microestrutura (uma chamada por modelo)"""
         predictions = {}
         
-        # Sempre garantir valores dinâmicos
-        time_factor = int(time.time())
-        
         # Order Flow Analyzer
         if 'micro_order_flow_analyzer' in self.models:
             try:
-                pred = self.models['micro_order_flow_analyzer'].predict_proba(X)[0]
+                proba = self.models['micro_order_flow_analyzer'].predict_proba(X)
                 # Assumindo 3 classes: SELL(-1), HOLD(0), BUY(1)
-                predictions['order_flow'] = int(np.argmax(pred) - 1)  # Converter para -1, 0, 1
-                predictions['order_flow_conf'] = float(np.max(pred))
+                predictions['order_flow'] = np.argmax(proba, axis=1).astype(int) - 1
+                predictions['order_flow_conf'] = np.max(proba, axis=1).astype(float)
             except Exception as e:
                 logger.error(f"Erro ao fazer predição de order_flow: {e}")
                 # Sem fallback - retornar sem valores se houver erro
@@ -386,78 +754,84 @@ class HybridMLPredictor:
         # Book Dynamics
         if 'micro_book_dynamics' in self.models:
             try:
-                pred = self.models['micro_book_dynamics'].predict(X)[0]
-                predictions['book_pressure'] = pred
+                predictions['book_pressure'] = np.asarray(
+                    self.models['micro_book_dynamics'].predict(X), dtype=float
+                )
             except:
-                predictions['book_pressure'] = 0
+                predictions['book_pressure'] = np.zeros(len(X))
         
         return predictions
     
     def _predict_meta(self, context_pred: Dict, micro_pred: Dict, 
                      features: Dict) -> float:
         """Predição do meta-learner"""
+        context_batch = {key: np.array([value]) for key, value in context_pred.items()}
+        micro_batch = {key: np.array([value]) for key, value in micro_pred.items()}
+        return self._predict_meta_batch(context_batch, micro_batch, n=1)[0].item()
+    
+    def _predict_meta_batch(self, context_pred: Dict[str, np.ndarray],
+                            micro_pred: Dict[str, np.ndarray], n: int) -> np.ndarray:
+        """Predição do meta-learner para um bloco de n linhas"""
+        # Camada sem predição entra como 0 (mesmo padrão do caminho por linha)
+        regime = context_pred.get('regime', np.zeros(n, dtype=int))
+        order_flow = micro_pred.get('order_flow', np.zeros(n, dtype=int))
         
         if 'meta_meta_learner' not in self.models:
-            # Fallback: média ponderada simples
-            context_signal = context_pred.get('regime', 0) - 1  # Converter para -1, 0, 1
-            micro_signal = micro_pred.get('order_flow', 0)
-            
-            return 0.6 * micro_signal + 0.4 * context_signal
+            # Fallback: média ponderada simples (regime convertido para -1, 0, 1)
+            return 0.6 * order_flow + 0.4 * (regime - 1)
         
         try:
-            # Preparar features para meta-learner
-            # NOTA: O modelo foi treinado com 6 features, vamos usar apenas essas
-            meta_features = []
-            
-            # 6 Features principais usadas no treinamento
-            meta_features.append(context_pred.get('regime', 0))
-            meta_features.append(context_pred.get('regime_conf', 0.5))
-            meta_features.append(context_pred.get('volatility', 0))
-            meta_features.append(micro_pred.get('order_flow', 0))
-            meta_features.append(micro_pred.get('order_flow_conf', 0.5))
-            meta_features.append(micro_pred.get('book_pressure', 0))
-            
-            # Se precisar de 12 features (para compatibilidade futura)
-            # Descomente as linhas abaixo:
-            # meta_features.append(context_pred.get('session', 0))
-            # meta_features.append(context_pred.get('session_conf', 0.5))
-            # meta_features.append(features.get('spread', 0))
-            # meta_features.append(features.get('imbalance', 0))
-            # meta_features.append(features.get('volatility_20', 0))
-            # meta_features.append(features.get('rsi_14', 50))
-            
-            X_meta = np.array(meta_features).reshape(1, -1)
+            # NOTA: O modelo foi treinado com 6 features, nesta ordem
+            X_meta = np.column_stack([
+                regime,
+                context_pred.get('regime_conf', np.full(n, 0.5)),
+                context_pred.get('volatility', np.zeros(n)),
+                order_flow,
+                micro_pred.get('order_flow_conf', np.full(n, 0.5)),
+                micro_pred.get('book_pressure', np.zeros(n))
+            ]).astype(float)
             
             # Predizer com meta-learner
-            prediction = self.models['meta_meta_learner'].predict(X_meta)[0]
-            
-            return prediction
+            return np.asarray(self.models['meta_meta_learner'].predict(X_meta), dtype=float)
             
         except Exception as e:
             logger.error(f"Erro no meta-learner: {e}")
             # Fallback
-            return 0.6 * micro_pred.get('order_flow', 0) + 0.4 * (context_pred.get('regime', 0) - 1)
+            return 0.6 * order_flow + 0.4 * (regime - 1)
     
     def _determine_signal(self, meta_prediction: float) -> int:
         """Determina sinal final baseado na predição"""
-        if meta_prediction > self.signal_threshold:
-            return 1  # BUY
-        elif meta_prediction < -self.signal_threshold:
-            return -1  # SELL
-        else:
-            return 0  # HOLD
+        return int(self._determine_signal_batch(np.array([meta_prediction]))[0])
+    
+    def _determine_signal_batch(self, meta_prediction: np.ndarray) -> np.ndarray:
+        """Sinais BUY(1)/SELL(-1)/HOLD(0) para um vetor de predições"""
+        signal = np.zeros(len(meta_prediction), dtype=int)
+        signal[meta_prediction > self.signal_threshold] = 1
+        signal[meta_prediction < -self.signal_threshold] = -1
+        return signal
     
     def _calculate_confidence(self, meta_pred: float, 
                             context_pred: Dict, 
                             micro_pred: Dict) -> float:
         """Calcula confiança da predição"""
+        context_batch = {key: np.array([value]) for key, value in context_pred.items()}
+        micro_batch = {key: np.array([value]) for key, value in micro_pred.items()}
+        return self._calculate_confidence_batch(
+            np.array([meta_pred], dtype=float), context_batch, micro_batch
+        )[0].item()
+    
+    def _calculate_confidence_batch(self, meta_pred: np.ndarray,
+                                    context_pred: Dict[str, np.ndarray],
+                                    micro_pred: Dict[str, np.ndarray]) -> np.ndarray:
+        """Confiança para um vetor de predições"""
+        n = len(meta_pred)
         
         # Confiança baseada na força do sinal
-        signal_confidence = min(abs(meta_pred) / 1.0, 1.0)
+        signal_confidence = np.minimum(np.abs(meta_pred) / 1.0, 1.0)
         
         # Confiança das predições individuais
-        context_conf = context_pred.get('regime_conf', 0.5)
-        micro_conf = micro_pred.get('order_flow_conf', 0.5)
+        context_conf = context_pred.get('regime_conf', np.full(n, 0.5))
+        micro_conf = micro_pred.get('order_flow_conf', np.full(n, 0.5))
         
         # Combinar confianças
         combined_confidence = (
@@ -466,8 +840,9 @@ class HybridMLPredictor:
             0.2 * context_conf
         )
         
-        return min(max(combined_confidence, 0.0), 1.0)
+        return np.clip(combined_confidence, 0.0, 1.0)
     
+    @_pin_models
     def get_feature_importance(self) -> Dict:
         """Retorna importância das features se disponível"""
         importance = {}
@@ -564,4 +939,56 @@ class HybridMLPredictor:
             
         except Exception as e:
             logger.error(f"Erro no fallback prediction: {e}")
-            return {'signal': 0, 'confidence': 0, 'error': str(e)}
\ No newline at end of file
+            return {'signal': 0, 'confidence': 0, 'error': str(e)}
+    
+    def _fallback_predict_batch(self, X: np.ndarray, names: List[str]) -> Dict[str, np.ndarray]:
+        """Versão vetorizada de _fallback_predict (mesmas regras)"""
+        n = len(X)
+        positions = {name: i for i, name in enumerate(names)}
+        
+        def column(name: str, default: float) -> np.ndarray:
+            if name in positions:
+                return X[:, positions[name]]
+            return np.full(n, default)
+        
+        signal = np.zeros(n)
+        confidence = np.zeros(n)
+        
+        # RSI
+        rsi = column('rsi_14', 50)
+        overbought, oversold = rsi > 70, rsi < 30
+        signal -= 0.5 * overbought
+        signal += 0.5 * oversold
+        confidence += 0.2 * (overbought | oversold)
+        
+        # Order Flow Imbalance - tentar diferentes chaves
+        ofi = column('order_flow_imbalance', 0)
+        ofi = np.where(ofi == 0, column('order_flow_imbalance_5', 0), ofi)
+        strong_ofi = np.abs(ofi) > 0.3
+        signal += np.sign(ofi) * 0.3 * strong_ofi
+        confidence += 0.15 * strong_ofi
+        
+        # Volume Imbalance
+        imbalance = column('imbalance', 0)
+        strong_imbalance = np.abs(imbalance) > 0.3
+        signal += np.sign(imbalance) * 0.2 * strong_imbalance
+        confidence += 0.1 * strong_imbalance
+        
+        # Momentum
+        returns_5 = column('returns_5', 0)
+        strong_momentum = np.abs(returns_5) > 0.005
+        signal += np.sign(returns_5) * 0.2 * strong_momentum
+        confidence += 0.1 * strong_momentum
+        
+        # Spread analysis
+        confidence += 0.05 * (column('spread', 0.5) < 0.5)
+        
+        final_signal = np.zeros(n, dtype=int)
+        final_signal[signal > 0.3] = 1
+        final_signal[signal < -0.3] = -1
+        
+        return {
+            'signal': final_signal,
+            'confidence': np.clip(confidence, 0.3, 0.8),
+            'meta_pred': signal
+        }
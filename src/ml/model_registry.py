@@ -0,0 +1,364 @@
+"""
+Registro Versionado de Modelos
+Cada versão é um diretório imutável com manifest.json (checksums SHA-256,
+métricas, metadados); um ponteiro current.json indica a versão ativa.
+Carregar uma versão verifica os checksums e devolve um ModelStack completo,
+pronto para ser trocado atomicamente no preditor
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+# Subdiretório da camada -> prefixo do nome no stack (mesmo do HybridMLPredictor)
+LAYERS = (
+    ('context', 'context'),
+    ('microstructure', 'micro'),
+    ('meta_learner', 'meta'),
+)
+
+MANIFEST = "manifest.json"
+POINTER = "current.json"
+
+
+def file_sha256(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json_atomic(path: Path, data: Dict):
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class ModelStack:
+    """Conjunto completo e já carregado de modelos + scalers de uma versão"""
+    version: str
+    models: Dict[str, Any]
+    scalers: Dict[str, Any]
+    config: Dict = field(default_factory=dict)
+    models_dir: Optional[Path] = None
+    load_seconds: float = 0.0
+
+    def layer(self, prefix: str) -> Dict[str, Any]:
+        """Modelos de uma camada sem o prefixo ('context', 'micro', 'meta')"""
+        start = len(prefix) + 1
+        return {name[start:]: model for name, model in self.models.items()
+                if name.startswith(f"{prefix}_")}
+
+
+def load_model_dir(models_dir: Union[str, Path], version: Optional[str] = None) -> ModelStack:
+    """
+    Carrega um diretório no layout do pipeline híbrido
+
+    <dir>/context/*.pkl, microstructure/*.pkl, meta_learner/*.pkl,
+    scaler_<camada>.pkl e config.json. Arquivos que falham ao carregar são
+    ignorados (com log), como no carregamento original do preditor.
+
+    Args:
+        models_dir: Diretório dos modelos
+        version: Rótulo da versão (padrão: 'timestamp' do config.json)
+
+    Returns:
+        ModelStack
+    """
+    models_dir = Path(models_dir)
+    start = time.perf_counter()
+    models, scalers, config = {}, {}, {}
+
+    for layer_dir, prefix in LAYERS:
+        for model_file in sorted((models_dir / layer_dir).glob("*.pkl")):
+            try:
+                models[f"{prefix}_{model_file.stem}"] = joblib.load(model_file)
+            except Exception as e:
+                logger.debug(f"Falha ao carregar {model_file.stem}: {e}")
+
+    for scaler_file in sorted(models_dir.glob("scaler_*.pkl")):
+        try:
+            scalers[scaler_file.stem[len("scaler_"):]] = joblib.load(scaler_file)
+        except Exception as e:
+            logger.debug(f"Falha ao carregar {scaler_file.name}: {e}")
+
+    config_file = models_dir / "config.json"
+    if config_file.exists():
+        try:
+            with open(config_file, 'r') as f:
+                config = json.load(f)
+        except Exception as e:
+            logger.warning(f"config.json ilegível em {models_dir}: {e}")
+
+    return ModelStack(
+        version=version or str(config.get('timestamp') or models_dir.name),
+        models=models,
+        scalers=scalers,
+        config=config,
+        models_dir=models_dir,
+        load_seconds=time.perf_counter() - start,
+    )
+
+
+class ModelRegistry:
+    """
+    Registro de versões de modelos em disco
+
+    Layout:
+        <root>/versions/<versão>/...     (cópia imutável + manifest.json)
+        <root>/current.json              (versão ativa e anterior)
+
+    publish() grava em um diretório temporário e só então renomeia, então
+    uma versão listada está sempre completa. activate() troca o ponteiro
+    com os.replace.
+    """
+
+    def __init__(self, root: Union[str, Path] = "models/registry"):
+        self.root = Path(root)
+        self.versions_dir = self.root / "versions"
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------- escrita
+
+    def _new_version_name(self) -> str:
+        base = f"v{datetime.now():%Y%m%d_%H%M%S}"
+        name, n = base, 1
+        while (self.versions_dir / name).exists():
+            n += 1
+            name = f"{base}_{n}"
+        return name
+
+    def publish(self, source_dir: Union[str, Path], version: Optional[str] = None,
+                metrics: Optional[Dict] = None, metadata: Optional[Dict] = None,
+                activate: bool = False) -> str:
+        """
+        Registra uma nova versão a partir de um diretório de modelos
+
+        Args:
+            source_dir: Diretório no layout do pipeline híbrido
+            version: Nome da versão (padrão: v<data>_<hora>)
+            metrics: Métricas de validação (gravadas no manifest)
+            metadata: Informações livres (origem, dados usados, ...)
+            activate: Tornar a versão ativa imediatamente
+
+        Returns:
+            Nome da versão registrada
+        """
+        source_dir = Path(source_dir)
+        if not source_dir.is_dir():
+            raise ValueError(f"Diretório de modelos inexistente: {source_dir}")
+
+        with self._lock:
+            self.versions_dir.mkdir(parents=True, exist_ok=True)
+            version = version or self._new_version_name()
+            target = self.versions_dir / version
+            if target.exists():
+                raise ValueError(f"Versão {version} já registrada")
+
+            staging = self.versions_dir / f".staging-{version}"
+            if staging.exists():
+                shutil.rmtree(staging)
+            shutil.copytree(source_dir, staging,
+                            ignore=shutil.ignore_patterns(MANIFEST, "*.tmp", "__pycache__"))
+
+            files = {}
+            for path in sorted(p for p in staging.rglob("*") if p.is_file()):
+                files[path.relative_to(staging).as_posix()] = {
+                    'sha256': file_sha256(path),
+                    'bytes': path.stat().st_size,
+                }
+            _write_json_atomic(staging / MANIFEST, {
+                'version': version,
+                'created_at': datetime.now().isoformat(),
+                'source': str(source_dir),
+                'files': files,
+                'metrics': metrics or {},
+                'metadata': metadata or {},
+            })
+            os.replace(staging, target)
+
+        logger.info(f"Versão de modelos registrada: {version} ({len(files)} arquivos)")
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str):
+        """Aponta current.json para a versão (troca atômica do ponteiro)"""
+        if not (self.versions_dir / version / MANIFEST).exists():
+            raise ValueError(f"Versão desconhecida: {version}")
+        with self._lock:
+            previous = self.current()
+            if previous == version:
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            _write_json_atomic(self.root / POINTER, {
+                'version': version,
+                'previous': previous,
+                'activated_at': datetime.now().isoformat(),
+            })
+        logger.info(f"Versão ativa: {version} (anterior: {previous})")
+
+    def rollback(self) -> Optional[str]:
+        """Reativa a versão anterior; retorna a versão ativada ou None"""
+        pointer = self._pointer()
+        previous = pointer.get('previous')
+        if not previous:
+            return None
+        self.activate(previous)
+        return previous
+
+    def prune(self, keep: int = 5) -> List[str]:
+        """Remove versões antigas, nunca a ativa nem a anterior"""
+        pointer = self._pointer()
+        protected = {pointer.get('version'), pointer.get('previous')}
+        removed = []
+        for version in self.list_versions()[:-keep or None]:
+            if version not in protected:
+                shutil.rmtree(self.versions_dir / version, ignore_errors=True)
+                removed.append(version)
+        return removed
+
+    # -------------------------------------------------------------- leitura
+
+    def _pointer(self) -> Dict:
+        try:
+            with open(self.root / POINTER, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Ponteiro de versão ilegível: {e}")
+            return {}
+
+    def current(self) -> Optional[str]:
+        """Versão ativa (ou None se nenhuma foi ativada)"""
+        return self._pointer().get('version')
+
+    def list_versions(self) -> List[str]:
+        """Versões completas, da mais antiga para a mais recente"""
+        if not self.versions_dir.exists():
+            return []
+        versions = [p for p in self.versions_dir.iterdir()
+                    if p.is_dir() and (p / MANIFEST).exists()]
+        return [p.name for p in sorted(versions, key=lambda p: ((p / MANIFEST).stat().st_mtime, p.name))]
+
+    def version_dir(self, version: str) -> Path:
+        return self.versions_dir / version
+
+    def manifest(self, version: str) -> Dict:
+        with open(self.versions_dir / version / MANIFEST, 'r') as f:
+            return json.load(f)
+
+    def verify(self, version: str) -> List[str]:
+        """
+        Confere os checksums do manifest
+
+        Returns:
+            Lista de arquivos ausentes ou corrompidos (vazia = íntegra)
+        """
+        base = self.versions_dir / version
+        bad = []
+        for name, info in self.manifest(version)['files'].items():
+            path = base / name
+            if not path.exists() or path.stat().st_size != info['bytes'] \
+                    or file_sha256(path) != info['sha256']:
+                bad.append(name)
+        return bad
+
+    def load(self, version: Optional[str] = None) -> ModelStack:
+        """
+        Verifica e carrega uma versão inteira
+
+        Args:
+            version: Versão (padrão: a ativa)
+
+        Returns:
+            ModelStack com as métricas do manifest em config['registry']
+        """
+        version = version or self.current()
+        if version is None:
+            raise ValueError(f"Nenhuma versão ativa em {self.root}")
+        bad = self.verify(version)
+        if bad:
+            raise ValueError(f"Versão {version} com checksum inválido: {bad}")
+
+        stack = load_model_dir(self.versions_dir / version, version=version)
+        manifest = self.manifest(version)
+        stack.config['registry'] = {
+            'version': version,
+            'created_at': manifest.get('created_at'),
+            'metrics': manifest.get('metrics', {}),
+        }
+        logger.info(f"Versão {version} carregada em {stack.load_seconds:.2f}s "
+                    f"({len(stack.models)} modelos)")
+        return stack
+
+
+class ArtifactCache:
+    """
+    Cache de artefatos desserializados (pickle/joblib)
+
+    Chave: caminho + tamanho + mtime, então um arquivo regravado é lido de
+    novo. prefetch() carrega vários arquivos em paralelo (I/O e
+    descompressão liberam o GIL).
+    """
+
+    def __init__(self, max_items: int = 32):
+        self.max_items = max_items
+        self._items: Dict[Tuple[str, int, int], Any] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'loads': 0}
+
+    @staticmethod
+    def _key(path: Path) -> Tuple[str, int, int]:
+        stat = path.stat()
+        return str(path.resolve()), stat.st_size, stat.st_mtime_ns
+
+    def load(self, path: Union[str, Path]) -> Any:
+        path = Path(path)
+        key = self._key(path)
+        with self._lock:
+            if key in self._items:
+                self.stats['hits'] += 1
+                return self._items[key]
+        obj = joblib.load(path)
+        with self._lock:
+            self.stats['loads'] += 1
+            if len(self._items) >= self.max_items:
+                self._items.pop(next(iter(self._items)))
+            self._items[key] = obj
+        return obj
+
+    def prefetch(self, paths: Iterable[Union[str, Path]], max_workers: int = 4) -> int:
+        """Carrega em paralelo; retorna quantos arquivos ficaram em cache"""
+        paths = [Path(p) for p in paths if p and Path(p).exists()]
+        if not paths:
+            return 0
+
+        def safe_load(path):
+            try:
+                self.load(path)
+                return True
+            except Exception as e:
+                logger.warning(f"Falha ao pré-carregar {path.name}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=max_workers,
+                                thread_name_prefix='artifact-prefetch') as pool:
+            return sum(pool.map(safe_load, paths))
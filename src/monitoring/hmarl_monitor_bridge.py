@@ -11,6 +11,11 @@ from typing import Dict, Optional
 import threading
 import logging
 
+try:
+    from src.monitoring.status_channel import publish_status, get_status_reader
+except ImportError:
+    from monitoring.status_channel import publish_status, get_status_reader
+
 logger = logging.getLogger(__name__)
 
 class HMARLMonitorBridge:
@@ -64,7 +69,7 @@ class HMARLMonitorBridge:
         }
     
     def write_hmarl_data(self, consensus_data: Dict):
-        """Escreve dados dos agentes HMARL para arquivo compartilhado"""
+        """Publica dados dos agentes HMARL no canal de status"""
         try:
             with self.lock:
                 # Preparar dados
@@ -99,9 +104,7 @@ class HMARLMonitorBridge:
                         "reasoning": agent_info.get("reasoning", {})
                     }
                 
-                # Escrever arquivo
-                with open(self.hmarl_file, 'w') as f:
-                    json.dump(data, f, indent=2)
+                publish_status('hmarl', data)
                 
                 self.last_update = datetime.now()
                 logger.info(f"[BRIDGE] HMARL written: {data['consensus']['action']} @ {data['consensus']['confidence']:.1%}")
@@ -110,11 +113,9 @@ class HMARLMonitorBridge:
             logger.error(f"Erro ao escrever dados HMARL: {e}")
     
     def write_ml_data(self, ml_data: Dict):
-        """Escreve dados dos modelos ML para arquivo compartilhado"""
+        """Publica dados dos modelos ML no canal de status"""
         try:
             with self.lock:
-                ml_file = self.data_dir / "ml_status.json"
-                
                 # Preparar dados
                 data = {
                     "timestamp": datetime.now().isoformat(),
@@ -128,9 +129,7 @@ class HMARLMonitorBridge:
                     "ml_predictions": ml_data.get("predictions_count", 0)
                 }
                 
-                # Escrever no arquivo
-                with open(ml_file, 'w') as f:
-                    json.dump(data, f)
+                publish_status('ml', data)
                 
                 logger.info(f"[BRIDGE] ML written: signal={data['meta_pred']} @ {data['ml_confidence']:.1%}")
                 
@@ -163,7 +162,16 @@ class HMARLMonitorBridge:
         self.update(data.get('type', 'unknown'), data)
     
     def read_hmarl_data(self) -> Dict:
-        """Lê dados dos agentes HMARL do arquivo compartilhado"""
+        """Lê dados dos agentes HMARL (canal de status ou arquivo legado)"""
+        # Canal de memória compartilhada publicado pelo sistema
+        status = get_status_reader().read_with_meta('hmarl')
+        if status is not None:
+            data, _, published_at = status
+            if time.time() - published_at > 30:
+                logger.warning(f"Dados HMARL muito antigos ({time.time() - published_at:.1f}s)")
+                return self.default_data
+            return data
+        
         max_retries = 3
         retry_delay = 0.1  # 100ms
         
@@ -12,6 +12,11 @@ import ctypes
 from pathlib import Path
 import json
 
+try:
+    from src.monitoring.status_channel import publish_status
+except ImportError:
+    from monitoring.status_channel import publish_status
+
 logger = logging.getLogger('PositionChecker')
 
 class PositionChecker:
@@ -242,7 +247,7 @@ class PositionChecker:
             logger.warning(f"[PositionChecker] Não foi possível resetar lock global: {e}")
     
     def _save_status(self):
-        """Salva status atual em arquivo"""
+        """Publica status atual no canal de status dos monitores"""
         try:
             status_data = {
                 'timestamp': datetime.now().isoformat(),
@@ -255,8 +260,7 @@ class PositionChecker:
             if 'timestamp' in status_data['position'] and hasattr(status_data['position']['timestamp'], 'isoformat'):
                 status_data['position']['timestamp'] = status_data['position']['timestamp'].isoformat()
             
-            with open(self.status_file, 'w') as f:
-                json.dump(status_data, f, indent=2)
+            publish_status('position_checker', status_data)
                 
         except Exception as e:
             logger.error(f"[PositionChecker] Erro ao salvar status: {e}")
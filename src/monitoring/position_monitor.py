@@ -15,6 +15,11 @@ import logging
 import json
 from pathlib import Path
 
+try:
+    from src.monitoring.status_channel import publish_status
+except ImportError:
+    from monitoring.status_channel import publish_status
+
 logger = logging.getLogger('PositionMonitor')
 
 class PositionStatus(Enum):
@@ -365,7 +370,7 @@ class PositionMonitor:
             return None
     
     def _save_status(self):
-        """Salva status atual em arquivo JSON"""
+        """Publica status atual no canal de status dos monitores"""
         try:
             status = {
                 'timestamp': datetime.now().isoformat(),
@@ -387,8 +392,7 @@ class PositionMonitor:
                     'open_time': pos.open_time.isoformat() if pos.open_time else None
                 })
             
-            with open(self.status_file, 'w') as f:
-                json.dump(status, f, indent=2)
+            publish_status('position', status)
                 
         except Exception as e:
             logger.error(f"[PositionMonitor] Erro ao salvar status: {e}")
@@ -0,0 +1,186 @@
+"""
+Escritor central de snapshots de status em arquivo
+Alternativa sem memória compartilhada para monitores legados: produtores
+entregam o último dict de cada tópico e um thread em background grava um
+JSON compacto por tópico, agregando atualizações e limitando a taxa de escrita
+"""
+
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    from src.monitoring.status_channel import LEGACY_STATUS_FILES
+except ImportError:
+    from monitoring.status_channel import LEGACY_STATUS_FILES
+
+logger = logging.getLogger('SnapshotWriter')
+
+# Arquivo de cada tópico (relativo a base_dir)
+DEFAULT_SNAPSHOT_FILES = dict(LEGACY_STATUS_FILES,
+                              regime_metrics='data/monitor/regime_metrics.json')
+
+
+class SnapshotWriter:
+    """
+    Grava o último estado de cada tópico em arquivo
+
+    submit() apenas substitui o pendente do tópico e retorna; atualizações
+    que chegam entre duas gravações são agregadas (só a última é escrita).
+    O thread grava no máximo `max_rate` rodadas por segundo, cada arquivo
+    via arquivo temporário + os.replace para o leitor nunca ver JSON parcial.
+
+    O dict entregue passa a pertencer ao escritor: o produtor não deve
+    alterá-lo depois do submit().
+    """
+
+    def __init__(self, base_dir: str = '.', max_rate: float = 2.0,
+                 files: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            base_dir: Diretório base dos arquivos
+            max_rate: Máximo de rodadas de gravação por segundo
+            files: Mapa tópico -> arquivo (padrão DEFAULT_SNAPSHOT_FILES)
+        """
+        if max_rate <= 0:
+            raise ValueError("max_rate deve ser positivo")
+
+        self.base_dir = Path(base_dir)
+        self.min_interval = 1.0 / max_rate
+        self.files = dict(DEFAULT_SNAPSHOT_FILES if files is None else files)
+
+        self._pending: Dict[str, Tuple[Path, Dict]] = {}
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self.running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {'submitted': 0, 'coalesced': 0, 'written': 0, 'flushes': 0, 'errors': 0}
+
+    def submit(self, topic: str, data: Dict, path: Optional[str] = None) -> bool:
+        """
+        Entrega o último estado de um tópico
+
+        Args:
+            topic: Nome do tópico
+            data: Dict serializável em JSON (default=str para o resto)
+            path: Arquivo de destino (se o tópico não estiver no mapa)
+
+        Returns:
+            False se o tópico não tem arquivo associado
+        """
+        target = path or self.files.get(topic)
+        if target is None:
+            return False
+
+        with self._cond:
+            if topic in self._pending:
+                self.stats['coalesced'] += 1
+            self._pending[topic] = (self.base_dir / target, data)
+            self.stats['submitted'] += 1
+            self._cond.notify()
+        return True
+
+    def start(self):
+        """Inicia o thread de gravação"""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name='SnapshotWriter', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Para o thread e grava o que estiver pendente"""
+        if self.running:
+            self.running = False
+            with self._cond:
+                self._cond.notify()
+            if self._thread:
+                self._thread.join(timeout=timeout)
+                self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """
+        Grava imediatamente todos os tópicos pendentes
+
+        Returns:
+            Número de arquivos gravados
+        """
+        with self._cond:
+            batch = self._pending
+            self._pending = {}
+        if not batch:
+            return 0
+
+        written = 0
+        with self._write_lock:
+            for topic, (path, data) in batch.items():
+                if self._write(topic, path, data):
+                    written += 1
+            self.stats['flushes'] += 1
+        return written
+
+    def _write(self, topic: str, path: Path, data: Dict) -> bool:
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        try:
+            content = json.dumps(data, separators=(',', ':'), default=str)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            self.stats['written'] += 1
+            return True
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Erro gravando snapshot '{topic}' em {path}: {e}")
+            return False
+
+    def _run(self):
+        """Loop: espera atualizações, grava e respeita o intervalo mínimo"""
+        last_flush = 0.0
+        while self.running:
+            with self._cond:
+                while self.running and not self._pending:
+                    self._cond.wait(1.0)
+            if not self.running:
+                break
+
+            wait = last_flush + self.min_interval - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            last_flush = time.time()
+            self.flush()
+
+    def get_stats(self) -> Dict:
+        """Retorna estatísticas do escritor"""
+        with self._cond:
+            pending = len(self._pending)
+        return dict(self.stats, pending=pending, running=self.running)
+
+
+_writer: Optional[SnapshotWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_snapshot_writer() -> SnapshotWriter:
+    """
+    Retorna o escritor singleton do processo, já iniciado
+
+    A taxa vem de STATUS_SNAPSHOT_RATE (rodadas/s, padrão 2). Na saída do
+    processo o último estado pendente é gravado.
+    """
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                writer = SnapshotWriter(max_rate=float(os.getenv('STATUS_SNAPSHOT_RATE', '2')))
+                writer.start()
+                atexit.register(writer.stop)
+                _writer = writer
+    return _writer
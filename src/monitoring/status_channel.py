@@ -0,0 +1,526 @@
+"""
+Canal de status em memória compartilhada para os monitores
+Substitui os arquivos JSON de data/monitor no caminho de trading: o sistema
+publica o último dict de cada tópico num segmento de memória compartilhada e
+os processos de monitor leem com um seqlock, sem disco e sem JSON
+"""
+
+import os
+import time
+import pickle
+import struct
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover - Python < 3.8
+    shared_memory = None
+
+logger = logging.getLogger('StatusChannel')
+
+# Tópicos publicados -> índice do slot (layout fixo, não reordenar)
+STATUS_CHANNELS = {
+    'hmarl': 0,
+    'ml': 1,
+    'regime': 2,
+    'signal': 3,
+    'regime_stats': 4,
+    'position': 5,
+    'position_checker': 6,
+    'volume': 7,
+}
+
+# Arquivos JSON que os monitores liam antes do canal (fallback de leitura)
+LEGACY_STATUS_FILES = {
+    'hmarl': 'data/monitor/hmarl_status.json',
+    'ml': 'data/monitor/ml_status.json',
+    'regime': 'data/monitor/regime_status.json',
+    'signal': 'data/monitor/latest_signal.json',
+    'regime_stats': 'data/monitor/regime_stats.json',
+    'position': 'data/monitor/position_status.json',
+    'position_checker': 'data/monitor/position_checker_status.json',
+    'volume': 'data/monitor/volume_stats.json',
+}
+
+DEFAULT_SEGMENT_NAME = os.getenv('STATUS_SHM_NAME', 'qt_status_v1')
+DEFAULT_SLOT_SIZE = int(os.getenv('STATUS_SHM_SLOT_SIZE', str(64 * 1024)))
+
+# Cabeçalho do segmento: magic, versão do layout, nº de slots, tamanho do slot,
+# encarnação do escritor e estado (vivo/fechado)
+_SEGMENT_HEADER = struct.Struct('<4sIIIQI')
+_SEGMENT_HEADER_SIZE = 64
+_MAGIC = b'QTST'
+_LAYOUT_VERSION = 2
+_STATE_CLOSED = 0
+_STATE_LIVE = 1
+
+# Cabeçalho do slot: seq (seqlock), tamanho do payload, reservado, timestamp
+_SEQ = struct.Struct('<Q')
+_SLOT_META = struct.Struct('<IId')
+_SLOT_HEADER_SIZE = _SEQ.size + _SLOT_META.size
+
+
+def _segment_size(slot_size: int) -> int:
+    return _SEGMENT_HEADER_SIZE + slot_size * len(STATUS_CHANNELS)
+
+
+# Segmentos criados por este processo (o registro deles deve ser mantido)
+_owned_segments = set()
+
+
+def _untrack(shm):
+    """
+    Evita que o resource_tracker apague o segmento quando um leitor sai
+    (no POSIX o Python < 3.13 registra também quem apenas anexa)
+    """
+    if shm.name in _owned_segments:
+        return
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+
+
+class StatusPublisher:
+    """
+    Escritor do segmento de status (processo de trading)
+
+    Cada tópico tem um slot de tamanho fixo com um contador de sequência.
+    A escrita torna o contador ímpar, copia o payload e o torna par de novo;
+    leitores que virem um valor ímpar ou diferente entre o início e o fim da
+    cópia descartam a leitura e tentam de novo. Há um único escritor por
+    segmento; o lock só serializa threads do próprio processo.
+
+    Cada execução grava uma encarnação nova no cabeçalho e o marca como
+    fechado em close(), para que leitores presos a um segmento antigo
+    percebam o reinício do sistema e anexem de novo.
+    """
+
+    def __init__(self, name: str = DEFAULT_SEGMENT_NAME, slot_size: int = DEFAULT_SLOT_SIZE):
+        """
+        Cria (ou reaproveita) o segmento
+
+        Args:
+            name: Nome do segmento de memória compartilhada
+            slot_size: Bytes por tópico, incluindo o cabeçalho do slot
+        """
+        if shared_memory is None:
+            raise RuntimeError("multiprocessing.shared_memory indisponível")
+        if slot_size <= _SLOT_HEADER_SIZE:
+            raise ValueError("slot_size muito pequeno")
+
+        self.name = name
+        self.slot_size = slot_size
+        self.payload_capacity = slot_size - _SLOT_HEADER_SIZE
+        self.incarnation = int.from_bytes(os.urandom(8), 'little') or 1
+        self._lock = threading.Lock()
+        self._shm = self._create_segment()
+        self._buf = self._shm.buf
+        _owned_segments.add(self._shm.name)
+        self._write_header(_STATE_LIVE)
+
+        # Sequência local de cada slot (sempre par fora de uma escrita)
+        self._seqs = []
+        for index in range(len(STATUS_CHANNELS)):
+            seq = _SEQ.unpack_from(self._buf, self._slot_offset(index))[0]
+            self._seqs.append(seq + (seq & 1))
+
+        self.published = 0
+        self.oversized = 0
+        self.errors = 0
+
+    def _create_segment(self):
+        size = _segment_size(self.slot_size)
+        try:
+            shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            # Segmento de uma execução anterior: reaproveitar se o layout bater
+            shm = shared_memory.SharedMemory(name=self.name)
+            magic, version, slots, slot_size, _, _ = _SEGMENT_HEADER.unpack_from(shm.buf, 0)
+            if (magic, version, slots, slot_size) == (_MAGIC, _LAYOUT_VERSION,
+                                                      len(STATUS_CHANNELS), self.slot_size):
+                logger.info(f"Segmento de status reaproveitado: {self.name}")
+                return shm
+            shm.close()
+            shm.unlink()
+            shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+
+        shm.buf[:size] = bytes(size)
+        logger.info(f"Segmento de status criado: {self.name} ({size} bytes)")
+        return shm
+
+    def _write_header(self, state: int):
+        _SEGMENT_HEADER.pack_into(self._shm.buf, 0, _MAGIC, _LAYOUT_VERSION,
+                                  len(STATUS_CHANNELS), self.slot_size,
+                                  self.incarnation, state)
+
+    def _slot_offset(self, index: int) -> int:
+        return _SEGMENT_HEADER_SIZE + index * self.slot_size
+
+    def publish(self, channel: str, data: Dict) -> bool:
+        """
+        Publica o último estado de um tópico
+
+        Args:
+            channel: Nome do tópico (chave de STATUS_CHANNELS)
+            data: Dict serializável com pickle
+
+        Returns:
+            False se o tópico é desconhecido ou o payload não cabe no slot
+        """
+        index = STATUS_CHANNELS.get(channel)
+        if index is None:
+            logger.warning(f"Tópico de status desconhecido: {channel}")
+            return False
+
+        try:
+            payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Erro serializando status '{channel}': {e}")
+            return False
+
+        size = len(payload)
+        if size > self.payload_capacity:
+            self.oversized += 1
+            if self.oversized == 1 or self.oversized % 1000 == 0:
+                logger.warning(f"Status '{channel}' com {size} bytes excede o slot "
+                               f"({self.payload_capacity}) - descartado")
+            return False
+
+        offset = self._slot_offset(index)
+        buf = self._buf
+        with self._lock:
+            seq = self._seqs[index]
+            _SEQ.pack_into(buf, offset, seq + 1)
+            start = offset + _SLOT_HEADER_SIZE
+            buf[start:start + size] = payload
+            _SLOT_META.pack_into(buf, offset + _SEQ.size, size, 0, time.time())
+            _SEQ.pack_into(buf, offset, seq + 2)
+            self._seqs[index] = seq + 2
+        self.published += 1
+        return True
+
+    def close(self, unlink: bool = True):
+        """Libera o segmento (e o remove do sistema se unlink)"""
+        if self._shm is None:
+            return
+        with self._lock:
+            self._write_header(_STATE_CLOSED)
+        self._buf = None
+        self._shm.close()
+        if unlink:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        _owned_segments.discard(self._shm.name)
+        self._shm = None
+
+    def get_stats(self) -> Dict:
+        """Retorna estatísticas do escritor"""
+        return {
+            'segment': self.name,
+            'published': self.published,
+            'oversized': self.oversized,
+            'errors': self.errors
+        }
+
+
+class StatusReader:
+    """
+    Leitor do segmento de status (processos de monitor)
+
+    Anexa ao segmento sob demanda - se o sistema ainda não subiu, tenta de
+    novo a cada `attach_interval`. Payloads só são decodificados quando a
+    sequência do slot muda; leituras repetidas devolvem o objeto em cache.
+
+    A cada `attach_interval` o leitor também confere se o segmento com o
+    nome ainda é o mesmo (encarnação) e se não foi fechado pelo escritor;
+    caso contrário desanexa e passa a ler o segmento da nova execução.
+    """
+
+    def __init__(self, name: str = DEFAULT_SEGMENT_NAME, max_retries: int = 100,
+                 attach_interval: float = 1.0):
+        """
+        Args:
+            name: Nome do segmento de memória compartilhada
+            max_retries: Tentativas quando uma escrita concorrente é detectada
+            attach_interval: Intervalo mínimo (s) entre tentativas de anexar
+        """
+        self.name = name
+        self.max_retries = max_retries
+        self.attach_interval = attach_interval
+        self._shm = None
+        self._slot_size = 0
+        self._incarnation = 0
+        self._last_attach = 0.0
+        self._cache: Dict[int, Tuple[int, float, object]] = {}
+        self.torn_reads = 0
+
+    @property
+    def attached(self) -> bool:
+        return self._attach()
+
+    def _attach(self) -> bool:
+        if self._shm is not None:
+            if self._still_current():
+                return True
+            self._detach()
+        if shared_memory is None:
+            return False
+        now = time.time()
+        if now - self._last_attach < self.attach_interval:
+            return False
+        self._last_attach = now
+
+        shm = self._open_segment()
+        if shm is None:
+            return False
+        _, _, _, slot_size, incarnation, _ = _SEGMENT_HEADER.unpack_from(shm.buf, 0)
+        self._shm = shm
+        self._slot_size = slot_size
+        self._incarnation = incarnation
+        return True
+
+    def _open_segment(self):
+        """Abre o segmento pelo nome se ele existe, é compatível e está vivo"""
+        try:
+            shm = shared_memory.SharedMemory(name=self.name)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        _untrack(shm)
+
+        magic, version, slots, _, _, state = _SEGMENT_HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC or version != _LAYOUT_VERSION or slots != len(STATUS_CHANNELS):
+            logger.warning(f"Segmento {self.name} com layout incompatível")
+            shm.close()
+            return None
+        if state != _STATE_LIVE:
+            shm.close()
+            return None
+        return shm
+
+    def _still_current(self) -> bool:
+        """
+        Verifica se o segmento anexado ainda é o do escritor em execução
+
+        O estado do cabeçalho é conferido em toda leitura; a reabertura pelo
+        nome (que detecta um segmento recriado após reinício ou queda) só a
+        cada `attach_interval`.
+        """
+        _, _, _, _, incarnation, state = _SEGMENT_HEADER.unpack_from(self._shm.buf, 0)
+        if state != _STATE_LIVE or incarnation != self._incarnation:
+            return False
+
+        now = time.time()
+        if now - self._last_attach < self.attach_interval:
+            return True
+        self._last_attach = now
+        try:
+            current = shared_memory.SharedMemory(name=self.name)
+        except (FileNotFoundError, OSError, ValueError):
+            return False
+        _untrack(current)
+        try:
+            header = _SEGMENT_HEADER.unpack_from(current.buf, 0)
+        finally:
+            current.close()
+        return header[4] == self._incarnation
+
+    def _detach(self):
+        logger.info(f"Segmento de status {self.name} substituído ou fechado - reanexando")
+        self._shm.close()
+        self._shm = None
+        self._incarnation = 0
+        self._last_attach = 0.0
+        self._cache.clear()
+
+    def read_with_meta(self, channel: str) -> Optional[Tuple[object, int, float]]:
+        """
+        Lê um tópico de forma consistente
+
+        Returns:
+            (dados, sequência, timestamp da publicação) ou None se o segmento
+            não existe ou o tópico nunca foi publicado
+        """
+        index = STATUS_CHANNELS.get(channel)
+        if index is None or not self._attach():
+            return None
+
+        buf = self._shm.buf
+        offset = _SEGMENT_HEADER_SIZE + index * self._slot_size
+        capacity = self._slot_size - _SLOT_HEADER_SIZE
+
+        for attempt in range(self.max_retries):
+            seq = _SEQ.unpack_from(buf, offset)[0]
+            if seq == 0:
+                return None
+            if seq & 1:
+                time.sleep(0)
+                continue
+
+            cached = self._cache.get(index)
+            if cached and cached[0] == seq:
+                return cached[2], seq, cached[1]
+
+            size, _, published_at = _SLOT_META.unpack_from(buf, offset + _SEQ.size)
+            if size > capacity:
+                continue
+            start = offset + _SLOT_HEADER_SIZE
+            payload = bytes(buf[start:start + size])
+
+            if _SEQ.unpack_from(buf, offset)[0] != seq:
+                self.torn_reads += 1
+                continue
+
+            try:
+                data = pickle.loads(payload)
+            except Exception as e:
+                logger.debug(f"Payload inválido em '{channel}': {e}")
+                return None
+            self._cache[index] = (seq, published_at, data)
+            return data, seq, published_at
+
+        return None
+
+    def read(self, channel: str) -> Optional[Dict]:
+        """Último estado publicado do tópico (None se indisponível)"""
+        result = self.read_with_meta(channel)
+        return result[0] if result else None
+
+    def age(self, channel: str) -> Optional[float]:
+        """Segundos desde a última publicação do tópico"""
+        result = self.read_with_meta(channel)
+        return time.time() - result[2] if result else None
+
+    def close(self):
+        """Desanexa do segmento (nunca o remove)"""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+        self._incarnation = 0
+        self._cache.clear()
+
+
+_publisher: Optional[StatusPublisher] = None
+_publisher_failed = False
+_publisher_lock = threading.Lock()
+_reader: Optional[StatusReader] = None
+_writer = None
+
+# Espelhar os tópicos em arquivos JSON para monitores legados
+SNAPSHOT_FILES_ENABLED = os.getenv('STATUS_SNAPSHOT_FILES', '1') == '1'
+
+
+def get_status_publisher() -> Optional[StatusPublisher]:
+    """
+    Retorna o escritor singleton do processo
+
+    Returns:
+        StatusPublisher ou None se a memória compartilhada não está disponível
+    """
+    global _publisher, _publisher_failed
+    if _publisher is None and not _publisher_failed:
+        with _publisher_lock:
+            if _publisher is None and not _publisher_failed:
+                try:
+                    _publisher = StatusPublisher()
+                except Exception as e:
+                    _publisher_failed = True
+                    logger.warning(f"Canal de status indisponível: {e}")
+    return _publisher
+
+
+def publish_status(channel: str, data: Dict) -> bool:
+    """
+    Publica o status de um tópico para os monitores
+
+    Vai para a memória compartilhada e, se STATUS_SNAPSHOT_FILES estiver
+    ativo (padrão), também para o escritor de snapshots que mantém os
+    arquivos JSON dos monitores legados. O dict não deve ser alterado
+    depois da chamada.
+
+    Returns:
+        True se ao menos um dos destinos aceitou o status
+    """
+    publisher = get_status_publisher()
+    published = publisher.publish(channel, data) if publisher else False
+    if SNAPSHOT_FILES_ENABLED:
+        published = _snapshot_writer().submit(channel, data) or published
+    return published
+
+
+def _snapshot_writer():
+    global _writer
+    if _writer is None:
+        try:
+            from src.monitoring.snapshot_writer import get_snapshot_writer
+        except ImportError:
+            from monitoring.snapshot_writer import get_snapshot_writer
+        _writer = get_snapshot_writer()
+    return _writer
+
+
+def get_status_reader() -> StatusReader:
+    """Retorna o leitor singleton do processo"""
+    global _reader
+    if _reader is None:
+        _reader = StatusReader()
+    return _reader
+
+
+def read_status(channel: str, default=None, base_dir: str = '.'):
+    """
+    Lê um tópico para os monitores
+
+    Usa a memória compartilhada quando o sistema a publica e cai para o
+    arquivo JSON legado (sistemas antigos) caso contrário.
+
+    Args:
+        channel: Nome do tópico
+        default: Valor retornado se nenhuma fonte tiver dados
+        base_dir: Diretório base dos arquivos legados
+
+    Returns:
+        Dict com o status ou default
+    """
+    data = get_status_reader().read(channel)
+    if data is not None:
+        return data
+
+    legacy_file = LEGACY_STATUS_FILES.get(channel)
+    if legacy_file:
+        path = Path(base_dir) / legacy_file
+        if path.exists():
+            try:
+                import json
+                with open(path, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.debug(f"Erro ao ler {path}: {e}")
+    return default
+
+
+def status_age(channel: str, base_dir: str = '.') -> Optional[float]:
+    """
+    Idade (s) do último status do tópico, pela memória compartilhada ou
+    pelo mtime do arquivo legado
+
+    Returns:
+        Segundos desde a atualização ou None se não há dados
+    """
+    age = get_status_reader().age(channel)
+    if age is not None:
+        return age
+
+    legacy_file = LEGACY_STATUS_FILES.get(channel)
+    if legacy_file:
+        path = Path(base_dir) / legacy_file
+        if path.exists():
+            return time.time() - path.stat().st_mtime
+    return None
@@ -1,18 +1,53 @@
 """
 Monitor OCO - Gerencia cancelamento automático de ordens OCO
+Orientado a eventos: consome os callbacks de ordem da DLL (order_callback_v2)
+num índice de ordens em memória e cancela a perna irmã assim que uma executa
 """
 
 import threading
 import time
+import queue
 import logging
 from typing import Dict, Set, Optional
 
 logger = logging.getLogger('OCOMonitor')
 
+# Status do TConnectorOrderOut (OrderStatus em profit_dll_structures)
+ORDER_STATUS_NAMES = {
+    0: "PENDING",           # NEW
+    1: "PARTIALLY_FILLED",
+    2: "FILLED",
+    3: "CANCELLED",
+    4: "PENDING",           # REPLACED
+    5: "PENDING_CANCEL",
+    6: "REJECTED",
+    7: "PENDING",           # PENDING_NEW
+    8: "PENDING"            # PENDING_REPLACE
+}
+
+EXECUTED_STATUSES = ("FILLED", "PARTIALLY_FILLED")
+FINAL_STATUSES = ("FILLED", "CANCELLED", "REJECTED")
+
+
+def normalize_order_status(status) -> str:
+    """Converte código numérico ou texto de status em nome padronizado"""
+    if isinstance(status, str):
+        return status.upper()
+    return ORDER_STATUS_NAMES.get(int(status), "UNKNOWN")
+
+
 class OCOMonitor:
     """
     Monitora ordens OCO e cancela automaticamente a ordem pendente
     quando uma é executada
+
+    Atualizações de ordem entram por on_order_update(), que só enfileira
+    (pode ser chamado no thread da DLL, onde não se deve chamar a DLL de
+    volta). O thread do monitor aplica o evento no índice de ordens e, se
+    uma perna stop/take executou, cancela a irmã imediatamente. Enquanto
+    houver eventos, a consulta de status à DLL vira apenas reconciliação
+    periódica (`reconcile_interval`); sem eventos, mantém o polling a cada
+    `check_interval`.
     """
     
     def __init__(self, connection_manager):
@@ -23,12 +58,22 @@ class OCOMonitor:
         self.conn = connection_manager
         self.is_running = False
         self.monitor_thread = None
-        self.check_interval = 2.0  # Verificar a cada 2 segundos para detectar execuções
+        self.check_interval = 2.0  # Polling quando não há callbacks de ordem
+        self.reconcile_interval = 30.0  # Reconciliação quando orientado a eventos
         
         # Rastreamento de ordens
         self.oco_groups = {}  # main_order_id -> {stop_id, take_id}
         self.executed_orders = set()
         self.pending_cancellations = set()
+
+        # Índice de ordens alimentado pelos callbacks
+        self.orders: Dict[int, Dict] = {}      # order_id -> último estado
+        self._legs: Dict[int, tuple] = {}      # order_id -> (main_id, 'stop'|'take')
+        self._events = queue.Queue()
+        self._lock = threading.RLock()
+        self.event_driven = False
+        self._last_reconcile = 0.0
+        self.stats = {'order_events': 0, 'event_closes': 0, 'poll_closes': 0}
         
         # Callback para quando posição fecha
         self.position_closed_callback = None
@@ -42,12 +87,21 @@ class OCOMonitor:
             stop_order_id: ID da ordem stop loss
             take_order_id: ID da ordem take profit
         """
-        self.oco_groups[main_order_id] = {
-            'stop': stop_order_id,
-            'take': take_order_id,
-            'active': True
-        }
+        with self._lock:
+            self.oco_groups[main_order_id] = {
+                'stop': stop_order_id,
+                'take': take_order_id,
+                'active': True
+            }
+            self._legs[stop_order_id] = (main_order_id, 'stop')
+            self._legs[take_order_id] = (main_order_id, 'take')
         logger.info(f"[OCO Monitor] Registrado grupo: Main={main_order_id}, Stop={stop_order_id}, Take={take_order_id}")
+
+        # Execução pode ter chegado antes do registro
+        for order_id in (stop_order_id, take_order_id):
+            state = self.orders.get(order_id)
+            if state and state['status'] in EXECUTED_STATUSES:
+                self._on_order_executed(order_id)
         
     def start(self):
         """Inicia o monitoramento OCO"""
@@ -62,19 +116,108 @@ class OCOMonitor:
     def stop(self):
         """Para o monitoramento OCO"""
         self.is_running = False
+        self._events.put(None)  # Acordar o thread
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
         logger.info("[OCO Monitor] Parado")
         
+    def on_order_update(self, order_data: Dict):
+        """
+        Recebe atualização de ordem (formato de order_callback_v2)
+
+        Apenas enfileira - seguro para chamar dentro do callback da DLL
+
+        Args:
+            order_data: Dict com 'profit_id', 'status' e opcionalmente
+                'executed_quantity', 'remaining_quantity', 'average_price'
+        """
+        self._events.put(order_data)
+
+    def process_pending_events(self) -> int:
+        """
+        Aplica todas as atualizações de ordem enfileiradas no thread atual
+
+        Returns:
+            Número de eventos aplicados
+        """
+        processed = 0
+        while True:
+            try:
+                order_data = self._events.get_nowait()
+            except queue.Empty:
+                return processed
+            if order_data is not None:
+                self._apply_order_update(order_data)
+                processed += 1
+
+    def get_order_state(self, order_id: int) -> Optional[str]:
+        """
+        Status conhecido pelo índice de ordens (sem consultar a DLL)
+
+        Returns:
+            Nome do status ou None se a ordem não recebeu eventos
+        """
+        state = self.orders.get(order_id)
+        return state['status'] if state else None
+
     def _monitor_loop(self):
-        """Loop principal de monitoramento"""
+        """Loop principal: eventos de ordem com reconciliação periódica"""
         while self.is_running:
             try:
-                self._check_oco_executions()
-                time.sleep(self.check_interval)
+                interval = self.reconcile_interval if self.event_driven else self.check_interval
+                timeout = max(0.0, self._last_reconcile + interval - time.time())
+
+                try:
+                    order_data = self._events.get(timeout=timeout)
+                except queue.Empty:
+                    order_data = None
+
+                if order_data is not None:
+                    self._apply_order_update(order_data)
+                    self.process_pending_events()
+
+                if time.time() - self._last_reconcile >= interval:
+                    self._last_reconcile = time.time()
+                    self._check_oco_executions()
             except Exception as e:
                 logger.error(f"[OCO Monitor] Erro no loop: {e}")
                 time.sleep(5)
+
+    def _apply_order_update(self, order_data: Dict):
+        """Atualiza o índice de ordens e reage a execuções"""
+        order_id = order_data.get('profit_id')
+        if order_id is None:
+            return
+
+        status = normalize_order_status(order_data.get('status', 0))
+        self.stats['order_events'] += 1
+        self.event_driven = True
+
+        with self._lock:
+            previous = self.orders.get(order_id)
+            self.orders[order_id] = {
+                'status': status,
+                'executed_quantity': order_data.get('executed_quantity', 0),
+                'remaining_quantity': order_data.get('remaining_quantity', 0),
+                'average_price': order_data.get('average_price', 0.0),
+                'updated': time.time()
+            }
+
+        if previous is None or previous['status'] != status:
+            logger.debug(f"[OCO Monitor] Ordem {order_id}: {previous['status'] if previous else '-'} -> {status}")
+
+        if status in EXECUTED_STATUSES:
+            self._on_order_executed(order_id)
+
+    def _on_order_executed(self, order_id: int):
+        """Execução de uma perna vinda do callback: fecha o grupo na hora"""
+        self.executed_orders.add(order_id)
+        leg = self._legs.get(order_id)
+        if not leg:
+            return
+        main_id, role = leg
+        if self._close_group(main_id, role, notify=True):
+            self.stats['event_closes'] += 1
                 
     def _check_oco_executions(self):
         """
@@ -97,46 +240,59 @@ class OCOMonitor:
                 self._check_count = 0
             self._check_count += 1
             
-            if self._check_count % 10 == 0:  # Log a cada 20 segundos
+            if self._check_count % 10 == 0:
                 logger.debug(f"[OCO Monitor] Verificando grupo {main_id}: Stop={stop_id} Take={take_id}")
-                if hasattr(self.conn, 'get_order_status'):
-                    stop_status = self.conn.get_order_status(stop_id)
-                    take_status = self.conn.get_order_status(take_id)
-                    logger.debug(f"[OCO Monitor] Status - Stop: {stop_status}, Take: {take_status}")
-            
-            # Se stop foi executado, cancelar take
+
+            # Se stop foi executado, cancelar take; se take, cancelar stop
             if stop_executed:
-                if take_id not in self.pending_cancellations:
-                    logger.info(f"[OCO Monitor] Stop executado ({stop_id}), cancelando Take ({take_id})")
-                    
-                    # Notificar que posição fechou (stop atingido)
-                    if self.position_closed_callback:
-                        logger.info("[OCO Monitor] Notificando fechamento de posição por STOP")
-                        try:
-                            self.position_closed_callback("stop_executed")
-                        except Exception as e:
-                            logger.error(f"[OCO Monitor] Erro ao chamar callback: {e}")
-                    
-                    self._cancel_order(take_id)
-                    self.pending_cancellations.add(take_id)
-                    group['active'] = False
-                    
-            # Se take foi executado, cancelar stop
+                closed = self._close_group(main_id, 'stop', notify=True)
             elif take_executed:
-                if stop_id not in self.pending_cancellations:
-                    logger.info(f"[OCO Monitor] Take executado ({take_id}), cancelando Stop ({stop_id})")
-                    
-                    # Notificar que posição fechou (take atingido)
-                    if self.position_closed_callback:
-                        logger.info("[OCO Monitor] Notificando fechamento de posição por TAKE")
-                        try:
-                            self.position_closed_callback("take_executed")
-                        except Exception as e:
-                            logger.error(f"[OCO Monitor] Erro ao chamar callback: {e}")
-                    
-                    self._cancel_order(stop_id)
-                    self.pending_cancellations.add(stop_id)
-                    group['active'] = False
+                closed = self._close_group(main_id, 'take', notify=True)
+            else:
+                closed = False
+
+            if closed:
+                self.stats['poll_closes'] += 1
+
+    def _close_group(self, main_id: int, executed_role: str, notify: bool) -> bool:
+        """
+        Desativa o grupo e cancela a perna irmã da que executou
+
+        Args:
+            main_id: ID da ordem principal do grupo
+            executed_role: 'stop' ou 'take'
+            notify: Chamar position_closed_callback
+
+        Returns:
+            True se o grupo estava ativo e foi fechado agora
+        """
+        with self._lock:
+            group = self.oco_groups.get(main_id)
+            if not group or not group['active']:
+                return False
+            sibling_role = 'take' if executed_role == 'stop' else 'stop'
+            executed_id = group[executed_role]
+            sibling_id = group[sibling_role]
+            if sibling_id in self.pending_cancellations:
+                return False
+            group['active'] = False
+            self.pending_cancellations.add(sibling_id)
+
+        label = 'Stop' if executed_role == 'stop' else 'Take'
+        logger.info(f"[OCO Monitor] {label} executado ({executed_id}), cancelando {sibling_role.capitalize()} ({sibling_id})")
+
+        # Notificar que posição fechou
+        if notify and self.position_closed_callback:
+            logger.info(f"[OCO Monitor] Notificando fechamento de posição por {executed_role.upper()}")
+            try:
+                self.position_closed_callback(f"{executed_role}_executed")
+            except Exception as e:
+                logger.error(f"[OCO Monitor] Erro ao chamar callback: {e}")
+
+        # Cancelamento já confirmado pelo callback não precisa ir à DLL
+        if self.get_order_state(sibling_id) not in FINAL_STATUSES:
+            self._cancel_order(sibling_id)
+        return True
                     
     def _is_order_executed(self, order_id: int) -> bool:
         """
@@ -152,13 +308,18 @@ class OCOMonitor:
         if order_id in self.executed_orders:
             return True
         
+        # Com callbacks de ordem ativos, o índice é a fonte de verdade
+        state = self.get_order_state(order_id)
+        if state is not None and self.event_driven:
+            return state in EXECUTED_STATUSES
+
         # Verificar status real via connection manager
         if hasattr(self.conn, 'get_order_status'):
             try:
                 status = self.conn.get_order_status(order_id)
                 
                 # Considerar como executada se status for FILLED ou PARTIALLY_FILLED
-                if status in ["FILLED", "PARTIALLY_FILLED"]:
+                if status in EXECUTED_STATUSES:
                     # Adicionar ao cache para não verificar novamente
                     self.executed_orders.add(order_id)
                     logger.info(f"[OCO Monitor] Ordem {order_id} detectada como EXECUTADA (status: {status})")
@@ -209,24 +370,6 @@ class OCOMonitor:
             
         self.executed_orders.add(order_id)
         
-        # Procurar em todos os grupos OCO
-        for main_id, group in self.oco_groups.items():
-            if not group['active']:
-                continue
-                
-            stop_id = group['stop']
-            take_id = group['take']
-            
-            if order_id == stop_id:
-                # Stop executado, cancelar take
-                logger.info(f"[OCO Monitor] Stop {stop_id} marcado como executado, cancelando Take {take_id}")
-                self._cancel_order(take_id)
-                group['active'] = False
-                break
-                
-            elif order_id == take_id:
-                # Take executado, cancelar stop
-                logger.info(f"[OCO Monitor] Take {take_id} marcado como executado, cancelando Stop {stop_id}")
-                self._cancel_order(stop_id)
-                group['active'] = False
-                break
\ No newline at end of file
+        leg = self._legs.get(order_id)
+        if leg:
+            self._close_group(leg[0], leg[1], notify=False)
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Replay de sessões gravadas do QuantumTrader
+Reproduz book/trades pelo pipeline de produção sem a ProfitDLL
+"""
+
+from .simulated_connection import SimulatedConnectionManager
+from .replay_engine import (
+    ReplayEngine,
+    ReplayClock,
+    StageProfiler,
+    EVENT_DTYPE,
+    events_from_frames,
+    frames_from_events,
+    replay_feature_matrices,
+    load_market_events,
+    format_report
+)
+
+__all__ = [
+    'SimulatedConnectionManager',
+    'ReplayEngine',
+    'ReplayClock',
+    'StageProfiler',
+    'EVENT_DTYPE',
+    'events_from_frames',
+    'frames_from_events',
+    'replay_feature_matrices',
+    'load_market_events',
+    'format_report'
+]
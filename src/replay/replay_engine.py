@@ -0,0 +1,448 @@
+"""
+ReplayEngine - Replay determinístico de book/trades gravados
+Alimenta o pipeline de produção através da SimulatedConnectionManager e
+mede throughput/latência por estágio (book, trade, features, ML, HMARL, OCO)
+"""
+
+import logging
+import time
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .simulated_connection import SimulatedConnectionManager, ns_to_datetime
+
+try:
+    from src.features.feature_library import build_feature_matrix, get_feature_cache
+except ImportError:
+    from features.feature_library import build_feature_matrix, get_feature_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+BOOK_EVENT = 0
+TRADE_EVENT = 1
+
+EVENT_DTYPE = np.dtype([
+    ('ts', '<i8'),          # ns, horário local
+    ('kind', 'i1'),         # BOOK_EVENT / TRADE_EVENT
+    ('price', '<f8'),       # book: bid / trade: preço
+    ('volume', '<f8'),      # book: volume bid / trade: quantidade
+    ('ask', '<f8'),
+    ('ask_volume', '<f8'),
+    ('aggressor', 'i1'),
+])
+
+# Nomes alternativos de colunas encontrados nos CSVs coletados
+BOOK_ALIASES = {
+    'bid_price_1': ('bid_price_1', 'bid', 'best_bid'),
+    'bid_vol_1': ('bid_vol_1', 'bid_volume_1', 'bid_volume'),
+    'ask_price_1': ('ask_price_1', 'ask', 'best_ask'),
+    'ask_vol_1': ('ask_vol_1', 'ask_volume_1', 'ask_volume'),
+}
+TRADE_ALIASES = {
+    'price': ('price',),
+    'volume': ('volume', 'quantity', 'qty'),
+    'aggressor': ('aggressor',),
+}
+AGGRESSOR_CODES = {'BUY': 1, 'BUYER': 1, 'SELL': -1, 'SELLER': -1}
+
+
+def _column(df: pd.DataFrame, aliases: Tuple[str, ...], default=0.0) -> np.ndarray:
+    for name in aliases:
+        if name in df.columns:
+            return df[name].to_numpy()
+    return np.full(len(df), default)
+
+
+def _timestamps(df: pd.DataFrame) -> np.ndarray:
+    ts = pd.to_datetime(df['timestamp'], format='mixed')
+    return ts.to_numpy(dtype='datetime64[ns]').view('<i8')
+
+
+def events_from_frames(book: Optional[pd.DataFrame] = None,
+                       trades: Optional[pd.DataFrame] = None) -> np.ndarray:
+    """
+    Monta a sequência de eventos a partir de DataFrames de book e trades
+
+    A ordenação é estável por timestamp; em empates o book vem antes do
+    trade, então o resultado é sempre o mesmo para a mesma entrada.
+    """
+    parts = []
+    if book is not None and len(book):
+        events = np.zeros(len(book), dtype=EVENT_DTYPE)
+        events['ts'] = _timestamps(book)
+        events['kind'] = BOOK_EVENT
+        events['price'] = _column(book, BOOK_ALIASES['bid_price_1'])
+        events['volume'] = _column(book, BOOK_ALIASES['bid_vol_1'])
+        events['ask'] = _column(book, BOOK_ALIASES['ask_price_1'])
+        events['ask_volume'] = _column(book, BOOK_ALIASES['ask_vol_1'])
+        parts.append(events[(events['price'] > 0) & (events['ask'] > 0)])
+
+    if trades is not None and len(trades):
+        events = np.zeros(len(trades), dtype=EVENT_DTYPE)
+        events['ts'] = _timestamps(trades)
+        events['kind'] = TRADE_EVENT
+        events['price'] = _column(trades, TRADE_ALIASES['price'])
+        events['volume'] = _column(trades, TRADE_ALIASES['volume'])
+        aggressor = _column(trades, TRADE_ALIASES['aggressor'], default=0)
+        if aggressor.dtype.kind in 'OUS':
+            aggressor = np.array([AGGRESSOR_CODES.get(str(a).upper(), 0) for a in aggressor])
+        events['aggressor'] = aggressor
+        parts.append(events[events['price'] > 0])
+
+    if not parts:
+        return np.empty(0, dtype=EVENT_DTYPE)
+    events = np.concatenate(parts)
+    return events[np.argsort(events['ts'], kind='stable')]
+
+
+def frames_from_events(events: np.ndarray) -> Dict[str, pd.DataFrame]:
+    """
+    Separa uma sequência de eventos em DataFrames de trades e book
+
+    Returns:
+        {'trades': timestamp/price/volume/aggressor,
+         'book': timestamp/bid_price_1/bid_vol_1/ask_price_1/ask_vol_1}
+    """
+    trades = events[events['kind'] == TRADE_EVENT]
+    book = events[events['kind'] == BOOK_EVENT]
+    return {
+        'trades': pd.DataFrame({
+            'timestamp': trades['ts'].view('datetime64[ns]'),
+            'price': trades['price'],
+            'volume': trades['volume'],
+            'aggressor': trades['aggressor'].astype(np.float64),
+        }),
+        'book': pd.DataFrame({
+            'timestamp': book['ts'].view('datetime64[ns]'),
+            'bid_price_1': book['price'],
+            'bid_vol_1': book['volume'],
+            'ask_price_1': book['ask'],
+            'ask_vol_1': book['ask_volume'],
+        }),
+    }
+
+
+def replay_feature_matrices(events: np.ndarray, cache=None) -> Dict[str, pd.DataFrame]:
+    """
+    Matrizes de features da sessão gravada (mesmas definições do treino)
+
+    Calcula de uma vez, vetorizado, os conjuntos 'context' (trades) e
+    'book' da FeatureLibrary; sessões já processadas vêm do cache.
+
+    Args:
+        events: Eventos de load_market_events/events_from_frames
+        cache: FeatureCache (padrão: cache compartilhado do processo)
+
+    Returns:
+        {'context': DataFrame, 'book': DataFrame}
+    """
+    cache = cache if cache is not None else get_feature_cache()
+    frames = frames_from_events(events)
+    return {
+        'context': build_feature_matrix(frames['trades'], 'context', cache),
+        'book': build_feature_matrix(frames['book'], 'book', cache),
+    }
+
+
+def load_market_events(data_dir: Union[str, Path] = "data/book_tick_data",
+                       start=None, end=None,
+                       symbol: Optional[str] = None) -> np.ndarray:
+    """
+    Carrega book e trades gravados (CSV ou .qtr) como sequência de eventos
+
+    Usa o TickStore (importação incremental dos arquivos coletados), então
+    replays repetidos não re-parseiam os CSVs.
+
+    Args:
+        data_dir: Diretório com book_data_* / tick_data_*
+        start: Início do intervalo (inclusivo)
+        end: Fim do intervalo (exclusivo)
+        symbol: Filtrar por símbolo (se a coluna existir)
+    """
+    from src.market_data.tick_store import ingest_recorded_data
+
+    stores = ingest_recorded_data(data_dir)
+    frames = {}
+    for kind in ('book', 'tick'):
+        store = stores.get(kind)
+        df = store.to_dataframe(start, end) if store is not None and store.exists() else None
+        if df is not None and symbol and 'symbol' in df.columns:
+            df = df[df['symbol'].astype(str) == symbol]
+        frames[kind] = df
+
+    events = events_from_frames(frames['book'], frames['tick'])
+    logger.info(f"[REPLAY] {len(events):,} eventos carregados de {data_dir}")
+    return events
+
+
+class StageProfiler:
+    """
+    Mede latência por estágio envolvendo métodos de instância
+
+    Os tempos são inclusivos (um estágio que chama outro inclui o tempo
+    dele) e guardados em ns para o cálculo de percentis no relatório.
+    """
+
+    def __init__(self):
+        self.samples: Dict[str, List[int]] = {}
+        self._wrapped: List[Tuple[Any, str]] = []
+
+    def instrument(self, obj: Any, method: str, stage: str) -> bool:
+        """Substitui obj.method por uma versão cronometrada"""
+        if obj is None or not hasattr(obj, method):
+            return False
+        original = getattr(obj, method)
+        samples = self.samples.setdefault(stage, [])
+        clock = time.perf_counter_ns
+
+        @wraps(original)
+        def timed(*args, **kwargs):
+            t0 = clock()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append(clock() - t0)
+
+        setattr(obj, method, timed)
+        self._wrapped.append((obj, method))
+        return True
+
+    def restore(self):
+        """Remove a instrumentação (volta aos métodos da classe)"""
+        for obj, method in self._wrapped:
+            try:
+                delattr(obj, method)
+            except AttributeError:
+                pass
+        self._wrapped.clear()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        stages = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            values = np.asarray(samples, dtype=np.float64) / 1000.0  # us
+            total_s = values.sum() / 1e6
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stages[stage] = {
+                'calls': len(values),
+                'total_s': total_s,
+                'throughput_per_s': len(values) / total_s if total_s > 0 else 0.0,
+                'mean_us': float(values.mean()),
+                'p50_us': float(p50),
+                'p95_us': float(p95),
+                'p99_us': float(p99),
+                'max_us': float(values.max()),
+            }
+        return stages
+
+
+class ReplayClock:
+    """
+    Relógio do replay para módulos que usam datetime.now()
+
+    install() troca o `datetime` importado pelos módulos informados por
+    uma subclasse cujo now() devolve o horário do último evento, tornando
+    as regras baseadas em tempo (intervalo entre trades, locks) iguais às
+    da sessão original.
+    """
+
+    def __init__(self, connection: SimulatedConnectionManager):
+        self.connection = connection
+        self._patched: List[Tuple[Any, Any]] = []
+
+    def now(self) -> datetime:
+        return self.connection.now()
+
+    def install(self, *modules):
+        clock = self
+
+        class ReplayDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now()
+
+        for module in modules:
+            if getattr(module, 'datetime', None) is datetime:
+                self._patched.append((module, module.datetime))
+                module.datetime = ReplayDatetime
+
+    def restore(self):
+        for module, original in self._patched:
+            module.datetime = original
+        self._patched.clear()
+
+
+class ReplayEngine:
+    """
+    Reproduz uma sessão gravada através do pipeline de produção
+
+    O sistema recebe os eventos pelos mesmos callbacks da conexão real e,
+    a cada `decision_interval` segundos do horário gravado, executa um ciclo
+    de decisão (`trading_step`: predição ML/HMARL/regime + OCO), como o
+    trading_loop faz em produção.
+    """
+
+    def __init__(self, system, connection: SimulatedConnectionManager,
+                 speed: float = 0.0, decision_interval: float = 5.0,
+                 profile: bool = True):
+        """
+        Args:
+            system: Sistema de trading (process_book_update, process_trade_update,
+                    trading_step) já ligado à conexão simulada
+            connection: Conexão simulada que recebe os eventos
+            speed: 0 = o mais rápido possível; 1.0 = tempo real; N = N x
+            decision_interval: Intervalo (s, horário gravado) entre decisões
+            profile: Instrumentar os estágios para o relatório de latência
+        """
+        self.system = system
+        self.connection = connection
+        self.speed = speed
+        self.decision_interval_ns = int(decision_interval * 1e9)
+        self.profiler = StageProfiler() if profile else None
+        self.decisions = 0
+        self.signals = 0
+
+    def _stages(self) -> List[Tuple[Any, str, str]]:
+        system = self.system
+        return [
+            (system, 'process_book_update', 'book_update'),
+            (system, 'process_trade_update', 'trade_update'),
+            (system, '_calculate_feature_vector', 'features'),
+            (getattr(system, 'ml_predictor', None), 'predict_vector', 'ml_predict'),
+            (getattr(system, 'hmarl_agents', None), 'get_consensus', 'hmarl_consensus'),
+            (getattr(system, 'regime_system', None), 'process_market_data', 'regime'),
+            (system, 'make_hybrid_prediction', 'prediction'),
+            (system, 'execute_trade_with_oco', 'oco_submit'),
+            (system, 'trading_step', 'decision'),
+            (self.connection, 'match_orders', 'order_matching'),
+        ]
+
+    def _instrument(self):
+        for obj, method, stage in self._stages():
+            self.profiler.instrument(obj, method, stage)
+        # Re-registrar callbacks para que a conexão chame as versões medidas
+        self.connection.set_offer_book_callback(self.system.process_book_update)
+        self.connection.set_trade_callback(self.system.process_trade_update)
+
+    def _decide(self):
+        prediction = self.system.trading_step()
+        self.decisions += 1
+        if prediction and prediction.get('signal', 0) != 0:
+            self.signals += 1
+
+    def run(self, events: np.ndarray, max_events: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Executa o replay
+
+        Args:
+            events: Array EVENT_DTYPE (load_market_events/events_from_frames)
+            max_events: Limitar número de eventos
+
+        Returns:
+            Relatório com totais, throughput e latência por estágio
+        """
+        if max_events is not None:
+            events = events[:max_events]
+        if len(events) == 0:
+            logger.warning("[REPLAY] Nenhum evento para reproduzir")
+            return {'events': 0}
+
+        if self.profiler:
+            self._instrument()
+
+        conn = self.connection
+        feed_book = conn.feed_book
+        feed_trade = conn.feed_trade
+        interval = self.decision_interval_ns
+        speed = self.speed
+
+        ts_all = events['ts']
+        first_ts = int(ts_all[0])
+        next_decision = first_ts + interval
+        wall_start = time.perf_counter()
+
+        try:
+            columns = zip(ts_all.tolist(), events['kind'].tolist(), events['price'].tolist(),
+                          events['volume'].tolist(), events['ask'].tolist(),
+                          events['ask_volume'].tolist(), events['aggressor'].tolist())
+            for ts, kind, price, volume, ask, ask_volume, aggressor in columns:
+                if speed > 0:
+                    delay = wall_start + (ts - first_ts) / 1e9 / speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                # Lacuna nos dados (ex.: noite): pular para o intervalo que
+                # contém ts em vez de decidir a cada intervalo vazio
+                if ts - next_decision > interval:
+                    next_decision += (ts - next_decision) // interval * interval
+
+                while ts >= next_decision:
+                    conn.clock_ns = next_decision
+                    self._decide()
+                    next_decision += interval
+
+                if kind == BOOK_EVENT:
+                    feed_book(ts, price, volume, ask, ask_volume)
+                else:
+                    feed_trade(ts, price, volume, aggressor)
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            if self.profiler:
+                self.profiler.restore()
+
+        span = (int(ts_all[-1]) - first_ts) / 1e9
+        report = {
+            'events': len(events),
+            'book_events': int(np.count_nonzero(events['kind'] == BOOK_EVENT)),
+            'trade_events': int(np.count_nonzero(events['kind'] == TRADE_EVENT)),
+            'start': ns_to_datetime(first_ts).isoformat(),
+            'end': ns_to_datetime(int(ts_all[-1])).isoformat(),
+            'replay_span_s': span,
+            'wall_time_s': wall_time,
+            'events_per_s': len(events) / wall_time if wall_time > 0 else 0.0,
+            'speedup': span / wall_time if wall_time > 0 else 0.0,
+            'decisions': self.decisions,
+            'signals': self.signals,
+            'execution': conn.get_session_summary(),
+            'stages': self.profiler.report() if self.profiler else {},
+        }
+        return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Relatório em texto (console)"""
+    lines = [
+        "=" * 80,
+        " RELATÓRIO DE REPLAY",
+        "=" * 80,
+        f"Período:     {report.get('start')} -> {report.get('end')}",
+        f"Eventos:     {report.get('events', 0):,} "
+        f"(book {report.get('book_events', 0):,} / trades {report.get('trade_events', 0):,})",
+        f"Tempo:       {report.get('wall_time_s', 0):.2f}s "
+        f"({report.get('events_per_s', 0):,.0f} eventos/s, {report.get('speedup', 0):.1f}x tempo real)",
+        f"Decisões:    {report.get('decisions', 0)} (sinais: {report.get('signals', 0)})",
+    ]
+    execution = report.get('execution')
+    if execution:
+        lines.append(f"Execuções:   {execution['entries']} entradas, {execution['fills']} fills, "
+                     f"PnL R$ {execution['realized_pnl']:.2f}")
+
+    stages = report.get('stages') or {}
+    if stages:
+        lines.append("")
+        lines.append(f"{'Estágio':<18}{'Chamadas':>10}{'Total(s)':>10}{'Média(us)':>11}"
+                     f"{'p50':>9}{'p95':>9}{'p99':>9}{'Máx':>10}")
+        lines.append("-" * 86)
+        for stage, s in stages.items():
+            lines.append(f"{stage:<18}{s['calls']:>10,}{s['total_s']:>10.3f}{s['mean_us']:>11.1f}"
+                         f"{s['p50_us']:>9.1f}{s['p95_us']:>9.1f}{s['p99_us']:>9.1f}{s['max_us']:>10.1f}")
+    lines.append("=" * 80)
+    return "\n".join(lines)
@@ -0,0 +1,459 @@
+"""
+SimulatedConnectionManager - Conexão simulada para replay sem ProfitDLL
+Mesma interface do ConnectionManagerOCO: callbacks de book/trade, envio de
+ordens com bracket (OCO), status, posição e cancelamentos
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from src.oco_monitor import OCOMonitor
+
+
+EPOCH = datetime(1970, 1, 1)
+AGGRESSOR_LABELS = {1: 'BUY', -1: 'SELL', 0: 'UNKNOWN'}
+
+
+def ns_to_datetime(ts_ns: int) -> datetime:
+    """Timestamp (ns, horário local sem timezone) -> datetime"""
+    return EPOCH + timedelta(microseconds=int(ts_ns) // 1000)
+
+
+class SimulatedConnectionManager:
+    """
+    Conexão simulada alimentada pelo ReplayEngine
+
+    Os eventos de mercado chegam por feed_book/feed_trade (no lugar dos
+    callbacks da DLL) e são repassados aos callbacks registrados pelo sistema
+    com os mesmos dicts do ConnectionManagerWorking. Ordens a mercado são
+    executadas no melhor preço do book; stop/take ficam pendentes e são
+    executados quando book ou trades cruzam o preço. Após cada execução o
+    OCOMonitor é verificado de forma síncrona (sem thread), o que mantém o
+    replay determinístico.
+    """
+
+    def __init__(self, symbol: str = 'WDOU25', tick_size: float = 0.5,
+                 point_value: float = 10.0):
+        """
+        Args:
+            symbol: Ticker simulado
+            tick_size: Tamanho do tick
+            point_value: Valor (R$) de um ponto por contrato (WDO = 10)
+        """
+        self.logger = logging.getLogger('SimulatedConnectionManager')
+        self.dll = None
+        self.target_ticker = symbol
+        self.tick_size = tick_size
+        self.point_value = point_value
+
+        # Estados para compatibilidade
+        self.connected = False
+        self.market_connected = False
+        self.broker_connected = False
+        self.routing_connected = False
+        self.bMarketConnected = False
+        self.bBrokerConnected = False
+
+        self.callbacks = {
+            'state': 0,
+            'trade': 0,
+            'tiny_book': 0,
+            'offer_book': 0,
+            'price_book': 0,
+            'daily': 0
+        }
+
+        # Dados de mercado atuais
+        self.clock_ns = 0
+        self.last_bid = 0
+        self.last_ask = 0
+        self.last_trade_price = 0
+        self.last_book_update = {}
+
+        # Callbacks externos
+        self._offer_book_callback: Optional[Callable] = None
+        self._trade_callback: Optional[Callable] = None
+
+        self._lock = threading.RLock()
+
+        # Ordens
+        self._next_order_id = 1
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self.active_orders: Dict[int, Dict[str, Any]] = {}  # pendentes
+        self.oco_pairs: Dict[int, Dict[str, int]] = {}
+        self.executed_orders = set()
+
+        # Posição e resultado
+        self.position = 0
+        self.avg_price = 0.0
+        self.realized_pnl = 0.0
+        self.fills: List[Dict[str, Any]] = []
+
+        # Volume (mesmas chaves do VolumeTracker)
+        self.volume_stats = {
+            'current_volume': 0,
+            'cumulative_volume': 0,
+            'buy_volume': 0,
+            'sell_volume': 0,
+            'delta_volume': 0,
+            'volume_ratio': 0,
+            'last_trade': None
+        }
+
+        # OCO alimentado por eventos de ordem, aplicados a cada execução
+        # (sem thread de polling)
+        self.oco_monitor = OCOMonitor(self)
+
+    # ------------------------------------------------------------------
+    # Conexão
+    # ------------------------------------------------------------------
+
+    @property
+    def best_bid(self) -> float:
+        return self.last_bid
+
+    @property
+    def best_ask(self) -> float:
+        return self.last_ask
+
+    @property
+    def last_price(self) -> float:
+        return self.last_trade_price
+
+    def now(self) -> datetime:
+        """Horário do replay (último evento recebido)"""
+        return ns_to_datetime(self.clock_ns)
+
+    def connect(self) -> bool:
+        self.connected = True
+        self.market_connected = self.bMarketConnected = True
+        self.broker_connected = self.bBrokerConnected = True
+        self.routing_connected = True
+        self.logger.info(f"[SIM] Conexão simulada ativa para {self.target_ticker}")
+        return True
+
+    def subscribe_symbol(self, symbol: str) -> bool:
+        self.target_ticker = symbol
+        return True
+
+    def disconnect(self):
+        self.connected = False
+
+    def set_offer_book_callback(self, callback: Callable):
+        """Define callback para book updates"""
+        self._offer_book_callback = callback
+
+    def set_trade_callback(self, callback: Callable):
+        """Define callback para trades"""
+        self._trade_callback = callback
+
+    def get_volume_stats(self) -> Dict[str, Any]:
+        return dict(self.volume_stats)
+
+    def get_current_prices(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'bid': self.last_bid,
+                'ask': self.last_ask,
+                'last': self.last_trade_price,
+                'mid': (self.last_bid + self.last_ask) / 2 if self.last_bid > 0 and self.last_ask > 0 else 0
+            }
+
+    def is_receiving_data(self) -> bool:
+        return self.last_bid > 0 and self.last_ask > 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'connected': self.connected,
+            'market_connected': self.market_connected,
+            'broker_connected': self.broker_connected,
+            'receiving_data': self.is_receiving_data(),
+            'callbacks': dict(self.callbacks),
+            'last_bid': self.last_bid,
+            'last_ask': self.last_ask,
+            'last_trade': self.last_trade_price
+        }
+
+    # ------------------------------------------------------------------
+    # Feed de mercado (chamado pelo ReplayEngine)
+    # ------------------------------------------------------------------
+
+    def feed_book(self, ts_ns: int, bid_price: float, bid_volume: float,
+                  ask_price: float, ask_volume: float):
+        """Atualiza o topo do book e dispara o callback de book"""
+        self.clock_ns = ts_ns
+        self.callbacks['offer_book'] += 1
+        self.last_bid = bid_price
+        self.last_ask = ask_price
+
+        book_data = {
+            'bid_price_1': bid_price,
+            'bid_volume_1': bid_volume,
+            'ask_price_1': ask_price,
+            'ask_volume_1': ask_volume,
+            'timestamp': self.now().isoformat()
+        }
+        self.last_book_update = book_data
+
+        if self._offer_book_callback:
+            try:
+                self._offer_book_callback(self.target_ticker, book_data)
+            except Exception as e:
+                self.logger.error(f"Erro no book callback externo: {e}")
+
+        if self.active_orders:
+            self.match_orders(bid=bid_price, ask=ask_price)
+
+    def feed_trade(self, ts_ns: int, price: float, quantity: float, aggressor: int = 0):
+        """Registra um trade (volume/agressão) e dispara o callback de trades"""
+        self.clock_ns = ts_ns
+        self.callbacks['trade'] += 1
+        self.last_trade_price = price
+
+        side = AGGRESSOR_LABELS.get(int(aggressor), 'UNKNOWN')
+        stats = self.volume_stats
+        stats['current_volume'] = quantity
+        stats['cumulative_volume'] += quantity
+        if side == 'BUY':
+            stats['buy_volume'] += quantity
+        elif side == 'SELL':
+            stats['sell_volume'] += quantity
+        stats['delta_volume'] = stats['buy_volume'] - stats['sell_volume']
+        stats['volume_ratio'] = stats['buy_volume'] / stats['sell_volume'] if stats['sell_volume'] > 0 else 0
+
+        trade_data = {
+            'timestamp': self.now().isoformat(),
+            'price': price,
+            'quantity': quantity,
+            'aggressor': side
+        }
+        stats['last_trade'] = trade_data
+
+        if self._trade_callback and quantity > 0:
+            try:
+                self._trade_callback(self.target_ticker, trade_data)
+            except Exception as e:
+                self.logger.error(f"Erro no trade callback externo: {e}")
+
+        if self.active_orders:
+            self.match_orders(trade_price=price)
+
+    # ------------------------------------------------------------------
+    # Execução simulada
+    # ------------------------------------------------------------------
+
+    def match_orders(self, bid: float = 0, ask: float = 0, trade_price: float = 0):
+        """Executa stops/takes pendentes cruzados pelo book ou por um trade"""
+        filled = False
+        for order_id, order in list(self.active_orders.items()):
+            price = order['price']
+            if order['side'] == 'SELL':
+                ref = trade_price or bid
+                if not ref:
+                    continue
+                if order['type'] == 'STOP' and ref <= price:
+                    self._fill(order, ref)
+                    filled = True
+                elif order['type'] == 'LIMIT' and ref >= price:
+                    self._fill(order, price)
+                    filled = True
+            else:
+                ref = trade_price or ask
+                if not ref:
+                    continue
+                if order['type'] == 'STOP' and ref >= price:
+                    self._fill(order, ref)
+                    filled = True
+                elif order['type'] == 'LIMIT' and ref <= price:
+                    self._fill(order, price)
+                    filled = True
+
+        if filled:
+            # Mesmo fluxo do callback de ordem em produção, mas síncrono
+            self.oco_monitor.process_pending_events()
+
+    def _new_order(self, symbol: str, side: str, quantity: int,
+                   order_type: str, price: float) -> Dict[str, Any]:
+        order_id = self._next_order_id
+        self._next_order_id += 1
+        order = {
+            'id': order_id,
+            'symbol': symbol,
+            'side': side,
+            'quantity': quantity,
+            'type': order_type,
+            'price': price,
+            'status': 'PENDING',
+            'created': self.clock_ns
+        }
+        self.orders[order_id] = order
+        return order
+
+    def _fill(self, order: Dict[str, Any], price: float):
+        order['status'] = 'FILLED'
+        order['fill_price'] = price
+        order['filled'] = self.clock_ns
+        self.active_orders.pop(order['id'], None)
+        self.executed_orders.add(order['id'])
+        self._publish_order(order)
+
+        signed = order['quantity'] if order['side'] == 'BUY' else -order['quantity']
+        if self.position != 0 and (self.position > 0) != (signed > 0):
+            closed = min(abs(signed), abs(self.position))
+            direction = 1 if self.position > 0 else -1
+            self.realized_pnl += (price - self.avg_price) * closed * direction * self.point_value
+        new_position = self.position + signed
+        if new_position == 0:
+            self.avg_price = 0.0
+        elif self.position == 0 or (self.position > 0) != (new_position > 0):
+            self.avg_price = price
+        elif (self.position > 0) == (signed > 0):
+            self.avg_price = (self.avg_price * abs(self.position) + price * abs(signed)) / abs(new_position)
+        self.position = new_position
+
+        self.fills.append({
+            'order_id': order['id'],
+            'timestamp': self.now().isoformat(),
+            'side': order['side'],
+            'type': order['type'],
+            'quantity': order['quantity'],
+            'price': price,
+            'position': self.position,
+            'realized_pnl': self.realized_pnl
+        })
+        self.logger.info(f"[SIM] Ordem {order['id']} executada: {order['side']} {order['quantity']} @ {price:.1f} ({order['type']})")
+
+    def _publish_order(self, order: Dict[str, Any]):
+        """Emite atualização de ordem no formato de order_callback_v2"""
+        filled = order['status'] == 'FILLED'
+        self.oco_monitor.on_order_update({
+            'profit_id': order['id'],
+            'status': order['status'],
+            'executed_quantity': order['quantity'] if filled else 0,
+            'remaining_quantity': 0,
+            'average_price': order.get('fill_price', 0.0)
+        })
+
+    def send_order_with_bracket(self, symbol, side, quantity, entry_price,
+                                stop_price, take_price,
+                                account_id=None, broker_id=None, password=None):
+        """
+        Envia ordem principal com bracket (stop loss e take profit)
+
+        Returns:
+            dict: {'main_order': id, 'stop_order': id, 'take_order': id} ou None
+        """
+        side = side.upper()
+        market_price = self.last_ask if side == 'BUY' else self.last_bid
+        fill_price = entry_price if entry_price and entry_price > 0 else market_price
+        if not fill_price:
+            self.logger.error("[SIM] Sem preço de mercado para executar ordem")
+            return None
+
+        exit_side = 'SELL' if side == 'BUY' else 'BUY'
+        main = self._new_order(symbol, side, quantity, 'MARKET', fill_price)
+        self._fill(main, fill_price)
+
+        stop = self._new_order(symbol, exit_side, quantity, 'STOP', stop_price)
+        take = self._new_order(symbol, exit_side, quantity, 'LIMIT', take_price)
+        self.active_orders[stop['id']] = stop
+        self.active_orders[take['id']] = take
+
+        self.oco_pairs[main['id']] = {'stop': stop['id'], 'take': take['id']}
+        self.oco_monitor.register_oco_group(main['id'], stop['id'], take['id'])
+        self.oco_monitor.process_pending_events()
+
+        return {
+            'main_order': main['id'],
+            'stop_order': stop['id'],
+            'take_order': take['id']
+        }
+
+    def cancel_order_by_id(self, order_id, symbol=None) -> bool:
+        order = self.active_orders.pop(order_id, None)
+        if order is None:
+            return False
+        order['status'] = 'CANCELLED'
+        self._publish_order(order)
+        return True
+
+    def cancel_order(self, order_id, symbol=None) -> bool:
+        return self.cancel_order_by_id(order_id, symbol)
+
+    def cancel_bracket_orders(self, main_order_id) -> bool:
+        pair = self.oco_pairs.get(main_order_id)
+        if not pair:
+            return False
+        for order_id in pair.values():
+            self.cancel_order_by_id(order_id)
+        return True
+
+    def check_and_cancel_oco_pair(self, executed_order_id):
+        for pair in self.oco_pairs.values():
+            if executed_order_id == pair['stop']:
+                self.cancel_order_by_id(pair['take'])
+            elif executed_order_id == pair['take']:
+                self.cancel_order_by_id(pair['stop'])
+
+    def cancel_all_pending_orders(self, symbol=None, account_id=None, broker_id=None, password=None) -> bool:
+        for order_id in list(self.active_orders):
+            self.cancel_order_by_id(order_id)
+        for group in self.oco_monitor.oco_groups.values():
+            group['active'] = False
+        return True
+
+    def modify_stop_loss(self, main_order_id, new_stop_price) -> bool:
+        pair = self.oco_pairs.get(main_order_id)
+        if not pair or pair['stop'] not in self.active_orders:
+            return False
+        self.active_orders[pair['stop']]['price'] = new_stop_price
+        return True
+
+    def close_all_positions(self, symbol=None) -> bool:
+        """Zera a posição a mercado e cancela pendentes"""
+        self.cancel_all_pending_orders(symbol)
+        if self.position == 0:
+            return True
+        side = 'SELL' if self.position > 0 else 'BUY'
+        price = self.last_bid if side == 'SELL' else self.last_ask
+        order = self._new_order(symbol or self.target_ticker, side, abs(self.position), 'MARKET', price)
+        self._fill(order, price)
+        return True
+
+    def get_order_status(self, order_id) -> str:
+        order = self.orders.get(order_id)
+        return order['status'] if order else "UNKNOWN"
+
+    def mark_order_as_executed(self, order_id):
+        self.executed_orders.add(order_id)
+        self.oco_monitor.mark_order_executed(order_id)
+
+    def get_position(self, symbol=None, account_id=None, broker_id=None):
+        if self.position == 0:
+            return None
+        return {
+            'quantity': abs(self.position),
+            'side': 'BUY' if self.position > 0 else 'SELL',
+            'avg_price': self.avg_price
+        }
+
+    def get_position_safe(self, symbol=None):
+        return self.get_position(symbol)
+
+    def check_position_exists(self, symbol=None):
+        if self.position == 0:
+            return (False, 0, "")
+        return (True, abs(self.position), 'BUY' if self.position > 0 else 'SELL')
+
+    def get_session_summary(self) -> Dict[str, Any]:
+        """Resumo das execuções simuladas"""
+        entries = sum(1 for f in self.fills if f['type'] == 'MARKET')
+        return {
+            'fills': len(self.fills),
+            'entries': entries,
+            'open_position': self.position,
+            'realized_pnl': self.realized_pnl,
+            'pending_orders': len(self.active_orders)
+        }
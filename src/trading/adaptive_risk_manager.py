@@ -10,6 +10,8 @@ import logging
 from collections import deque
 from datetime import datetime, timedelta
 
+from .support_resistance import LevelDetector, nearest_levels
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -43,6 +45,9 @@ class AdaptiveRiskManager:
         self.low_buffer = deque(maxlen=100)
         self.volume_buffer = deque(maxlen=100)
         
+        # Pivôs de 3 preços (mínimo/máximo local estrito) dos últimos 50 preços
+        self.levels = self._level_detector(50)
+        
         # Configurações por regime de volatilidade
         self.volatility_configs = {
             'LOW': {
@@ -84,6 +89,7 @@ class AdaptiveRiskManager:
                        low: float = None, volume: float = None):
         """Atualiza buffers com novos dados"""
         self.price_buffer.append(price)
+        self.levels.push(price)
         if high:
             self.high_buffer.append(high)
         if low:
@@ -91,6 +97,10 @@ class AdaptiveRiskManager:
         if volume:
             self.volume_buffer.append(volume)
     
+    def on_bar(self, bar):
+        """Atualiza buffers com uma barra fechada (assinante do BarAggregator)"""
+        self.update_buffers(bar.close, bar.high, bar.low, bar.volume)
+    
     def calculate_atr(self, period: int = 14) -> float:
         """Calcula Average True Range"""
         if len(self.high_buffer) < period or len(self.low_buffer) < period:
@@ -152,32 +162,32 @@ class AdaptiveRiskManager:
         else:
             return 'TRENDING'
     
+    @staticmethod
+    def _level_detector(lookback: int) -> LevelDetector:
+        return LevelDetector(window=lookback, left=1, right=1, margin=2,
+                             strict=True, min_points=10)
+    
     def find_support_resistance(self, lookback: int = 50) -> Tuple[float, float]:
         """Encontra níveis de suporte e resistência próximos"""
         if len(self.price_buffer) < 10:
             current = self.price_buffer[-1] if self.price_buffer else 5400.0
             return current - 20.0, current + 20.0
         
-        prices = list(self.price_buffer)[-min(lookback, len(self.price_buffer)):]
-        current = prices[-1]
-        
-        # Encontrar mínimos e máximos locais
-        lows = []
-        highs = []
-        
-        for i in range(2, len(prices) - 2):
-            if prices[i] < prices[i-1] and prices[i] < prices[i+1]:
-                lows.append(prices[i])
-            if prices[i] > prices[i-1] and prices[i] > prices[i+1]:
-                highs.append(prices[i])
-        
-        # Suporte: menor low abaixo do preço atual
-        support_candidates = [p for p in lows if p < current]
-        support = max(support_candidates) if support_candidates else current - 15.0
-        
-        # Resistência: maior high acima do preço atual
-        resistance_candidates = [p for p in highs if p > current]
-        resistance = min(resistance_candidates) if resistance_candidates else current + 15.0
+        current = self.price_buffer[-1]
+        if lookback == self.levels.window:
+            detector = self.levels
+        else:
+            detector = self._level_detector(lookback)
+            detector.extend(list(self.price_buffer)[-min(lookback, len(self.price_buffer)):])
+        
+        # Mínimos/máximos locais: suporte mais alto abaixo e resistência
+        # mais baixa acima do preço atual
+        lows, highs = detector.pivots()
+        support, resistance = nearest_levels(current, lows, highs)
+        if support is None:
+            support = current - 15.0
+        if resistance is None:
+            resistance = current + 15.0
         
         return support, resistance
     
@@ -9,6 +9,15 @@ from collections import deque
 from datetime import datetime, timedelta
 import logging
 
+try:
+    from src.features.streaming_features import (
+        RollingMoments, RollingRegression, RollingSum, SortedWindow
+    )
+except ImportError:
+    from features.streaming_features import (
+        RollingMoments, RollingRegression, RollingSum, SortedWindow
+    )
+
 logger = logging.getLogger(__name__)
 
 class MarketRegimeDetector:
@@ -51,6 +60,9 @@ class MarketRegimeDetector:
         # Histórico de regimes
         self.regime_history = deque(maxlen=100)
         
+        # Métricas mantidas incrementalmente (O(1) por atualização)
+        self._reset_state()
+        
         logger.info("MarketRegimeDetector inicializado")
     
     def update(self, price: float, high: float = None, low: float = None, 
@@ -67,11 +79,15 @@ class MarketRegimeDetector:
         Returns:
             Dict com regime atual e métricas
         """
-        # Atualizar buffers
+        high = high or price
+        low = low or price
+        
+        # Atualizar buffers e estado incremental das métricas
         self.price_buffer.append(price)
-        self.high_buffer.append(high or price)
-        self.low_buffer.append(low or price)
+        self.high_buffer.append(high)
+        self.low_buffer.append(low)
         self.volume_buffer.append(volume)
+        self._push_state(price, high, low)
         
         self.last_update = datetime.now()
         
@@ -81,6 +97,18 @@ class MarketRegimeDetector:
         
         return self.get_current_regime()
     
+    def on_bar(self, bar) -> Dict:
+        """
+        Atualiza com uma barra fechada (assinante do BarAggregator)
+        
+        Args:
+            bar: Barra com close/high/low/volume
+            
+        Returns:
+            Dict com regime atual e métricas
+        """
+        return self.update(bar.close, bar.high, bar.low, bar.volume)
+    
     def _analyze_regime(self):
         """Analisa e classifica o regime atual do mercado"""
         
@@ -123,58 +151,52 @@ class MarketRegimeDetector:
             'metrics': self.regime_metrics.copy()
         })
     
+    def _reset_state(self):
+        """Estado incremental das métricas (somas e janelas móveis)"""
+        w = self.window_sizes
+        self._true_ranges = RollingSum(max(w['atr'], 1))
+        self._trend = RollingRegression(max(w['trend'], 2))
+        self._short_sma = RollingSum(5)
+        self._up_moves = RollingSum(max(w['trend'] - 1, 1))
+        self._down_moves = RollingSum(max(w['trend'] - 1, 1))
+        self._range = SortedWindow(max(w['range'], 1))
+        self._returns = RollingMoments(max(w['volatility'] - 1, 1))
+        self._prev_close = None
+    
+    def _push_state(self, price: float, high: float, low: float):
+        """Atualiza todas as métricas com um novo dado em tempo constante"""
+        prev = self._prev_close
+        if prev is not None:
+            self._true_ranges.push(max(high - low, abs(high - prev), abs(low - prev)))
+            self._returns.push((price - prev) / prev if prev else 0.0)
+            self._up_moves.push(1.0 if price > prev else 0.0)
+            self._down_moves.push(1.0 if price < prev else 0.0)
+        self._trend.push(price)
+        self._short_sma.push(price)
+        self._range.push(price)
+        self._prev_close = price
+    
     def _calculate_atr(self) -> float:
-        """Calcula o Average True Range"""
+        """Calcula o Average True Range (média dos últimos true ranges)"""
         if len(self.high_buffer) < self.window_sizes['atr']:
             return 0
-        
-        window = self.window_sizes['atr']
-        true_ranges = []
-        
-        prices = list(self.price_buffer)[-window-1:]
-        highs = list(self.high_buffer)[-window:]
-        lows = list(self.low_buffer)[-window:]
-        
-        for i in range(1, len(highs)):
-            tr = max(
-                highs[i] - lows[i],  # High - Low
-                abs(highs[i] - prices[i-1]),  # High - Previous Close
-                abs(lows[i] - prices[i-1])    # Low - Previous Close
-            )
-            true_ranges.append(tr)
-        
-        return np.mean(true_ranges) if true_ranges else 0
+        return self._true_ranges.mean
     
     def _calculate_directional_strength(self) -> float:
         """
         Calcula a força direcional do movimento
         Retorna valor entre -1 (forte baixa) e +1 (forte alta)
         """
-        window = self.window_sizes['trend']
-        if len(self.price_buffer) < window:
+        trend = self._trend
+        if trend.count < self.window_sizes['trend'] or not trend.mean:
             return 0
         
-        prices = list(self.price_buffer)[-window:]
-        
-        # Calcular regressão linear
-        x = np.arange(len(prices))
-        slope, _ = np.polyfit(x, prices, 1)
-        
-        # Normalizar slope pelo preço médio
-        avg_price = np.mean(prices)
-        normalized_slope = slope / avg_price * 100
-        
-        # Calcular R-squared para medir consistência
-        y_pred = np.polyval([slope, _], x)
-        ss_res = np.sum((prices - y_pred) ** 2)
-        ss_tot = np.sum((prices - np.mean(prices)) ** 2)
-        r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
-        
-        # Combinar slope e R-squared
-        directional_strength = normalized_slope * r_squared
+        # Slope da regressão normalizado pelo preço médio, ponderado pelo R²
+        normalized_slope = trend.slope / trend.mean * 100
+        directional_strength = normalized_slope * trend.r_squared
         
         # Limitar entre -1 e 1
-        return np.clip(directional_strength, -1, 1)
+        return max(-1.0, min(1.0, directional_strength))
     
     def _calculate_range_bound_score(self) -> float:
         """
@@ -182,14 +204,13 @@ class MarketRegimeDetector:
         Retorna valor entre 0 (tendência forte) e 1 (lateralização perfeita)
         """
         window = self.window_sizes['range']
-        if len(self.price_buffer) < window:
+        prices = self._range
+        if prices.count < window:
             return 0.5
         
-        prices = list(self.price_buffer)[-window:]
-        
         # Calcular níveis de suporte e resistência
-        high = max(prices)
-        low = min(prices)
+        high = prices.max
+        low = prices.min
         range_size = high - low
         
         if range_size == 0:
@@ -198,13 +219,13 @@ class MarketRegimeDetector:
         # Contar quantas vezes o preço tocou suporte/resistência
         touch_threshold = range_size * 0.05  # 5% do range
         
-        resistance_touches = sum(1 for p in prices if abs(p - high) < touch_threshold)
-        support_touches = sum(1 for p in prices if abs(p - low) < touch_threshold)
+        resistance_touches = prices.count_between(high - touch_threshold, high, include_low=False)
+        support_touches = prices.count_between(low, low + touch_threshold, include_high=False)
         
         # Calcular porcentagem de tempo dentro do range central
         upper_bound = low + range_size * 0.8
         lower_bound = low + range_size * 0.2
-        time_in_range = sum(1 for p in prices if lower_bound <= p <= upper_bound) / len(prices)
+        time_in_range = prices.count_between(lower_bound, upper_bound) / prices.count
         
         # Combinar métricas
         touch_score = min((resistance_touches + support_touches) / 10, 1.0)
@@ -216,17 +237,11 @@ class MarketRegimeDetector:
         """
         Calcula volatilidade normalizada pelo preço
         """
-        window = self.window_sizes['volatility']
-        if len(self.price_buffer) < window:
+        if len(self.price_buffer) < self.window_sizes['volatility']:
             return 0
         
-        prices = list(self.price_buffer)[-window:]
-        returns = np.diff(prices) / prices[:-1]
-        
         # Volatilidade anualizada (considerando ~252 dias de trading)
-        volatility = np.std(returns) * np.sqrt(252)
-        
-        return volatility
+        return self._returns.std * np.sqrt(252)
     
     def _calculate_trend_consistency(self) -> float:
         """
@@ -234,22 +249,18 @@ class MarketRegimeDetector:
         Retorna valor entre 0 (sem consistência) e 1 (tendência muito consistente)
         """
         window = self.window_sizes['trend']
-        if len(self.price_buffer) < window:
+        if self._trend.count < window:
             return 0
         
-        prices = list(self.price_buffer)[-window:]
-        
         # Calcular médias móveis
-        sma_short = np.mean(prices[-5:])
-        sma_long = np.mean(prices)
+        sma_short = self._short_sma.mean
+        sma_long = self._trend.mean
         
-        # Contar candles na direção da tendência
+        # Proporção de candles na direção da tendência
         if sma_short > sma_long:  # Tendência de alta
-            bullish_candles = sum(1 for i in range(1, len(prices)) if prices[i] > prices[i-1])
-            consistency = bullish_candles / (len(prices) - 1)
+            consistency = self._up_moves.total / (window - 1)
         elif sma_short < sma_long:  # Tendência de baixa
-            bearish_candles = sum(1 for i in range(1, len(prices)) if prices[i] < prices[i-1])
-            consistency = bearish_candles / (len(prices) - 1)
+            consistency = self._down_moves.total / (window - 1)
         else:
             consistency = 0.5
         
@@ -53,8 +53,24 @@ class OptimizationSystem:
         self.daily_trades = 0
         self.last_update = None
         
+        # Fonte de barras (BarAggregator); quando ligada, o detector de regime
+        # é alimentado pelas barras fechadas e não a cada atualização
+        self.bar_source = None
+        
         logger.info("OptimizationSystem inicializado com todos os módulos")
     
+    def attach_bar_aggregator(self, aggregator, timeframe: str = '1min'):
+        """
+        Alimenta o detector de regime com as barras fechadas do agregador
+        
+        Args:
+            aggregator: BarAggregator compartilhado pelo sistema
+            timeframe: Timeframe das barras usadas pelo detector
+        """
+        if self.regime_detector:
+            aggregator.subscribe(timeframe, self.regime_detector.on_bar)
+            self.bar_source = aggregator
+    
     def process_market_update(self, market_data: Dict) -> Dict:
         """
         Processa atualização de mercado através de todos os módulos
@@ -75,12 +91,15 @@ class OptimizationSystem:
         
         # 1. Detectar regime de mercado
         if self.regime_detector:
-            regime_data = self.regime_detector.update(
-                price=market_data.get('price', 0),
-                high=market_data.get('high'),
-                low=market_data.get('low'),
-                volume=market_data.get('volume', 0)
-            )
+            if self.bar_source is not None:
+                regime_data = self.regime_detector.get_current_regime()
+            else:
+                regime_data = self.regime_detector.update(
+                    price=market_data.get('price', 0),
+                    high=market_data.get('high'),
+                    low=market_data.get('low'),
+                    volume=market_data.get('volume', 0)
+                )
             
             analysis['regime'] = regime_data['regime']
             analysis['regime_confidence'] = regime_data['confidence']
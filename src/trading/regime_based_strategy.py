@@ -12,6 +12,17 @@ import logging
 from collections import deque
 from datetime import datetime
 
+try:
+    from src.features.streaming_features import (
+        RollingExtremum, RollingMoments, RollingRegression, RollingSum
+    )
+except ImportError:
+    from features.streaming_features import (
+        RollingExtremum, RollingMoments, RollingRegression, RollingSum
+    )
+
+from .support_resistance import LevelDetector
+
 logger = logging.getLogger(__name__)
 
 def round_to_tick(price: float, tick_size: float = 0.5) -> float:
@@ -59,8 +70,31 @@ class RegimeDetector:
         self.regime_history = deque(maxlen=20)
         self.trend_strength_history = deque(maxlen=20)
         
+        # Estado incremental: regressões (com médias) de 5/10/20 períodos,
+        # extremos e média de 14, volatilidade dos retornos - O(1) por preço
+        self._trends = {p: RollingRegression(max(min(p, lookback_periods), 2)) for p in (5, 10, 20)}
+        self._range_high = RollingExtremum(min(14, lookback_periods), 'max')
+        self._range_low = RollingExtremum(min(14, lookback_periods), 'min')
+        self._range_mean = RollingSum(min(14, lookback_periods))
+        self._returns = RollingMoments(max(lookback_periods - 1, 1))
+        self.volatility = 0.0
+        
+        # Suporte/resistência sobre o mesmo buffer (cache compartilhado pela
+        # estratégia lateral e pelo sistema)
+        self.levels = LevelDetector(window=lookback_periods)
+        
     def update(self, price: float, volume: float):
         """Atualiza buffers com novo preço e volume"""
+        if self.price_buffer:
+            prev = self.price_buffer[-1]
+            self._returns.push((price - prev) / prev if prev else 0.0)
+        for trend in self._trends.values():
+            trend.push(price)
+        self._range_high.push(price)
+        self._range_low.push(price)
+        self._range_mean.push(price)
+        self.levels.push(price)
+        
         self.price_buffer.append(price)
         self.volume_buffer.append(volume)
         
@@ -84,43 +118,27 @@ class RegimeDetector:
                 return MarketRegime.LATERAL, 0.3  # Baixa confiança mas permite operação
             return MarketRegime.UNDEFINED, 0.0
             
-        prices = np.array(self.price_buffer)
+        short, medium, recent = self._trends[5], self._trends[10], self._trends[20]
         
-        # 1. Calcular médias móveis
-        sma_5 = np.mean(prices[-5:])
-        sma_10 = np.mean(prices[-10:])
-        sma_20 = np.mean(prices[-20:])
+        # 1. Médias móveis
+        sma_5 = short.mean
+        sma_10 = medium.mean
+        sma_20 = recent.mean
         
-        # 2. Calcular inclinação da tendência (mais sensível)
-        x = np.arange(len(prices))
-        # Usar apenas últimos 20 preços para tendência mais recente
-        recent_prices = prices[-20:]
-        x_recent = np.arange(len(recent_prices))
-        slope, _ = np.polyfit(x_recent, recent_prices, 1)
-        normalized_slope = slope / np.mean(recent_prices)
+        # 2. Inclinação da tendência (regressão dos últimos 20 preços)
+        normalized_slope = recent.slope / recent.mean
         
         # NOVO: Análise multi-período para tendência mais robusta
-        # Tendência curto prazo (5 períodos)
-        if len(prices) >= 5:
-            short_slope, _ = np.polyfit(np.arange(5), prices[-5:], 1)
-            short_trend = short_slope / np.mean(prices[-5:])
-        else:
-            short_trend = 0
-            
-        # Tendência médio prazo (10 períodos)
-        if len(prices) >= 10:
-            medium_slope, _ = np.polyfit(np.arange(10), prices[-10:], 1)
-            medium_trend = medium_slope / np.mean(prices[-10:])
-        else:
-            medium_trend = 0
+        # Tendência curto prazo (5 períodos) e médio prazo (10 períodos)
+        short_trend = short.slope / short.mean
+        medium_trend = medium.slope / medium.mean
         
-        # 3. Calcular volatilidade
-        returns = np.diff(prices) / prices[:-1]
-        volatility = np.std(returns) if len(returns) > 0 else 0
+        # 3. Volatilidade dos retornos
+        self.volatility = self._returns.std
         
         # 4. Calcular ADX simplificado (força da tendência)
-        high_low = np.max(prices[-14:]) - np.min(prices[-14:])
-        atr = high_low / np.mean(prices[-14:])
+        high_low = self._range_high.value - self._range_low.value
+        atr = high_low / self._range_mean.mean
         
         # NOVO: Calcular força direcional
         directional_strength = abs(normalized_slope) * (1 + atr)
@@ -324,50 +342,15 @@ class SupportResistanceStrategy:
         self.trend_strength = 0.0  # Força da tendência recente
         
     def find_support_resistance(self, prices: np.ndarray) -> Tuple[List[float], List[float]]:
-        """Encontra níveis de suporte e resistência"""
-        if len(prices) < 20:
-            return [], []
-            
-        # Encontrar máximos e mínimos locais
-        supports = []
-        resistances = []
-        
-        for i in range(10, len(prices) - 10):
-            # Resistência: máximo local
-            if prices[i] == max(prices[i-10:i+10]):
-                resistances.append(prices[i])
-                
-            # Suporte: mínimo local
-            if prices[i] == min(prices[i-10:i+10]):
-                supports.append(prices[i])
-                
-        # Agrupar níveis próximos (melhorado)
-        def cluster_levels(levels, tolerance=0.002):  # Aumentar tolerância
-            if not levels:
-                return []
-            
-            clustered = []
-            levels_sorted = sorted(set(levels))  # Remover duplicatas
-            current_cluster = [levels_sorted[0]]
-            
-            for level in levels_sorted[1:]:
-                if abs(level - current_cluster[-1]) / current_cluster[-1] < tolerance:
-                    current_cluster.append(level)
-                else:
-                    # Adicionar cluster (aceitar com 1 toque para dados com pouca variação)
-                    if len(current_cluster) >= 1:
-                        clustered.append(np.mean(current_cluster))
-                    current_cluster = [level]
-                    
-            if current_cluster and len(current_cluster) >= 1:
-                clustered.append(np.mean(current_cluster))
-                
-            return clustered
-            
-        supports = cluster_levels(supports)
-        resistances = cluster_levels(resistances)
+        """
+        Encontra níveis de suporte e resistência em uma série de preços
         
-        return supports[-3:], resistances[-3:]  # Retornar os 3 níveis mais recentes
+        Pivôs: preço igual ao máximo/mínimo de prices[i-10:i+10]; níveis
+        próximos agrupados. Retorna os 3 níveis mais altos de cada lado.
+        """
+        detector = LevelDetector(window=len(prices))
+        detector.extend(prices)
+        return detector.levels()
         
     def generate_signal(self,
                        regime: MarketRegime,
@@ -404,7 +387,11 @@ class SupportResistanceStrategy:
                     trend_dir = "ALTA" if self.recent_trend > 0 else "BAIXA"
                     logger.info(f"[LATERAL] Tendência recente de {trend_dir} detectada "
                               f"(força: {self.trend_strength:.4f}). Evitando trades contrários.")
-        supports, resistances = self.find_support_resistance(prices)
+        if regime_detector is not None and price_buffer is regime_detector.price_buffer:
+            # Níveis mantidos incrementalmente pelo detector (em cache)
+            supports, resistances = regime_detector.levels.levels()
+        else:
+            supports, resistances = self.find_support_resistance(prices)
         
         # Log de debug a cada 100 chamadas
         if not hasattr(self, '_call_count'):
@@ -748,8 +735,7 @@ class RegimeBasedTradingSystem:
             
             # Armazenar níveis de S/R quando em lateralização
             if len(self.regime_detector.price_buffer) >= 30:
-                prices = np.array(self.regime_detector.price_buffer)
-                supports, resistances = self.lateral_strategy.find_support_resistance(prices)
+                supports, resistances = self.regime_detector.levels.levels()
                 self.last_support_levels = supports if supports else []
                 self.last_resistance_levels = resistances if resistances else []
             
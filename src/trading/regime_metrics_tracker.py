@@ -12,6 +12,11 @@ import json
 from pathlib import Path
 import logging
 
+try:
+    from src.monitoring.snapshot_writer import get_snapshot_writer
+except ImportError:
+    from monitoring.snapshot_writer import get_snapshot_writer
+
 logger = logging.getLogger(__name__)
 
 class RegimeMetricsTracker:
@@ -143,6 +148,8 @@ class RegimeMetricsTracker:
             f"P&L: {pnl_points:.1f} pts ({pnl_value:.2f} R$) | "
             f"Duração: {trade_record['duration']:.1f} min"
         )
+        
+        self._submit_snapshot()
     
     def _update_regime_metrics(self, regime: str, trade: Dict):
         """Atualiza métricas específicas do regime"""
@@ -253,6 +260,26 @@ class RegimeMetricsTracker:
             f"Trades na sessão: {change_record['session_trades']} | "
             f"P&L: {change_record['session_pnl']:.2f}"
         )
+        
+        self._submit_snapshot()
+    
+    def _submit_snapshot(self):
+        """Entrega o resumo atual ao escritor de snapshots (sem I/O aqui)"""
+        snapshot = {
+            'timestamp': datetime.now().isoformat(),
+            'session_trades': len(self.current_session['trades']),
+            'session_pnl': self.current_session['daily_pnl'],
+            'regime_changes': len(self.current_session['regime_changes']),
+            'regimes': {
+                regime: {
+                    k: dict(v) if isinstance(v, dict) else v
+                    for k, v in metrics.items()
+                    if k != 'pnl_curve'
+                }
+                for regime, metrics in self.regime_metrics.items()
+            }
+        }
+        get_snapshot_writer().submit('regime_metrics', snapshot)
     
     def get_regime_performance(self, regime: str = None) -> Dict:
         """
@@ -10,6 +10,8 @@ from collections import deque
 from dataclasses import dataclass
 import logging
 
+from .support_resistance import nearest_levels
+
 logger = logging.getLogger('SmartTargets')
 
 @dataclass
@@ -245,33 +247,31 @@ class SmartTargetsCalculator:
         Returns:
             Tuple (stop_loss, take_profit)
         """
+        support, resistance = nearest_levels(current_price, support_levels, resistance_levels)
+        
         if signal_type > 0:  # BUY
             # Stop abaixo do suporte mais próximo
-            valid_supports = [s for s in support_levels if s < current_price]
-            if valid_supports:
-                stop_loss = max(valid_supports) - 2.0  # 2 pontos abaixo do suporte
+            if support is not None:
+                stop_loss = support - 2.0  # 2 pontos abaixo do suporte
             else:
                 stop_loss = current_price - 10.0  # Fallback
             
             # Take na resistência mais próxima
-            valid_resistances = [r for r in resistance_levels if r > current_price]
-            if valid_resistances:
-                take_profit = min(valid_resistances) - 2.0  # 2 pontos antes da resistência
+            if resistance is not None:
+                take_profit = resistance - 2.0  # 2 pontos antes da resistência
             else:
                 take_profit = current_price + 15.0  # Fallback
                 
         else:  # SELL
             # Stop acima da resistência mais próxima
-            valid_resistances = [r for r in resistance_levels if r > current_price]
-            if valid_resistances:
-                stop_loss = min(valid_resistances) + 2.0  # 2 pontos acima da resistência
+            if resistance is not None:
+                stop_loss = resistance + 2.0  # 2 pontos acima da resistência
             else:
                 stop_loss = current_price + 10.0  # Fallback
             
             # Take no suporte mais próximo
-            valid_supports = [s for s in support_levels if s < current_price]
-            if valid_supports:
-                take_profit = max(valid_supports) + 2.0  # 2 pontos após o suporte
+            if support is not None:
+                take_profit = support + 2.0  # 2 pontos após o suporte
             else:
                 take_profit = current_price - 15.0  # Fallback
         
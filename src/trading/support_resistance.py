@@ -0,0 +1,180 @@
+"""
+Detecção de Suporte/Resistência incremental
+Pivôs (máximos/mínimos locais) detectados com máximo/mínimo móvel em deque
+monotônico a cada novo preço; níveis agrupados calculados só quando os
+pivôs mudam e servidos do cache para todos os consumidores
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+try:
+    from src.features.streaming_features import RollingExtremum, RollingWindow
+except ImportError:
+    from features.streaming_features import RollingExtremum, RollingWindow
+
+
+def cluster_levels(levels: Iterable[float], tolerance: float = 0.002) -> List[float]:
+    """
+    Agrupa níveis próximos (distância relativa ao último do grupo < tolerance)
+
+    Args:
+        levels: Preços dos pivôs
+        tolerance: Distância relativa máxima entre níveis vizinhos do grupo
+
+    Returns:
+        Média de cada grupo, em ordem crescente de preço
+    """
+    levels_sorted = sorted(set(levels))
+    if not levels_sorted:
+        return []
+
+    clustered = []
+    current_cluster = [levels_sorted[0]]
+    for level in levels_sorted[1:]:
+        if abs(level - current_cluster[-1]) / current_cluster[-1] < tolerance:
+            current_cluster.append(level)
+        else:
+            clustered.append(sum(current_cluster) / len(current_cluster))
+            current_cluster = [level]
+    clustered.append(sum(current_cluster) / len(current_cluster))
+    return clustered
+
+
+def nearest_levels(price: float, supports: List[float],
+                   resistances: List[float]) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Suporte mais alto abaixo e resistência mais baixa acima do preço
+
+    Returns:
+        (suporte, resistência); None quando não há nível daquele lado
+    """
+    supports = sorted(supports)
+    resistances = sorted(resistances)
+    i = bisect_left(supports, price)
+    j = bisect_right(resistances, price)
+    return (supports[i - 1] if i else None,
+            resistances[j] if j < len(resistances) else None)
+
+
+class LevelDetector:
+    """
+    Pivôs e níveis de suporte/resistência sobre os últimos `window` preços
+
+    Um preço é pivô de alta (resistência) quando é o máximo da janela
+    [i-left, i+right] (mínimo para suporte). Com `strict`, precisa ser o
+    único extremo da janela. Pivôs contam enquanto estiverem a pelo menos
+    `margin` posições das duas pontas da janela de consulta.
+
+    push() custa O(1) amortizado; pivots()/levels() ficam em cache até o
+    próximo push.
+    """
+
+    def __init__(self, window: int = 50, left: int = 10, right: int = 9,
+                 margin: int = 10, strict: bool = False, min_points: int = 20,
+                 tolerance: float = 0.002, max_levels: int = 3):
+        """
+        Args:
+            window: Preços considerados (como o buffer passado antes)
+            left: Preços antes do pivô na janela do extremo
+            right: Preços depois do pivô na janela do extremo
+            margin: Distância mínima do pivô às pontas da janela
+            strict: Pivô precisa ser o extremo único da janela
+            min_points: Preços mínimos para haver níveis
+            tolerance: Tolerância relativa do agrupamento
+            max_levels: Níveis devolvidos por lado (os de preço mais alto)
+        """
+        self.window = window
+        self.left = left
+        self.right = right
+        self.margin = margin
+        self.strict = strict
+        self.min_points = min_points
+        self.tolerance = tolerance
+        self.max_levels = max_levels
+        self.reset()
+
+    def reset(self):
+        size = self.left + self.right + 1
+        self._highs = RollingExtremum(size, 'max')
+        self._lows = RollingExtremum(size, 'min')
+        self._recent = RollingWindow(size)
+        self._resistances = deque()      # (índice, preço) dos pivôs de alta
+        self._supports = deque()
+        self.count = 0
+        self.version = 0
+        self._pivot_cache = (-1, None)
+        self._level_cache = (-1, None)
+
+    def _is_pivot(self, extremum: RollingExtremum, index: int, price: float) -> bool:
+        if self.strict:
+            return extremum.position == index and extremum.unique
+        return price == extremum.value
+
+    def push(self, price: float):
+        """Adiciona um preço (O(1) amortizado)"""
+        self._highs.push(price)
+        self._lows.push(price)
+        self._recent.push(price)
+        self.count += 1
+
+        if self.count >= self.left + self.right + 1:
+            index = self.count - 1 - self.right
+            candidate = self._recent.lag(self.right)
+            if self._is_pivot(self._highs, index, candidate):
+                self._resistances.append((index, candidate))
+            if self._is_pivot(self._lows, index, candidate):
+                self._supports.append((index, candidate))
+
+        # Pivôs que saíram da janela de consulta
+        oldest = self.count - self.window + max(self.left, self.margin)
+        for pivots in (self._resistances, self._supports):
+            while pivots and pivots[0][0] < oldest:
+                pivots.popleft()
+        self.version += 1
+
+    def extend(self, prices: Iterable[float]):
+        for price in prices:
+            self.push(price)
+
+    def pivots(self) -> Tuple[List[float], List[float]]:
+        """
+        Preços dos pivôs válidos na janela atual, em ordem cronológica
+
+        Returns:
+            (pivôs de suporte, pivôs de resistência)
+        """
+        version, cached = self._pivot_cache
+        if version == self.version:
+            return list(cached[0]), list(cached[1])
+
+        if min(self.count, self.window) < self.min_points:
+            result = ([], [])
+        else:
+            start = max(self.count - self.window, 0)
+            first = start + max(self.left, self.margin)
+            last = self.count - 1 - max(self.right + 1, self.margin)
+            result = tuple(
+                [price for index, price in pivots if first <= index <= last]
+                for pivots in (self._supports, self._resistances)
+            )
+        self._pivot_cache = (self.version, result)
+        return list(result[0]), list(result[1])
+
+    def levels(self) -> Tuple[List[float], List[float]]:
+        """
+        Níveis agrupados (até max_levels por lado, os de preço mais alto)
+
+        Returns:
+            (suportes, resistências)
+        """
+        version, cached = self._level_cache
+        if version == self.version:
+            return list(cached[0]), list(cached[1])
+
+        supports, resistances = self.pivots()
+        result = (cluster_levels(supports, self.tolerance)[-self.max_levels:],
+                  cluster_levels(resistances, self.tolerance)[-self.max_levels:])
+        self._level_cache = (self.version, result)
+        return list(result[0]), list(result[1])
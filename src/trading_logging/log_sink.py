@@ -0,0 +1,414 @@
+"""
+Gravação assíncrona de logs JSONL
+Fila limitada + thread de gravação em lotes, rotação com compressão e
+índice por bloco para buscas sem varrer o arquivo inteiro
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import queue
+import shutil
+import atexit
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Mensagens distintas guardadas por bloco no índice; acima disso o bloco
+# é marcado como "não indexado" e a busca lê o bloco inteiro
+MAX_INDEXED_MESSAGES = 64
+
+_STOP = object()
+
+
+class AsyncJsonlSink:
+    """
+    Escritor JSONL em background
+
+    write() só coloca a linha já serializada numa fila limitada e retorna;
+    com a fila cheia a linha é descartada e contada em `dropped` (o thread
+    de trading nunca espera pelo disco). O thread grava lotes de até
+    `batch_size` linhas ou o que chegou em `flush_interval` segundos numa
+    única chamada write().
+
+    Para cada lote uma linha é acrescentada no índice `<arquivo>.idx` com
+    offset, tamanho, intervalo de timestamps, níveis e mensagens distintas.
+    Quando o arquivo passa de `max_bytes` ele é rotacionado para
+    `<nome>.<n>.jsonl` (comprimido em .gz se `compress`) junto com o índice.
+    """
+
+    def __init__(self, path: str, max_queue: int = 10000, batch_size: int = 256,
+                 flush_interval: float = 0.5, max_bytes: int = 50 * 1024 * 1024,
+                 compress: bool = True):
+        """
+        Args:
+            path: Arquivo .jsonl de destino
+            max_queue: Linhas aguardando gravação antes de descartar
+            batch_size: Máximo de linhas por gravação
+            flush_interval: Tempo máximo (s) que uma linha espera na fila
+            max_bytes: Tamanho que dispara a rotação (0 desliga)
+            compress: Comprimir os arquivos rotacionados com gzip
+        """
+        self.path = Path(path)
+        self.index_path = index_path_for(self.path)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.compress = compress
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._index = None
+        self._offset = 0
+        self._flushed = threading.Condition()
+        self._done = 0
+        self.running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'enqueued': 0,
+            'dropped': 0,
+            'written': 0,
+            'batches': 0,
+            'bytes': 0,
+            'rotations': 0,
+            'errors': 0
+        }
+
+    def write(self, line: str, timestamp: str = '', level: str = '', message: str = '') -> bool:
+        """
+        Enfileira uma linha JSON (sem '\\n')
+
+        Args:
+            line: Entrada serializada
+            timestamp: Timestamp ISO da entrada (índice)
+            level: Nível da entrada (índice)
+            message: Mensagem da entrada (índice)
+
+        Returns:
+            False se a fila estava cheia e a linha foi descartada
+        """
+        try:
+            self._queue.put_nowait((line, timestamp, level, message))
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+        self.stats['enqueued'] += 1
+        return True
+
+    def start(self):
+        """Inicia o thread de gravação"""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name=f'LogSink-{self.path.stem}',
+                                        daemon=True)
+        self._thread.start()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Espera a fila atual ser gravada (não usar no thread de trading)
+
+        Returns:
+            True se tudo que foi enfileirado até agora está no arquivo
+        """
+        if not self.running:
+            self._drain()
+            return self._queue.empty()
+        target = self.stats['enqueued']
+        deadline = time.time() + timeout
+        with self._flushed:
+            while self._done < target:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._flushed.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Grava o que estiver na fila e fecha os arquivos"""
+        if self.running:
+            self.running = False
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            if self._thread:
+                self._thread.join(timeout=timeout)
+                self._thread = None
+        self._drain()
+        self._close_files()
+
+    def _run(self):
+        """Loop: junta um lote até batch_size ou flush_interval e grava"""
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                if not self.running:
+                    break
+                continue
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 \
+                        else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write_batch(batch)
+            if stop:
+                break
+
+    def _drain(self):
+        """Grava no thread atual o que restou na fila"""
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+
+    def _open_files(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'ab')
+        self._offset = self._file.tell()
+        has_index = self.index_path.exists()
+        self._index = open(self.index_path, 'a', encoding='utf-8')
+        if self._offset and not has_index:
+            # Linhas gravadas antes do índice existir: um bloco sem metadados
+            legacy = {'offset': 0, 'length': self._offset, 'count': None, 't0': '', 't1': '',
+                      'levels': None, 'messages': None}
+            self._index.write(json.dumps(legacy, separators=(',', ':')) + '\n')
+
+    def _close_files(self):
+        for f in (self._file, self._index):
+            if f is not None:
+                try:
+                    f.close()
+                except Exception:
+                    pass
+        self._file = None
+        self._index = None
+
+    def _write_batch(self, batch: List[Tuple[str, str, str, str]]):
+        try:
+            if self._file is None:
+                self._open_files()
+
+            data = ('\n'.join(item[0] for item in batch) + '\n').encode('utf-8')
+            offset = self._offset
+            self._file.write(data)
+            self._file.flush()
+            self._offset += len(data)
+
+            timestamps = [item[1] for item in batch if item[1]]
+            messages = {item[3] for item in batch}
+            block = {
+                'offset': offset,
+                'length': len(data),
+                'count': len(batch),
+                't0': min(timestamps) if timestamps else '',
+                't1': max(timestamps) if timestamps else '',
+                'levels': sorted({item[2] for item in batch}),
+                'messages': sorted(messages) if len(messages) <= MAX_INDEXED_MESSAGES else None
+            }
+            self._index.write(json.dumps(block, separators=(',', ':')) + '\n')
+            self._index.flush()
+
+            self.stats['written'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['bytes'] += len(data)
+
+            if self.max_bytes and self._offset >= self.max_bytes:
+                self._rotate()
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"Erro ao escrever log: {e}", file=sys.stderr)
+        finally:
+            with self._flushed:
+                self._done += len(batch)
+                self._flushed.notify_all()
+
+    def _rotate(self):
+        """Move o arquivo atual para <nome>.<n>.jsonl[.gz] com seu índice"""
+        self._close_files()
+
+        n = 1
+        while True:
+            rotated = self.path.with_name(f"{self.path.stem}.{n}{self.path.suffix}")
+            if not rotated.exists() and not rotated.with_name(rotated.name + '.gz').exists():
+                break
+            n += 1
+
+        os.replace(self.path, rotated)
+        if self.index_path.exists():
+            os.replace(self.index_path, index_path_for(rotated))
+
+        if self.compress:
+            with open(rotated, 'rb') as src, gzip.open(str(rotated) + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            rotated.unlink()
+
+        self.stats['rotations'] += 1
+        self._offset = 0
+
+    def get_stats(self) -> Dict:
+        """Retorna estatísticas do escritor"""
+        return dict(self.stats, queued=self._queue.qsize(), running=self.running)
+
+
+def index_path_for(path: Path) -> Path:
+    """Índice de um arquivo de log (o mesmo para a versão .gz)"""
+    path = Path(path)
+    if path.suffix == '.gz':
+        path = path.with_suffix('')
+    return path.with_name(path.name + '.idx')
+
+
+def log_files_for(path: Path) -> List[Path]:
+    """Arquivo atual e seus rotacionados (.N.jsonl[.gz]), do mais antigo ao atual"""
+    path = Path(path)
+    rotated = []
+    for candidate in path.parent.glob(f"{path.stem}.*{path.suffix}*"):
+        if candidate.name.endswith('.idx'):
+            continue
+        number = candidate.name[len(path.stem) + 1:].split('.', 1)[0]
+        if number.isdigit():
+            rotated.append((int(number), candidate))
+    files = [p for _, p in sorted(rotated)]
+    if path.exists():
+        files.append(path)
+    return files
+
+
+def _load_index(path: Path) -> Optional[List[Dict]]:
+    index_path = index_path_for(path)
+    if not index_path.exists():
+        return None
+    blocks = []
+    with open(index_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                blocks.append(json.loads(line))
+            except ValueError:
+                continue  # Linha parcial no fim do índice
+    return blocks
+
+
+def _block_matches(block: Dict, query: str, levels: Optional[set],
+                   since: Optional[str], until: Optional[str]) -> bool:
+    if levels and block['levels'] is not None and not levels.intersection(block['levels']):
+        return False
+    if since and block['t1'] and block['t1'] < since:
+        return False
+    if until and block['t0'] and block['t0'] > until:
+        return False
+    messages = block.get('messages')
+    if query and messages is not None:
+        return any(query in message.lower() for message in messages)
+    return True
+
+
+def search_log_file(path: str, query: str = '', levels: Optional[List[str]] = None,
+                    since: Optional[str] = None, until: Optional[str] = None,
+                    limit: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Busca entradas num arquivo JSONL usando o índice de blocos
+
+    Só os blocos cujo índice pode conter a mensagem/nível/intervalo são
+    lidos do disco. Arquivos sem índice (formato antigo) são varridos.
+
+    Args:
+        path: Arquivo .jsonl ou .jsonl.gz
+        query: Trecho da mensagem (sem diferenciar maiúsculas)
+        levels: Níveis aceitos
+        since: Timestamp ISO mínimo
+        until: Timestamp ISO máximo
+        limit: Máximo de entradas
+
+    Yields:
+        Entradas (dict) na ordem do arquivo
+    """
+    path = Path(path)
+    query = query.lower()
+    level_set = set(levels) if levels else None
+    blocks = _load_index(path)
+    opener = gzip.open if path.suffix == '.gz' else open
+    found = 0
+
+    with opener(path, 'rb') as f:
+        if blocks is None:
+            chunks = [f.read()]
+        else:
+            chunks = []
+            for block in blocks:
+                if _block_matches(block, query, level_set, since, until):
+                    f.seek(block['offset'])
+                    chunks.append(f.read(block['length']))
+
+        for chunk in chunks:
+            for raw in chunk.splitlines():
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue
+                if query and query not in entry.get('message', '').lower():
+                    continue
+                if level_set and entry.get('level') not in level_set:
+                    continue
+                timestamp = entry.get('timestamp', '')
+                if (since and timestamp < since) or (until and timestamp > until):
+                    continue
+                yield entry
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+
+
+_sinks: Dict[str, AsyncJsonlSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_sink(path: str) -> AsyncJsonlSink:
+    """
+    Escritor compartilhado por arquivo, já iniciado
+
+    Configuração via ambiente: LOG_QUEUE_SIZE, LOG_BATCH_SIZE,
+    LOG_FLUSH_INTERVAL (s), LOG_MAX_BYTES e LOG_COMPRESS (0/1). Na saída do
+    processo a fila é gravada.
+    """
+    key = str(Path(path).resolve())
+    with _sinks_lock:
+        sink = _sinks.get(key)
+        if sink is None:
+            sink = AsyncJsonlSink(
+                path,
+                max_queue=int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+                batch_size=int(os.getenv('LOG_BATCH_SIZE', '256')),
+                flush_interval=float(os.getenv('LOG_FLUSH_INTERVAL', '0.5')),
+                max_bytes=int(os.getenv('LOG_MAX_BYTES', str(50 * 1024 * 1024))),
+                compress=os.getenv('LOG_COMPRESS', '1') == '1')
+            sink.start()
+            atexit.register(sink.close)
+            _sinks[key] = sink
+    return sink
@@ -17,6 +17,11 @@ import threading
 from collections import deque
 import time
 
+try:
+    from src.trading_logging.log_sink import get_sink, log_files_for, search_log_file
+except ImportError:
+    from trading_logging.log_sink import get_sink, log_files_for, search_log_file
+
 
 class LogLevel(Enum):
     """Níveis de log customizados"""
@@ -58,6 +63,9 @@ class StructuredLogger:
         timestamp = datetime.now().strftime("%Y%m%d")
         self.log_file = self.log_dir / f"{component}_{timestamp}.jsonl"
         
+        # Gravação em background (compartilhada por arquivo)
+        self.sink = get_sink(self.log_file)
+        
         # Buffer para logs recentes
         self.recent_logs = deque(maxlen=1000)
         
@@ -106,37 +114,38 @@ class StructuredLogger:
     
     def log(self, level: LogLevel, message: str, data: Optional[Dict] = None, **kwargs):
         """Log genérico estruturado"""
+        # Criar entrada
+        entry = LogEntry(
+            timestamp=datetime.now().isoformat(),
+            level=level.value,
+            component=self.component,
+            message=message,
+            data=data or {},
+            context={**self.global_context, **kwargs}
+        )
+        
         with self.lock:
-            # Criar entrada
-            entry = LogEntry(
-                timestamp=datetime.now().isoformat(),
-                level=level.value,
-                component=self.component,
-                message=message,
-                data=data or {},
-                context={**self.global_context, **kwargs}
-            )
-            
             # Adicionar ao buffer
             self.recent_logs.append(entry)
             
-            # Escrever no arquivo
-            self._write_to_file(entry)
-            
             # Atualizar estatísticas
             self._update_stats(level)
-            
-            # Console output (desenvolvimento)
-            if os.getenv('LOG_TO_CONSOLE', 'false').lower() == 'true':
-                self._console_output(entry)
+        
+        # Escrever no arquivo (fora do lock; só enfileira)
+        self._write_to_file(entry)
+        
+        # Console output (desenvolvimento)
+        if os.getenv('LOG_TO_CONSOLE', 'false').lower() == 'true':
+            self._console_output(entry)
     
     def _write_to_file(self, entry: LogEntry):
-        """Escreve entrada no arquivo"""
+        """Enfileira entrada para o thread de gravação (nunca espera o disco)"""
         try:
-            with open(self.log_file, 'a') as f:
-                f.write(entry.to_json() + '\n')
+            line = entry.to_json()
         except Exception as e:
-            print(f"Erro ao escrever log: {e}", file=sys.stderr)
+            print(f"Erro ao serializar log: {e}", file=sys.stderr)
+            return
+        self.sink.write(line, entry.timestamp, entry.level, entry.message)
     
     def _update_stats(self, level: LogLevel):
         """Atualiza estatísticas de logging"""
@@ -226,7 +235,48 @@ class StructuredLogger:
     def get_stats(self) -> Dict:
         """Retorna estatísticas de logging"""
         with self.lock:
-            return self.stats.copy()
+            stats = self.stats.copy()
+        stats['dropped'] = self.sink.stats['dropped']
+        return stats
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Espera as entradas enfileiradas chegarem ao arquivo"""
+        return self.sink.flush(timeout)
+    
+    def search(self, query: str = '', level: Optional[LogLevel] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               limit: Optional[int] = None) -> list:
+        """
+        Busca entradas gravadas (arquivo atual e rotacionados)
+        
+        Usa o índice de blocos: só os trechos que podem conter a mensagem,
+        o nível ou o intervalo pedido são lidos.
+        
+        Args:
+            query: Trecho da mensagem (sem diferenciar maiúsculas)
+            level: Nível desejado
+            since: Timestamp ISO mínimo
+            until: Timestamp ISO máximo
+            limit: Máximo de entradas
+        
+        Returns:
+            Lista de LogEntry, da mais antiga para a mais recente
+        """
+        self.flush()
+        results = []
+        levels = [level.value] if level else None
+        
+        for path in log_files_for(self.log_file):
+            remaining = None if limit is None else limit - len(results)
+            for entry in search_log_file(path, query, levels, since, until, remaining):
+                try:
+                    results.append(LogEntry(**entry))
+                except TypeError:
+                    continue
+            if limit is not None and len(results) >= limit:
+                break
+        
+        return results
 
 
 class TradingLogger(StructuredLogger):
@@ -372,16 +422,16 @@ class LogAggregator:
         
         return total_stats
     
-    def search_logs(self, query: str, component: Optional[str] = None) -> list:
-        """Busca logs por query"""
+    def search_logs(self, query: str, component: Optional[str] = None,
+                    level: Optional[LogLevel] = None, since: Optional[str] = None,
+                    limit: Optional[int] = None) -> list:
+        """Busca logs por query nos arquivos indexados de cada componente"""
         results = []
         
         loggers = [self.loggers[component]] if component else self.loggers.values()
         
         for logger in loggers:
-            for log in logger.get_recent_logs(1000):
-                if query.lower() in log.message.lower():
-                    results.append(log)
+            results.extend(logger.search(query, level=level, since=since, limit=limit))
         
         return results
 
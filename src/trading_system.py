@@ -33,6 +33,7 @@ from src.metrics_collector import MetricsCollector
 
 # Adicionar integração para dados reais
 from src.data_integration import DataIntegration
+from src.market_data.bar_aggregator import BarAggregator, bars_to_frame
 
 # Importar sistema de execução de ordens
 try:
@@ -142,6 +143,13 @@ class TradingSystem:
         # Data integration será inicializado após os componentes
         self.data_integration = None
         
+        # Candles em tempo real: cada trade é agregado uma única vez.
+        # Barra de 1min fechada -> gravada no data_structure; a barra aberta
+        # é sincronizada no máximo uma vez por segundo (fechamento da barra de 1s)
+        self.bar_aggregator = BarAggregator(timeframes=('1s', '1min', '5min'))
+        self.bar_aggregator.subscribe('1min', self._on_candle_closed)
+        self.bar_aggregator.subscribe('1s', self._sync_open_candle)
+        
         # Controles anti-loop para carregamento de dados
         self.historical_data_loaded = False
         self.last_historical_load_time = None
@@ -1025,21 +1033,8 @@ class TradingSystem:
             return
             
         try:
-            # Usar data_integration para criar candles reais
-            if self.data_integration:
-                # Processar trade para formar candles
-                self.data_integration._on_trade(trade_data)
-                
-                # Obter candles atualizados
-                current_candles = self.data_integration.get_candles('1min')
-                if not current_candles.empty:
-                    self.data_structure.update_candles(current_candles)
-            
-            # Processar com real time processor se disponível
-            elif self.real_time_processor:
-                self.real_time_processor.process_trade(trade_data)
-            else:
-                self.logger.warning("Nenhum processador de dados disponível")
+            # Formar candles (assinantes são chamados só no fechamento das barras)
+            self.bar_aggregator.on_trade_data(trade_data)
                 
             # Atualizar métricas se disponível
             if self.metrics:
@@ -1058,6 +1053,38 @@ class TradingSystem:
                     'error': str(e)
                 })
             
+    def _write_candles(self, bars: List):
+        """Grava barras de 1min (OHLCV + fluxo por agressor) no data_structure"""
+        if not self.data_structure or not bars:
+            return
+        frame = bars_to_frame(bars)
+        candles = frame[['open', 'high', 'low', 'close', 'volume']].assign(quantidade=frame['trades'])
+        self.data_structure.update_candles(candles)
+        
+        flow = frame['buy_volume'] + frame['sell_volume']
+        flow = flow.where(flow > 0)
+        trades = frame['buy_trades'] + frame['sell_trades']
+        trades = trades.where(trades > 0)
+        self.data_structure.update_microstructure(pd.DataFrame({
+            'buy_volume': frame['buy_volume'],
+            'sell_volume': frame['sell_volume'],
+            'buy_trades': frame['buy_trades'],
+            'sell_trades': frame['sell_trades'],
+            'volume_imbalance': ((frame['buy_volume'] - frame['sell_volume']) / flow).fillna(0),
+            'trade_imbalance': ((frame['buy_trades'] - frame['sell_trades']) / trades).fillna(0),
+            'buy_ratio': (frame['buy_volume'] / flow).fillna(0.5),
+        }, index=frame.index))
+    
+    def _on_candle_closed(self, bar):
+        """Barra de 1min fechada pelo BarAggregator"""
+        self._write_candles([bar])
+    
+    def _sync_open_candle(self, _bar):
+        """Atualiza a barra de 1min em formação (chamado a cada segundo com trades)"""
+        candle = self.bar_aggregator.current('1min')
+        if candle is not None:
+            self._write_candles([candle])
+        
     def _on_book_update(self, book_data: Dict):
         """Callback para processar atualizações do book"""
         # Implementar se necessário
@@ -1150,11 +1177,9 @@ class TradingSystem:
         """Reseta dados ao mudar de contrato"""
         # Limpar dados antigos mas manter estrutura
         if self.data_structure:
-            self.data_structure.candles = self.data_structure.candles.iloc[0:0]
-            self.data_structure.microstructure = self.data_structure.microstructure.iloc[0:0]
-            self.data_structure.orderbook = self.data_structure.orderbook.iloc[0:0]
-            self.data_structure.indicators = self.data_structure.indicators.iloc[0:0]
-            self.data_structure.features = self.data_structure.features.iloc[0:0]
+            for store in self.data_structure.stores.values():
+                store.reset()
+        self.bar_aggregator.reset()
             
         # Resetar timers
         self.last_ml_time = None
@@ -2065,6 +2090,17 @@ class TradingSystem:
             
         self.logger.info("Sistema parado com sucesso")
             
+    def _last_candle_time(self) -> Optional[datetime]:
+        """Abertura do último candle de 1min conhecido (None se não houver)"""
+        times = []
+        bar = self.bar_aggregator.last_closed('1min')
+        if bar is not None:
+            times.append(bar.timestamp)
+        candles = getattr(self.data_structure, 'candles', None)
+        if candles is not None and not candles.empty:
+            times.append(pd.Timestamp(candles.index.max()).to_pydatetime())
+        return max(times) if times else None
+    
     def _check_and_fill_temporal_gap(self):
         """
         Verifica se há gap temporal entre dados históricos e tempo atual
@@ -2076,18 +2112,12 @@ class TradingSystem:
                 self.logger.info("Gap fill já em progresso - evitando loop")
                 return
             
-            # Verificar se temos DataIntegration para analisar gap
-            if not self.data_integration or not hasattr(self.data_integration, 'candles_1min'):
-                self.logger.warning("DataIntegration não disponível para análise de gap")
-                return
-            
-            # Verificar se há dados para analisar
-            if self.data_integration.candles_1min.empty:
+            # Pegar último timestamp dos dados (candles formados pelo BarAggregator
+            # ou sincronizados no data_structure)
+            last_data_time = self._last_candle_time()
+            if last_data_time is None:
                 self.logger.warning("Nenhum candle formado ainda para análise de gap")
                 return
-            
-            # Pegar último timestamp dos dados
-            last_data_time = self.data_integration.candles_1min.index.max()
             current_time = datetime.now()
             
             # Calcular gap em minutos
@@ -0,0 +1,267 @@
+"""
+Seleção de Features em Paralelo
+Pontua colunas (ANOVA, Mutual Information, importância de árvore) em
+processos, sobre uma amostra estratificada por blocos de tempo, com cache
+de scores por versão do dataset — colunas novas são as únicas pontuadas
+"""
+
+import os
+import json
+import math
+import hashlib
+import logging
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_selection import f_classif, mutual_info_classif
+from sklearn.tree import DecisionTreeClassifier
+
+try:
+    from src.training.training_orchestrator import _init_worker
+except ImportError:
+    from training.training_orchestrator import _init_worker
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('anova', 'mi', 'importance')
+
+# Incrementar quando o cálculo de algum score mudar (invalida o cache)
+SCORING_VERSION = 1
+
+
+def stratified_block_sample(y: np.ndarray, n_samples: int, block_size: int = 2000,
+                            random_state: int = 42) -> np.ndarray:
+    """
+    Amostra estratificada por blocos de tempo
+
+    A série é dividida em blocos contíguos e cada (bloco, classe) contribui
+    na proporção do seu tamanho, então a amostra cobre todo o período e
+    mantém a mistura de classes de cada regime — ao contrário de uma
+    amostra uniforme, que pode sub-representar trechos com poucos sinais.
+
+    Args:
+        y: Target em ordem temporal
+        n_samples: Tamanho desejado da amostra
+        block_size: Linhas por bloco de tempo
+        random_state: Semente
+
+    Returns:
+        Índices ordenados da amostra
+    """
+    y = np.asarray(y)
+    n = len(y)
+    if n_samples >= n:
+        return np.arange(n)
+
+    _, classes = np.unique(y, return_inverse=True)
+    n_classes = int(classes.max()) + 1
+    groups = (np.arange(n) // block_size) * n_classes + classes
+
+    counts = np.bincount(groups)
+    quota = np.round(counts * (n_samples / n)).astype(np.int64)
+
+    # Ordem aleatória dentro de cada grupo; mantém as `quota` primeiras
+    rng = np.random.default_rng(random_state)
+    order = np.lexsort((rng.random(n), groups))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.arange(n) - starts[groups[order]]
+    keep = order[rank < quota[groups[order]]]
+    return np.sort(keep)
+
+
+def _column_digest(name: str, values: np.ndarray) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(name.encode())
+    digest.update(memoryview(np.ascontiguousarray(values)).cast('B'))
+    return digest.hexdigest()
+
+
+def _tree_importance(column: np.ndarray, y: np.ndarray, random_state: int) -> float:
+    """Redução total de impureza (Gini) de uma árvore rasa só com esta coluna"""
+    tree = DecisionTreeClassifier(max_depth=4, min_samples_leaf=50,
+                                  random_state=random_state)
+    tree.fit(column.reshape(-1, 1), y)
+    return float(tree.tree_.compute_feature_importances(normalize=False)[0])
+
+
+def _score_columns(X: np.ndarray, y: np.ndarray, methods: Sequence[str],
+                   random_state: int) -> Dict[str, np.ndarray]:
+    """
+    Scores de um bloco de colunas (executado nos workers)
+
+    Cada coluna é pontuada isoladamente, com a mesma semente, para que o
+    score não dependa de quais outras colunas estavam no bloco — é isso que
+    permite reaproveitar scores em cache coluna a coluna.
+    """
+    scores = {}
+    if 'anova' in methods:
+        f_scores, _ = f_classif(X, y)
+        scores['anova'] = np.nan_to_num(f_scores, nan=0.0, posinf=0.0)
+    if 'mi' in methods:
+        scores['mi'] = np.array([
+            mutual_info_classif(X[:, [j]], y, n_neighbors=3, random_state=random_state)[0]
+            for j in range(X.shape[1])
+        ])
+    if 'importance' in methods:
+        scores['importance'] = np.array([
+            _tree_importance(X[:, j], y, random_state) for j in range(X.shape[1])
+        ])
+    return scores
+
+
+class FeatureSelector:
+    """
+    Seleção de features com scores em paralelo e em cache
+
+    Os scores ficam em <cache_dir>/<versão>.json, onde a versão identifica
+    o dataset (target amostrado + parâmetros de amostragem, ou uma versão
+    explícita). Cada coluna guarda o hash dos seus valores amostrados: ao
+    adicionar features, ou alterar uma existente, só essas colunas são
+    pontuadas de novo.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = "data/feature_selection_cache",
+                 max_workers: Optional[int] = None, sample_size: int = 100_000,
+                 block_size: int = 2000, methods: Sequence[str] = METHODS,
+                 random_state: int = 42):
+        """
+        Args:
+            cache_dir: Diretório do cache de scores (None desativa)
+            max_workers: Processos (None = cpu_count, 0 = no processo atual)
+            sample_size: Linhas da amostra estratificada
+            block_size: Linhas por bloco de tempo na amostragem
+            methods: Subconjunto de ('anova', 'mi', 'importance')
+            random_state: Semente da amostragem e dos scores
+        """
+        unknown = set(methods) - set(METHODS)
+        if unknown:
+            raise ValueError(f"Métodos desconhecidos: {sorted(unknown)}")
+
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.sample_size = sample_size
+        self.block_size = block_size
+        self.methods = tuple(methods)
+        self.random_state = random_state
+        self.stats = {'scored': 0, 'cached': 0}
+
+    # ------------------------------------------------------------------ cache
+
+    def dataset_version(self, y_sample: np.ndarray, sample_idx: np.ndarray) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"v{SCORING_VERSION}:{self.random_state}:{self.block_size}".encode())
+        digest.update(memoryview(np.ascontiguousarray(y_sample)).cast('B'))
+        digest.update(memoryview(np.ascontiguousarray(sample_idx, dtype=np.int64)).cast('B'))
+        return digest.hexdigest()
+
+    def _cache_path(self, version: str) -> Optional[Path]:
+        return self.cache_dir / f"{version}.json" if self.cache_dir else None
+
+    def _load(self, version: str) -> Dict:
+        path = self._cache_path(version)
+        if path is None or not path.exists():
+            return {}
+        try:
+            with open(path, 'r') as f:
+                return json.load(f).get('columns', {})
+        except Exception as e:
+            logger.warning(f"Cache de scores ilegível ({path.name}): {e}")
+            return {}
+
+    def _save(self, version: str, columns: Dict):
+        path = self._cache_path(version)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': version, 'scoring_version': SCORING_VERSION,
+                       'columns': columns}, f)
+        os.replace(tmp_path, path)
+
+    # ---------------------------------------------------------------- scoring
+
+    def _chunks(self, columns: List[str]) -> List[List[str]]:
+        n_chunks = max(1, min(len(columns), 2 * max(self.max_workers, 1)))
+        size = math.ceil(len(columns) / n_chunks)
+        return [columns[i:i + size] for i in range(0, len(columns), size)]
+
+    def _compute(self, X: pd.DataFrame, y: np.ndarray, columns: List[str]) -> Dict[str, Dict]:
+        results = {}
+
+        def collect(chunk, scores):
+            for j, name in enumerate(chunk):
+                results[name] = {m: float(scores[m][j]) for m in self.methods}
+
+        chunks = self._chunks(columns)
+        if self.max_workers == 0 or len(chunks) == 1:
+            for chunk in chunks:
+                collect(chunk, _score_columns(X[chunk].to_numpy(np.float64), y,
+                                              self.methods, self.random_state))
+            return results
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(1,)) as pool:
+            futures = {
+                pool.submit(_score_columns, X[chunk].to_numpy(np.float64), y,
+                            self.methods, self.random_state): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+        return results
+
+    def score(self, features: pd.DataFrame, target: pd.Series,
+              version: Optional[str] = None) -> pd.DataFrame:
+        """
+        Scores por coluna, reaproveitando o cache
+
+        Args:
+            features: Matriz de features (linhas em ordem temporal)
+            target: Target alinhado (NaN são descartados)
+            version: Versão explícita do dataset (padrão: hash da amostra)
+
+        Returns:
+            DataFrame indexado pelas colunas, uma coluna por método
+        """
+        mask = target.notna().to_numpy()
+        y_all = target.to_numpy()[mask]
+        sample_idx = np.flatnonzero(mask)[
+            stratified_block_sample(y_all, self.sample_size, self.block_size, self.random_state)
+        ]
+        sample = features.iloc[sample_idx]
+        sample = sample.replace([np.inf, -np.inf], np.nan).fillna(0)
+        y = target.to_numpy()[sample_idx]
+        version = version or self.dataset_version(y, sample_idx)
+
+        cached = self._load(version)
+        digests = {c: _column_digest(c, sample[c].to_numpy(np.float64)) for c in sample.columns}
+        pending = [c for c in sample.columns
+                   if cached.get(c, {}).get('digest') != digests[c]
+                   or not all(m in cached[c] for m in self.methods)]
+
+        self.stats['cached'] += len(sample.columns) - len(pending)
+        self.stats['scored'] += len(pending)
+        if pending:
+            for name, scores in self._compute(sample, y, pending).items():
+                cached[name] = {'digest': digests[name], **scores}
+            self._save(version, cached)
+
+        return pd.DataFrame({m: [cached[c][m] for c in sample.columns] for m in self.methods},
+                            index=sample.columns)
+
+    def select(self, features: pd.DataFrame, target: pd.Series, k: int = 50,
+               version: Optional[str] = None) -> Tuple[List[str], pd.DataFrame]:
+        """
+        Seleciona as K melhores features pela média dos rankings dos métodos
+
+        Returns:
+            (features selecionadas, scores com coluna 'rank')
+        """
+        scores = self.score(features, target, version)
+        scores['rank'] = scores[list(self.methods)].rank(ascending=False).mean(axis=1)
+        k = min(k, len(scores))
+        return scores['rank'].nsmallest(k).index.tolist(), scores
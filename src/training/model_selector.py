@@ -5,7 +5,6 @@ Escolhe o melhor modelo baseado em métricas de performance e validação
 
 import os
 import json
-import pickle
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -16,6 +15,11 @@ from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_sc
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from src.ml.model_registry import ArtifactCache
+except ImportError:
+    from ml.model_registry import ArtifactCache
+
 logger = logging.getLogger(__name__)
 
 class ModelSelector:
@@ -43,6 +47,7 @@ class ModelSelector:
         
         # Cache de modelos avaliados
         self.model_scores = {}
+        self.artifacts = ArtifactCache()
         self.current_models = None
         self.best_model_info = None
         
@@ -167,15 +172,13 @@ class ModelSelector:
             Dicionário com métricas de avaliação
         """
         try:
-            # Carregar modelo
-            with open(model_info['model_path'], 'rb') as f:
-                model = pickle.load(f)
+            # Carregar modelo (do cache se já pré-carregado)
+            model = self.artifacts.load(model_info['model_path'])
             
             # Carregar scaler se disponível
             scaler = None
             if model_info.get('scaler_path') and model_info['scaler_path'].exists():
-                with open(model_info['scaler_path'], 'rb') as f:
-                    scaler = pickle.load(f)
+                scaler = self.artifacts.load(model_info['scaler_path'])
             
             # Preparar features
             from src.training.smart_retraining_system import SmartRetrainingSystem
@@ -266,6 +269,14 @@ class ModelSelector:
             # Avaliar cada modelo
             logger.info(f"Avaliando {len(available_models)} modelos...")
             
+            # Desserializar os candidatos em paralelo antes da avaliação
+            candidates = [m for m in available_models
+                          if m['age_days'] <= self.max_model_age_days]
+            self.artifacts.prefetch(
+                [m['model_path'] for m in candidates] +
+                [m['scaler_path'] for m in candidates if m.get('scaler_path')]
+            )
+            
             for model_info in available_models:
                 # Pular modelos muito antigos
                 if model_info['age_days'] > self.max_model_age_days:
@@ -455,15 +466,13 @@ class ModelSelector:
             return None, None
         
         try:
-            # Carregar modelo
-            with open(best['model_path'], 'rb') as f:
-                model = pickle.load(f)
+            # Carregar modelo (já em cache se foi avaliado nesta sessão)
+            model = self.artifacts.load(best['model_path'])
             
             # Carregar scaler se disponível
             scaler = None
             if best.get('scaler_path') and best['scaler_path'].exists():
-                with open(best['scaler_path'], 'rb') as f:
-                    scaler = pickle.load(f)
+                scaler = self.artifacts.load(best['scaler_path'])
             
             logger.info(f"Modelo carregado: {best['model_path'].name}")
             return model, scaler
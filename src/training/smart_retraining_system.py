@@ -20,6 +20,8 @@ from sklearn.metrics import classification_report, accuracy_score
 import warnings
 warnings.filterwarnings('ignore')
 
+from src.market_data.tick_store import ingest_recorded_data
+
 logger = logging.getLogger(__name__)
 
 class SmartRetrainingSystem:
@@ -182,38 +184,28 @@ class SmartRetrainingSystem:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
         
+        # Importar apenas arquivos novos para o store colunar; a leitura
+        # abaixo é um memory-map do intervalo, sem re-parsear CSVs
+        stores = ingest_recorded_data(self.data_dir)
+        start_day = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        
         all_data = []
         
-        for file_path in self.data_dir.glob("*.csv"):
-            self.validation_stats['total_files'] += 1
-            
-            # Verificar se o arquivo é do período desejado
-            try:
-                # Extrair data do nome do arquivo (assumindo formato com data)
-                file_date_str = file_path.stem.split('_')[-1][:8]  # YYYYMMDD
-                file_date = datetime.strptime(file_date_str, "%Y%m%d")
-                
-                if file_date < start_date.replace(hour=0, minute=0, second=0):
-                    continue
-                    
-            except:
-                # Se não conseguir extrair data, usar data de modificação
-                file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                if file_mtime < start_date:
-                    continue
+        for name, store in stores.items():
+            # Mesmo significado de antes: arquivos encontrados / arquivos com dados no período
+            self.validation_stats['total_files'] += len(store.sources())
             
-            # Carregar arquivo
             try:
-                df = pd.read_csv(file_path)
+                df = store.to_dataframe(start=start_day)
                 
                 if len(df) > 0:
-                    self.validation_stats['valid_files'] += 1
+                    self.validation_stats['valid_files'] += len(store.sources(start=start_day))
                     self.validation_stats['total_samples'] += len(df)
                     all_data.append(df)
-                    logger.info(f"Carregado: {file_path.name} ({len(df)} amostras)")
+                    logger.info(f"Carregado: {name} ({len(df)} amostras)")
                     
             except Exception as e:
-                logger.warning(f"Erro ao carregar {file_path.name}: {e}")
+                logger.warning(f"Erro ao carregar {name}: {e}")
                 continue
         
         if not all_data:
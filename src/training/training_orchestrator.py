@@ -0,0 +1,529 @@
+"""
+Orquestrador de Treinamento Walk-Forward
+Executa folds walk-forward e modelos independentes num pool de processos,
+com limite de threads por job, matrizes de features em cache (memory-map)
+e perfil de tempo/memória por estágio
+"""
+
+import os
+import gc
+import time
+import hashlib
+import logging
+import importlib
+import tracemalloc
+from pathlib import Path
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.preprocessing import StandardScaler, RobustScaler
+from sklearn.utils.class_weight import compute_sample_weight
+
+logger = logging.getLogger(__name__)
+
+_SCALERS = {
+    'standard': StandardScaler,
+    'robust': RobustScaler,
+}
+
+# Variáveis lidas pelas bibliotecas nativas (OpenMP/BLAS) na importação
+_THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+
+def walk_forward_folds(n_samples: int, n_folds: int = 4, test_size: Optional[int] = None,
+                       min_train: Optional[int] = None, gap: int = 0,
+                       expanding: bool = True) -> List[Tuple[int, int, int, int]]:
+    """
+    Divide uma série temporal em folds walk-forward
+
+    Cada fold treina no passado e testa no bloco seguinte; `gap` amostras
+    entre treino e teste evitam vazamento do target (horizonte futuro).
+
+    Args:
+        n_samples: Total de amostras (em ordem temporal)
+        n_folds: Número de folds
+        test_size: Amostras por bloco de teste (padrão: n / (n_folds + 1))
+        min_train: Mínimo de amostras de treino no primeiro fold
+        gap: Amostras descartadas entre treino e teste
+        expanding: Janela de treino crescente (False = janela deslizante)
+
+    Returns:
+        Lista de (train_start, train_end, test_start, test_end)
+    """
+    if n_folds < 1:
+        raise ValueError("n_folds deve ser >= 1")
+    test_size = test_size or n_samples // (n_folds + 1)
+    min_train = min_train or n_samples - n_folds * test_size - gap
+    if test_size <= 0 or min_train <= 0 or min_train + gap + n_folds * test_size > n_samples:
+        raise ValueError(f"Amostras insuficientes para {n_folds} folds: {n_samples}")
+
+    folds = []
+    first_test = n_samples - n_folds * test_size
+    for i in range(n_folds):
+        test_start = first_test + i * test_size
+        train_end = test_start - gap
+        train_start = 0 if expanding else max(0, train_end - min_train)
+        folds.append((train_start, train_end, test_start, test_start + test_size))
+    return folds
+
+
+def _rss_mb() -> float:
+    """Memória residente do processo (MB); 0 se não houver como medir"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except Exception:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except Exception:
+        return 0.0
+
+
+class StageProfiler:
+    """Tempo de parede, CPU e memória por estágio do treinamento"""
+
+    def __init__(self, track_allocations: bool = False):
+        """
+        Args:
+            track_allocations: Medir o pico de alocações Python/NumPy
+                               (tracemalloc - deixa o treino bem mais lento)
+        """
+        self.track_allocations = track_allocations
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mede o bloco como o estágio `name` (acumula se repetido)"""
+        started_tracing = False
+        if self.track_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+
+        rss_start = _rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.stages.setdefault(name, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                                                  'rss_delta_mb': 0.0, 'peak_alloc_mb': 0.0})
+            stats['calls'] += 1
+            stats['wall_s'] += time.perf_counter() - wall_start
+            stats['cpu_s'] += time.process_time() - cpu_start
+            stats['rss_delta_mb'] += _rss_mb() - rss_start
+            if self.track_allocations:
+                peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                stats['peak_alloc_mb'] = max(stats['peak_alloc_mb'], peak)
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def add(self, name: str, wall_s: float, cpu_s: float, peak_alloc_mb: float = 0.0):
+        """Registra um estágio medido em outro processo (job do pool)"""
+        stats = self.stages.setdefault(name, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                                              'rss_delta_mb': 0.0, 'peak_alloc_mb': 0.0})
+        stats['calls'] += 1
+        stats['wall_s'] += wall_s
+        stats['cpu_s'] += cpu_s
+        stats['peak_alloc_mb'] = max(stats['peak_alloc_mb'], peak_alloc_mb)
+
+    def format(self) -> str:
+        """Tabela do perfil (console/log)"""
+        lines = [f"{'Estágio':<32}{'Calls':>6}{'Wall(s)':>10}{'CPU(s)':>10}{'Pico(MB)':>10}",
+                 "-" * 68]
+        for name, s in self.stages.items():
+            lines.append(f"{name:<32}{s['calls']:>6}{s['wall_s']:>10.2f}"
+                         f"{s['cpu_s']:>10.2f}{s['peak_alloc_mb']:>10.1f}")
+        return "\n".join(lines)
+
+
+@dataclass
+class ModelSpec:
+    """
+    Modelo a treinar, descrito de forma serializável para o pool
+
+    Attributes:
+        name: Nome do modelo no resultado
+        dataset: Dataset registrado em add_dataset()
+        estimator: Caminho da classe (ex.: 'sklearn.ensemble.RandomForestClassifier')
+        params: Parâmetros do construtor (n_jobs é substituído pelo limite do job)
+        scaler: 'standard', 'robust' ou None
+        encode_labels: Mapear classes para 0..k-1 (XGBoost)
+        label_map: Mapa fixo classe -> índice para encode_labels (None = classes
+                   do treino); mantém a codificação igual em todos os folds
+        sample_weight: 'balanced' para pesos por amostra no fit
+    """
+    name: str
+    dataset: str
+    estimator: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    scaler: Optional[str] = 'standard'
+    encode_labels: bool = False
+    label_map: Optional[Dict[int, int]] = None
+    sample_weight: Optional[str] = None
+
+
+def _init_worker(threads: int):
+    """Limita threads nativos antes de qualquer import pesado no worker"""
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+
+
+def _build_estimator(spec: ModelSpec, threads: int):
+    module_name, class_name = spec.estimator.rsplit('.', 1)
+    estimator_class = getattr(importlib.import_module(module_name), class_name)
+    params = dict(spec.params)
+    if 'n_jobs' in params or 'n_jobs' in estimator_class().get_params():
+        params['n_jobs'] = threads
+    return estimator_class(**params)
+
+
+def _run_job(spec: ModelSpec, x_path: str, y_path: str,
+             fold: Optional[Tuple[int, int, int, int]], threads: int,
+             track_allocations: bool) -> Dict:
+    """
+    Treina (e avalia) um modelo em um fold; executado no processo do pool
+
+    Com fold=None treina em todas as amostras e devolve o modelo ajustado.
+    """
+    # No modo em série o tracemalloc pode já estar ativo (StageProfiler)
+    owns_tracing = track_allocations and not tracemalloc.is_tracing()
+    if owns_tracing:
+        tracemalloc.start()
+    elif track_allocations:
+        tracemalloc.reset_peak()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    try:
+        from threadpoolctl import threadpool_limits
+        limits = threadpool_limits(limits=threads)
+    except Exception:
+        limits = None
+
+    try:
+        X = np.load(x_path, mmap_mode='r')
+        y = np.load(y_path, mmap_mode='r')
+        if fold is None:
+            train, test = slice(0, len(X)), None
+        else:
+            train, test = slice(fold[0], fold[1]), slice(fold[2], fold[3])
+
+        X_train = np.asarray(X[train], dtype=np.float64)
+        y_train = np.asarray(y[train])
+
+        scaler = _SCALERS[spec.scaler]() if spec.scaler else None
+        if scaler is not None:
+            X_train = scaler.fit_transform(X_train)
+
+        fit_kwargs = {}
+        if spec.sample_weight == 'balanced':
+            fit_kwargs['sample_weight'] = compute_sample_weight('balanced', y_train)
+
+        # Com mapa fixo a codificação é a mesma em todos os folds; sem ele,
+        # as classes do treino deste fold (contíguas 0..k-1)
+        label_map = None
+        y_fit = y_train
+        if spec.encode_labels:
+            label_map = dict(spec.label_map) if spec.label_map else \
+                {int(c): i for i, c in enumerate(np.unique(y_train))}
+            classes = np.array(sorted(label_map, key=label_map.get))
+            keys = np.array(sorted(label_map))
+            codes = np.array([label_map[k] for k in keys])
+            y_fit = codes[np.searchsorted(keys, y_train)]
+            # Classe ausente no fold: uma linha de peso zero por classe, para o
+            # estimador ver todos os índices 0..k-1
+            missing = np.setdiff1d(np.arange(len(classes)), y_fit)
+            if len(missing):
+                weights = fit_kwargs.get('sample_weight', np.ones(len(y_fit)))
+                X_train = np.vstack([X_train, np.repeat(X_train[:1], len(missing), axis=0)])
+                y_fit = np.concatenate([y_fit, missing])
+                fit_kwargs['sample_weight'] = np.concatenate([weights, np.zeros(len(missing))])
+
+        model = _build_estimator(spec, threads)
+        model.fit(X_train, y_fit, **fit_kwargs)
+
+        result = {'name': spec.name, 'fold': fold, 'train_size': len(y_train)}
+
+        if test is not None:
+            X_test = np.asarray(X[test], dtype=np.float64)
+            y_test = np.asarray(y[test])
+            if scaler is not None:
+                X_test = scaler.transform(X_test)
+            y_pred = model.predict(X_test)
+            if label_map:
+                y_pred = classes[np.asarray(y_pred, dtype=int)]
+            signals = y_test != 0
+            result.update({
+                'test_size': len(y_test),
+                'accuracy': float(accuracy_score(y_test, y_pred)),
+                'f1': float(f1_score(y_test, y_pred, average='weighted')),
+                'signal_accuracy': float((y_pred[signals] == y_test[signals]).mean())
+                if signals.any() else None
+            })
+        else:
+            result.update({
+                'model': model,
+                'scaler': scaler,
+                'label_map': label_map,
+                'inverse_map': {i: c for c, i in label_map.items()} if label_map else None
+            })
+
+        del X_train
+        gc.collect()
+    finally:
+        if limits is not None:
+            limits.restore_original_limits()
+
+    result['wall_s'] = time.perf_counter() - wall_start
+    result['cpu_s'] = time.process_time() - cpu_start
+    if track_allocations:
+        result['peak_alloc_mb'] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        if owns_tracing:
+            tracemalloc.stop()
+    return result
+
+
+class TrainingOrchestrator:
+    """
+    Orquestrador de treinamento walk-forward em paralelo
+
+    Datasets são gravados uma vez em cache (.npy, nome = hash do conteúdo)
+    e abertos via memory-map pelos workers: todos os folds e modelos usam a
+    mesma matriz sem recalcular nem serializar os dados para cada job, e
+    uma nova execução com os mesmos dados reaproveita os arquivos. Ao fim
+    de run() o cache é podado (menos usados primeiro) para não crescer a
+    cada retreino.
+
+    Cada (modelo, fold) é um job independente no pool; `threads_per_job`
+    limita n_jobs dos estimadores e os pools OpenMP/BLAS do worker, para
+    max_workers * threads_per_job não sobrecarregar a máquina.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, threads_per_job: int = 2,
+                 cache_dir: str = "data/training_cache", track_allocations: bool = False,
+                 cache_max_bytes: Optional[int] = 4 * 1024 ** 3,
+                 cache_max_age_days: Optional[float] = 14):
+        """
+        Args:
+            max_workers: Processos do pool (0 = executar no processo atual)
+            threads_per_job: Threads de cada job
+            cache_dir: Diretório das matrizes em cache
+            track_allocations: Medir pico de alocações por estágio (tracemalloc
+                               em cada job - apenas para diagnóstico)
+            cache_max_bytes: Tamanho máximo do cache após run() (None = sem limite)
+            cache_max_age_days: Idade máxima (dias sem uso) das matrizes em cache
+        """
+        cpus = os.cpu_count() or 1
+        self.threads_per_job = max(1, threads_per_job)
+        self.max_workers = max(1, cpus // self.threads_per_job) if max_workers is None else max_workers
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.track_allocations = track_allocations
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_max_age_days = cache_max_age_days
+
+        self.datasets: Dict[str, Dict] = {}
+        self.specs: List[ModelSpec] = []
+        self.profiler = StageProfiler(track_allocations)
+
+    def add_dataset(self, name: str, X, y, gap: int = 0) -> str:
+        """
+        Registra um dataset (ordem temporal) e grava no cache se novo
+
+        Args:
+            name: Nome do dataset
+            X: Matriz de features (DataFrame ou array)
+            y: Target
+            gap: Amostras entre treino e teste (horizonte do target)
+
+        Returns:
+            Chave de cache do dataset
+        """
+        with self.profiler.stage(f"cache:{name}"):
+            columns = list(X.columns) if isinstance(X, pd.DataFrame) else None
+            X_arr = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+            y_arr = np.ascontiguousarray(np.asarray(y))
+
+            digest = hashlib.blake2b(digest_size=16)
+            for arr in (X_arr, y_arr):
+                digest.update(str((arr.shape, arr.dtype.str)).encode())
+                digest.update(memoryview(arr).cast('B'))
+            key = digest.hexdigest()
+
+            x_path = self.cache_dir / f"{key}_X.npy"
+            y_path = self.cache_dir / f"{key}_y.npy"
+            cached = x_path.exists() and y_path.exists()
+            if cached:
+                # mtime = último uso (ordem de remoção do prune_cache)
+                for path in (x_path, y_path):
+                    os.utime(path)
+            else:
+                np.save(x_path, X_arr)
+                np.save(y_path, y_arr)
+
+        self.datasets[name] = {
+            'key': key,
+            'x_path': str(x_path),
+            'y_path': str(y_path),
+            'n_samples': len(y_arr),
+            'columns': columns,
+            'gap': gap,
+            'cached': cached
+        }
+        logger.info(f"Dataset '{name}': {X_arr.shape} ({'cache' if cached else 'gravado'})")
+        return key
+
+    def add_model(self, name: str, dataset: str, estimator: str, params: Optional[Dict] = None,
+                  **options) -> ModelSpec:
+        """Registra um modelo (ver ModelSpec para as opções)"""
+        if dataset not in self.datasets:
+            raise KeyError(f"Dataset não registrado: {dataset}")
+        spec = ModelSpec(name=name, dataset=dataset, estimator=estimator,
+                         params=params or {}, **options)
+        self.specs.append(spec)
+        return spec
+
+    def run(self, n_folds: int = 4, gap: Optional[int] = None, refit: bool = True,
+            expanding: bool = True) -> Dict:
+        """
+        Executa todos os (modelo, fold) e o treino final
+
+        Args:
+            n_folds: Folds walk-forward por dataset
+            gap: Amostras entre treino e teste (padrão: o gap de cada dataset)
+            refit: Treinar cada modelo em todas as amostras ao final
+            expanding: Janela de treino crescente
+
+        Returns:
+            {'models': {nome: {'folds', 'mean_accuracy', 'mean_f1', 'model', ...}},
+             'profile': {estágio: {...}}}
+        """
+        jobs = []
+        for spec in self.specs:
+            dataset = self.datasets[spec.dataset]
+            dataset_gap = dataset['gap'] if gap is None else gap
+            for fold in walk_forward_folds(dataset['n_samples'], n_folds, gap=dataset_gap,
+                                           expanding=expanding):
+                jobs.append((spec, fold))
+            if refit:
+                jobs.append((spec, None))
+
+        logger.info(f"{len(jobs)} jobs em {self.max_workers} processos "
+                    f"x {self.threads_per_job} threads")
+
+        results: Dict[str, Dict] = {spec.name: {'folds': []} for spec in self.specs}
+        with self.profiler.stage('train:total'):
+            for result in self._execute(jobs):
+                stage = f"{'fold' if result['fold'] is not None else 'refit'}:{result['name']}"
+                self.profiler.add(stage, result.pop('wall_s'), result.pop('cpu_s'),
+                                  result.pop('peak_alloc_mb', 0.0))
+                entry = results[result['name']]
+                if result['fold'] is None:
+                    entry.update({k: result[k] for k in ('model', 'scaler', 'label_map',
+                                                         'inverse_map', 'train_size')})
+                else:
+                    entry['folds'].append(result)
+
+        for spec in self.specs:
+            entry = results[spec.name]
+            entry['folds'].sort(key=lambda r: r['fold'][2])
+            entry['dataset'] = spec.dataset
+            entry['columns'] = self.datasets[spec.dataset]['columns']
+            if entry['folds']:
+                entry['mean_accuracy'] = float(np.mean([r['accuracy'] for r in entry['folds']]))
+                entry['mean_f1'] = float(np.mean([r['f1'] for r in entry['folds']]))
+
+        self.prune_cache()
+        return {'models': results, 'profile': self.profiler.stages}
+
+    def _execute(self, jobs: List[Tuple[ModelSpec, Optional[Tuple]]]):
+        """Executa os jobs no pool (ou em série com max_workers=0)"""
+        def args(spec, fold):
+            dataset = self.datasets[spec.dataset]
+            return (spec, dataset['x_path'], dataset['y_path'], fold,
+                    self.threads_per_job, self.track_allocations)
+
+        if self.max_workers == 0:
+            for spec, fold in jobs:
+                yield _run_job(*args(spec, fold))
+            return
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(self.threads_per_job,)) as pool:
+            futures = {pool.submit(_run_job, *args(spec, fold)): (spec.name, fold)
+                       for spec, fold in jobs}
+            for future in as_completed(futures):
+                name, fold = futures[future]
+                try:
+                    yield future.result()
+                except Exception as e:
+                    logger.error(f"Job {name} fold={fold} falhou: {e}")
+                    raise
+
+    def prune_cache(self, max_bytes: Optional[int] = None,
+                    max_age_days: Optional[float] = None) -> List[str]:
+        """
+        Remove do cache as matrizes antigas ou menos usadas
+
+        Datasets registrados neste orquestrador nunca são removidos. Os pares
+        X/y saem juntos, primeiro os que passaram de `max_age_days` sem uso e
+        depois os menos recentes até o total caber em `max_bytes`.
+
+        Args:
+            max_bytes: Tamanho máximo (padrão: cache_max_bytes)
+            max_age_days: Idade máxima sem uso (padrão: cache_max_age_days)
+
+        Returns:
+            Chaves removidas
+        """
+        max_bytes = self.cache_max_bytes if max_bytes is None else max_bytes
+        max_age_days = self.cache_max_age_days if max_age_days is None else max_age_days
+        in_use = {dataset['key'] for dataset in self.datasets.values()}
+
+        entries: Dict[str, Dict] = {}
+        for path in self.cache_dir.glob("*_[Xy].npy"):
+            key = path.name.rsplit('_', 1)[0]
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entry = entries.setdefault(key, {'paths': [], 'bytes': 0, 'used': 0.0})
+            entry['paths'].append(path)
+            entry['bytes'] += stat.st_size
+            entry['used'] = max(entry['used'], stat.st_mtime)
+
+        total = sum(entry['bytes'] for entry in entries.values())
+        cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+        removed = []
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]['used']):
+            if key in in_use:
+                continue
+            expired = cutoff is not None and entry['used'] < cutoff
+            if not expired and (max_bytes is None or total <= max_bytes):
+                continue
+            for path in entry['paths']:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= entry['bytes']
+            removed.append(key)
+
+        if removed:
+            logger.info(f"Cache de treino: {len(removed)} datasets removidos "
+                        f"({total / 1024 / 1024:.0f} MB restantes)")
+        return removed
+
+    def clear_cache(self):
+        """Remove as matrizes em cache"""
+        for path in self.cache_dir.glob("*.npy"):
+            path.unlink()
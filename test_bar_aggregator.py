@@ -0,0 +1,117 @@
+"""
+Teste do BarAggregator (candles em streaming, múltiplos timeframes)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from market_data.bar_aggregator import BarAggregator
+from trading.market_regime_detector import MarketRegimeDetector
+from trading.adaptive_risk_manager import AdaptiveRiskManager
+
+
+def _trades(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 8, 1, 9, 0).timestamp()
+    ts = start + np.cumsum(rng.exponential(0.4, n))
+    price = 5400 + np.round(np.cumsum(rng.normal(0, 0.5, n)) * 2) / 2
+    volume = rng.integers(1, 20, n).astype(float)
+    side = rng.choice([1, -1, 0], n)
+    return ts, price, volume, side
+
+
+def test_bars_match_resample():
+    """Barras fechadas = resample do pandas, para todos os timeframes"""
+    ts, price, volume, side = _trades()
+    agg = BarAggregator(history=5000)
+    for t, p, v, s in zip(ts, price, volume, side):
+        agg.on_trade(p, v, t, s)
+
+    trades = pd.DataFrame({'price': price, 'volume': volume, 'side': side},
+                          index=pd.DatetimeIndex([datetime.fromtimestamp(t) for t in ts]))
+    for tf, rule in (('1s', '1s'), ('5s', '5s'), ('1min', '1min'), ('5min', '5min')):
+        grouped = trades.resample(rule)
+        expected = grouped['price'].ohlc()
+        expected['volume'] = grouped['volume'].sum()
+        expected['vwap'] = (trades['price'] * trades['volume']).resample(rule).sum() / expected['volume']
+        expected['buy_volume'] = trades['volume'].where(trades['side'] > 0, 0).resample(rule).sum()
+        expected = expected.dropna(subset=['open'])
+
+        bars = agg.frame(tf, include_open=True)
+        assert len(bars) == len(expected)
+        assert len(agg.bars(tf)) == len(expected) - 1          # última ainda aberta
+        for col in ('open', 'high', 'low', 'close', 'volume', 'vwap', 'buy_volume'):
+            assert np.allclose(bars[col].to_numpy(), expected[col].to_numpy()), (tf, col)
+
+    assert agg.session.volume == volume.sum() and agg.session.high == price.max()
+    assert abs(agg.session.vwap - (price * volume).sum() / volume.sum()) < 1e-9
+
+
+def test_subscribers_only_on_close():
+    """Callback só no fechamento; on_clock fecha sem novo trade; trade atrasado não se perde"""
+    agg = BarAggregator(timeframes=('1s', '1min'))
+    closed = {'1s': [], '1min': []}
+    agg.subscribe('1s', closed['1s'].append)
+    agg.subscribe('1min', closed['1min'].append)
+    agg.subscribe('1min', lambda bar: 1 / 0)                 # assinante com erro
+
+    t0 = datetime(2025, 8, 1, 10, 0).timestamp()
+    for i in range(10):
+        agg.on_trade_data({'price': 5400 + i, 'quantity': 2, 'timestamp': t0 + i * 0.05,
+                           'trade_type': 2})
+    assert closed == {'1s': [], '1min': []}
+    assert agg.current('1min').buy_volume == 20 and agg.current('1min').close == 5409
+
+    agg.on_trade(5410, 1, t0 + 1.2, side=-1)
+    assert len(closed['1s']) == 1 and closed['1s'][0].trades == 10 and not closed['1min']
+
+    agg.on_trade(5399, 3, t0 + 0.5)                          # atrasado: entra na barra aberta
+    assert agg.stats['late_trades'] == 1 and agg.current('1s').volume == 4
+
+    assert len(agg.on_clock(t0 + 60)) == 2
+    assert closed['1min'][0].volume == 24 and closed['1min'][0].low == 5399
+    assert agg.stats['callback_errors'] == 1 and agg.current('1min') is None
+
+    agg.on_trade(5405, 1, t0 + 30)                           # antes da barra fechada
+    assert agg.current('1min').start == closed['1min'][0].end
+
+    agg.reset()
+    assert agg.session is None and agg.bars('1min') == []
+
+
+def test_consumers_fed_by_closed_bars():
+    """Detector de regime e risk manager alimentados pelo mesmo agregador"""
+    detector = MarketRegimeDetector()
+    risk = AdaptiveRiskManager()
+    agg = BarAggregator(timeframes=('1min',))
+    agg.subscribe('1min', detector.on_bar)
+    agg.subscribe('1min', risk.on_bar)
+
+    ts, price, volume, side = _trades(n=6000, seed=3)
+    for t, p, v, s in zip(ts, price, volume, side):
+        agg.on_trade(p, v, t, s)
+
+    bars = agg.bars('1min')
+    assert len(detector.price_buffer) == min(len(bars), detector.price_buffer.maxlen)
+    assert list(risk.price_buffer)[-5:] == [b.close for b in bars[-5:]]
+    assert list(detector.high_buffer)[-1] == bars[-1].high
+    assert detector.current_regime != 'UNDEFINED'
+    assert risk.calculate_atr() > 0
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: BarAggregator")
+    print("=" * 60)
+    test_bars_match_resample()
+    print("[OK] Barras iguais ao resample")
+    test_subscribers_only_on_close()
+    print("[OK] Notificação só no fechamento")
+    test_consumers_fed_by_closed_bars()
+    print("[OK] Regime e risco alimentados pelas barras")
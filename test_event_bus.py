@@ -0,0 +1,102 @@
+"""
+Teste do EventBus com lanes por tópico
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import time
+import threading
+
+from events.event_system import EventBus, Event, EventType
+
+
+def test_order_events_do_not_wait_behind_market_data():
+    """Handler lento de book não atrasa ORDER_FILLED; book é coalescido"""
+    bus = EventBus(max_history_size=50)
+    release = threading.Event()
+    books = []
+    filled = threading.Event()
+
+    def slow_book(event):
+        release.wait(2.0)
+        books.append(event.data['seq'])
+
+    bus.subscribe(EventType.BOOK_UPDATE, slow_book)
+    bus.subscribe(EventType.ORDER_FILLED, lambda e: filled.set(), priority=9)
+    bus.start()
+    try:
+        for i in range(500):
+            bus.publish(Event(type=EventType.BOOK_UPDATE, data={'seq': i}, source="market_data"))
+        bus.publish(Event(type=EventType.ORDER_FILLED, data={'order_id': 1}, priority=9))
+
+        assert filled.wait(1.0)
+        release.set()
+        deadline = time.time() + 2.0
+        while bus.get_stats()['queue_size'] and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        bus.stop()
+
+    stats = bus.get_stats()
+    market = stats['lanes']['market']
+    assert books[-1] == 499
+    assert len(books) < 500 and market['coalesced'] == 500 - len(books)
+    assert stats['lanes']['orders']['processed'] == 1
+    assert stats['processed'] == len(books) + 1 and stats['failed'] == 0
+    assert stats['handler_latency']['ORDER_FILLED']['calls'] == 1
+    assert len(bus.event_history) == 50
+
+
+def test_subscribe_priority_and_drop_when_full():
+    bus = EventBus(max_queue_size=3)
+    calls = []
+    bus.subscribe(EventType.TRADE_EXECUTED, lambda e: calls.append('low'), priority=1)
+    bus.subscribe(EventType.TRADE_EXECUTED, lambda e: calls.append('high'), priority=9)
+    bus.subscribe(EventType.TRADE_EXECUTED, lambda e: calls.append('mid'), priority=5)
+
+    # Sem workers: trades (não coalescidos) enchem a lane de mercado
+    for i in range(5):
+        bus.publish(Event(type=EventType.TRADE_EXECUTED, data={'price': i}))
+    lanes = bus.get_lane_stats()
+    assert lanes['market']['depth'] == 3 and lanes['market']['dropped'] == 2
+    assert lanes['market']['depth_by_type'] == {'TRADE_EXECUTED': 3}
+
+    bus.publish_immediate(Event(type=EventType.TRADE_EXECUTED))
+    assert calls == ['high', 'mid', 'low']
+    stats = bus.get_stats()
+    assert stats['published'] == 5 and stats['failed'] == 2
+    assert stats['by_type'] == {EventType.TRADE_EXECUTED: 5}
+
+
+def test_publish_counters_exact_across_threads():
+    """Contadores de publicação não perdem incrementos com vários publicadores"""
+    bus = EventBus(max_queue_size=100_000)
+    per_thread, n_threads = 2000, 8
+
+    def publisher():
+        for i in range(per_thread):
+            bus.publish(Event(type=EventType.ORDER_FILLED, data={'i': i}))
+
+    threads = [threading.Thread(target=publisher) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = bus.get_stats()
+    assert stats['published'] == per_thread * n_threads
+    assert stats['by_type'][EventType.ORDER_FILLED] == per_thread * n_threads
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: EventBus com lanes")
+    print("=" * 60)
+    test_order_events_do_not_wait_behind_market_data()
+    print("[OK] Ordens isoladas de dados de mercado")
+    test_subscribe_priority_and_drop_when_full()
+    print("[OK] Prioridade de handlers e descarte")
+    test_publish_counters_exact_across_threads()
+    print("[OK] Contadores exatos com vários publicadores")
@@ -0,0 +1,154 @@
+"""
+Teste da biblioteca vetorizada de features e do cache de matrizes
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import time
+import dataclasses
+import numpy as np
+import pandas as pd
+
+from features.feature_library import (
+    FEATURE_SETS, FeatureCache, build_feature_matrix,
+    rolling_max, rolling_mean, rolling_std, rolling_sum
+)
+from replay.replay_engine import events_from_frames, replay_feature_matrices
+
+
+def _ticks(n=5000, seed=11):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2025-03-10 09:00', periods=n, freq='s'),
+        'price': 5400 + np.cumsum(rng.normal(0, 0.5, n)).round(1),
+        'volume': rng.integers(1, 20, n).astype(float),
+        'aggressor': rng.choice([-1, 1], n),
+    })
+
+
+def test_kernels_match_pandas_rolling():
+    """Mesma semântica (min_periods, NaN, ddof=1) que pandas.rolling"""
+    rng = np.random.default_rng(0)
+    # Preço alto e longo: testa a precisão das somas centradas por bloco
+    x = 5000 + np.cumsum(rng.normal(0, 0.5, 200_000))
+    x[[10, 5000]] = np.nan
+    s = pd.Series(x)
+
+    for window in (5, 20, 200):
+        assert np.allclose(rolling_sum(x, window), s.rolling(window).sum(), equal_nan=True)
+        assert np.allclose(rolling_mean(x, window), s.rolling(window).mean(), equal_nan=True)
+        # Somas acumuladas: erro absoluto ~1e-7 em janelas curtas de preço alto
+        assert np.allclose(rolling_std(x, window), s.rolling(window).std(),
+                           rtol=1e-6, atol=1e-6, equal_nan=True)
+        assert np.allclose(rolling_max(x, window), s.rolling(window).max(), equal_nan=True)
+    assert np.isnan(rolling_mean(x[:3], 5)).all()
+
+
+def test_context_features_match_reference_definition():
+    """Conjunto 'context' reproduz as definições em pandas do pipeline"""
+    df = _ticks()
+    features = build_feature_matrix(df, 'context')
+    returns = df['price'].pct_change()
+
+    reference = {
+        'sma_20': df['price'].rolling(20).mean(),
+        'momentum_30': df['price'].pct_change(30),
+        'volatility_60': returns.rolling(60).std(),
+        'atr': (df['price'].rolling(20).max() - df['price'].rolling(20).min()) / df['price'],
+        'aggressor_ratio': df['aggressor'].rolling(100).mean(),
+        'trade_intensity': df['volume'].rolling(100).sum(),
+    }
+    for name, expected in reference.items():
+        assert np.allclose(features[name], expected, rtol=1e-7, equal_nan=True), name
+    assert features['session'].iloc[0] == 0 and features.index.equals(df.index)
+
+
+def test_cache_hit_and_version_invalidation(tmp_path):
+    """Mesmo conteúdo vem do cache; dados ou versão diferentes recalculam"""
+    cache = FeatureCache(tmp_path)
+    df = _ticks()
+
+    first = build_feature_matrix(df, 'context', cache)
+    second = build_feature_matrix(df, 'context', cache)
+    assert cache.stats == {'hits': 1, 'misses': 1, 'writes': 1, 'pruned': 0}
+    assert np.array_equal(first.to_numpy(), second.to_numpy(), equal_nan=True)
+    assert list(second.columns) == list(first.columns)
+
+    changed = df.copy()
+    changed.loc[100, 'price'] += 1
+    build_feature_matrix(changed, 'context', cache)
+    assert cache.stats['writes'] == 2
+
+    bumped = dataclasses.replace(FEATURE_SETS['context'], version=99)
+    build_feature_matrix(df, bumped, cache)
+    assert cache.stats['writes'] == 3 and len(list((tmp_path / 'context').glob('*.npy'))) == 3
+
+
+def test_cache_prune_by_age_and_size(tmp_path):
+    """Matrizes sem uso expiram; acima do limite saem as menos usadas"""
+    cache = FeatureCache(tmp_path)
+    df = _ticks()
+    paths = []
+    for i in range(3):
+        changed = df.copy()
+        changed.loc[0, 'price'] += i
+        build_feature_matrix(changed, 'context', cache)
+        newest = max((tmp_path / 'context').glob('*.npy'), key=lambda p: p.stat().st_mtime_ns)
+        past = time.time() - (3 - i) * 86400
+        os.utime(newest, (past, past))
+        paths.append(newest)
+
+    # Leitura renova o uso da matriz mais antiga
+    build_feature_matrix(df, 'context', cache)
+    assert cache.stats['hits'] == 1
+    size = paths[0].stat().st_size + paths[0].with_suffix('.json').stat().st_size
+
+    assert cache.prune(max_age_days=1.5) == [f"context/{paths[1].stem}"]
+    assert not paths[1].with_suffix('.json').exists()
+    assert cache.prune(max_bytes=size, max_age_days=None) == [f"context/{paths[2].stem}"]
+    assert [p.name for p in (tmp_path / 'context').glob('*.npy')] == [paths[0].name]
+    assert cache.stats['pruned'] == 2
+
+
+def test_replay_path_uses_same_feature_sets(tmp_path):
+    """Replay monta trades/book dos eventos e calcula os mesmos conjuntos"""
+    trades = _ticks(n=500)
+    book = pd.DataFrame({
+        'timestamp': trades['timestamp'],
+        'bid_price_1': trades['price'] - 0.5,
+        'ask_price_1': trades['price'] + 0.5,
+        'bid_volume_1': 10.0,
+        'ask_volume_1': 30.0,
+    })
+    events = events_from_frames(book, trades)
+    matrices = replay_feature_matrices(events, cache=FeatureCache(tmp_path))
+
+    assert len(matrices['context']) == 500 and len(matrices['book']) == 500
+    assert np.allclose(matrices['context']['sma_5'],
+                       build_feature_matrix(trades, 'context')['sma_5'], equal_nan=True)
+    assert np.allclose(matrices['book']['imbalance'], -0.5)
+    assert np.allclose(matrices['book']['spread'], 1.0)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("=" * 60)
+    print("TESTE: FeatureLibrary")
+    print("=" * 60)
+    test_kernels_match_pandas_rolling()
+    print("[OK] Kernels rolling")
+    test_context_features_match_reference_definition()
+    print("[OK] Conjunto de contexto")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_hit_and_version_invalidation(Path(tmp))
+    print("[OK] Cache por conteúdo e versão")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_prune_by_age_and_size(Path(tmp))
+    print("[OK] Poda do cache")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_replay_path_uses_same_feature_sets(Path(tmp))
+    print("[OK] Features no replay")
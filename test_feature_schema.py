@@ -0,0 +1,81 @@
+"""
+Teste do FeatureSchema: mapeamento compilado nome -> índice
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import numpy as np
+
+from features.feature_schema import FeatureSchema
+from features.feature_mapping import FeatureMapper
+
+
+def test_schema_from_model_config():
+    """Schema deve seguir a ordem declarada em models/hybrid/config.json"""
+    schema = FeatureSchema.from_model_config('models/hybrid')
+    assert schema.size == 16
+    assert schema.names[0] == 'returns_1'
+    assert schema.index['book_imbalance'] == 15
+    assert schema.new_vector().dtype == np.float32
+
+
+def test_binding_gather_and_missing():
+    """Binding resolve índices uma vez e reporta features sem produtor"""
+    schema = FeatureSchema(['a', 'b', 'c'], name='test')
+    binding = schema.bind(['c', 'x', 'a'])
+    assert binding.missing == ['b']
+
+    out = binding.gather(np.array([3.0, 9.0, 1.0]))
+    assert list(out) == [1.0, 0.0, 3.0]
+
+    matrix = binding.gather(np.array([[3.0, 9.0, 1.0], [6.0, 9.0, 2.0]]))
+    assert matrix.shape == (2, 3)
+    assert list(matrix[:, 0]) == [1.0, 2.0]
+
+
+def test_mapper_vector_matches_dict():
+    """map_vector deve produzir os mesmos valores que map_features"""
+    calculated = ['order_flow_imbalance_10', 'volatility_10', 'is_buyer_aggressor',
+                  'volume_weighted_return', 'spread']
+    values = np.array([0.4, 0.02, 1.0, -0.3, 0.5])
+
+    mapper = FeatureMapper()
+    binding = mapper.compile(calculated)
+    mapped_vector = mapper.map_vector(values, binding)
+    mapped_dict = mapper.map_features(dict(zip(calculated, values)))
+
+    for name, i in binding.schema.index.items():
+        assert np.isclose(mapped_vector[i], mapped_dict[name]), name
+
+
+def test_mapper_missing_alias_target_uses_default():
+    """Alvo do alias ausente: padrão, mesmo com feature calculada de mesmo nome"""
+    calculated = ['spread_ma', 'vwap', 'is_buyer_aggressor']
+    values = np.array([0.7, 5450.0, 0.0])
+
+    mapper = FeatureMapper()
+    binding = mapper.compile(calculated)
+    mapped_vector = mapper.map_vector(values, binding)
+    mapped_dict = mapper.map_features(dict(zip(calculated, values)))
+
+    index = binding.schema.index
+    assert mapped_dict['spread_ma'] == 0.0 and mapped_vector[index['spread_ma']] == 0.0
+    assert mapped_vector[index['vwap']] == 0.0
+    for name, i in index.items():
+        assert np.isclose(mapped_vector[i], mapped_dict[name]), name
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: FeatureSchema")
+    print("=" * 60)
+    test_schema_from_model_config()
+    print("[OK] Schema do config.json")
+    test_binding_gather_and_missing()
+    print("[OK] Binding")
+    test_mapper_vector_matches_dict()
+    print("[OK] FeatureMapper compilado")
+    test_mapper_missing_alias_target_uses_default()
+    print("[OK] Alias sem alvo usa o padrão")
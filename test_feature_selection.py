@@ -0,0 +1,95 @@
+"""
+Teste da seleção de features em paralelo com cache de scores
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import json
+import numpy as np
+import pandas as pd
+
+from training.feature_selection import FeatureSelector, stratified_block_sample
+
+
+def _dataset(n=6000, seed=5):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 6)), columns=[f'noise_{i}' for i in range(6)])
+    X['signal'] = rng.normal(size=n)
+    X['weak'] = X['signal'] * 0.3 + rng.normal(size=n)
+    y = pd.Series(np.where(X['signal'] > 0.6, 1, np.where(X['signal'] < -0.6, -1, 0)),
+                  dtype='int8')
+    return X, y
+
+
+def test_stratified_block_sample_covers_time_and_classes():
+    """Cada bloco de tempo e cada classe entram na proporção do seu tamanho"""
+    y = np.zeros(100_000, dtype=np.int8)
+    y[50_000:60_000] = 1          # classe rara concentrada num trecho
+    idx = stratified_block_sample(y, 10_000, block_size=1000)
+
+    assert abs(len(idx) - 10_000) <= 100
+    assert np.all(np.diff(idx) > 0)
+    per_block = np.bincount(idx // 1000, minlength=100)
+    assert per_block.min() >= 95 and per_block.max() <= 105
+    assert abs((y[idx] == 1).sum() - 1000) <= 10
+    assert np.array_equal(idx, stratified_block_sample(y, 10_000, block_size=1000))
+
+
+def test_select_ranks_informative_features(tmp_path):
+    """Coluna que gera o target fica no topo em todos os métodos"""
+    X, y = _dataset()
+    selector = FeatureSelector(cache_dir=str(tmp_path), max_workers=2, sample_size=4000,
+                               block_size=500)
+    selected, scores = selector.select(X, y, k=2)
+
+    assert selected == ['signal', 'weak']
+    assert list(scores.columns) == ['anova', 'mi', 'importance', 'rank']
+    for method in ('anova', 'mi', 'importance'):
+        assert scores[method].idxmax() == 'signal'
+
+
+def test_cache_scores_only_new_or_changed_columns(tmp_path):
+    """Re-executar só pontua colunas novas; scores iguais ao cálculo completo"""
+    X, y = _dataset(n=3000)
+    y = y.astype('float64')
+    y.iloc[:10] = np.nan
+    selector = FeatureSelector(cache_dir=str(tmp_path), max_workers=0)
+
+    first = selector.score(X, y)
+    assert selector.stats == {'scored': 8, 'cached': 0}
+
+    X['extra'] = X['signal'] ** 2
+    second = selector.score(X, y)
+    assert selector.stats == {'scored': 9, 'cached': 8}
+    assert second.loc[first.index].equals(first)
+
+    X['weak'] = X['weak'] + 1.0
+    selector.score(X, y)
+    assert selector.stats == {'scored': 10, 'cached': 16}
+
+    # Pool e cálculo sem cache dão os mesmos scores
+    fresh = FeatureSelector(cache_dir=None, max_workers=2).score(X, y)
+    assert np.allclose(fresh.to_numpy(), selector.score(X, y).to_numpy())
+
+    files = list(tmp_path.glob('*.json'))
+    assert len(files) == 1
+    assert set(json.loads(files[0].read_text())['columns']) == set(X.columns)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("=" * 60)
+    print("TESTE: FeatureSelector")
+    print("=" * 60)
+    test_stratified_block_sample_covers_time_and_classes()
+    print("[OK] Amostragem estratificada por blocos")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_select_ranks_informative_features(Path(tmp))
+    print("[OK] Seleção em paralelo")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_scores_only_new_or_changed_columns(Path(tmp))
+    print("[OK] Cache de scores por coluna")
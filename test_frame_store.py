@@ -0,0 +1,117 @@
+"""
+Teste da FrameStore e do TradingDataStructure sobre ela
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from buffers.frame_store import FrameStore
+from data_structure import TradingDataStructure
+
+
+def _bars(start, n, price=5400.0, seed=0):
+    rng = np.random.default_rng(seed)
+    close = price + np.cumsum(rng.normal(0, 1, n))
+    index = pd.date_range(start, periods=n, freq='1min', name='datetime')
+    return pd.DataFrame({
+        'open': close - 0.5, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': rng.integers(10, 100, n).astype(float),
+    }, index=index)
+
+
+def _reference(frame, new):
+    merged = pd.concat([frame, new]) if not frame.empty else new.copy()
+    return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+
+def test_upsert_matches_concat_dedupe_sort():
+    """Mesma tabela que concat + drop_duplicates(keep='last') + sort_index"""
+    store = FrameStore(capacity=16)
+    history = _bars('2025-08-01 09:00', 40)
+    expected = history
+    store.upsert(history)
+
+    updates = [
+        history.iloc[-1:].assign(close=1.0, volume=999.0),         # barra aberta
+        _bars('2025-08-01 09:40', 30, seed=1),                      # barras novas (cresce)
+        history.iloc[5:7].assign(high=9999.0),                      # correção antiga
+        _bars('2025-08-01 08:00', 3, seed=2),                       # antes do início
+        _bars('2025-08-01 10:10', 2, seed=3).assign(buy_ratio=0.7), # coluna nova
+        _bars('2025-08-01 10:11', 3, seed=4).iloc[::-1],            # fora de ordem
+    ]
+    for new in updates:
+        store.upsert(new)
+        expected = _reference(expected, new)
+        pd.testing.assert_frame_equal(store.frame(), expected, check_freq=False)
+
+    assert len(store) == len(expected)
+    assert store.last('close') == expected['close'].iloc[-1]
+    pd.testing.assert_frame_equal(store.tail(4), expected.tail(4), check_freq=False)
+
+
+def test_frame_is_built_lazily_and_cached():
+    """DataFrame só é remontado depois de uma alteração"""
+    store = FrameStore(columns=['open', 'close'])
+    assert store.empty and list(store.frame().columns) == ['open', 'close']
+
+    bars = _bars('2025-08-01 09:00', 5)[['open', 'close']]
+    store.upsert(bars)
+    first = store.frame()
+    assert store.frame() is first
+
+    store.upsert(bars.iloc[-1:].assign(close=1.0))
+    second = store.frame()
+    assert second is not first and second['close'].iloc[-1] == 1.0
+    assert first['close'].iloc[-1] != 1.0          # cópia anterior não muda
+
+    store.reset()
+    assert store.empty and list(store.frame().columns) == ['open', 'close']
+
+
+def test_trading_data_structure_per_trade_updates():
+    """Barra aberta atualizada a cada trade; metadados sem montar DataFrame"""
+    data = TradingDataStructure()
+    data.initialize_structure()
+    assert data.candles.empty and 'quantidade' in data.candles.columns
+
+    history = _bars('2025-08-01 09:00', 100)
+    data.update_candles(history)
+    open_bar = history.iloc[-1:].copy()
+    for price in (5401.0, 5402.5, 5399.0):
+        open_bar['close'] = price
+        open_bar['volume'] += 1
+        assert data.update_candles(open_bar)
+    data.update_candles(_bars('2025-08-01 10:40', 1, seed=9))
+
+    assert len(data.candles) == 101
+    assert data.candles.loc['2025-08-01 10:39', 'close'] == 5399.0
+    assert data.last_price == data.candles['close'].iloc[-1]
+    assert data.data_quality['data_range']['end'] == pd.Timestamp('2025-08-01 10:40')
+    assert data.get_latest_candle().name == pd.Timestamp('2025-08-01 10:40')
+    assert len(data.get_candles_window(10)) == 10
+
+    micro = pd.DataFrame({'buy_volume': [1.0, 2.0]}, index=history.index[:2])
+    assert data.update_microstructure(micro)
+    assert data.get_summary()['dataframes']['microstructure']['rows'] == 2
+    assert not data.update_features(pd.DataFrame())
+
+    data.candles = data.candles.iloc[0:0]
+    assert data.candles.empty
+    data.clear()
+    assert all(df.empty for df in data.get_all_dataframes().values())
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: FrameStore / TradingDataStructure")
+    print("=" * 60)
+    test_upsert_matches_concat_dedupe_sort()
+    print("[OK] Upsert equivalente ao concat")
+    test_frame_is_built_lazily_and_cached()
+    print("[OK] DataFrame sob demanda")
+    test_trading_data_structure_per_trade_updates()
+    print("[OK] Atualizações por trade")
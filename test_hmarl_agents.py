@@ -0,0 +1,641 @@
+"""
+Teste da avaliação vetorizada dos agentes HMARL (vetor de features compartilhado)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+
+import agents.hmarl_agents_realtime as hmarl_module
+from agents.hmarl_agents_realtime import (
+    AGENT_NAMES, AGENT_SCHEMA, HMARLAgentsRealtime, build_feature_matrix,
+    consensus_scores, score_agents, score_matrix
+)
+
+
+def _ticks(n=300, seed=0, with_features=False):
+    rng = np.random.default_rng(seed)
+    prices = 5400 + np.round(np.cumsum(rng.normal(0, 1.0, n)) * 2) / 2
+    ticks = []
+    for i, price in enumerate(prices):
+        tick = {'price': float(price), 'volume': float(rng.integers(1, 80)),
+                'book_data': {'spread': float(rng.choice([0.5, 1.0, 1.5])),
+                              'imbalance': float(rng.uniform(-0.5, 0.5))}}
+        if with_features and i % 3:
+            tick['features'] = {
+                'delta_volume': float(rng.choice([0, rng.integers(-200, 200)])),
+                'buy_sell_ratio': float(rng.uniform(0.5, 1.5)),
+                'volume_pressure': float(rng.uniform(-1, 1)),
+                'order_flow_imbalance_5': float(rng.uniform(-1, 1)),
+                'signed_volume_5': float(rng.normal()),
+                'trade_flow_5': float(rng.normal()),
+                'volume_ratio': float(rng.uniform(0.5, 1.5)),
+                'spread': float(rng.choice([0.25, 0.5, 1.5])),
+                'book_depth_imbalance': float(rng.uniform(-1, 1)),
+                'bid_levels_active': float(rng.integers(1, 10)),
+                'volume': float(rng.integers(0, 120)),
+                'cumulative_volume': float(rng.choice([0, 500])),
+                'buy_volume': float(rng.integers(0, 300)),
+                'sell_volume': float(rng.integers(0, 300)),
+                'absorption_ratio': float(rng.uniform(0, 1)),
+                'volume_clusters': float(rng.integers(0, 6)),
+            }
+        ticks.append(tick)
+    return ticks
+
+
+def _reference(prices, volumes, books, f):
+    """Regras originais (sem variação temporal, aleatoriedade nem decay)"""
+    result = []
+
+    # OrderFlowSpecialist
+    if f:
+        dv = f.get('delta_volume', 0)
+        if dv != 0:
+            combined = np.sign(dv) * 0.5 + (f.get('buy_sell_ratio', 1.0) - 1.0) * 0.3 + f.get('volume_pressure', 0) * 0.2
+        else:
+            combined = (f.get('order_flow_imbalance_5', 0) * 0.4 + np.sign(f.get('signed_volume_5', 0)) * 0.3
+                        + np.sign(f.get('trade_flow_5', 0)) * 0.3)
+        signal = 1 if combined > 0.3 else -1 if combined < -0.3 else combined
+        result.append((signal, np.clip(min(abs(combined) + 0.3, 0.95), 0.3, 0.95)))
+    elif len(volumes) < 10 or len(prices) < 10:
+        result.append((0, 0.5))
+    else:
+        recent_vol = list(volumes)[-10:]
+        vol_trend = (recent_vol[-1] - np.mean(recent_vol)) / (np.mean(recent_vol) + 1e-8)
+        weighted = sum(p * v for p, v in zip(np.diff(list(prices)[-10:]), recent_vol[1:]))
+        if weighted > 0:
+            signal = 1 if vol_trend > 0 else 0.5
+        elif weighted < 0:
+            signal = -1 if vol_trend < 0 else -0.5
+        else:
+            signal = 0
+        result.append((signal, min(abs(weighted) / 1000 + 0.5, 0.95)))
+
+    # LiquidityAgent
+    if f:
+        score = 0
+        ratio = f.get('volume_ratio', 1.0)
+        score += 0.3 if ratio > 1.2 else -0.3 if ratio < 0.8 else 0
+        spread = f.get('spread', 0.5)
+        score += 0.2 if spread < 0.5 else -0.2 if spread > 1.0 else 0
+        score += f.get('book_depth_imbalance', 0) * 0.3
+        levels = f.get('bid_levels_active', 5) / (f.get('ask_levels_active', 5) + 1)
+        score += 0.2 if levels > 1.3 else -0.2 if levels < 0.7 else 0
+        result.append((np.clip(score, -1, 1), min(abs(score) + 0.4, 0.9)))
+    elif len(books) < 5:
+        result.append((0, 0.5))
+    else:
+        spread = np.mean([b['spread'] for b in list(books)[-5:]])
+        imbalance = np.mean([b['imbalance'] for b in list(books)[-5:]])
+        if spread < 0.5 and imbalance > 0.1:
+            signal = 1
+        elif spread < 0.5 and imbalance < -0.1:
+            signal = -1
+        elif spread > 1.0:
+            signal = 0
+        else:
+            signal = imbalance
+        result.append((signal, max(0.3, min(0.9, 1.0 - spread / 2.0))))
+
+    # TapeReadingAgent
+    if f and f.get('cumulative_volume', 0) > 0:
+        volume, dv = f.get('volume', 0), f.get('delta_volume', 0)
+        if volume > 50:
+            result.append((np.sign(dv) * 0.8, min(volume / 100, 0.9)))
+        elif volume > 10:
+            result.append((np.sign(dv) * 0.4, 0.6))
+        else:
+            result.append((0, 0.5))
+    elif len(prices) < 20:
+        result.append((0, min(0.3 + len(prices) * 0.02, 0.6) if len(prices) >= 5 else 0.3))
+    else:
+        window = list(prices)[-20:]
+        momentum = (np.mean(window[-5:]) - np.mean(window)) / np.mean(window)
+        volatility = np.std(window) / np.mean(window)
+        if momentum > 0.0001:
+            signal = 1 if volatility < 0.01 else 0.5
+        elif momentum < -0.0001:
+            signal = -1 if volatility < 0.01 else -0.5
+        else:
+            signal = 0
+        strength = abs(momentum) / 0.0001
+        result.append((signal, max(0.3, min(0.95, (1.0 - volatility * 10) * (0.5 + strength * 0.1)))))
+
+    # FootprintPatternAgent (a pontuação das features era sobrescrita pelo POC)
+    if not f and (len(prices) < 30 or len(volumes) < 30):
+        ready = len(prices) >= 10 and len(volumes) >= 10
+        result.append((0, 0.3 + min(len(prices) * 0.01, 0.3) if ready else 0.25))
+    else:
+        levels = {}
+        for p, v in zip(list(prices)[-30:], list(volumes)[-30:]):
+            level = round(p / 0.5) * 0.5
+            levels[level] = levels.get(level, 0) + v
+        if levels:
+            poc = max(levels, key=levels.get)
+            distance = (prices[-1] - poc) / prices[-1]
+            signal = -0.5 if distance > 0.0002 else 0.5 if distance < -0.0002 else 0
+            strength = levels[poc] / sum(levels.values())
+            factor = min(abs(distance) / 0.0002, 2.0)
+            result.append((signal, max(0.3, min(0.95, 0.4 + strength * 0.4 + factor * 0.1))))
+        else:
+            result.append((0, 0.5))
+
+    return result
+
+
+class _LegacyAgents:
+    """Implementação anterior à avaliação vetorizada (cópia das regras, sem logs)"""
+
+
+    def __init__(self):
+        self.name = "HMARL_Realtime"
+        self.agents = {
+            'OrderFlowSpecialist': {'weight': 0.30, 'bias': 0},
+            'LiquidityAgent': {'weight': 0.20, 'bias': 0},
+            'TapeReadingAgent': {'weight': 0.25, 'bias': 0},
+            'FootprintPatternAgent': {'weight': 0.25, 'bias': 0}
+        }
+        self.price_buffer = deque(maxlen=100)
+        self.volume_buffer = deque(maxlen=100)
+        self.book_buffer = deque(maxlen=50)
+        self.agent_states = {}
+        for agent in self.agents:
+            self.agent_states[agent] = {
+                'last_signal': 0,
+                'confidence': 0.5,
+                'trades_analyzed': 0,
+                'last_change_time': time.time(),
+                'confidence_decay_rate': 0.98
+            }
+
+    def update_market_data(self, price: float = None, volume: float = None, 
+                          book_data: Dict = None, features: Dict = None):
+        """Atualiza dados de mercado"""
+        if price is not None and price > 0:
+            self.price_buffer.append(price)
+        if volume is not None and volume > 0:
+            self.volume_buffer.append(volume)
+        if book_data is not None:
+            self.book_buffer.append(book_data)
+        if features:
+            self.last_features = features
+
+    def analyze_order_flow(self) -> tuple[float, float]:
+        """OrderFlowSpecialist - Analisa fluxo de ordens"""
+        if hasattr(self, 'last_features') and self.last_features:
+            delta_volume = self.last_features.get('delta_volume', 0)
+            buy_sell_ratio = self.last_features.get('buy_sell_ratio', 1.0)
+            volume_pressure = self.last_features.get('volume_pressure', 0)
+            ofi = self.last_features.get('order_flow_imbalance_5', 0)
+            signed_vol = self.last_features.get('signed_volume_5', 0)
+            trade_flow = self.last_features.get('trade_flow_5', 0)
+            if delta_volume != 0:
+                combined = (
+                    np.sign(delta_volume) * 0.5 +
+                    (buy_sell_ratio - 1.0) * 0.3 +
+                    volume_pressure * 0.2
+                )
+            else:
+                combined = ofi * 0.4 + np.sign(signed_vol) * 0.3 + np.sign(trade_flow) * 0.3
+            if combined > 0.3:
+                signal = 1
+            elif combined < -0.3:
+                signal = -1
+            else:
+                signal = combined
+            base_confidence = min(abs(combined) + 0.3, 0.95)
+            time_var = np.sin(time.time() / 5) * 0.05
+            state = self.agent_states['OrderFlowSpecialist']
+            if abs(state.get('last_confidence', 0) - base_confidence) < 0.01:
+                base_confidence = base_confidence * 0.95
+            confidence = np.clip(base_confidence + time_var, 0.3, 0.95)
+            state['last_confidence'] = confidence
+        elif len(self.volume_buffer) < 10:
+            return 0, 0.5
+        else:
+            recent_vol = list(self.volume_buffer)[-10:]
+            avg_vol = np.mean(recent_vol)
+            vol_trend = (recent_vol[-1] - avg_vol) / (avg_vol + 1e-8)
+            if len(self.price_buffer) >= 10:
+                price_changes = np.diff(list(self.price_buffer)[-10:])
+                volume_weighted = sum(p * v for p, v in zip(price_changes, recent_vol[1:]))
+                if volume_weighted > 0:
+                    signal = 1 if vol_trend > 0 else 0.5
+                elif volume_weighted < 0:
+                    signal = -1 if vol_trend < 0 else -0.5
+                else:
+                    signal = 0
+                confidence = min(abs(volume_weighted) / 1000 + 0.5, 0.95)
+            else:
+                signal = 0
+                confidence = 0.5
+        self.agent_states['OrderFlowSpecialist']['last_signal'] = signal
+        self.agent_states['OrderFlowSpecialist']['confidence'] = confidence
+        return signal, confidence
+
+    def analyze_liquidity(self) -> tuple[float, float]:
+        """LiquidityAgent - Analisa liquidez do book"""
+        if hasattr(self, 'last_features') and self.last_features:
+            volume_ratio = self.last_features.get('volume_ratio', 1.0)
+            spread = self.last_features.get('spread', 0.5)
+            depth_imb = self.last_features.get('book_depth_imbalance', 0)
+            bid_levels = self.last_features.get('bid_levels_active', 5)
+            ask_levels = self.last_features.get('ask_levels_active', 5)
+            liquidity_score = 0
+            if volume_ratio > 1.2:
+                liquidity_score += 0.3
+            elif volume_ratio < 0.8:
+                liquidity_score -= 0.3
+            if spread < 0.5:
+                liquidity_score += 0.2
+            elif spread > 1.0:
+                liquidity_score -= 0.2
+            liquidity_score += depth_imb * 0.3
+            level_ratio = bid_levels / (ask_levels + 1)
+            if level_ratio > 1.3:
+                liquidity_score += 0.2
+            elif level_ratio < 0.7:
+                liquidity_score -= 0.2
+            signal = np.clip(liquidity_score, -1, 1)
+            confidence = min(abs(liquidity_score) + 0.4, 0.9)
+        elif len(self.book_buffer) < 5:
+            return 0, 0.5
+        else:
+            recent_books = list(self.book_buffer)[-5:]
+            spreads = []
+            imbalances = []
+            for book in recent_books:
+                if isinstance(book, dict):
+                    spread = book.get('spread', 0.5)
+                    imbalance = book.get('imbalance', 0)
+                    spreads.append(spread)
+                    imbalances.append(imbalance)
+            if spreads and imbalances:
+                avg_spread = np.mean(spreads)
+                avg_imbalance = np.mean(imbalances)
+                if avg_spread < 0.5 and avg_imbalance > 0.1:
+                    signal = 1
+                elif avg_spread < 0.5 and avg_imbalance < -0.1:
+                    signal = -1
+                elif avg_spread > 1.0:
+                    signal = 0
+                else:
+                    signal = avg_imbalance
+                confidence = max(0.3, min(0.9, 1.0 - avg_spread / 2.0))
+            else:
+                signal = 0
+                confidence = 0.5
+        time_factor = 1.0 + (np.sin(time.time() / 10) * 0.05)
+        confidence = min(confidence * time_factor, 0.95)
+        self.agent_states['LiquidityAgent']['last_signal'] = signal
+        self.agent_states['LiquidityAgent']['confidence'] = confidence
+        return signal, confidence
+
+    def analyze_tape(self) -> tuple[float, float]:
+        """TapeReadingAgent - Analisa fita de operações"""
+        if hasattr(self, 'last_features') and self.last_features:
+            current_volume = self.last_features.get('volume', 0)
+            cumulative_volume = self.last_features.get('cumulative_volume', 0)
+            delta_volume = self.last_features.get('delta_volume', 0)
+            if cumulative_volume > 0:
+                if current_volume > 50:
+                    signal = np.sign(delta_volume) * 0.8
+                    confidence = min(current_volume / 100, 0.9)
+                elif current_volume > 10:
+                    signal = np.sign(delta_volume) * 0.4
+                    confidence = 0.6
+                else:
+                    signal = 0
+                    confidence = 0.5
+                return signal, confidence
+        buffer_size = len(self.price_buffer)
+        if buffer_size < 20:
+            if buffer_size >= 5:
+                prices = list(self.price_buffer)
+                vol = np.std(prices) / (np.mean(prices) + 1e-8)
+                random_factor = np.random.uniform(0.95, 1.05)
+                return 0, min(0.3 + buffer_size * 0.02, 0.6) * random_factor
+            return 0, 0.3
+        prices = list(self.price_buffer)[-20:]
+        short_ma = np.mean(prices[-5:])
+        long_ma = np.mean(prices)
+        momentum = (short_ma - long_ma) / long_ma
+        volatility = np.std(prices) / np.mean(prices)
+        if momentum > 0.0001:
+            signal = 1 if volatility < 0.01 else 0.5
+        elif momentum < -0.0001:
+            signal = -1 if volatility < 0.01 else -0.5
+        else:
+            signal = 0
+        base_confidence = 1.0 - volatility * 10
+        signal_strength = abs(momentum) / 0.0001
+        time_factor = 0.95 + 0.1 * np.sin(time.time() / 10)
+        confidence = max(0.3, min(0.95, base_confidence * (0.5 + signal_strength * 0.1) * time_factor))
+        state = self.agent_states['TapeReadingAgent']
+        if abs(signal - state['last_signal']) < 0.01:
+            confidence = confidence * state['confidence_decay_rate']
+            confidence = max(confidence, 0.3)
+        else:
+            state['last_change_time'] = time.time()
+        state['last_signal'] = signal
+        state['confidence'] = confidence
+        return signal, confidence
+
+    def analyze_footprint(self) -> tuple[float, float]:
+        """FootprintPatternAgent - Analisa padrões de pegada"""
+        if hasattr(self, 'last_features') and self.last_features:
+            delta_volume = self.last_features.get('delta_volume', 0)
+            buy_volume = self.last_features.get('buy_volume', 0)
+            sell_volume = self.last_features.get('sell_volume', 0)
+            cumulative_volume = self.last_features.get('cumulative_volume', 0)
+            delta_profile = self.last_features.get('delta_profile', 0)
+            cumulative_delta = self.last_features.get('cumulative_delta', delta_volume)
+            absorption_ratio = self.last_features.get('absorption_ratio', 0.5)
+            volume_clusters = self.last_features.get('volume_clusters', 1)
+            footprint_score = 0
+            if delta_volume != 0:
+                if delta_volume > 100:
+                    footprint_score += 0.5
+                elif delta_volume > 50:
+                    footprint_score += 0.3
+                elif delta_volume < -100:
+                    footprint_score -= 0.5
+                elif delta_volume < -50:
+                    footprint_score -= 0.3
+                if buy_volume > sell_volume * 1.5:
+                    footprint_score += 0.2
+                elif sell_volume > buy_volume * 1.5:
+                    footprint_score -= 0.2
+            elif cumulative_delta > 100:
+                footprint_score += 0.4
+            elif cumulative_delta < -100:
+                footprint_score -= 0.4
+            else:
+                footprint_score += cumulative_delta / 250.0
+            if absorption_ratio > 0.7:
+                footprint_score += 0.3
+            elif absorption_ratio < 0.3:
+                footprint_score -= 0.3
+            if volume_clusters > 3:
+                footprint_score *= 0.8
+            signal = np.clip(footprint_score, -1, 1)
+            confidence = min(abs(footprint_score) + 0.25, 0.85)
+            time_variation = 1.0 + 0.1 * np.sin(time.time() / 15)
+            confidence = min(confidence * time_variation, 0.9)
+        else:
+            price_buffer_size = len(self.price_buffer)
+            volume_buffer_size = len(self.volume_buffer)
+            if price_buffer_size < 30 or volume_buffer_size < 30:
+                if price_buffer_size >= 10 and volume_buffer_size >= 10:
+                    random_factor = np.random.uniform(0.95, 1.05)
+                    return 0, (0.3 + min(price_buffer_size * 0.01, 0.3)) * random_factor
+                return 0, 0.25
+        prices = list(self.price_buffer)[-30:]
+        volumes = list(self.volume_buffer)[-30:]
+        price_levels = {}
+        for p, v in zip(prices, volumes):
+            level = round(p / 0.5) * 0.5
+            if level not in price_levels:
+                price_levels[level] = 0
+            price_levels[level] += v
+        if price_levels:
+            poc_level = max(price_levels, key=price_levels.get)
+            current_price = prices[-1]
+            distance_from_poc = (current_price - poc_level) / current_price
+            if distance_from_poc > 0.0002:
+                signal = -0.5
+            elif distance_from_poc < -0.0002:
+                signal = 0.5
+            else:
+                signal = 0
+            total_volume = sum(price_levels.values())
+            poc_strength = price_levels[poc_level] / total_volume
+            distance_factor = min(abs(distance_from_poc) / 0.0002, 2.0)
+            time_factor = 0.95 + 0.1 * np.cos(time.time() / 15)
+            confidence = max(0.3, min(0.95, (0.4 + poc_strength * 0.4 + distance_factor * 0.1) * time_factor))
+        else:
+            signal = 0
+            confidence = 0.5
+        state = self.agent_states['FootprintPatternAgent']
+        if abs(signal - state['last_signal']) < 0.01:
+            confidence = confidence * state['confidence_decay_rate']
+            confidence = max(confidence, 0.25)
+        else:
+            state['last_change_time'] = time.time()
+        state['last_signal'] = signal
+        state['confidence'] = confidence
+        return signal, confidence
+
+    def get_consensus(self, features: Dict = None) -> Dict:
+        """Retorna consenso de todos os agentes"""
+        signals = {
+            'OrderFlowSpecialist': self.analyze_order_flow(),
+            'LiquidityAgent': self.analyze_liquidity(),
+            'TapeReadingAgent': self.analyze_tape(),
+            'FootprintPatternAgent': self.analyze_footprint()
+        }
+        weighted_signal = 0
+        total_confidence = 0
+        for agent_name, (signal, confidence) in signals.items():
+            weight = self.agents[agent_name]['weight']
+            weighted_signal += signal * weight * confidence
+            total_confidence += confidence * weight
+        if total_confidence > 0:
+            final_signal = weighted_signal / total_confidence
+        else:
+            final_signal = 0
+        if final_signal > 0.3:
+            action = 'BUY'
+        elif final_signal < -0.3:
+            action = 'SELL'
+        else:
+            action = 'HOLD'
+        consensus_confidence = min(total_confidence, 1.0)
+        result = {
+            'action': action,
+            'signal': final_signal,
+            'confidence': consensus_confidence,
+            'agents': {
+                name: {
+                    'signal': sig,
+                    'confidence': conf,
+                    'weight': self.agents[name]['weight']
+                }
+                for name, (sig, conf) in signals.items()
+            },
+            'timestamp': datetime.now()
+        }
+        return result
+
+
+def _live_ticks(n=400, seed=5):
+    """Ticks com features intermitentes, volumes/preços descartados e books fora de dict"""
+    ticks = _ticks(n, seed=seed, with_features=True)
+    rng = np.random.default_rng(seed)
+    # Features chegam antes de os buffers terem dados
+    ticks.insert(0, {'price': None, 'volume': None, 'book_data': None,
+                     'features': dict(ticks[1]['features'])})
+    for tick in ticks[1:]:
+        draw = rng.random()
+        if draw < 0.05:
+            tick['volume'] = 0.0
+        elif draw < 0.08:
+            tick['price'] = 0.0
+        elif draw < 0.11:
+            tick['book_data'] = [tick['book_data']]
+    return ticks
+
+
+def test_realtime_matches_legacy_agents():
+    """Consenso em tempo real idêntico à implementação anterior, com estado e decay"""
+    clock = {'now': 1_700_000_000.0}
+    fake_time = type('FakeTime', (), {'time': staticmethod(lambda: clock['now'])})
+    module = sys.modules[__name__]
+    originals = (hmarl_module.time, module.time, np.random.uniform)
+    hmarl_module.time = module.time = fake_time
+    np.random.uniform = lambda low, high, size=None: (
+        1.03 if size is None else np.full(size, 1.03))
+    try:
+        for ticks in (_live_ticks(), _ticks(250, seed=6)):
+            new, old = HMARLAgentsRealtime(), _LegacyAgents()
+            for i, tick in enumerate(ticks):
+                clock['now'] += 0.37 + (i % 7) * 0.11
+                for agents in (new, old):
+                    agents.update_market_data(tick['price'], tick['volume'],
+                                              tick['book_data'], tick.get('features'))
+                if i % 11 == 5:
+                    # Wrapper individual só atualiza o estado do próprio agente
+                    assert new.analyze_tape() == old.analyze_tape(), i
+                    assert new.analyze_footprint() == old.analyze_footprint(), i
+
+                # Argumento `features` de get_consensus é ignorado, como antes
+                ignored = {'delta_volume': 500.0, 'cumulative_volume': 900.0, 'volume': 90.0}
+                result, expected = new.get_consensus(ignored), old.get_consensus(ignored)
+                for name in AGENT_NAMES:
+                    got, want = result['agents'][name], expected['agents'][name]
+                    assert got['signal'] == want['signal'], (i, name, got, want)
+                    assert got['confidence'] == want['confidence'], (i, name, got, want)
+                    assert new.agent_states[name]['last_signal'] == old.agent_states[name]['last_signal']
+                assert result['signal'] == expected['signal'], i
+                assert result['confidence'] == expected['confidence'], i
+                assert result['action'] == expected['action'], i
+    finally:
+        hmarl_module.time, module.time, np.random.uniform = originals
+
+
+def test_vector_scoring_matches_agent_rules():
+    """Uma passada vetorizada = regras de cada agente, com e sem features"""
+    for ticks in (_ticks(seed=1), _ticks(seed=2, with_features=True)):
+        X = build_feature_matrix(ticks)
+        assert X.shape == (len(ticks), AGENT_SCHEMA.size)
+        signals, confidences, _ = score_agents(X)
+
+        prices, volumes, books = deque(maxlen=100), deque(maxlen=100), deque(maxlen=50)
+        features = None
+        for i, tick in enumerate(ticks):
+            prices.append(tick['price'])
+            volumes.append(tick['volume'])
+            books.append(tick['book_data'])
+            features = tick.get('features') or features
+            for j, (signal, confidence) in enumerate(_reference(prices, volumes, books, features)):
+                assert abs(signals[i, j] - signal) < 1e-9, (i, AGENT_NAMES[j])
+                assert abs(confidences[i, j] - confidence) < 1e-9, (i, AGENT_NAMES[j])
+
+
+def test_realtime_consensus_without_status_write():
+    """get_consensus avalia todos os agentes e não publica status"""
+    published = []
+    original = hmarl_module.publish_status
+    hmarl_module.publish_status = lambda channel, data: published.append(channel)
+    try:
+        agents = HMARLAgentsRealtime()
+        for tick in _ticks(120, seed=3):
+            agents.update_market_data(tick['price'], tick['volume'], tick['book_data'])
+            result = agents.get_consensus()
+        assert not published
+
+        signals = np.array([result['agents'][name]['signal'] for name in AGENT_NAMES])
+        confs = np.array([result['agents'][name]['confidence'] for name in AGENT_NAMES])
+        final, confidence, _ = consensus_scores(signals, confs, agents._weights())
+        assert abs(result['signal'] - final[0]) < 1e-12
+        assert abs(result['confidence'] - confidence[0]) < 1e-12
+        assert result['action'] in ('BUY', 'SELL', 'HOLD')
+        for name in AGENT_NAMES:
+            assert agents.agent_states[name]['last_signal'] == result['agents'][name]['signal']
+        assert set(agents.get_agent_signals()) == set(AGENT_NAMES)
+
+        # Sinal do tape repetido: confiança com decay de 2%
+        flat = HMARLAgentsRealtime()
+        for _ in range(25):
+            flat.update_market_data(price=5400.0, volume=10)
+        vector = flat.feature_vector()
+        state = {'signals': np.zeros(4), 'flow_confidence': 0.0}
+        assert score_agents(vector, state=state)[1][0, 2] == 0.5 * 0.98
+        state['signals'][2] = 1.0
+        assert score_agents(vector, state=state)[1][0, 2] == 0.5
+        assert flat.analyze_tape()[0] == 0
+
+        agents.save_status()
+        assert published == ['hmarl']
+    finally:
+        hmarl_module.publish_status = original
+
+
+def test_feature_vector_update_matches_dict():
+    """Vetor do produtor + binding monta o mesmo vetor dos agentes que o dict"""
+    names = ['returns_1', 'delta_volume', 'buy_sell_ratio', 'volume_pressure',
+             'volume', 'cumulative_volume', 'spread', 'imbalance']
+    by_dict, by_vector = HMARLAgentsRealtime(), HMARLAgentsRealtime()
+    binding = by_vector.bind_features(names)
+    rng = np.random.default_rng(5)
+    for tick in _ticks(60, seed=5):
+        values = rng.normal(size=len(names))
+        by_dict.update_market_data(tick['price'], tick['volume'], tick['book_data'],
+                                   features=dict(zip(names, values)))
+        by_vector.update_market_data(tick['price'], tick['volume'], tick['book_data'],
+                                     feature_vector=values, binding=binding)
+        assert np.array_equal(by_dict.feature_vector(), by_vector.feature_vector())
+
+
+def test_score_matrix_backtest():
+    """Matriz de ticks pontuada de uma vez = pontuação linha a linha"""
+    ticks = _ticks(200, seed=4, with_features=True)
+    X = build_feature_matrix(ticks)
+    scores = score_matrix(X)
+    assert scores['signals'].shape == (200, 4) and scores['action'].shape == (200,)
+
+    for i in range(0, 200, 17):
+        signals, confidences, _ = score_agents(X[i])
+        assert np.array_equal(signals[0], scores['signals'][i])
+        assert np.array_equal(confidences[0], scores['confidences'][i])
+    assert set(np.unique(scores['action'])) <= {-1, 0, 1}
+    buys = scores['signal'] > 0.3
+    assert np.array_equal(scores['action'] == 1, buys)
+
+    # Pesos alternativos: apenas o OrderFlow decide
+    only_flow = score_matrix(X, weights=np.array([1.0, 0, 0, 0]))
+    assert np.allclose(only_flow['signal'], scores['signals'][:, 0])
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: Agentes HMARL vetorizados")
+    print("=" * 60)
+    test_vector_scoring_matches_agent_rules()
+    print("[OK] Regras dos agentes")
+    test_realtime_matches_legacy_agents()
+    print("[OK] Tempo real idêntico à implementação anterior")
+    test_realtime_consensus_without_status_write()
+    print("[OK] Consenso em tempo real sem gravação de status")
+    test_feature_vector_update_matches_dict()
+    print("[OK] Features por vetor = por dict")
+    test_score_matrix_backtest()
+    print("[OK] Backtest em matriz")
@@ -0,0 +1,114 @@
+"""
+Teste da predição em lote do HybridMLPredictor contra a predição por linha
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression, Ridge
+from sklearn.preprocessing import StandardScaler
+
+from src.ml.hybrid_predictor import HybridMLPredictor
+
+
+def _write_models(path, n_features, seed=0):
+    """Diretório no layout do pipeline híbrido com modelos sklearn pequenos"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(400, n_features))
+    y3 = np.digitize(X[:, 0] + 0.5 * X[:, 1], [-0.5, 0.5])
+
+    files = {
+        'context/regime_detector.pkl': LogisticRegression(max_iter=200).fit(X, y3),
+        'context/volatility_forecaster.pkl': Ridge().fit(X, np.abs(X[:, 2])),
+        'context/session_classifier.pkl': LogisticRegression(max_iter=200).fit(X, y3[::-1]),
+        'microstructure/order_flow_analyzer.pkl': LogisticRegression(max_iter=200).fit(X, 2 - y3),
+        'microstructure/book_dynamics.pkl': Ridge().fit(X, X[:, 3]),
+        'meta_learner/meta_learner.pkl': Ridge().fit(rng.normal(size=(400, 6)), rng.normal(size=400)),
+        'scaler_context.pkl': StandardScaler().fit(X),
+        'scaler_microstructure.pkl': StandardScaler().fit(X * 2),
+    }
+    for name, model in files.items():
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(model, path / name)
+    return path
+
+
+def test_predict_batch_matches_row_predictions(tmp_path):
+    """Mesmo sinal, confiança e predições das camadas que predict() linha a linha"""
+    predictor = HybridMLPredictor(models_dir=str(tmp_path))
+    names = predictor.context_features
+    _write_models(tmp_path, len(names))
+    predictor.load_models()
+    assert not predictor.use_fallback
+
+    rng = np.random.default_rng(7)
+    X = rng.normal(size=(25, len(names)))
+    # Colunas fora da ordem do schema: exercita o binding do lote
+    order = rng.permutation(len(names))
+    shuffled = [names[i] for i in order]
+    batch = predictor.predict_batch(X[:, order], feature_names=shuffled, chunk_size=10)
+
+    for i, row in enumerate(X):
+        result = predictor.predict(dict(zip(names, row)))
+        assert 'error' not in result, result
+        assert result['signal'] == batch['signal'][i]
+        assert abs(result['confidence'] - batch['confidence'][i]) < 1e-12
+        assert abs(result['predictions']['meta'] - batch['meta_pred'][i]) < 1e-12
+        for key, value in result['predictions']['context'].items():
+            assert abs(value - batch[key][i]) < 1e-12, key
+        for key, value in result['predictions']['microstructure'].items():
+            assert abs(value - batch[key][i]) < 1e-12, key
+
+    # Binding compilado uma vez por ordem de colunas
+    bindings = predictor._active.batch_bindings
+    predictor.predict_batch(X[:, order], feature_names=shuffled)
+    assert list(bindings) == [tuple(shuffled)]
+
+
+def test_predict_vector_from_producer_layout(tmp_path):
+    """Vetor do produtor (binding compilado) = predict() com o dict equivalente"""
+    predictor = HybridMLPredictor(models_dir=str(tmp_path))
+    names = predictor.context_features
+    _write_models(tmp_path, len(names))
+    predictor.load_models()
+
+    rng = np.random.default_rng(11)
+    # Produtor com parte das features do modelo, fora de ordem, e uma extra
+    producer = tuple(rng.permutation(names)[:len(names) - 3]) + ('mid_price',)
+    for _ in range(5):
+        vector = rng.normal(size=len(producer))
+        by_vector = predictor.predict_vector(vector, producer)
+        by_dict = predictor.predict(dict(zip(producer, vector)))
+        assert by_vector['signal'] == by_dict['signal']
+        assert abs(by_vector['confidence'] - by_dict['confidence']) < 1e-12
+    assert predictor.bind_producer(list(producer)) is predictor._active.batch_bindings[producer]
+
+
+def test_meta_without_regime_defaults_to_zero(tmp_path):
+    """Sem predição de regime o meta-learner usa 0, como no caminho por linha"""
+    predictor = HybridMLPredictor(models_dir=str(tmp_path / 'none'))
+    predictor.load_models()
+    assert predictor._predict_meta({}, {'order_flow': 1}, {}) == 0.6 * 1 + 0.4 * (0 - 1)
+    meta = predictor._predict_meta_batch({}, {'order_flow': np.array([1, -1])}, 2)
+    assert np.allclose(meta, [0.2, -1.0])
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("=" * 60)
+    print("TESTE: HybridMLPredictor.predict_batch")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_predict_batch_matches_row_predictions(Path(tmp))
+    print("[OK] Lote = predição por linha")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_predict_vector_from_producer_layout(Path(tmp))
+    print("[OK] predict_vector no layout do produtor")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_meta_without_regime_defaults_to_zero(Path(tmp))
+    print("[OK] Meta-learner sem regime")
@@ -0,0 +1,97 @@
+"""
+Teste do rastreamento de latência do caminho quente
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import time
+import threading
+
+from metrics.latency_tracer import LatencyTracer, format_latency_report
+
+
+def _busy(us):
+    end = time.perf_counter_ns() + us * 1000
+    while time.perf_counter_ns() < end:
+        pass
+
+
+def test_decision_cycle_spans_and_tick_to_order():
+    """Estágios do ciclo e latência tick -> ordem a partir do último tick"""
+    tracer = LatencyTracer(capacity=1024)
+
+    for cycle in range(20):
+        tracer.mark_tick()
+        _busy(200)
+        trace_id = tracer.start_trace()
+        assert trace_id > 0
+        with tracer.span('decision'):
+            with tracer.span('features'):
+                _busy(100)
+            with tracer.span('ml_predict'):
+                _busy(50)
+            if cycle % 2:
+                with tracer.span('order'):
+                    _busy(30)
+                tracer.finish_trace('tick_to_order')
+        tracer.finish_trace('tick_to_decision')
+
+    report = tracer.report()
+    assert report['features']['calls'] == 20 and report['order']['calls'] == 10
+    assert report['tick_to_order']['calls'] == 10
+    assert report['tick_to_decision']['calls'] == 10
+    assert report['features']['p50_us'] >= 100
+    # Tick -> ordem inclui a espera antes do ciclo e todos os estágios
+    assert report['tick_to_order']['p50_us'] >= 200 + 100 + 50 + 30
+    assert report['decision']['p99_us'] >= report['features']['p99_us']
+    assert 'tick_to_order' in format_latency_report(report)
+
+
+def test_sampling_ring_wrap_and_threads():
+    """Amostragem por ciclo, ring sobrescrito e gravação concorrente"""
+    tracer = LatencyTracer(capacity=100, sample_every=4)
+    assert tracer.capacity == 128
+
+    for _ in range(8):
+        tracer.start_trace()
+        with tracer.span('features'):
+            pass
+        tracer.finish_trace()
+    assert tracer.report()['features']['calls'] == 2
+
+    # Spans fora de ciclo (dispatch do ingresso) em vários threads
+    def ingress():
+        for _ in range(500):
+            tracer.record('ingress', time.perf_counter_ns() - 1000)
+
+    threads = [threading.Thread(target=ingress) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = tracer.get_stats()
+    # features (sem tick não há tick_to_decision) + ingresso; contagem aproximada entre threads
+    assert 2000 - 8 <= stats['spans'] <= 2 + 2000
+    assert stats['overwritten'] == stats['spans'] - 128
+    assert tracer.report()['ingress']['calls'] == 128
+    assert tracer.report()['ingress']['p50_us'] >= 1.0
+
+    disabled = LatencyTracer(enabled=False)
+    disabled.start_trace()
+    with disabled.span('features'):
+        pass
+    disabled.record('ingress', 0)
+    assert disabled.report() == {}
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: LatencyTracer")
+    print("=" * 60)
+    test_decision_cycle_spans_and_tick_to_order()
+    print("[OK] Spans do ciclo e tick -> ordem")
+    test_sampling_ring_wrap_and_threads()
+    print("[OK] Amostragem, ring e threads")
@@ -0,0 +1,95 @@
+"""
+Teste do MetricsCollector com lock striping e sketches de quantis
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import threading
+import numpy as np
+
+from metrics.quantile_sketch import QuantileSketch, WindowedQuantileSketch
+from metrics.metrics_and_alerts import MetricsCollector
+
+
+def test_sketch_quantiles_within_relative_error():
+    """Quantis do sketch ficam dentro do erro relativo configurado"""
+    rng = np.random.default_rng(7)
+    values = rng.lognormal(mean=-6, sigma=1.0, size=20_000)  # Latências em segundos
+
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(float(value))
+
+    for q in (0.5, 0.95, 0.99):
+        exact = np.quantile(values, q, method='lower')
+        assert abs(sketch.quantile(q) - exact) / exact <= 0.011
+    assert sketch.count == len(values)
+    assert np.isclose(sketch.mean, values.mean())
+
+    # Negativos, zero e merge
+    other = QuantileSketch(relative_accuracy=0.01)
+    for value in (-2.0, -1.0, 0.0):
+        other.add(value)
+    other.merge(sketch)
+    assert other.quantile(0.0) == -2.0 and other.count == len(values) + 3
+
+
+def test_window_drops_old_observations():
+    """Observações antigas saem após duas janelas"""
+    windowed = WindowedQuantileSketch(window=60.0)
+    for _ in range(100):
+        windowed.add(1.0)
+    windowed._window_start -= 61
+    windowed.add(0.001)
+    assert windowed.snapshot().count == 101
+
+    windowed._window_start -= 121
+    windowed.add(0.002)
+    snapshot = windowed.snapshot()
+    assert snapshot.count == 1 and abs(snapshot.quantile(0.99) - 0.002) < 0.0001
+
+
+def test_collector_stats_on_read_and_concurrent_records():
+    """Estatísticas calculadas na leitura; registros concorrentes não se perdem"""
+    collector = MetricsCollector("test_collector")
+
+    def worker(seed):
+        rng = np.random.default_rng(seed)
+        for value in rng.uniform(0.001, 0.010, 2_000):
+            collector.record_histogram('feature_latency', float(value))
+            collector.record_counter('features_calculated', 65)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    collector.record_gauge('win_rate', 0.58)
+
+    assert collector.get_metric('features_calculated') == 4 * 2_000 * 65
+    assert 0.009 < collector.get_metric('feature_latency_p99') <= 0.010
+    assert 0.0050 < collector.get_metric('feature_latency_p50') < 0.0061
+    assert collector.get_metric('feature_latency_p42') is None
+
+    all_metrics = collector.get_all_metrics()
+    assert 'feature_latency_p95' in all_metrics and all_metrics['win_rate'] == 0.58
+
+    summary = collector.get_metrics_summary()
+    assert set(summary['histograms']['feature_latency']) == {'mean', 'p50', 'p95', 'p99'}
+    assert summary['gauges'] == {'win_rate': 0.58}
+    assert summary['counters'] == {'features_calculated': 4 * 2_000 * 65}
+    assert len(collector.get_metric_history('feature_latency', n=10)) == 10
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: MetricsCollector / QuantileSketch")
+    print("=" * 60)
+    test_sketch_quantiles_within_relative_error()
+    print("[OK] Quantis dentro do erro relativo")
+    test_window_drops_old_observations()
+    print("[OK] Janela deslizante")
+    test_collector_stats_on_read_and_concurrent_records()
+    print("[OK] Coletor com lock striping")
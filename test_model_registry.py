@@ -0,0 +1,177 @@
+"""
+Teste do registro versionado de modelos e da troca atômica no preditor
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import json
+import time
+import threading
+import joblib
+import numpy as np
+
+from src.ml.model_registry import ArtifactCache, ModelRegistry
+from src.ml.hybrid_predictor import HybridMLPredictor
+
+
+class Probe:
+    """Modelo de teste: todas as saídas identificam a versão (tag)"""
+
+    def __init__(self, tag, delay=0.0):
+        self.tag = tag
+        self.delay = delay
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        time.sleep(self.delay)
+        proba = np.zeros((len(X), 3))
+        proba[:, self.tag] = 1.0
+        return proba
+
+    def predict(self, X):
+        self.calls += 1
+        return np.full(len(X), float(self.tag))
+
+
+def _write_version(path, tag, delay=0.0):
+    files = {
+        'context/regime_detector.pkl': Probe(tag, delay),
+        'context/volatility_forecaster.pkl': Probe(tag),
+        'microstructure/order_flow_analyzer.pkl': Probe(tag),
+        'microstructure/book_dynamics.pkl': Probe(tag),
+        'meta_learner/meta_learner.pkl': Probe(tag),
+    }
+    for name, model in files.items():
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(model, path / name)
+    return path
+
+
+def test_publish_verify_activate_rollback(tmp_path):
+    """Manifest com checksums, ponteiro atômico, rollback e prune"""
+    registry = ModelRegistry(tmp_path / 'registry')
+    first = registry.publish(_write_version(tmp_path / 'a', 0), version='v1',
+                             metrics={'accuracy': 0.71})
+    assert registry.current() is None and registry.list_versions() == ['v1']
+
+    manifest = registry.manifest('v1')
+    assert set(manifest['files']) == {
+        'context/regime_detector.pkl', 'context/volatility_forecaster.pkl',
+        'microstructure/order_flow_analyzer.pkl', 'microstructure/book_dynamics.pkl',
+        'meta_learner/meta_learner.pkl'}
+    assert registry.verify('v1') == []
+
+    registry.activate(first)
+    registry.publish(_write_version(tmp_path / 'b', 2), version='v2', activate=True)
+    pointer = json.loads((tmp_path / 'registry' / 'current.json').read_text())
+    assert pointer['version'] == 'v2' and pointer['previous'] == 'v1'
+
+    stack = registry.load()
+    assert stack.version == 'v2' and stack.layer('context')['regime_detector'].tag == 2
+    assert stack.config['registry']['metrics'] == {}
+
+    assert registry.rollback() == 'v1' and registry.current() == 'v1'
+    assert registry.load().config['registry']['metrics'] == {'accuracy': 0.71}
+
+    # Arquivo alterado depois de publicado: não carrega
+    target = tmp_path / 'registry' / 'versions' / 'v2' / 'meta_learner' / 'meta_learner.pkl'
+    joblib.dump(Probe(1), target)
+    assert registry.verify('v2') == ['meta_learner/meta_learner.pkl']
+    try:
+        registry.load('v2')
+        assert False, "checksum inválido deveria falhar"
+    except ValueError:
+        pass
+
+    registry.publish(_write_version(tmp_path / 'c', 1), version='v3')
+    assert registry.prune(keep=1) == []            # v1 ativa, v2 anterior
+    assert registry.list_versions() == ['v1', 'v2', 'v3']
+
+
+def test_predictor_swap_is_atomic_for_inflight_predictions(tmp_path):
+    """Predição em andamento termina na versão antiga; a seguinte já usa a nova"""
+    registry = ModelRegistry(tmp_path / 'registry')
+    registry.publish(_write_version(tmp_path / 'a', 0, delay=0.3), version='v1', activate=True)
+    registry.publish(_write_version(tmp_path / 'b', 2), version='v2')
+
+    predictor = HybridMLPredictor(models_dir=str(tmp_path / 'none'), registry=registry,
+                                  preload=True)
+    assert predictor._pending.result(timeout=10) == 'v1'
+    assert predictor.is_loaded and predictor.model_version == 'v1'
+    # Aquecimento já chamou os modelos fora do caminho de predição
+    assert predictor.models['context_regime_detector'].calls >= 1
+
+    X = np.random.default_rng(0).normal(size=(4, len(predictor.context_features)))
+    results = {}
+    worker = threading.Thread(target=lambda: results.update(old=predictor.predict_batch(X)))
+    worker.start()
+    time.sleep(0.1)                                # predição de v1 dentro do modelo lento
+    assert predictor.swap_to('v2', timeout=10) == 'v2'
+    worker.join()
+
+    old = results['old']
+    assert (old['regime'] == 0).all() and (old['meta_pred'] == 0).all()
+    assert (old['order_flow'] == -1).all() and (old['volatility'] == 0).all()
+
+    new = predictor.predict_batch(X)
+    assert (new['regime'] == 2).all() and (new['meta_pred'] == 2).all()
+    assert (new['order_flow'] == 1).all() and predictor.model_version == 'v2'
+
+
+def test_prediction_waits_for_background_preload(tmp_path):
+    """Predição antes do fim da pré-carga espera os modelos em vez de sinal neutro"""
+    registry = ModelRegistry(tmp_path / 'registry')
+    registry.publish(_write_version(tmp_path / 'a', 2, delay=0.3), version='v1', activate=True)
+
+    assert not HybridMLPredictor(models_dir=str(tmp_path / 'none'))._pending
+
+    predictor = HybridMLPredictor(models_dir=str(tmp_path / 'none'), registry=registry,
+                                  preload=True)
+    assert not predictor.is_loaded
+    x = np.random.default_rng(1).normal(size=len(predictor.context_features))
+    result = predictor.predict_vector(x)
+    assert 'error' not in result, result
+    assert predictor.model_version == 'v1'
+    assert result['predictions']['meta'] == 2
+
+
+def test_artifact_cache_prefetch_and_invalidation(tmp_path):
+    """Pré-carga paralela; arquivo regravado é lido de novo"""
+    paths = []
+    for i in range(4):
+        paths.append(tmp_path / f'model_{i}.pkl')
+        joblib.dump({'id': i}, paths[-1])
+
+    cache = ArtifactCache()
+    assert cache.prefetch(paths + [tmp_path / 'missing.pkl']) == 4
+    assert cache.load(paths[2]) == {'id': 2}
+    assert cache.stats == {'hits': 1, 'loads': 4}
+
+    joblib.dump({'id': 'novo'}, paths[2])
+    os.utime(paths[2], ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert cache.load(paths[2]) == {'id': 'novo'}
+    assert cache.stats['loads'] == 5
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("=" * 60)
+    print("TESTE: ModelRegistry")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_publish_verify_activate_rollback(Path(tmp))
+    print("[OK] Publicação, checksums, ativação e rollback")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_predictor_swap_is_atomic_for_inflight_predictions(Path(tmp))
+    print("[OK] Troca atômica no preditor")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_prediction_waits_for_background_preload(Path(tmp))
+    print("[OK] Predição espera a pré-carga")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_artifact_cache_prefetch_and_invalidation(Path(tmp))
+    print("[OK] Cache de artefatos")
@@ -0,0 +1,88 @@
+"""
+Teste do OCOMonitor orientado a eventos de ordem
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import time
+
+from oco_monitor import OCOMonitor
+
+
+class FakeConnection:
+    """Conexão mínima que conta consultas de status e cancelamentos"""
+
+    def __init__(self):
+        self.status_queries = 0
+        self.cancelled = []
+
+    def get_order_status(self, order_id):
+        self.status_queries += 1
+        return "PENDING"
+
+    def cancel_order_by_id(self, order_id):
+        self.cancelled.append(order_id)
+        return True
+
+
+def test_fill_event_cancels_sibling_without_polling():
+    conn = FakeConnection()
+    monitor = OCOMonitor(conn)
+    closed = []
+    monitor.position_closed_callback = closed.append
+    monitor.register_oco_group(100, 101, 102)
+
+    monitor.on_order_update({'profit_id': 101, 'status': 0})
+    monitor.on_order_update({'profit_id': 101, 'status': 2, 'executed_quantity': 1})
+    assert monitor.process_pending_events() == 2
+
+    assert conn.cancelled == [102]
+    assert closed == ['stop_executed']
+    assert not monitor.oco_groups[100]['active']
+    assert conn.status_queries == 0
+
+    # Índice responde sem DLL e o grupo não fecha duas vezes
+    monitor._check_oco_executions()
+    monitor.on_order_update({'profit_id': 102, 'status': 3})
+    monitor.process_pending_events()
+    assert monitor.get_order_state(102) == "CANCELLED"
+    assert conn.cancelled == [102] and conn.status_queries == 0
+
+
+def test_fill_before_registration_and_background_thread():
+    conn = FakeConnection()
+    monitor = OCOMonitor(conn)
+    monitor.check_interval = 60.0
+
+    # Take executa antes de o grupo ser registrado
+    monitor.on_order_update({'profit_id': 202, 'status': 'FILLED'})
+    monitor.process_pending_events()
+    monitor.register_oco_group(200, 201, 202)
+    assert conn.cancelled == [201]
+
+    # Com o thread ativo, o cancelamento não espera o intervalo de polling
+    monitor.register_oco_group(300, 301, 302)
+    monitor.start()
+    try:
+        started = time.time()
+        monitor.on_order_update({'profit_id': 302, 'status': 2})
+        deadline = time.time() + 1.0
+        while 301 not in conn.cancelled and time.time() < deadline:
+            time.sleep(0.005)
+        assert 301 in conn.cancelled
+        assert time.time() - started < 1.0
+    finally:
+        monitor.stop()
+    assert monitor.stats['event_closes'] == 2
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: OCOMonitor orientado a eventos")
+    print("=" * 60)
+    test_fill_event_cancels_sibling_without_polling()
+    print("[OK] Execução cancela irmã sem consultar a DLL")
+    test_fill_before_registration_and_background_thread()
+    print("[OK] Execução antes do registro e thread do monitor")
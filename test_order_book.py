@@ -0,0 +1,109 @@
+"""
+Teste do OrderBookLadder (book por nível a partir de deltas do OfferBook V2)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import numpy as np
+
+from market_data.order_book import (
+    OrderBookLadder, BOOK_ADD, BOOK_EDIT, BOOK_DELETE, BOOK_DELETE_FROM, BID, ASK
+)
+from book_data_manager import BookDataManager
+
+
+def _seed(book):
+    """5 níveis de cada lado, duas ofertas no melhor bid"""
+    offer_id = 0
+    for i in range(5):
+        offer_id += 1
+        book.apply_offer(BOOK_ADD, BID, 5450.0 - 0.5 * i, 10 + i, offer_id)
+        offer_id += 1
+        book.apply_offer(BOOK_ADD, ASK, 5450.5 + 0.5 * i, 20 + i, offer_id)
+    book.apply_offer(BOOK_ADD, BID, 5450.0, 5, 100)
+
+
+def test_ladder_applies_offer_deltas():
+    """Add/edit/delete por offer_id mantêm níveis e melhor preço corretos"""
+    book = OrderBookLadder(tick_size=0.5)
+    _seed(book)
+
+    assert book.best(BID) == (5450.0, 15.0)
+    assert book.best(ASK) == (5450.5, 20.0)
+    assert book.spread == 0.5
+    prices, volumes = book.depth(BID, 3)
+    assert prices.tolist() == [5450.0, 5449.5, 5449.0]
+    assert volumes.tolist() == [15.0, 11.0, 12.0]
+    assert book.cumulative_depth(ASK, 3).tolist() == [20.0, 41.0, 63.0]
+
+    # Edit muda só a quantidade; delete esvazia o melhor ask
+    book.apply_offer(BOOK_EDIT, BID, 0.0, 8, 100, has_price=False)
+    assert book.best(BID) == (5450.0, 18.0)
+    book.apply_offer(BOOK_DELETE, ASK, 0.0, 0, 2, has_price=False, has_quantity=False)
+    assert book.best_ask == 5451.0
+
+    # Edit move a oferta de nível
+    book.apply_offer(BOOK_EDIT, BID, 5450.5, 10, 1)
+    assert book.best(BID) == (5450.5, 10.0)
+    assert book.depth(BID, 2)[1].tolist() == [10.0, 8.0]
+
+    # Delete from remove o nível indicado e todos os piores
+    book.apply_offer(BOOK_DELETE_FROM, BID, 5449.0, 0, None, has_quantity=False)
+    assert book.depth(BID, 10)[0].tolist() == [5450.5, 5450.0, 5449.5]
+    assert book.get_stats()['unmatched'] == 0
+
+
+def test_ladder_recenters_far_prices_and_snapshot():
+    """Preço fora da janela recentraliza sem perder níveis próximos"""
+    book = OrderBookLadder(tick_size=0.5, span=64)
+    _seed(book)
+    book.apply_offer(BOOK_ADD, ASK, 5470.0, 7, 500)
+    assert book.recenters == 1
+    assert book.best_ask == 5450.5 and book.best_bid == 5450.0
+
+    snap = book.snapshot(levels=3)
+    assert snap['bid_price_1'] == 5450.0 and snap['ask_volume_3'] == 22.0
+    assert np.isclose(snap['imbalance'], (38 - 63) / (38 + 63))
+
+
+def test_ladder_rejects_out_of_band_prices_and_prunes_offers():
+    """Preço espúrio não apaga o book; ofertas que saem da janela são esquecidas"""
+    book = OrderBookLadder(tick_size=0.5, span=64)
+    _seed(book)
+    assert not book.apply_offer(BOOK_ADD, ASK, 54505.0, 7, 500)
+    assert not book.apply_offer(BOOK_EDIT, BID, 0.5, 7, 1)
+    assert book.recenters == 0 and book.get_stats()['rejected'] == 2
+    assert book.best(BID) == (5450.0, 15.0) and book.best_ask == 5450.5
+
+    # Salto real de preço: níveis antigos saem da janela junto com as ofertas
+    book.apply_offer(BOOK_ADD, ASK, 5500.0, 7, 501)
+    assert book.recenters == 1
+    assert book.get_stats()['tracked_offers'] == 1
+    assert book.best_bid == 0.0 and book.best_ask == 5500.0
+
+
+def test_book_data_manager_consumes_v2_deltas():
+    manager = BookDataManager(levels=3)
+    for i, (side, price, qty) in enumerate([(0, 5450.0, 10), (1, 5450.5, 12), (0, 5449.5, 4)]):
+        manager.on_book_delta({'action': 0, 'side': side, 'price': price,
+                               'quantity': qty, 'offer_id': i})
+    state = manager.get_current_state()
+    assert state['bid_prices'] == [5450.0, 5449.5]
+    assert state['spread'] == 0.5
+    assert manager.get_statistics()['total_snapshots'] == 2
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: OrderBookLadder")
+    print("=" * 60)
+    test_ladder_applies_offer_deltas()
+    print("[OK] Deltas add/edit/delete/delete-from")
+    test_ladder_recenters_far_prices_and_snapshot()
+    print("[OK] Recentralização e snapshot")
+    test_ladder_rejects_out_of_band_prices_and_prunes_offers()
+    print("[OK] Faixa de preço e poda de ofertas")
+    test_book_data_manager_consumes_v2_deltas()
+    print("[OK] BookDataManager.on_book_delta")
@@ -0,0 +1,136 @@
+"""
+Teste dos detectores de regime incrementais (mesmas métricas do cálculo com NumPy)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import numpy as np
+
+from features.streaming_features import RollingExtremum, RollingRegression, SortedWindow
+from trading.market_regime_detector import MarketRegimeDetector
+from trading.regime_based_strategy import MarketRegime, RegimeDetector
+
+
+def _walk(n=400, seed=0, drift=0.0):
+    rng = np.random.default_rng(seed)
+    return 5400 + np.round(np.cumsum(rng.normal(drift, 1.0, n)) * 2) / 2
+
+
+def test_rolling_primitives_match_numpy():
+    """Regressão, extremos e janela ordenada iguais ao recálculo da janela"""
+    prices = _walk(300, seed=1)
+    reg, high, low, window = RollingRegression(20), RollingExtremum(14), \
+        RollingExtremum(14, 'min'), SortedWindow(50)
+    for i, price in enumerate(prices):
+        reg.push(price)
+        high.push(price)
+        low.push(price)
+        window.push(price)
+        recent = prices[max(0, i - 19):i + 1]
+        if len(recent) >= 2:
+            slope, intercept = np.polyfit(np.arange(len(recent)), recent, 1)
+            assert abs(reg.slope - slope) < 1e-8
+            fitted = np.polyval([slope, intercept], np.arange(len(recent)))
+            ss_tot = np.sum((recent - recent.mean()) ** 2)
+            r2 = 1 - np.sum((recent - fitted) ** 2) / ss_tot if ss_tot else 0
+            assert abs(reg.r_squared - r2) < 1e-8
+        assert high.value == prices[max(0, i - 13):i + 1].max()
+        assert low.value == prices[max(0, i - 13):i + 1].min()
+        last = prices[max(0, i - 49):i + 1]
+        assert window.sorted == sorted(last)
+        mid = last.mean()
+        assert window.count_between(mid - 2, mid + 2) == np.sum((last >= mid - 2) & (last <= mid + 2))
+        assert window.count_between(mid, mid + 5, include_low=False) == np.sum((last > mid) & (last <= mid + 5))
+
+
+def test_market_regime_detector_metrics():
+    """Métricas incrementais = fórmulas originais sobre os buffers"""
+    detector = MarketRegimeDetector()
+    prices = np.concatenate([_walk(150, seed=2), _walk(150, seed=3, drift=0.4)])
+    for price in prices:
+        detector.update(price, price + 1.0, price - 1.0, volume=10)
+        m = detector.regime_metrics
+        buf = np.array(detector.price_buffer)
+        if len(buf) < 50:
+            continue
+
+        trend = buf[-20:]
+        slope, intercept = np.polyfit(np.arange(20), trend, 1)
+        fitted = np.polyval([slope, intercept], np.arange(20))
+        r2 = 1 - np.sum((trend - fitted) ** 2) / np.sum((trend - trend.mean()) ** 2)
+        assert abs(m['directional_strength'] - np.clip(slope / trend.mean() * 100 * r2, -1, 1)) < 1e-9
+
+        window = buf[-50:]
+        high, low = window.max(), window.min()
+        rng = high - low
+        touches = np.sum(np.abs(window - high) < rng * 0.05) + np.sum(np.abs(window - low) < rng * 0.05)
+        inside = np.mean((window >= low + rng * 0.2) & (window <= low + rng * 0.8))
+        assert abs(m['range_bound_score'] - (min(touches / 10, 1.0) + inside) / 2) < 1e-12
+
+        returns = np.diff(buf[-30:]) / buf[-30:-1]
+        assert abs(m['volatility'] - np.std(returns) * np.sqrt(252)) < 1e-9
+
+        diffs = np.diff(trend)
+        if trend[-5:].mean() > trend.mean():
+            expected = np.mean(diffs > 0)
+        elif trend[-5:].mean() < trend.mean():
+            expected = np.mean(diffs < 0)
+        else:
+            expected = 0.5
+        assert abs(m['trend_consistency'] - expected) < 1e-12
+
+        closes = buf[-15:-1]
+        true_range = np.maximum(2.0, np.maximum(np.abs(buf[-14:] + 1 - closes),
+                                                np.abs(buf[-14:] - 1 - closes)))
+        assert abs(m['atr'] - true_range.mean()) < 1e-9
+
+    assert detector.current_regime in ('TRENDING_UP', 'TRENDING_DOWN', 'RANGING', 'VOLATILE', 'UNDEFINED')
+
+
+def test_regime_detector_incremental_state_and_regimes():
+    """RegimeDetector: médias/inclinações iguais ao polyfit; regimes coerentes"""
+    detector = RegimeDetector(lookback_periods=50)
+    assert detector.detect_regime() == (MarketRegime.UNDEFINED, 0.0)
+
+    prices = _walk(200, seed=4)
+    for price in prices:
+        detector.update(price, volume=5)
+        buf = np.array(detector.price_buffer)
+        for period in (5, 10, 20):
+            recent = buf[-period:]
+            if len(recent) >= 2:
+                slope = np.polyfit(np.arange(len(recent)), recent, 1)[0]
+                assert abs(detector._trends[period].slope - slope) < 1e-8
+                assert abs(detector._trends[period].mean - recent.mean()) < 1e-8
+        assert detector._range_high.value - detector._range_low.value == np.ptp(buf[-14:])
+    detector.detect_regime()
+    assert abs(detector.volatility - np.std(np.diff(buf) / buf[:-1])) < 1e-12
+
+    rising = RegimeDetector()
+    for price in 5400 + np.arange(60) * 10.0:
+        rising.update(price, volume=1)
+    assert rising.detect_regime()[0] == MarketRegime.STRONG_UPTREND
+
+    falling = RegimeDetector()
+    for price in 5400 - np.arange(60) * 10.0:
+        falling.update(price, volume=1)
+    assert falling.detect_regime()[0] == MarketRegime.STRONG_DOWNTREND
+
+    flat = RegimeDetector()
+    for price in 5400 + np.tile([0.0, 0.5], 30):
+        flat.update(price, volume=1)
+    assert flat.detect_regime()[0] == MarketRegime.LATERAL
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: Detectores de regime incrementais")
+    print("=" * 60)
+    test_rolling_primitives_match_numpy()
+    print("[OK] Primitivas móveis")
+    test_market_regime_detector_metrics()
+    print("[OK] MarketRegimeDetector")
+    test_regime_detector_incremental_state_and_regimes()
+    print("[OK] RegimeDetector")
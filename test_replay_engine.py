@@ -0,0 +1,105 @@
+"""
+Teste do ReplayEngine + SimulatedConnectionManager (sem ProfitDLL)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from replay import SimulatedConnectionManager, ReplayEngine, events_from_frames
+
+
+class BracketOnceSystem:
+    """Sistema mínimo: compra na primeira decisão com stop/take fixos"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.books = 0
+        self.trades = 0
+        self.closed = []
+        connection.set_offer_book_callback(self.process_book_update)
+        connection.set_trade_callback(self.process_trade_update)
+        connection.oco_monitor.position_closed_callback = self.closed.append
+
+    def process_book_update(self, symbol, book_data):
+        self.books += 1
+
+    def process_trade_update(self, symbol, trade_data):
+        self.trades += 1
+
+    def trading_step(self):
+        if self.connection.position == 0 and not self.connection.fills:
+            self.connection.send_order_with_bracket('WDOU25', 'BUY', 1, 0, 5445.0, 5452.0)
+            return {'signal': 1, 'confidence': 1.0}
+        return {'signal': 0, 'confidence': 0.0}
+
+
+def _session():
+    ts = pd.date_range('2025-08-28 09:00', periods=40, freq='s')
+    mid = np.concatenate([np.full(10, 5450.0), np.linspace(5450, 5455, 30)])
+    book = pd.DataFrame({'timestamp': ts, 'bid_price_1': mid - 0.5, 'bid_vol_1': 50,
+                         'ask_price_1': mid, 'ask_vol_1': 40})
+    trades = pd.DataFrame({'timestamp': ts[::2], 'price': mid[::2], 'volume': 5,
+                           'aggressor': ['BUY', 'SELL'] * 10})
+    return events_from_frames(book, trades)
+
+
+def test_events_are_ordered_book_first():
+    events = _session()
+    assert len(events) == 60
+    assert np.all(np.diff(events['ts']) >= 0)
+    assert events['kind'][0] == 0 and events['kind'][1] == 1
+
+
+def test_replay_fills_take_and_closes_oco():
+    """Entrada a mercado, take executado pelo book e stop cancelado"""
+    connection = SimulatedConnectionManager()
+    system = BracketOnceSystem(connection)
+    report = ReplayEngine(system, connection, decision_interval=5.0).run(_session())
+
+    assert system.books == 40 and system.trades == 20
+    assert report['decisions'] == 7
+    assert report['execution']['entries'] == 1
+    assert connection.position == 0
+    assert connection.fills[-1]['type'] == 'LIMIT'
+    assert np.isclose(connection.realized_pnl, (5452.0 - 5450.0) * 10)
+    assert system.closed == ['take_executed']
+    assert connection.active_orders == {}
+    assert report['stages']['book_update']['calls'] == 40
+
+    # Determinístico: mesma entrada, mesmo resultado
+    connection2 = SimulatedConnectionManager()
+    ReplayEngine(BracketOnceSystem(connection2), connection2, profile=False).run(_session())
+    assert connection2.fills == connection.fills
+
+
+def test_data_gap_does_not_replay_empty_intervals():
+    """Lacuna overnight: uma decisão ao retomar, não uma a cada 5 s da lacuna"""
+    day1 = pd.date_range('2025-08-28 17:59:50', periods=10, freq='s')
+    day2 = pd.date_range('2025-08-29 09:00:00', periods=10, freq='s')
+    ts = day1.append(day2)
+    book = pd.DataFrame({'timestamp': ts, 'bid_price_1': 5449.5, 'bid_vol_1': 50,
+                         'ask_price_1': 5450.0, 'ask_vol_1': 40})
+    trades = pd.DataFrame({'timestamp': ts[:0], 'price': 0.0, 'volume': 0, 'aggressor': 'BUY'})
+
+    connection = SimulatedConnectionManager()
+    report = ReplayEngine(BracketOnceSystem(connection), connection,
+                          decision_interval=5.0, profile=False).run(events_from_frames(book, trades))
+
+    # dia 1: 17:59:55; retomada: 09:00:00 e 09:00:05
+    assert report['decisions'] == 3
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: ReplayEngine")
+    print("=" * 60)
+    test_events_are_ordered_book_first()
+    print("[OK] Ordenação de eventos")
+    test_replay_fills_take_and_closes_oco()
+    print("[OK] Replay com OCO simulado")
+    test_data_gap_does_not_replay_empty_intervals()
+    print("[OK] Lacuna nos dados sem decisões vazias")
@@ -0,0 +1,91 @@
+"""
+Teste dos buffers tipados (StructuredRingBuffer / CandleBuffer / BookBuffer / TradeBuffer)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from datetime import datetime, timedelta
+import numpy as np
+
+from buffers.ring_buffer import StructuredRingBuffer, CANDLE_DTYPE
+from buffers.circular_buffer import CandleBuffer, BookBuffer, TradeBuffer
+
+
+def test_ring_wraparound_is_contiguous_view():
+    """Janela dos últimos N deve ser view contígua mesmo após wrap"""
+    ring = StructuredRingBuffer(4, CANDLE_DTYPE)
+    for i in range(10):
+        ring.append((i, i, i, i, float(i), 1.0))
+
+    window = ring.last(3)
+    assert list(window['close']) == [7.0, 8.0, 9.0]
+    assert window.base is not None  # view, não cópia
+    assert len(ring) == 4
+    assert list(ring.last()['close']) == [6.0, 7.0, 8.0, 9.0]
+
+
+def test_candle_buffer_matches_legacy_calculations():
+    """Retornos/volatilidade devem bater com o cálculo via DataFrame"""
+    buffer = CandleBuffer(max_size=50)
+    base = datetime(2025, 8, 28, 9, 0)
+    closes = 5450 + np.cumsum(np.random.randn(80))
+    for i, close in enumerate(closes):
+        buffer.add_candle(base + timedelta(minutes=i), close, close + 1, close - 1, close, 100 + i)
+
+    expected = closes[-50:]
+    expected_returns = np.diff(expected) / expected[:-1]
+    assert np.allclose(buffer.calculate_returns(1), expected_returns)
+    assert np.isclose(buffer.calculate_volatility(20), np.std(expected_returns[-20:]))
+    assert buffer.get_ohlc_stats()['last_close'] == expected[-1]
+    assert buffer.get_last_n(1)[0]['close'] == expected[-1]
+    assert len(buffer.get_dataframe()) == 50
+    assert buffer.get_stats()['total_dropped'] == 30
+
+
+def test_book_and_trade_buffers():
+    """Spread, imbalance, VWAP e agressores"""
+    book = BookBuffer(max_size=10, levels=5)
+    book.add_snapshot(datetime.now(), [5450.0, 5449.5], [100, 50], [5450.5], [30])
+    assert book.calculate_spread() == 0.5
+    assert np.isclose(book.calculate_imbalance(), (150 - 30) / 180)
+    assert book.get_last_n(1)[0]['ask_prices'] == [5450.5]
+
+    trades = TradeBuffer(max_size=10)
+    trades.add_trade(datetime.now(), 5450.0, 10, 'buy', 'buyer')
+    trades.add_trade(datetime.now(), 5451.0, 30, 'sell', 'seller', trader_id='T1')
+    assert np.isclose(trades.calculate_vwap(), (5450 * 10 + 5451 * 30) / 40)
+    assert trades.get_aggressor_ratio()['buyer_aggressor_count'] == 1
+    assert trades.get_last_n(1)[0]['trader_id'] == 'T1'
+
+
+def test_structured_buffer_dict_api_and_window_copies():
+    """add() em dict funciona em todos os buffers e a janela não muda com novas escritas"""
+    book = BookBuffer(max_size=3, levels=2)
+    assert book.add({'timestamp': datetime.now(), 'bid_prices': [5450.0], 'bid_volumes': [10],
+                     'ask_prices': [5450.5], 'ask_volumes': [20]})
+    assert book.get_last_n(1)[0]['bid_volumes'] == [10.0]
+
+    trades = TradeBuffer(max_size=2)
+    trades.add_trade(datetime.now(), 5450.0, 10, 'buy', 'buyer')
+    window = trades.get_window()
+    prices = trades.get_column('price')
+    for price in (5451.0, 5452.0):
+        trades.add_trade(datetime.now(), price, 10, 'buy', 'buyer')
+    assert window['price'].tolist() == [5450.0]
+    assert prices.tolist() == [5450.0]
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: Buffers tipados")
+    print("=" * 60)
+    test_ring_wraparound_is_contiguous_view()
+    print("[OK] Ring buffer")
+    test_candle_buffer_matches_legacy_calculations()
+    print("[OK] CandleBuffer")
+    test_book_and_trade_buffers()
+    print("[OK] BookBuffer / TradeBuffer")
+    test_structured_buffer_dict_api_and_window_copies()
+    print("[OK] add() em dict e janelas copiadas")
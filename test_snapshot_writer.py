@@ -0,0 +1,68 @@
+"""
+Teste do escritor central de snapshots de status
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import json
+import time
+
+from monitoring.snapshot_writer import SnapshotWriter
+
+
+def test_updates_are_coalesced_per_topic(tmp_path):
+    """Várias atualizações entre gravações viram um arquivo compacto"""
+    writer = SnapshotWriter(base_dir=str(tmp_path), max_rate=1.0)
+
+    for i in range(100):
+        writer.submit('hmarl', {'consensus': {'action': 'BUY', 'update': i}})
+        writer.submit('ml', {'ml_confidence': i / 100})
+    assert not writer.submit('desconhecido', {})
+    assert writer.flush() == 2
+
+    hmarl_file = tmp_path / 'data' / 'monitor' / 'hmarl_status.json'
+    content = hmarl_file.read_text()
+    assert json.loads(content) == {'consensus': {'action': 'BUY', 'update': 99}}
+    assert '\n' not in content and ': ' not in content  # Sem indentação
+    assert json.loads((tmp_path / 'data' / 'monitor' / 'ml_status.json').read_text())['ml_confidence'] == 0.99
+
+    stats = writer.get_stats()
+    assert stats['written'] == 2 and stats['coalesced'] == 198
+    assert not list((tmp_path / 'data' / 'monitor').glob('*.tmp'))
+
+
+def test_background_thread_limits_rate(tmp_path):
+    """O thread grava no máximo max_rate rodadas/s e stop() grava o último"""
+    writer = SnapshotWriter(base_dir=str(tmp_path), max_rate=5.0)
+    writer.start()
+    try:
+        deadline = time.time() + 0.5
+        i = 0
+        while time.time() < deadline:
+            writer.submit('position', {'has_position': True, 'update': i})
+            i += 1
+            time.sleep(0.001)
+    finally:
+        writer.stop()
+
+    assert writer.stats['flushes'] <= 5
+    position = json.loads((tmp_path / 'data' / 'monitor' / 'position_status.json').read_text())
+    assert position['update'] == i - 1
+    assert writer.get_stats()['pending'] == 0
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("=" * 60)
+    print("TESTE: SnapshotWriter")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_updates_are_coalesced_per_topic(Path(tmp))
+    print("[OK] Atualizações agregadas por tópico")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_background_thread_limits_rate(Path(tmp))
+    print("[OK] Taxa de gravação limitada")
@@ -0,0 +1,117 @@
+"""
+Teste do ingresso de callbacks (SPSCRing / CallbackIngress)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import threading
+import numpy as np
+
+from buffers.spsc_ring import SPSCRing, CallbackIngress
+
+TRADE_DTYPE = np.dtype([('ticker', object), ('seq', 'i8'), ('price', 'f8')])
+
+
+def test_ring_drops_when_full_and_wraps_in_segments():
+    """Fila cheia descarta; lote que cruza o fim vem em dois segmentos"""
+    ring = SPSCRing(3, TRADE_DTYPE)
+    assert ring.capacity == 4
+
+    for i in range(6):
+        ring.push('WDOU25', i, 5450.0 + i)
+    assert ring.dropped == 2 and len(ring) == 4
+
+    seen = []
+    ring.consume(lambda cols, n: seen.extend(cols['seq'].tolist()), max_items=3)
+    for i in range(6, 9):
+        ring.push('WDOU25', i, 5450.0 + i)
+
+    segments = []
+    ring.consume(lambda cols, n: segments.append(cols['seq'].tolist()))
+    assert seen == [0, 1, 2]
+    assert segments == [[3], [6, 7, 8]]
+    assert len(ring) == 0
+
+
+def test_ingress_delivers_in_order_across_threads():
+    """Produtor em outro thread: todos os registros chegam, em ordem"""
+    received = []
+
+    def handler(cols, n):
+        received.extend(cols['seq'].tolist())
+
+    ingress = CallbackIngress(batch_size=64, idle_timeout=0.01)
+    ring = ingress.add_channel('trade', TRADE_DTYPE, handler, capacity=1 << 16)
+    ingress.start()
+
+    total = 50_000
+    producer = threading.Thread(
+        target=lambda: [ring.push('WDOU25', i, 5450.0) for i in range(total)])
+    producer.start()
+    producer.join()
+    ingress.stop()
+
+    assert ring.dropped == 0
+    assert received == list(range(total))
+    assert ingress.get_stats()['dispatched'] == total
+
+
+def test_ingress_survives_handler_errors():
+    """Exceção no handler não derruba o consumidor nem trava a fila"""
+    calls = []
+
+    def handler(cols, n):
+        calls.append(n)
+        raise RuntimeError("handler lento/quebrado")
+
+    ingress = CallbackIngress()
+    ring = ingress.add_channel('book', TRADE_DTYPE, handler, capacity=8)
+    for i in range(5):
+        ring.push('WDOU25', i, 0.0)
+
+    ingress.drain()
+    assert calls == [5] and len(ring) == 0
+    assert ingress.errors == 1
+
+
+def test_stop_timeout_leaves_final_drain_to_consumer():
+    """Join expirado: stop() não drena em paralelo; o consumidor entrega o resto"""
+    release = threading.Event()
+    received = []
+    consumers = set()
+
+    def handler(cols, n):
+        consumers.add(threading.get_ident())
+        release.wait(2.0)
+        received.extend(cols['seq'].tolist())
+
+    ingress = CallbackIngress(batch_size=1, idle_timeout=0.01)
+    ring = ingress.add_channel('trade', TRADE_DTYPE, handler, capacity=64)
+    ingress.start()
+    for i in range(10):
+        ring.push('WDOU25', i, 5450.0)
+
+    ingress.stop(timeout=0.05)
+    assert ingress._thread is not None and ingress._thread.is_alive()
+    assert threading.get_ident() not in consumers
+
+    release.set()
+    ingress._thread.join(2.0)
+    assert received == list(range(10))
+    assert len(consumers) == 1 and threading.get_ident() not in consumers
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: SPSCRing / CallbackIngress")
+    print("=" * 60)
+    test_ring_drops_when_full_and_wraps_in_segments()
+    print("[OK] Descarte e wrap-around")
+    test_ingress_delivers_in_order_across_threads()
+    print("[OK] Entrega ordenada entre threads")
+    test_ingress_survives_handler_errors()
+    print("[OK] Erros isolados no consumidor")
+    test_stop_timeout_leaves_final_drain_to_consumer()
+    print("[OK] Drenagem final fica no thread consumidor")
@@ -0,0 +1,139 @@
+"""
+Teste do canal de status em memória compartilhada
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import json
+import subprocess
+import uuid
+
+from monitoring import status_channel
+from monitoring.status_channel import StatusPublisher, StatusReader, read_status
+
+
+def _segment_name():
+    return f"qt_status_test_{uuid.uuid4().hex[:8]}"
+
+
+def test_publish_and_read_with_seqlock():
+    """Leitura consistente, cache por sequência e slot ocupado por escrita"""
+    name = _segment_name()
+    publisher = StatusPublisher(name=name, slot_size=4096)
+    reader = StatusReader(name=name, max_retries=5)
+    try:
+        assert reader.read('hmarl') is None  # Nunca publicado
+
+        status = {'consensus': {'action': 'BUY', 'confidence': 0.71},
+                  'agents': {'OrderFlowSpecialist': {'signal': 0.4, 'weight': 0.3}}}
+        assert publisher.publish('hmarl', status)
+        data, seq, _ = reader.read_with_meta('hmarl')
+        assert data == status and seq == 2
+
+        # Sem nova publicação o objeto decodificado é reaproveitado
+        assert reader.read('hmarl') is data
+        assert reader.age('hmarl') < 5
+
+        publisher.publish('hmarl', {'consensus': {'action': 'SELL'}})
+        assert reader.read('hmarl')['consensus']['action'] == 'SELL'
+        assert reader.read('ml') is None
+
+        # Sequência ímpar = escrita em andamento: o leitor não devolve dados parciais
+        offset = status_channel._SEGMENT_HEADER_SIZE
+        status_channel._SEQ.pack_into(publisher._buf, offset, 5)
+        assert reader.read('hmarl') is None
+
+        # Payload maior que o slot é descartado sem corromper o anterior
+        assert not publisher.publish('ml', {'blob': 'x' * 8192})
+        assert publisher.oversized == 1
+    finally:
+        reader.close()
+        publisher.close()
+
+
+def test_reader_in_another_process():
+    """Monitor em outro processo lê o último estado publicado"""
+    name = _segment_name()
+    publisher = StatusPublisher(name=name, slot_size=4096)
+    try:
+        for i in range(50):
+            publisher.publish('position', {'has_position': True, 'update': i})
+
+        src_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+        code = (
+            "import sys, json; sys.path.insert(0, sys.argv[1]);"
+            "from monitoring.status_channel import StatusReader;"
+            "print(json.dumps(StatusReader(name=sys.argv[2]).read('position')))"
+        )
+        output = subprocess.run([sys.executable, '-c', code, src_dir, name],
+                                capture_output=True, text=True, timeout=30)
+        assert output.returncode == 0, output.stderr
+        assert json.loads(output.stdout) == {'has_position': True, 'update': 49}
+
+        # Saída do leitor não remove o segmento do escritor
+        assert StatusReader(name=name).read('position')['update'] == 49
+    finally:
+        publisher.close()
+
+
+def test_reader_reattaches_after_restart():
+    """Monitor em execução passa a ler o segmento recriado no reinício do sistema"""
+    name = _segment_name()
+    publisher = StatusPublisher(name=name, slot_size=4096)
+    reader = StatusReader(name=name, attach_interval=0)
+    try:
+        publisher.publish('regime', {'regime': 'trend_up'})
+        assert reader.read('regime') == {'regime': 'trend_up'}
+
+        # Parada normal: o segmento é fechado e removido
+        publisher.close()
+        assert reader.read('regime') is None
+
+        publisher = StatusPublisher(name=name, slot_size=4096)
+        publisher.publish('regime', {'regime': 'lateral'})
+        assert reader.read('regime') == {'regime': 'lateral'}
+
+        # Segmento recriado sem close() (queda do processo): nova encarnação
+        publisher._shm.unlink()
+        publisher = StatusPublisher(name=name, slot_size=4096)
+        publisher.publish('regime', {'regime': 'trend_down'})
+        assert reader.read('regime') == {'regime': 'trend_down'}
+    finally:
+        reader.close()
+        publisher.close()
+
+
+def test_read_status_falls_back_to_legacy_file(tmp_path, monkeypatch):
+    """Sem segmento publicado, os monitores leem o JSON legado"""
+    monkeypatch.setattr(status_channel, '_reader', StatusReader(name=_segment_name()))
+    monitor_dir = tmp_path / 'data' / 'monitor'
+    monitor_dir.mkdir(parents=True)
+    with open(monitor_dir / 'regime_status.json', 'w') as f:
+        json.dump({'regime': 'trend_up', 'confidence': 0.8}, f)
+
+    assert read_status('regime', base_dir=str(tmp_path))['regime'] == 'trend_up'
+    assert read_status('ml', default={}, base_dir=str(tmp_path)) == {}
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    class _Patch:
+        def setattr(self, obj, attr, value):
+            setattr(obj, attr, value)
+
+    print("=" * 60)
+    print("TESTE: Canal de status em memória compartilhada")
+    print("=" * 60)
+    test_publish_and_read_with_seqlock()
+    print("[OK] Publicação e leitura com seqlock")
+    test_reader_in_another_process()
+    print("[OK] Leitura em outro processo")
+    test_reader_reattaches_after_restart()
+    print("[OK] Reanexação após reinício do sistema")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_read_status_falls_back_to_legacy_file(Path(tmp), _Patch())
+    print("[OK] Fallback para arquivo JSON legado")
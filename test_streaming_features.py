@@ -0,0 +1,79 @@
+"""
+Teste do StreamingFeatureEngine: features incrementais devem bater com o cálculo via NumPy
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import numpy as np
+
+from features.streaming_features import RollingMoments, StreamingFeatureEngine
+
+
+def test_rolling_moments_matches_numpy():
+    """Welford com janela deslizante deve bater com np.mean/np.std"""
+    values = 5450 + np.cumsum(np.random.randn(500))
+    moments = RollingMoments(20)
+    for i, value in enumerate(values):
+        moments.push(value)
+        window = values[max(0, i - 19):i + 1]
+        assert np.isclose(moments.mean, window.mean())
+        assert np.isclose(moments.std, window.std(), atol=1e-9)
+
+
+def test_candle_features_match_batch_formulas():
+    """Retornos, volatilidade, RSI e z-score de volume"""
+    np.random.seed(7)
+    closes = 5450 + np.cumsum(np.random.randn(150))
+    volumes = 1000 + np.random.randint(0, 500, size=150).astype(float)
+
+    engine = StreamingFeatureEngine()
+    for close, volume in zip(closes, volumes):
+        engine.on_candle(close, close + 2, close - 2, close, volume)
+
+    returns = engine.return_features()
+    assert np.isclose(returns['returns_20'], (closes[-1] - closes[-21]) / closes[-21])
+
+    window = closes[-20:]
+    expected_vol = np.std(np.diff(window) / window[:-1])
+    assert np.isclose(engine.volatility_features()['volatility_20'], expected_vol)
+
+    deltas = np.diff(closes[-15:])
+    avg_gain = np.where(deltas > 0, deltas, 0).mean()
+    avg_loss = np.where(deltas < 0, -deltas, 0).mean()
+    assert np.isclose(engine.rsi(), 100 - 100 / (1 + avg_gain / avg_loss))
+
+    zscore = (volumes[-1] - volumes[-50:].mean()) / volumes[-50:].std()
+    assert np.isclose(engine.volume_features()['volume_zscore_50'], zscore)
+
+
+def test_trade_and_book_state():
+    """VWAP, volume sinalizado e imbalance incrementais"""
+    engine = StreamingFeatureEngine(max_trades=10)
+    engine.on_trade(0.0, 5450.0, 10, 1)
+    engine.on_trade(1.0, 5451.0, 30, -1)
+    assert np.isclose(engine.vwap(), (5450 * 10 + 5451 * 30) / 40)
+    assert engine.cumulative_signed_volume == -20
+    assert engine.signed_volume == -30
+    assert engine.trade_intensity() == 2.0
+
+    # Um único trade na janela (após um intervalo longo): 1.0, como o TradeBuffer
+    engine.on_trade(500.0, 5452.0, 5, 1)
+    assert engine.trade_intensity() == 1.0
+    assert engine.trade_intensity() == 1.0
+
+    engine.on_book(150, 50)
+    assert np.isclose(engine.order_flow_imbalance(10), 0.5)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: StreamingFeatureEngine")
+    print("=" * 60)
+    test_rolling_moments_matches_numpy()
+    print("[OK] RollingMoments")
+    test_candle_features_match_batch_formulas()
+    print("[OK] Features de candle")
+    test_trade_and_book_state()
+    print("[OK] Trades / book")
@@ -0,0 +1,103 @@
+"""
+Teste da gravação assíncrona e indexada dos logs estruturados
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import json
+import gzip
+
+from trading_logging.log_sink import AsyncJsonlSink, log_files_for, search_log_file
+from trading_logging.structured_logger import StructuredLogger, LogAggregator, LogLevel
+
+
+def _line(i, level='INFO', message='Features calculated'):
+    entry = {'timestamp': f'2026-01-01T10:00:{i % 60:02d}.{i:06d}', 'level': level,
+             'component': 'T', 'message': message, 'data': {'i': i}, 'context': {}}
+    return json.dumps(entry), entry['timestamp'], level, message
+
+
+def test_bounded_queue_drops_and_batches(tmp_path):
+    """Fila cheia descarta sem bloquear; o thread grava em lotes indexados"""
+    sink = AsyncJsonlSink(str(tmp_path / 'a.jsonl'), max_queue=50, batch_size=20)
+    accepted = sum(sink.write(*_line(i)) for i in range(80))
+    assert accepted == 50 and sink.stats['dropped'] == 30
+
+    sink.start()
+    assert sink.flush()
+    for i in range(30):
+        sink.write(*_line(i, 'TRADE', f'Trade signal: {i}'))
+    sink.close()
+
+    lines = (tmp_path / 'a.jsonl').read_text().splitlines()
+    assert len(lines) == 80
+    blocks = [json.loads(l) for l in (tmp_path / 'a.jsonl.idx').read_text().splitlines()]
+    assert sum(b['count'] for b in blocks) == 80
+    assert all(b['count'] <= 20 for b in blocks)
+
+    trades = list(search_log_file(tmp_path / 'a.jsonl', 'trade signal: 1', levels=['TRADE']))
+    assert [e['data']['i'] for e in trades] == [1] + list(range(10, 20))
+
+
+def test_rotation_compresses_and_search_uses_index(tmp_path):
+    """Rotação gera .gz com índice; a busca continua nos arquivos rotacionados"""
+    path = tmp_path / 'b.jsonl'
+    sink = AsyncJsonlSink(str(path), batch_size=10, max_bytes=4000)
+    for i in range(200):
+        message = 'Order FILLED' if i == 7 else 'Features calculated'
+        sink.write(*_line(i, 'TRADE' if i == 7 else 'FEATURE', message))
+    sink.close()
+
+    files = log_files_for(path)
+    assert sink.stats['rotations'] >= 1 and files[0].name == 'b.1.jsonl.gz'
+    with gzip.open(files[0], 'rt') as f:
+        assert json.loads(f.readline())['data']['i'] == 0
+
+    found = [e for p in files for e in search_log_file(p, 'order filled')]
+    assert [e['data']['i'] for e in found] == [7]
+    total = sum(1 for p in files for _ in search_log_file(p))
+    assert total == 200
+
+
+def test_structured_logger_search(tmp_path):
+    """Logger enfileira sem lock de disco e busca pelo índice"""
+    aggregator = LogAggregator([])
+    logger = StructuredLogger('SinkTest', log_dir=str(tmp_path))
+    aggregator.loggers['SinkTest'] = logger
+
+    for i in range(100):
+        logger.feature(f'feature_{i % 5}', i * 0.1)
+    logger.trade('BUY', price=5450.5)
+    logger.error('Falha no envio', order='ORD_1')
+
+    trades = aggregator.search_logs('trade action')
+    assert len(trades) == 1 and trades[0].data['price'] == 5450.5
+    assert len(logger.search('feature_3')) == 20
+    assert [e.message for e in logger.search(level=LogLevel.ERROR)] == ['Falha no envio']
+    assert len(logger.search('feature', limit=7)) == 7
+    assert logger.get_stats()['dropped'] == 0
+
+    # Arquivo legado (sem índice) continua pesquisável
+    legacy = tmp_path / 'Legacy_19990101.jsonl'
+    legacy.write_text(_line(1, message='Old entry')[0] + '\n')
+    assert len(list(search_log_file(legacy, 'old'))) == 1
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("=" * 60)
+    print("TESTE: Logging estruturado assíncrono")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_bounded_queue_drops_and_batches(Path(tmp))
+    print("[OK] Fila limitada e lotes indexados")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_rotation_compresses_and_search_uses_index(Path(tmp))
+    print("[OK] Rotação comprimida e busca indexada")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_structured_logger_search(Path(tmp))
+    print("[OK] Busca do StructuredLogger")
@@ -0,0 +1,118 @@
+"""
+Teste da detecção incremental de suporte/resistência (LevelDetector)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import numpy as np
+
+from trading.support_resistance import LevelDetector, nearest_levels
+from trading.regime_based_strategy import RegimeDetector, SupportResistanceStrategy
+from trading.adaptive_risk_manager import AdaptiveRiskManager
+from trading.smart_targets_calculator import SmartTargetsCalculator
+
+
+def _walk(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    return 5400 + np.round(np.cumsum(rng.normal(0, 1.0, n)) * 2) / 2
+
+
+def _reference_levels(prices):
+    """Algoritmo anterior: pivôs por max()/min() da fatia + agrupamento"""
+    if len(prices) < 20:
+        return [], []
+    supports, resistances = [], []
+    for i in range(10, len(prices) - 10):
+        if prices[i] == max(prices[i-10:i+10]):
+            resistances.append(prices[i])
+        if prices[i] == min(prices[i-10:i+10]):
+            supports.append(prices[i])
+
+    def cluster(levels, tolerance=0.002):
+        if not levels:
+            return []
+        clustered, levels_sorted = [], sorted(set(levels))
+        current = [levels_sorted[0]]
+        for level in levels_sorted[1:]:
+            if abs(level - current[-1]) / current[-1] < tolerance:
+                current.append(level)
+            else:
+                clustered.append(np.mean(current))
+                current = [level]
+        clustered.append(np.mean(current))
+        return clustered
+
+    return cluster(supports)[-3:], cluster(resistances)[-3:]
+
+
+def _reference_nearest(prices, lookback=50):
+    """Algoritmo anterior do AdaptiveRiskManager (pivôs de 3 preços)"""
+    prices = list(prices)[-min(lookback, len(prices)):]
+    current = prices[-1]
+    lows = [prices[i] for i in range(2, len(prices) - 2)
+            if prices[i] < prices[i-1] and prices[i] < prices[i+1]]
+    highs = [prices[i] for i in range(2, len(prices) - 2)
+             if prices[i] > prices[i-1] and prices[i] > prices[i+1]]
+    below = [p for p in lows if p < current]
+    above = [p for p in highs if p > current]
+    return (max(below) if below else current - 15.0,
+            min(above) if above else current + 15.0)
+
+
+def test_streaming_levels_match_window_recompute():
+    """Níveis incrementais = recálculo sobre cada janela de 50 preços"""
+    prices = _walk()
+    detector = RegimeDetector(lookback_periods=50)
+    strategy = SupportResistanceStrategy()
+    for price in prices:
+        detector.update(price, volume=1)
+        window = np.array(detector.price_buffer)
+        expected = _reference_levels(window)
+        for got in (detector.levels.levels(), strategy.find_support_resistance(window)):
+            assert len(got[0]) == len(expected[0]) and len(got[1]) == len(expected[1])
+            assert np.allclose(got[0], expected[0]) and np.allclose(got[1], expected[1])
+
+
+def test_risk_manager_support_resistance_matches_previous():
+    """AdaptiveRiskManager: mesmo suporte/resistência dos pivôs de 3 preços"""
+    risk = AdaptiveRiskManager()
+    assert risk.find_support_resistance() == (5380.0, 5420.0)
+    for price in _walk(400, seed=7):
+        risk.update_buffers(price)
+        if len(risk.price_buffer) >= 10:
+            assert risk.find_support_resistance() == _reference_nearest(risk.price_buffer)
+            assert risk.find_support_resistance(30) == _reference_nearest(risk.price_buffer, 30)
+
+
+def test_levels_cached_and_shared_by_targets():
+    """Cache por versão; SmartTargets usa os mesmos níveis"""
+    detector = LevelDetector(window=50)
+    detector.extend(_walk(200, seed=3))
+    first = detector.levels()
+    cached = detector._level_cache
+    assert detector.levels() == first and detector._level_cache is cached
+    detector.push(5400.0)
+    detector.levels()
+    assert detector._level_cache is not cached
+
+    assert nearest_levels(5400, [5390, 5395, 5401], [5399, 5405, 5410]) == (5395, 5405)
+    assert nearest_levels(5400, [], [5390]) == (None, None)
+
+    targets = SmartTargetsCalculator()
+    assert targets.calculate_support_resistance_targets(5400, 1, [5390, 5395], [5405, 5410]) == (5393.0, 5403.0)
+    assert targets.calculate_support_resistance_targets(5400, -1, [5390, 5395], [5405, 5410]) == (5407.0, 5397.0)
+    assert targets.calculate_support_resistance_targets(5400, 1, [], []) == (5390.0, 5415.0)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: LevelDetector (suporte/resistência)")
+    print("=" * 60)
+    test_streaming_levels_match_window_recompute()
+    print("[OK] Níveis incrementais")
+    test_risk_manager_support_resistance_matches_previous()
+    print("[OK] AdaptiveRiskManager")
+    test_levels_cached_and_shared_by_targets()
+    print("[OK] Cache e SmartTargets")
@@ -0,0 +1,110 @@
+"""
+Teste do TickDataRecorder (gravação em lote + leitura binária)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import tempfile
+import numpy as np
+
+from market_data.tick_recorder import (
+    TickDataRecorder, read_records, records_to_dataframe, load_recorded, list_sessions
+)
+
+
+def test_recorder_roundtrip():
+    """Trades e book enfileirados devem ser lidos de volta na mesma ordem"""
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = TickDataRecorder(tmp, flush_interval=0.05, batch_size=16)
+        files = recorder.start()
+        for i in range(100):
+            recorder.record_trade('WDOU25', 5450.0 + i * 0.5, i + 1, 'BUY' if i % 2 else 'SELL',
+                                  timestamp=1_700_000_000 + i)
+        recorder.record_book('WDOU25', 5450.0, 120, 5450.5, 80, timestamp=1_700_000_000)
+        recorder.stop()
+
+        ticks = read_records(files['tick'])
+        assert len(ticks) == 100
+        assert np.allclose(ticks['price'], 5450.0 + np.arange(100) * 0.5)
+        assert list(ticks['aggressor'][:2]) == [-1, 1]
+
+        book = records_to_dataframe(read_records(files['book']))
+        assert book['spread'].iloc[0] == 0.5
+        assert np.isclose(book['imbalance'].iloc[0], 0.2)
+        assert book['symbol'].iloc[0] == 'WDOU25'
+
+        df = load_recorded(tmp, 'tick')
+        assert list(df['aggressor'][:2]) == ['SELL', 'BUY']
+        assert len(list_sessions(tmp, 'book')) == 1
+
+
+def test_recorder_drops_when_full():
+    """Fila cheia descarta em vez de bloquear o callback"""
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = TickDataRecorder(tmp, max_pending=10)
+        for i in range(15):
+            recorder.record_trade('WDOU25', 5450.0, 1, 'BUY')
+        assert recorder.get_stats()['dropped'] == 5
+        recorder.start()
+        recorder.stop()
+        assert len(read_records(recorder.files['tick'])) == 10
+
+
+class _FailingFile:
+    """Arquivo que falha nas primeiras `failures` gravações"""
+
+    def __init__(self, file, failures=1):
+        self._file = file
+        self.failures = failures
+
+    def write(self, data):
+        if self.failures:
+            self.failures -= 1
+            self._file.write(data[:len(data) // 2])
+            raise OSError("disco cheio")
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def test_recorder_keeps_rows_on_write_error():
+    """Erro de I/O não perde o lote: ele fica pendente e sai no próximo flush"""
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = TickDataRecorder(tmp, flush_interval=60)
+        files = recorder.start()
+        writer = recorder._writers['tick']
+        writer.file = _FailingFile(writer.file)
+
+        for i in range(10):
+            recorder.record_trade('WDOU25', 5450.0 + i, 1, 'BUY')
+        try:
+            recorder.flush()
+        except OSError:
+            pass
+        else:
+            raise AssertionError("flush deveria propagar o erro de I/O")
+        assert recorder.get_stats()['pending']['tick'] == 10
+        assert recorder.get_stats()['written'] == 0
+
+        recorder.record_trade('WDOU25', 5460.0, 1, 'SELL')
+        recorder.stop()
+
+        ticks = read_records(files['tick'])
+        assert len(ticks) == 11
+        assert np.allclose(ticks['price'], 5450.0 + np.arange(11))
+        assert recorder.get_stats()['written'] == 11
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: TickDataRecorder")
+    print("=" * 60)
+    test_recorder_roundtrip()
+    print("[OK] Gravação e leitura")
+    test_recorder_drops_when_full()
+    print("[OK] Descarte com fila cheia")
+    test_recorder_keeps_rows_on_write_error()
+    print("[OK] Lote preservado em erro de I/O")
@@ -0,0 +1,126 @@
+"""
+Teste do TickStore (partições diárias memory-mapped)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from market_data.tick_store import TickStore, convert_wdo_history, ingest_recorded_data
+
+
+def _write_wdo_csv(path: Path, rows: int = 3000) -> pd.DataFrame:
+    """CSV no formato do export histórico, cobrindo 3 dias"""
+    day = np.repeat([20250826, 20250827, 20250828], rows // 3)
+    seconds = np.tile(np.arange(rows // 3) * 10 + 9 * 3600, 3)
+    time = (seconds // 3600) * 10000 + (seconds // 60 % 60) * 100 + seconds % 60
+    df = pd.DataFrame({
+        '<ticker>': 'WDOFUT',
+        '<date>': day,
+        '<time>': time,
+        '<trade_number>': np.arange(rows),
+        '<price>': 5450.0 + np.arange(rows) * 0.5,
+        '<qty>': np.arange(rows) % 7 + 1,
+        '<vol>': 1000.0,
+        '<buy_agent>': np.where(np.arange(rows) % 2, 'XP', 'BTG Pactual'),
+        '<sell_agent>': 'Itau',
+        '<trade_type>': 'Buy',
+        '<aft>': 'N',
+    })
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_convert_and_range_read():
+    """Conversão do histórico e leitura por intervalo/amostragem"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = _write_wdo_csv(Path(tmp) / 'wdo.csv')
+        store = convert_wdo_history(Path(tmp) / 'wdo.csv', Path(tmp) / 'store', chunksize=700)
+
+        assert len(store) == len(source)
+        assert store.partitions == ['20250826', '20250827', '20250828']
+
+        # Reabrir a partir do manifest
+        store = TickStore(Path(tmp) / 'store')
+        day = store.to_dataframe('2025-08-27', '2025-08-28')
+        assert len(day) == 1000
+        assert day['timestamp'].iloc[0] == pd.Timestamp('2025-08-27 09:00:00')
+        assert np.allclose(day['price'], source['<price>'][1000:2000])
+        assert list(day['buy_agent'][:2]) == ['BTG Pactual', 'XP']
+
+        arrays = store.read(columns=['price'], step=7, limit=300)
+        assert np.allclose(arrays['price'], source['<price>'].to_numpy()[::7][:300])
+
+        # Segunda conversão do mesmo arquivo não faz nada
+        store = convert_wdo_history(Path(tmp) / 'wdo.csv', Path(tmp) / 'store')
+        assert len(store) == len(source)
+
+
+def test_ingest_is_incremental():
+    """Arquivos coletados são importados uma única vez"""
+    with tempfile.TemporaryDirectory() as tmp:
+        ts = pd.date_range('2025-08-28 09:00', periods=50, freq='s')
+        pd.DataFrame({'timestamp': ts, 'mid_price': 5450.0, 'spread': 0.5}).to_csv(
+            Path(tmp) / 'book_data_20250828_090000.csv', index=False)
+
+        stores = ingest_recorded_data(tmp)
+        assert len(stores['book']) == 50
+        stores = ingest_recorded_data(tmp)
+        assert len(stores['book']) == 50
+        assert stores['book'].to_dataframe(start='2025-08-28 09:00:30')['timestamp'].iloc[0] == ts[30]
+        assert stores['book'].sources() == ['book_data_20250828_090000.csv']
+        assert stores['book'].sources(start='2025-08-29') == []
+
+
+def test_failed_append_keeps_columns_aligned():
+    """Falha no meio de um append não deixa colunas com tamanhos diferentes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        ts = pd.date_range('2025-08-28 09:00', periods=10, freq='s')
+        store = TickStore(Path(tmp) / 'store')
+        store.append(pd.DataFrame({'timestamp': ts, 'price': 5450.0, 'qty': 1}))
+
+        # Falha de I/O depois de gravar a primeira coluna
+        bad = pd.DataFrame({'timestamp': ts + pd.Timedelta('10s'), 'price': 5451.0, 'qty': 2})
+        original = np.ascontiguousarray
+        calls = []
+
+        def failing(values):
+            calls.append(1)
+            if len(calls) == 2:
+                raise OSError("disco cheio")
+            return original(values)
+
+        np.ascontiguousarray = failing
+        try:
+            store.append(bad)
+        except OSError:
+            pass
+        finally:
+            np.ascontiguousarray = original
+
+        store.append(bad)
+        store = TickStore(Path(tmp) / 'store')
+        df = store.to_dataframe()
+        assert len(df) == 20
+        assert df['price'].tolist() == [5450.0] * 10 + [5451.0] * 10
+        assert df['qty'].tolist() == [1] * 10 + [2] * 10
+        for name in store.columns:
+            size = (Path(tmp) / 'store' / '20250828' / f'{name}.bin').stat().st_size
+            assert size == 20 * store._column_dtype(name).itemsize
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTE: TickStore")
+    print("=" * 60)
+    test_convert_and_range_read()
+    print("[OK] Conversão e leitura por intervalo")
+    test_ingest_is_incremental()
+    print("[OK] Importação incremental")
+    test_failed_append_keeps_columns_aligned()
+    print("[OK] Append interrompido não desalinha colunas")
@@ -0,0 +1,155 @@
+"""
+Teste do orquestrador de treinamento walk-forward
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from training.training_orchestrator import TrainingOrchestrator, walk_forward_folds
+
+
+def _dataset(n=3000, seed=3):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 6)), columns=[f'f{i}' for i in range(6)])
+    signal = X['f0'] + 0.5 * X['f1']
+    y = pd.Series(np.where(signal > 0.5, 1, np.where(signal < -0.5, -1, 0)), dtype='int8')
+    return X, y
+
+
+def test_walk_forward_folds_are_ordered_with_gap():
+    """Teste sempre depois do treino, separado pelo gap"""
+    folds = walk_forward_folds(1000, n_folds=4, gap=10)
+    assert len(folds) == 4
+    for train_start, train_end, test_start, test_end in folds:
+        assert train_start == 0 and train_end + 10 == test_start and test_end - test_start == 200
+    assert folds[-1][3] == 1000
+
+    sliding = walk_forward_folds(1000, n_folds=2, test_size=100, min_train=300, expanding=False)
+    assert [f[1] - f[0] for f in sliding] == [300, 300]
+
+
+def test_parallel_folds_refit_and_cache(tmp_path):
+    """Folds e refit em processos; dataset igual reaproveita o cache"""
+    X, y = _dataset()
+    orchestrator = TrainingOrchestrator(max_workers=2, threads_per_job=1,
+                                        cache_dir=str(tmp_path / 'cache'))
+    key = orchestrator.add_dataset('ctx', X, y, gap=5)
+    orchestrator.add_model('rf', 'ctx', 'sklearn.ensemble.RandomForestClassifier',
+                           {'n_estimators': 20, 'max_depth': 6, 'random_state': 1, 'n_jobs': -1},
+                           scaler='robust', sample_weight='balanced')
+    orchestrator.add_model('lr', 'ctx', 'sklearn.linear_model.LogisticRegression',
+                           {'max_iter': 200}, encode_labels=True)
+    report = orchestrator.run(n_folds=3)
+
+    rf = report['models']['rf']
+    assert len(rf['folds']) == 3 and rf['mean_accuracy'] > 0.8
+    assert rf['model'].n_jobs == 1 and rf['columns'] == list(X.columns)
+    assert rf['train_size'] == len(X)
+
+    lr = report['models']['lr']
+    assert lr['label_map'] == {-1: 0, 0: 1, 1: 2}
+    assert set(lr['model'].predict(lr['scaler'].transform(X.values[:50]))) <= {0, 1, 2}
+    assert lr['mean_accuracy'] > 0.8
+
+    profile = report['profile']
+    assert profile['fold:rf']['calls'] == 3 and profile['refit:lr']['calls'] == 1
+    assert profile['train:total']['wall_s'] > 0
+
+    # Mesmo conteúdo -> mesma chave, arquivo já existente
+    again = TrainingOrchestrator(max_workers=0, cache_dir=str(tmp_path / 'cache'))
+    assert again.add_dataset('ctx', X, y) == key and again.datasets['ctx']['cached']
+
+
+def test_serial_mode_matches_pool(tmp_path):
+    """max_workers=0 roda no processo atual com o mesmo resultado"""
+    X, y = _dataset(n=1500)
+    results = []
+    for workers in (0, 2):
+        orchestrator = TrainingOrchestrator(max_workers=workers, threads_per_job=1,
+                                            cache_dir=str(tmp_path))
+        orchestrator.add_dataset('d', X, y)
+        orchestrator.add_model('et', 'd', 'sklearn.ensemble.ExtraTreesClassifier',
+                               {'n_estimators': 10, 'random_state': 0})
+        report = orchestrator.run(n_folds=2, refit=False)
+        results.append([f['accuracy'] for f in report['models']['et']['folds']])
+    assert results[0] == results[1]
+
+
+def test_fold_missing_class_uses_contiguous_labels(tmp_path):
+    """Classe ausente no treino do fold: XGBoost recebe 0..k-1 e a predição volta aos rótulos"""
+    X, y = _dataset(n=1200, seed=5)
+    y = y.copy()
+    y[y == -1] = 0
+    y.iloc[-300:] = np.where(X['f0'].values[-300:] < -0.5, -1, y.iloc[-300:])   # classe só no fim
+
+    orchestrator = TrainingOrchestrator(max_workers=0, cache_dir=str(tmp_path))
+    orchestrator.add_dataset('d', X, y)
+    orchestrator.add_model('xgb', 'd', 'xgboost.XGBClassifier',
+                           {'n_estimators': 10, 'max_depth': 3}, encode_labels=True)
+    orchestrator.add_model('xgb_fixed', 'd', 'xgboost.XGBClassifier',
+                           {'n_estimators': 10, 'max_depth': 3}, encode_labels=True,
+                           label_map={-1: 0, 0: 1, 1: 2})
+    report = orchestrator.run(n_folds=3)
+
+    xgb = report['models']['xgb']
+    assert len(xgb['folds']) == 3
+    assert xgb['label_map'] == {-1: 0, 0: 1, 1: 2}
+    assert xgb['inverse_map'] == {0: -1, 1: 0, 2: 1}
+
+    # Mapa fixo: mesma codificação em todos os folds, inclusive sem a classe -1
+    fixed = report['models']['xgb_fixed']
+    assert len(fixed['folds']) == 3
+    assert fixed['model'].n_classes_ == 3
+    assert fixed['inverse_map'] == {0: -1, 1: 0, 2: 1}
+
+
+def test_cache_pruned_by_size_and_age(tmp_path):
+    """Cache de treino não cresce sem limite: datasets antigos saem primeiro"""
+    orchestrator = TrainingOrchestrator(max_workers=0, cache_dir=str(tmp_path))
+    assert not orchestrator.track_allocations
+
+    keys = []
+    for seed in range(3):
+        X, y = _dataset(n=500, seed=seed)
+        keys.append(orchestrator.add_dataset(f'd{seed}', X, y))
+        past = time.time() - (3 - seed) * 86400
+        for path in tmp_path.glob(f"{keys[-1]}_*.npy"):
+            os.utime(path, (past, past))
+    pair_bytes = sum(p.stat().st_size for p in tmp_path.glob(f"{keys[0]}_*.npy"))
+
+    # Registrados no orquestrador não são removidos
+    assert orchestrator.prune_cache(max_bytes=0, max_age_days=0) == []
+
+    fresh = TrainingOrchestrator(max_workers=0, cache_dir=str(tmp_path))
+    assert fresh.prune_cache(max_age_days=2.5) == [keys[0]]
+    assert fresh.prune_cache(max_bytes=pair_bytes, max_age_days=None) == [keys[1]]
+    assert sorted(p.name for p in tmp_path.glob("*.npy")) == [f"{keys[2]}_X.npy", f"{keys[2]}_y.npy"]
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("=" * 60)
+    print("TESTE: TrainingOrchestrator")
+    print("=" * 60)
+    test_walk_forward_folds_are_ordered_with_gap()
+    print("[OK] Folds walk-forward")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_parallel_folds_refit_and_cache(Path(tmp))
+    print("[OK] Folds em paralelo, refit e cache")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_serial_mode_matches_pool(Path(tmp))
+    print("[OK] Modo em série")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_fold_missing_class_uses_contiguous_labels(Path(tmp))
+    print("[OK] Classe ausente no fold")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_pruned_by_size_and_age(Path(tmp))
+    print("[OK] Poda do cache")
@@ -23,6 +23,10 @@ from sklearn.metrics import accuracy_score, f1_score, classification_report
 import lightgbm as lgb
 import xgboost as xgb
 
+from src.market_data.tick_store import TickStore
+from src.training.training_orchestrator import TrainingOrchestrator, StageProfiler
+from src.features.feature_library import build_feature_matrix, get_feature_cache
+
 class HybridTradingPipeline:
     """
     Pipeline completo que integra:
@@ -38,10 +42,17 @@ class HybridTradingPipeline:
         
         # Paths
         self.tick_data_path = Path(r"C:\Users\marth\Downloads\WDO_FUT\WDOFUT_BMF_T.csv")
+        self.tick_store_dir = Path("data/tick_store/wdo")  # python -m src.market_data.tick_store <csv>
         self.book_data_dir = Path("data/book_tick_data")
         self.models_dir = Path("models/hybrid")
         self.models_dir.mkdir(parents=True, exist_ok=True)
         
+        # Walk-forward em paralelo (ver TrainingOrchestrator)
+        self.n_folds = 4
+        self.max_workers = None
+        self.threads_per_job = 2
+        self.profiler = StageProfiler()
+        
     def load_book_data(self) -> pd.DataFrame:
         """Carrega e processa dados de book"""
         print("\n" + "=" * 80)
@@ -86,26 +97,44 @@ class HybridTradingPipeline:
         print(f"[OK] {len(df_book):,} registros de book carregados")
         return df_book
     
-    def load_tick_data(self, sample_size: int = 1_000_000) -> pd.DataFrame:
-        """Carrega dados de tick históricos"""
+    def load_tick_data(self, sample_size: int = 1_000_000,
+                       start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Carrega dados de tick históricos
+        
+        Usa o TickStore convertido (memory-map por intervalo de datas) quando
+        disponível; caso contrário lê o CSV original.
+        
+        Args:
+            sample_size: Máximo de registros
+            start_date: Data inicial (inclusiva) - apenas TickStore
+            end_date: Data final (exclusiva) - apenas TickStore
+        """
         print("\n" + "=" * 80)
         print(" CARREGANDO DADOS DE TICK")
         print("=" * 80)
         
-        # Carregar amostra com nomes corretos
-        df_tick = pd.read_csv(
-            self.tick_data_path,
-            names=['ticker', 'date', 'time', 'trade_number', 'price', 'qty', 
-                   'vol', 'buy_agent', 'sell_agent', 'trade_type', 'aft'],
-            skiprows=1,  # Pular header
-            nrows=sample_size
-        )
-        
-        # Criar timestamp combinando date e time
-        df_tick['timestamp'] = pd.to_datetime(
-            df_tick['date'].astype(str) + ' ' + df_tick['time'].astype(str).str.zfill(6),
-            format='%Y%m%d %H%M%S'
-        )
+        store = TickStore(self.tick_store_dir)
+        if store.exists():
+            # Store colunar: memory-map das primeiras partições, sem parsing
+            df_tick = store.to_dataframe(start_date, end_date, limit=sample_size)
+        else:
+            print(f"[AVISO] TickStore não encontrado em {self.tick_store_dir}; lendo CSV")
+            # Carregar amostra com nomes corretos
+            df_tick = pd.read_csv(
+                self.tick_data_path,
+                names=['ticker', 'date', 'time', 'trade_number', 'price', 'qty', 
+                       'vol', 'buy_agent', 'sell_agent', 'trade_type', 'aft'],
+                skiprows=1,  # Pular header
+                nrows=sample_size
+            )
+            
+            # Criar timestamp combinando date e time
+            df_tick['timestamp'] = pd.to_datetime(
+                df_tick['date'].astype(str) + ' ' + df_tick['time'].astype(str).str.zfill(6),
+                format='%Y%m%d %H%M%S'
+            )
         
         # Renomear colunas para compatibilidade
         df_tick['volume'] = df_tick['qty']
@@ -124,103 +153,21 @@ class HybridTradingPipeline:
         """
         Cria features de contexto de mercado
         Usadas para identificar regime, volatilidade e padrões macro
+        
+        Conjunto 'context' da FeatureLibrary (mesma definição usada na
+        produção e no replay); matrizes já calculadas vêm do cache.
         """
         print("\nCriando features de contexto...")
-        
-        features = pd.DataFrame(index=df.index)
-        
-        # 1. Regime de Mercado (Trending vs Ranging)
-        # SMA crossovers
-        features['sma_5'] = df['price'].rolling(5).mean()
-        features['sma_20'] = df['price'].rolling(20).mean()
-        features['sma_50'] = df['price'].rolling(50).mean()
-        features['sma_trend'] = (features['sma_5'] - features['sma_20']) / features['sma_20']
-        
-        # Momentum
-        features['momentum_10'] = df['price'].pct_change(10)
-        features['momentum_30'] = df['price'].pct_change(30)
-        features['momentum_60'] = df['price'].pct_change(60)
-        
-        # 2. Volatilidade
-        returns = df['price'].pct_change()
-        features['volatility_10'] = returns.rolling(10).std()
-        features['volatility_30'] = returns.rolling(30).std()
-        features['volatility_60'] = returns.rolling(60).std()
-        features['volatility_ratio'] = features['volatility_10'] / features['volatility_30']
-        
-        # ATR (Average True Range)
-        high = df['price'].rolling(20).max()
-        low = df['price'].rolling(20).min()
-        features['atr'] = (high - low) / df['price']
-        
-        # 3. Volume Profile
-        features['volume_ma_10'] = df['volume'].rolling(10).mean()
-        features['volume_ma_30'] = df['volume'].rolling(30).mean()
-        features['volume_ratio'] = df['volume'] / features['volume_ma_30']
-        features['volume_trend'] = features['volume_ma_10'] / features['volume_ma_30']
-        
-        # 4. Padrões Temporais
-        features['hour'] = df['timestamp'].dt.hour
-        features['minute'] = df['timestamp'].dt.minute
-        features['day_of_week'] = df['timestamp'].dt.dayofweek
-        
-        # Sessões de trading
-        features['session'] = pd.cut(
-            features['hour'],
-            bins=[0, 11, 14, 24],
-            labels=['morning', 'lunch', 'afternoon']
-        )
-        features['session'] = features['session'].cat.codes
-        
-        # 5. Microestrutura básica (do tick data)
-        features['aggressor_ratio'] = df['aggressor'].rolling(100).mean()
-        features['trade_intensity'] = df['volume'].rolling(100).sum()
-        
-        return features
+        return build_feature_matrix(df, 'context', get_feature_cache())
     
     def create_book_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Cria features específicas de book (microestrutura)
+        
+        Conjunto 'book' da FeatureLibrary.
         """
         print("\nCriando features de book...")
-        
-        features = pd.DataFrame(index=df.index)
-        
-        # 1. Spread metrics
-        features['spread'] = df['spread']
-        features['spread_ma'] = df['spread'].rolling(20).mean()
-        features['spread_std'] = df['spread'].rolling(20).std()
-        features['spread_normalized'] = (df['spread'] - features['spread_ma']) / features['spread_std']
-        
-        # 2. Book Imbalance
-        features['imbalance'] = df['imbalance']
-        features['imbalance_ma'] = df['imbalance'].rolling(20).mean()
-        features['imbalance_momentum'] = df['imbalance'].diff(5)
-        
-        # 3. Volume metrics
-        features['book_pressure'] = df['total_bid_vol'] / (df['total_bid_vol'] + df['total_ask_vol'])
-        features['volume_at_best'] = df['bid_vol_1'] + df['ask_vol_1']
-        features['volume_ratio'] = df['bid_vol_1'] / (df['ask_vol_1'] + 1)
-        
-        # 4. Price dynamics
-        features['mid_price'] = df['mid_price']
-        features['mid_return_1'] = df['mid_price'].pct_change(1)
-        features['mid_return_5'] = df['mid_price'].pct_change(5)
-        features['mid_return_10'] = df['mid_price'].pct_change(10)
-        
-        # 5. Order flow
-        features['bid_change'] = df['bid_vol_1'].diff()
-        features['ask_change'] = df['ask_vol_1'].diff()
-        features['net_order_flow'] = features['bid_change'] - features['ask_change']
-        
-        # 6. Microstructure patterns
-        features['bid_ask_ratio'] = df['bid_price_1'] / df['ask_price_1']
-        features['microprice'] = (
-            df['bid_price_1'] * df['ask_vol_1'] + 
-            df['ask_price_1'] * df['bid_vol_1']
-        ) / (df['bid_vol_1'] + df['ask_vol_1'] + 1)
-        
-        return features
+        return build_feature_matrix(df, 'book', get_feature_cache())
     
     def create_targets(self, df: pd.DataFrame, feature_col: str = 'mid_price') -> Dict[str, pd.Series]:
         """
@@ -258,191 +205,95 @@ class HybridTradingPipeline:
         
         return targets
     
-    def train_context_models(self, features: pd.DataFrame, targets: Dict[str, pd.Series]):
-        """
-        Treina modelos de contexto (Camada 1)
-        Estes modelos identificam o regime de mercado e condições macro
+    def train_layers_parallel(self, context_features: pd.DataFrame,
+                              tick_targets: Dict[str, pd.Series],
+                              book_features: Optional[pd.DataFrame] = None,
+                              book_targets: Optional[Dict[str, pd.Series]] = None) -> Dict:
         """
-        print("\n" + "=" * 80)
-        print(" TREINAMENTO - CAMADA 1: MODELOS DE CONTEXTO")
-        print("=" * 80)
-        
-        # Usar target de swing para contexto (horizonte maior)
-        target = targets['swing']
-        
-        # Remover NaN
-        mask = ~(features.isna().any(axis=1) | target.isna())
-        X = features[mask]
-        y = target[mask]
-        
-        # Split
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
-        
-        # Scaler
-        scaler = RobustScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        # Modelos
-        models = {}
-        
-        # 1. Regime Detector (Random Forest)
-        print("\n[1/3] Treinando Regime Detector...")
-        rf_model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42,
-            n_jobs=-1
-        )
-        rf_model.fit(X_train_scaled, y_train)
-        models['regime_detector'] = rf_model
+        Treina as camadas 1 e 2 juntas no pool do orquestrador
         
-        # Avaliar
-        y_pred = rf_model.predict(X_test_scaled)
-        acc = accuracy_score(y_test, y_pred)
-        print(f"  Acurácia: {acc*100:.2f}%")
+        Os 5 modelos das duas camadas são independentes: cada um é avaliado
+        em folds walk-forward (split temporal, sem vazamento do horizonte do
+        target) e treinado em todas as amostras ao final, tudo em paralelo.
+        Preenche self.models/self.scalers (modelos XGBoost como dict com
+        label_map/inverse_map).
         
-        # 2. Volatility Forecaster (LightGBM)
-        print("\n[2/3] Treinando Volatility Forecaster...")
-        lgb_model = lgb.LGBMClassifier(
-            n_estimators=100,
-            max_depth=7,
-            learning_rate=0.05,
-            random_state=42,
-            verbosity=-1
-        )
-        lgb_model.fit(X_train_scaled, y_train)
-        models['volatility_forecaster'] = lgb_model
-        
-        y_pred = lgb_model.predict(X_test_scaled)
-        acc = accuracy_score(y_test, y_pred)
-        print(f"  Acurácia: {acc*100:.2f}%")
-        
-        # 3. Session Classifier (XGBoost)
-        print("\n[3/3] Treinando Session Classifier...")
-        # Mapear labels para XGBoost
-        label_map = {-1: 0, 0: 1, 1: 2}
-        y_train_xgb = pd.Series(y_train).map(label_map)
-        y_test_xgb = pd.Series(y_test).map(label_map)
-        
-        xgb_model = xgb.XGBClassifier(
-            n_estimators=100,
-            max_depth=7,
-            learning_rate=0.05,
-            random_state=42,
-            verbosity=0
-        )
-        xgb_model.fit(X_train_scaled, y_train_xgb)
-        models['session_classifier'] = {
-            'model': xgb_model,
-            'label_map': label_map,
-            'inverse_map': {0: -1, 1: 0, 2: 1}
-        }
-        
-        y_pred = xgb_model.predict(X_test_scaled)
-        # Mapear de volta
-        y_pred = pd.Series(y_pred).map({0: -1, 1: 0, 2: 1})
-        acc = accuracy_score(y_test, y_pred)
-        print(f"  Acurácia: {acc*100:.2f}%")
-        
-        # Salvar
-        self.models['context'] = models
-        self.scalers['context'] = scaler
-        
-        # Feature importance
-        print("\n[FEATURE IMPORTANCE - TOP 10]")
-        importance = pd.Series(
-            rf_model.feature_importances_,
-            index=X.columns
-        ).sort_values(ascending=False)
-        
-        for i, (feat, imp) in enumerate(importance.head(10).items(), 1):
-            print(f"  {i:2d}. {feat}: {imp:.4f}")
-        
-        return models
-    
-    def train_microstructure_models(self, features: pd.DataFrame, targets: Dict[str, pd.Series]):
-        """
-        Treina modelos de microestrutura (Camada 2)
-        Estes modelos analisam book dynamics e order flow
+        Returns:
+            Relatório do orquestrador (métricas por fold e perfil)
         """
         print("\n" + "=" * 80)
-        print(" TREINAMENTO - CAMADA 2: MODELOS DE MICROESTRUTURA")
+        print(" TREINAMENTO PARALELO - CAMADAS 1 E 2 (WALK-FORWARD)")
         print("=" * 80)
         
-        # Usar target de scalping para microestrutura (horizonte curto)
-        target = targets['scalping']
-        
-        # Remover NaN
-        mask = ~(features.isna().any(axis=1) | target.isna())
-        X = features[mask]
-        y = target[mask]
-        
-        # Split
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-        
-        # Scaler
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        # Modelos
-        models = {}
-        
-        # 1. Order Flow Analyzer (LightGBM)
-        print("\n[1/2] Treinando Order Flow Analyzer...")
-        lgb_model = lgb.LGBMClassifier(
-            n_estimators=200,
-            max_depth=5,
-            learning_rate=0.03,
-            random_state=42,
-            verbosity=-1
-        )
-        lgb_model.fit(X_train_scaled, y_train)
-        models['order_flow_analyzer'] = lgb_model
-        
-        y_pred = lgb_model.predict(X_test_scaled)
-        acc = accuracy_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred, average='weighted')
-        print(f"  Acurácia: {acc*100:.2f}%")
-        print(f"  F1 Score: {f1:.3f}")
-        
-        # 2. Book Dynamics Model (Extra Trees)
-        print("\n[2/2] Treinando Book Dynamics Model...")
-        et_model = ExtraTreesClassifier(
-            n_estimators=200,
-            max_depth=8,
-            random_state=42,
-            n_jobs=-1
-        )
-        et_model.fit(X_train_scaled, y_train)
-        models['book_dynamics'] = et_model
-        
-        y_pred = et_model.predict(X_test_scaled)
-        acc = accuracy_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred, average='weighted')
-        print(f"  Acurácia: {acc*100:.2f}%")
-        print(f"  F1 Score: {f1:.3f}")
-        
-        # Salvar
-        self.models['microstructure'] = models
-        self.scalers['microstructure'] = scaler
+        # Orquestrador novo a cada execução (datasets/specs não se acumulam);
+        # o perfil vai para o profiler do pipeline
+        orchestrator = TrainingOrchestrator(max_workers=self.max_workers,
+                                            threads_per_job=self.threads_per_job)
+        orchestrator.profiler = self.profiler
+        
+        # Camada 1: contexto, target swing (200 ticks)
+        target = tick_targets['swing']
+        mask = ~(context_features.isna().any(axis=1) | target.isna())
+        orchestrator.add_dataset('context', context_features[mask], target[mask], gap=200)
+        orchestrator.add_model('regime_detector', 'context',
+                               'sklearn.ensemble.RandomForestClassifier',
+                               {'n_estimators': 100, 'max_depth': 10, 'random_state': 42},
+                               scaler='robust')
+        orchestrator.add_model('volatility_forecaster', 'context', 'lightgbm.LGBMClassifier',
+                               {'n_estimators': 100, 'max_depth': 7, 'learning_rate': 0.05,
+                                'random_state': 42, 'verbosity': -1},
+                               scaler='robust')
+        orchestrator.add_model('session_classifier', 'context', 'xgboost.XGBClassifier',
+                               {'n_estimators': 100, 'max_depth': 7, 'learning_rate': 0.05,
+                                'random_state': 42, 'verbosity': 0},
+                               scaler='robust', encode_labels=True,
+                               label_map={-1: 0, 0: 1, 1: 2})
+        layers = {'context': ['regime_detector', 'volatility_forecaster', 'session_classifier']}
+        
+        # Camada 2: microestrutura, target scalping (10 ticks)
+        if book_features is not None and book_targets is not None:
+            target = book_targets['scalping']
+            mask = ~(book_features.isna().any(axis=1) | target.isna())
+            orchestrator.add_dataset('microstructure', book_features[mask], target[mask], gap=10)
+            orchestrator.add_model('order_flow_analyzer', 'microstructure', 'lightgbm.LGBMClassifier',
+                                   {'n_estimators': 200, 'max_depth': 5, 'learning_rate': 0.03,
+                                    'random_state': 42, 'verbosity': -1})
+            orchestrator.add_model('book_dynamics', 'microstructure',
+                                   'sklearn.ensemble.ExtraTreesClassifier',
+                                   {'n_estimators': 200, 'max_depth': 8, 'random_state': 42})
+            layers['microstructure'] = ['order_flow_analyzer', 'book_dynamics']
+        
+        report = orchestrator.run(n_folds=self.n_folds)
+        
+        for layer, names in layers.items():
+            models = {}
+            for name in names:
+                result = report['models'][name]
+                if result['label_map']:
+                    models[name] = {
+                        'model': result['model'],
+                        'label_map': result['label_map'],
+                        'inverse_map': result['inverse_map']
+                    }
+                else:
+                    models[name] = result['model']
+                self.scalers[layer] = result['scaler']
+                print(f"  [{layer}] {name}: acurácia {result['mean_accuracy']*100:.2f}% | "
+                      f"F1 {result['mean_f1']:.3f} ({len(result['folds'])} folds)")
+            self.models[layer] = models
         
         # Feature importance
         print("\n[FEATURE IMPORTANCE - TOP 10]")
+        regime = report['models']['regime_detector']
         importance = pd.Series(
-            lgb_model.feature_importances_,
-            index=X.columns
+            regime['model'].feature_importances_,
+            index=regime['columns']
         ).sort_values(ascending=False)
         
         for i, (feat, imp) in enumerate(importance.head(10).items(), 1):
             print(f"  {i:2d}. {feat}: {imp:.4f}")
         
-        return models
+        return report
     
     def train_meta_learner(self, context_preds: np.ndarray, micro_preds: np.ndarray, 
                            target: pd.Series):
@@ -533,6 +384,14 @@ class HybridTradingPipeline:
             json.dump(config, f, indent=2)
         print(f"  Salvando: {config_path}")
         
+    def prune_feature_cache(self):
+        """Remove do cache de features as matrizes antigas (cada retreino gera novas)"""
+        cache = get_feature_cache()
+        if cache is not None:
+            removed = cache.prune()
+            if removed:
+                print(f"Cache de features: {len(removed)} matrizes antigas removidas")
+    
     def run_complete_pipeline(self):
         """Executa o pipeline completo de treinamento"""
         
@@ -544,39 +403,48 @@ class HybridTradingPipeline:
         print("  Camada 2: Modelos de Microestrutura (book data)")
         print("  Camada 3: Meta-Learner (decisão final)")
         
+        profiler = self.profiler
+        
         # 1. Carregar dados
-        df_tick = self.load_tick_data(sample_size=500_000)
-        df_book = self.load_book_data()
+        with profiler.stage('load'):
+            df_tick = self.load_tick_data(sample_size=500_000)
+            df_book = self.load_book_data()
         
         # Verificar se temos dados de book
         if len(df_book) == 0:
             print("\n[AVISO] Sem dados de book. Treinando apenas com tick data...")
             # Criar features apenas de tick
-            context_features = self.create_context_features(df_tick)
-            tick_targets = self.create_targets(df_tick, 'price')
+            with profiler.stage('features'):
+                context_features = self.create_context_features(df_tick)
+                tick_targets = self.create_targets(df_tick, 'price')
             
             # Treinar apenas modelos de contexto
-            context_models = self.train_context_models(context_features, tick_targets)
+            self.train_layers_parallel(context_features, tick_targets)
             
             # Salvar
-            self.save_models()
+            with profiler.stage('save'):
+                self.save_models()
+            self.prune_feature_cache()
             
+            print("\n[PERFIL DO TREINAMENTO]")
+            print(profiler.format())
             print("\n[AVISO] Pipeline parcial completado (apenas Camada 1)")
             return
         
         # 2. Criar features
-        context_features = self.create_context_features(df_tick)
-        book_features = self.create_book_features(df_book)
+        with profiler.stage('features'):
+            context_features = self.create_context_features(df_tick)
+            book_features = self.create_book_features(df_book)
         
         # 3. Criar targets
-        tick_targets = self.create_targets(df_tick, 'price')
-        book_targets = self.create_targets(df_book, 'mid_price')
-        
-        # 4. Treinar Camada 1 (Contexto)
-        context_models = self.train_context_models(context_features, tick_targets)
+        with profiler.stage('targets'):
+            tick_targets = self.create_targets(df_tick, 'price')
+            book_targets = self.create_targets(df_book, 'mid_price')
         
-        # 5. Treinar Camada 2 (Microestrutura)
-        micro_models = self.train_microstructure_models(book_features, book_targets)
+        # 4-5. Treinar Camadas 1 (Contexto) e 2 (Microestrutura) em paralelo
+        self.train_layers_parallel(context_features, tick_targets, book_features, book_targets)
+        context_models = self.models['context']
+        micro_models = self.models['microstructure']
         
         # 6. Criar predições para meta-learner (usando subset comum)
         # Aqui usaríamos dados sincronizados, mas para demo vamos simular
@@ -610,10 +478,16 @@ class HybridTradingPipeline:
         target_meta = book_targets['scalping'].dropna()[:n_samples]
         
         # 7. Treinar Meta-Learner
-        meta_model = self.train_meta_learner(context_pred, micro_pred, target_meta)
+        with profiler.stage('meta_learner'):
+            meta_model = self.train_meta_learner(context_pred, micro_pred, target_meta)
         
         # 8. Salvar modelos
-        self.save_models()
+        with profiler.stage('save'):
+            self.save_models()
+        self.prune_feature_cache()
+        
+        print("\n[PERFIL DO TREINAMENTO]")
+        print(profiler.format())
         
         print("\n" + "=" * 80)
         print(" PIPELINE COMPLETO!")